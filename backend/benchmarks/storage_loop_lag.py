@@ -0,0 +1,115 @@
+"""
+Event loop lag while LocalFileStorage saves many large uploads at once
+
+Saves --uploads parallel uploads of --size-mb each and samples how late a
+10 ms timer fires on the event loop meanwhile, which is how long any other
+request would have been stalled. --blocking runs the same uploads through
+a storage that writes on the event loop, for comparison.
+
+Run from the backend directory:
+
+    python -m benchmarks.storage_loop_lag
+    python -m benchmarks.storage_loop_lag --blocking
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from src.uploads.services.local_storage import LocalFileStorage
+
+TICK = 0.010
+
+
+class BlockingFileStorage(LocalFileStorage):
+    """Writes 8 KiB chunks with blocking calls on the event loop"""
+
+    async def save_file(self, file: UploadFile, filename: str) -> str:
+        file_path = self.upload_dir / filename
+        with open(file_path, "wb") as f:
+            while content := await file.read(8192):
+                f.write(content)
+        await file.close()
+        return str(file_path)
+
+
+def make_uploads(count: int, size: int, directory: Path) -> List[UploadFile]:
+    """Create uploads backed by files on disk, as Starlette spools large bodies."""
+    block = os.urandom(1024 * 1024)
+    uploads = []
+    for i in range(count):
+        path = directory / f"upload_{i}.jpg"
+        with open(path, "wb") as f:
+            for _ in range(size // len(block)):
+                f.write(block)
+        uploads.append(
+            UploadFile(
+                filename=f"upload_{i}.jpg",
+                file=open(path, "rb"),
+                headers=Headers({"content-type": "image/jpeg"}),
+            )
+        )
+    return uploads
+
+
+async def measure_lag(stop: asyncio.Event) -> List[float]:
+    """Sample how late a TICK timer fires until stop is set."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+    return lags
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as target:
+        uploads = make_uploads(args.uploads, args.size_mb * 1024 * 1024, Path(source))
+        storage_class = BlockingFileStorage if args.blocking else LocalFileStorage
+        storage = storage_class(
+            upload_dir=target, buffer_size=args.buffer_size, fsync=args.fsync
+        )
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(measure_lag(stop))
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                storage.save_file(upload, f"stored_{i}.jpg")
+                for i, upload in enumerate(uploads)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        lags = sorted(await monitor)
+
+    total_mb = args.uploads * args.size_mb
+    print(f"storage:     {storage_class.__name__} (fsync={args.fsync})")
+    print(f"uploads:     {args.uploads} x {args.size_mb} MB in {elapsed:.2f} s")
+    print(f"throughput:  {total_mb / elapsed:.0f} MB/s")
+    if lags:
+        print(f"loop lag:    median {statistics.median(lags) * 1000:.1f} ms")
+        print(f"             p99 {lags[int(len(lags) * 0.99)] * 1000:.1f} ms")
+        print(f"             max {lags[-1] * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--buffer-size", type=int, default=1024 * 1024)
+    parser.add_argument("--fsync", choices=["none", "file", "full"], default="file")
+    parser.add_argument("--blocking", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
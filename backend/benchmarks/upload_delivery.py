@@ -0,0 +1,87 @@
+"""
+Application time spent per photo view under each upload delivery mode
+
+Sends --requests GET requests for a --size-mb photo straight to the
+/uploads ASGI app, without a server, and reports the time from the request
+until the app has sent its whole response. In "direct" mode that includes
+reading and sending the file; with X-Accel-Redirect it only covers
+checking the signed URL and naming the file for the reverse proxy.
+
+Run from the backend directory:
+
+    python -m benchmarks.upload_delivery
+    python -m benchmarks.upload_delivery --delivery x-accel-redirect
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from src.uploads.signing import UrlSigner
+from src.uploads.static import UploadFiles
+
+
+async def request(app: UploadFiles, url: str) -> int:
+    """Send a GET request to the app and return the number of body bytes."""
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": parts.path.removeprefix("/uploads"),
+        "root_path": "",
+        "query_string": parts.query.encode(),
+        "headers": [],
+    }
+    received = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal received
+        received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "photo.jpg"), "wb") as f:
+            f.write(os.urandom(args.size_mb * 1024 * 1024))
+
+        signer = UrlSigner("benchmark", 3600)
+        app = UploadFiles(directory=directory, delivery=args.delivery, signer=signer)
+        url = signer.sign("photo.jpg")
+
+        times = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            sent = await request(app, url)
+            times.append(time.perf_counter() - start)
+
+    times.sort()
+    print(f"delivery:    {args.delivery}")
+    print(f"body sent:   {sent} bytes per request")
+    print(f"app time:    median {statistics.median(times) * 1e6:.0f} us")
+    print(f"             p99 {times[int(len(times) * 0.99)] * 1e6:.0f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument(
+        "--delivery",
+        choices=["direct", "x-accel-redirect", "x-sendfile"],
+        default="direct",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,53 @@
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from sqlmodel import Session
 
 from src.api import register_routes
-from src.database.core import create_db_and_tables
+from src.database.core import async_engine, create_db_and_tables, engine
+from src.jobs.settings import jobs_settings
+from src.jobs.worker import JobWorker
+from src.peaks.cache import peaks_cache
+from src.photos.jobs import photo_job_handlers
+from src.photos.service import purge_deleted_photo_files
+from src.uploads.resumable import collect_expired_uploads
+from src.uploads.service import UploadsService
+from src.uploads.services.factory import get_storage
+from src.uploads.static import UploadFiles
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Creating database tables...")
+    print("Running database migrations...")
     create_db_and_tables()
-    print("Database tables created successfully")
+    print("Database is up to date")
+    with Session(engine) as db:
+        catalogue = peaks_cache.load(db)
+    print(f"Loaded {len(catalogue.peaks)} peaks into cache")
+
+    storage = get_storage()
+    uploads_service = UploadsService(storage)
+    worker = JobWorker(async_engine, photo_job_handlers(uploads_service))
+    if jobs_settings.enabled:
+        worker.start()
+        print("Started background job worker")
+
+    collectors = [
+        asyncio.create_task(collect_expired_uploads(async_engine, uploads_service)),
+        asyncio.create_task(purge_deleted_photo_files(async_engine, storage)),
+    ]
+
     yield
-    pass
+
+    for collector in collectors:
+        collector.cancel()
+    await asyncio.gather(*collectors, return_exceptions=True)
+    await worker.stop()
+    await storage.close()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -34,7 +66,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", UploadFiles(directory="uploads"), name="uploads")
 
 register_routes(app)
 
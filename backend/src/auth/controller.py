@@ -76,7 +76,7 @@ async def login_with_session(
         HTTPException: If credentials are invalid
     """
     try:
-        session_id = auth_service.login_user(email, password)
+        session_id = await auth_service.login_user(email, password)
 
     except ValueError:
         raise HTTPException(
@@ -114,7 +114,7 @@ async def logout_session(
         Success message
     """
     if session_id:
-        auth_service.logout_user(session_id=session_id)
+        await auth_service.logout_user(session_id=session_id)
 
     response.delete_cookie(key="session_id")
     return {"message": "Logout successful"}
@@ -7,18 +7,18 @@ from fastapi import Cookie, Depends, HTTPException, status
 
 from src.auth.password_service import PasswordService
 from src.auth.service import AuthService
-from src.database.core import db_dep
+from src.database.core import async_db_dep
 from src.sessions.repository import SessionsRepository
 from src.users.models import User
 from src.users.repository import UsersRepository
 
 
-def get_users_repository(db: db_dep) -> UsersRepository:
+def get_users_repository(db: async_db_dep) -> UsersRepository:
     """Provides a UsersRepository."""
     return UsersRepository(db)
 
 
-def get_sessions_repository(db: db_dep) -> SessionsRepository:
+def get_sessions_repository(db: async_db_dep) -> SessionsRepository:
     """Provides a SessionsRepository."""
     return SessionsRepository(db)
 
@@ -54,7 +54,7 @@ async def get_current_user(
         )
 
     try:
-        return auth_service.get_current_user(session_id)
+        return await auth_service.get_current_user(session_id)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
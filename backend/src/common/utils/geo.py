@@ -3,6 +3,10 @@ Utility functions for geographical calculations
 """
 
 import math
+from typing import Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike
 
 RADIUS_EARTH_M = 6371000.0
 
@@ -21,15 +25,95 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     Returns:
         Distance in meters
     """
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    return float(haversine_distances(lat1, lon1, lat2, lon2))
+
+
+def haversine_distances(
+    lat: float, lon: float, lats: ArrayLike, lons: ArrayLike
+) -> np.ndarray:
+    """
+    Calculate the great circle distances from one point to many points
+    (specified in decimal degrees)
+
+    Args:
+        lat: Latitude of the query point
+        lon: Longitude of the query point
+        lats: Latitudes of the target points
+        lons: Longitudes of the target points
+
+    Returns:
+        Array of distances in meters, shaped like ``lats``
+    """
+    lat = np.radians(lat)
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.asarray(lons, dtype=np.float64)
 
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
     a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin(np.radians(lons - lon) / 2) ** 2
     )
-    c = 2 * math.asin(math.sqrt(a))
-    r = RADIUS_EARTH_M
 
-    return c * r
+    return 2 * RADIUS_EARTH_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_distance_matrix(
+    lats1: ArrayLike, lons1: ArrayLike, lats2: ArrayLike, lons2: ArrayLike
+) -> np.ndarray:
+    """
+    Calculate the great circle distances between every pair of points
+    from two sets (specified in decimal degrees)
+
+    Args:
+        lats1: Latitudes of the first set of points (length m)
+        lons1: Longitudes of the first set of points (length m)
+        lats2: Latitudes of the second set of points (length n)
+        lons2: Longitudes of the second set of points (length n)
+
+    Returns:
+        Array of shape (m, n) with distances in meters
+    """
+    lats1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, np.newaxis]
+    lons1 = np.asarray(lons1, dtype=np.float64)[:, np.newaxis]
+    lats2 = np.radians(np.asarray(lats2, dtype=np.float64))[np.newaxis, :]
+    lons2 = np.asarray(lons2, dtype=np.float64)[np.newaxis, :]
+
+    a = (
+        np.sin((lats2 - lats1) / 2) ** 2
+        + np.cos(lats1) * np.cos(lats2) * np.sin(np.radians(lons2 - lons1) / 2) ** 2
+    )
+
+    return 2 * RADIUS_EARTH_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(
+    lat: float, lon: float, distance: float
+) -> Tuple[float, float, float, float]:
+    """
+    Calculate the latitude/longitude box enclosing every point within
+    a great circle distance of a point (specified in decimal degrees)
+
+    Args:
+        lat: Latitude of the point
+        lon: Longitude of the point
+        distance: Distance in meters
+
+    Returns:
+        Tuple (min_lat, max_lat, min_lon, max_lon). When the box crosses the
+        antimeridian, min_lon is greater than max_lon.
+    """
+    angular = distance / RADIUS_EARTH_M
+    min_lat = lat - math.degrees(angular)
+    max_lat = lat + math.degrees(angular)
+
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, max_lat, -180.0, 180.0
+
+    delta_lon = math.degrees(math.asin(ratio))
+    min_lon = (lon - delta_lon + 180) % 360 - 180
+    max_lon = (lon + delta_lon + 180) % 360 - 180
+
+    return min_lat, max_lat, min_lon, max_lon
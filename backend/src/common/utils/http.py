@@ -0,0 +1,76 @@
+"""
+Utility functions for HTTP content negotiation and conditional requests
+"""
+
+from typing import Iterable, Optional
+
+
+def etag_matches(if_none_match: Optional[str], etags: Iterable[str]) -> bool:
+    """
+    Check an If-None-Match header against the current entity tags,
+    using weak comparison as required for If-None-Match.
+
+    Args:
+        if_none_match: Value of the If-None-Match header (optional)
+        etags: Entity tags of the current representations
+
+    Returns:
+        True if the client's cached copy is still current
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    current = {etag.removeprefix("W/") for etag in etags}
+    return any(
+        tag.strip().removeprefix("W/") in current for tag in if_none_match.split(",")
+    )
+
+
+def select_encoding(
+    accept_encoding: Optional[str], available: Iterable[str]
+) -> Optional[str]:
+    """
+    Pick the content coding to send based on an Accept-Encoding header.
+
+    "identity" is weighed like the other codings: it is acceptable with
+    weight 1 unless the header lists it, or "*", with another weight. When
+    weights are equal the available codings are preferred over it.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding header (optional)
+        available: Codings the server can send, in order of preference,
+            not including "identity"
+
+    Returns:
+        The chosen coding, "identity" without the header, or None if no
+        coding is acceptable
+    """
+    if not accept_encoding:
+        return "identity"
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+
+    if weights.get("identity", weights.get("*", 1.0)) > best_quality:
+        return "identity"
+
+    return best
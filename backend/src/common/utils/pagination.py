@@ -0,0 +1,45 @@
+"""
+Utility functions for opaque pagination cursors
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor.
+
+    Args:
+        position: JSON-serializable position of the last item on a page
+
+    Returns:
+        The cursor string
+    """
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor created by encode_cursor. Raises ValueError if the
+    cursor is malformed.
+
+    Args:
+        cursor: The cursor string
+
+    Returns:
+        The keyset position
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor.")
+
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor.")
+
+    return position
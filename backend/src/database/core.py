@@ -1,15 +1,91 @@
-from typing import Annotated
+from pathlib import Path
+from typing import Annotated, Any, Dict
 
+from alembic import command
+from alembic.config import Config
 from fastapi import Depends
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import Engine
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-DATABASE_URL = "sqlite:///./polish_peaks.db"
+from src.database.settings import DatabaseSettings, database_settings
+from src.database.sqlite import DatabaseWriter, configure_sqlite
 
-engine = create_engine(DATABASE_URL, echo=True)
+
+def engine_options(url: URL, settings: DatabaseSettings) -> Dict[str, Any]:
+    """
+    Build create_engine keyword arguments for a URL from the settings.
+
+    Args:
+        url: Database URL the engine will connect to
+        settings: Database settings
+
+    Returns:
+        Keyword arguments for create_engine or create_async_engine
+    """
+    options: Dict[str, Any] = {
+        "echo": settings.echo,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_recycle=settings.pool_recycle,
+        pool_timeout=settings.pool_timeout,
+    )
+
+    if url.get_backend_name() == "postgresql" and settings.statement_timeout_ms:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.statement_timeout_ms}"
+        }
+
+    return options
+
+
+engine = create_engine(
+    database_settings.sync_url,
+    **engine_options(database_settings.sync_url, database_settings),
+)
+async_engine = create_async_engine(
+    database_settings.async_url,
+    **engine_options(database_settings.async_url, database_settings),
+)
+configure_sqlite(engine, database_settings)
+configure_sqlite(async_engine.sync_engine, database_settings)
+
+db_writer = DatabaseWriter(
+    enabled=database_settings.backend == "sqlite" and database_settings.serialize_writes
+)
+
+
+MIGRATIONS_CONFIG = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def run_migrations(bind: Engine, revision: str = "head") -> None:
+    """
+    Upgrade a database to a migration revision.
+
+    Args:
+        bind: Engine of the database to upgrade
+        revision: Target revision (default: the latest)
+    """
+    config = Config(str(MIGRATIONS_CONFIG))
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
 
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    """
+    Bring the application database up to the latest migration.
+    """
+    run_migrations(engine)
 
 
 def get_db():
@@ -17,4 +93,10 @@ def get_db():
         yield db
 
 
+async def get_async_db():
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        yield db
+
+
 db_dep = Annotated[Session, Depends(get_db)]
+async_db_dep = Annotated[AsyncSession, Depends(get_async_db)]
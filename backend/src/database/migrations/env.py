@@ -0,0 +1,57 @@
+"""
+Alembic environment for the Polish Peaks database
+
+Migrations run on the connection passed in by run_migrations(), or on the
+application engine when invoked from the alembic CLI.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlmodel import SQLModel
+
+import src.jobs.models  # noqa: F401
+import src.peaks.models  # noqa: F401
+import src.photos.models  # noqa: F401
+import src.sessions.models  # noqa: F401
+import src.uploads.models  # noqa: F401
+import src.users.models  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = SQLModel.metadata
+
+
+def run_migrations(connection) -> None:
+    """Run the migrations on a connection."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run the migrations against a live database."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+
+    from src.database.core import engine
+
+    with engine.connect() as connection:
+        run_migrations(connection)
+        connection.commit()
+
+
+if context.is_offline_mode():
+    raise RuntimeError("Offline migrations are not supported.")
+
+run_migrations_online()
@@ -0,0 +1,93 @@
+"""Initial schema
+
+Creates the tables previously created by SQLModel.metadata.create_all().
+Tables that already exist are left alone, so databases created before
+migrations were introduced can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-20 12:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "peak" not in existing:
+        op.create_table(
+            "peak",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("elevation", sa.Integer(), nullable=False),
+            sa.Column("latitude", sa.Float(), nullable=False),
+            sa.Column("longitude", sa.Float(), nullable=False),
+            sa.Column("range", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "user" not in existing:
+        op.create_table(
+            "user",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column(
+                "hashed_password", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+            ),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_user_email", "user", ["email"], unique=True)
+
+    if "session" not in existing:
+        op.create_table(
+            "session",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_session_user_id", "session", ["user_id"])
+
+    if "summitphoto" not in existing:
+        op.create_table(
+            "summitphoto",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("file_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("uploaded_at", sa.DateTime(), nullable=False),
+            sa.Column("captured_at", sa.DateTime(), nullable=True),
+            sa.Column("latitude", sa.Float(), nullable=True),
+            sa.Column("longitude", sa.Float(), nullable=True),
+            sa.Column("altitude", sa.Float(), nullable=True),
+            sa.Column("peak_id", sa.Integer(), nullable=True),
+            sa.Column("distance_to_peak", sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(["peak_id"], ["peak.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("summitphoto")
+    op.drop_index("ix_session_user_id", table_name="session")
+    op.drop_table("session")
+    op.drop_index("ix_user_email", table_name="user")
+    op.drop_table("user")
+    op.drop_table("peak")
@@ -0,0 +1,40 @@
+"""Photo query indexes
+
+Indexes for the photo list sorts (keyset pagination on the sort column
+and ID) and for looking up photos by peak.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-20 12:30:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_summitphoto_peak_id", "summitphoto", ["peak_id"])
+    op.create_index(
+        "ix_summitphoto_uploaded_at_id", "summitphoto", ["uploaded_at", "id"]
+    )
+    op.create_index(
+        "ix_summitphoto_captured_at_id", "summitphoto", ["captured_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_summitphoto_captured_at_id", table_name="summitphoto")
+    op.drop_index("ix_summitphoto_uploaded_at_id", table_name="summitphoto")
+    op.drop_index("ix_summitphoto_peak_id", table_name="summitphoto")
@@ -0,0 +1,68 @@
+"""Background jobs
+
+Adds the job queue table and the processing status of photos. Photos
+uploaded before background processing are marked ready. Like the initial
+schema, parts that already exist are left alone.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-24 10:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if "job" not in inspector.get_table_names():
+        op.create_table(
+            "job",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("kind", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("photo_id", sa.Integer(), nullable=True),
+            sa.Column("status", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("max_attempts", sa.Integer(), nullable=False),
+            sa.Column("run_after", sa.DateTime(), nullable=False),
+            sa.Column("locked_until", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_job_photo_id", "job", ["photo_id"])
+        op.create_index("ix_job_status_run_after", "job", ["status", "run_after"])
+
+    columns = {column["name"] for column in inspector.get_columns("summitphoto")}
+    if "processing_status" not in columns:
+        with op.batch_alter_table("summitphoto") as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "processing_status",
+                    sqlmodel.sql.sqltypes.AutoString(),
+                    server_default="ready",
+                    nullable=False,
+                )
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("summitphoto") as batch_op:
+        batch_op.drop_column("processing_status")
+    op.drop_index("ix_job_status_run_after", table_name="job")
+    op.drop_index("ix_job_photo_id", table_name="job")
+    op.drop_table("job")
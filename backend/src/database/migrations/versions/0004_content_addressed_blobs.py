@@ -0,0 +1,50 @@
+"""Content-addressed blobs
+
+Adds the reference counts of content-addressed upload files, and an
+index for finding the photos stored in a file.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-27 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if "blob" not in inspector.get_table_names():
+        op.create_table(
+            "blob",
+            sa.Column("file_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("digest", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("size", sa.Integer(), nullable=False),
+            sa.Column("ref_count", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("file_name"),
+        )
+        op.create_index("ix_blob_digest", "blob", ["digest"])
+
+    indexes = {index["name"] for index in inspector.get_indexes("summitphoto")}
+    if "ix_summitphoto_file_name" not in indexes:
+        op.create_index("ix_summitphoto_file_name", "summitphoto", ["file_name"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_summitphoto_file_name", table_name="summitphoto")
+    op.drop_index("ix_blob_digest", table_name="blob")
+    op.drop_table("blob")
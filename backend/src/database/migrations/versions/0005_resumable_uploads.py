@@ -0,0 +1,50 @@
+"""Resumable uploads
+
+Adds the uploads sent in chunks that are still in progress.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-29 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if "resumableupload" not in inspector.get_table_names():
+        op.create_table(
+            "resumableupload",
+            sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("filename", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column(
+                "content_type", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+            ),
+            sa.Column("length", sa.Integer(), nullable=False),
+            sa.Column("offset", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_resumableupload_expires_at", "resumableupload", ["expires_at"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_resumableupload_expires_at", table_name="resumableupload")
+    op.drop_table("resumableupload")
@@ -0,0 +1,44 @@
+"""Photo tombstones
+
+Adds the files of deleted photos that are yet to be removed from storage.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-11-03 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if "phototombstone" not in inspector.get_table_names():
+        op.create_table(
+            "phototombstone",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("file_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_phototombstone_created_at", "phototombstone", ["created_at"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_phototombstone_created_at", table_name="phototombstone")
+    op.drop_table("phototombstone")
@@ -0,0 +1,44 @@
+"""Resumable upload locks
+
+Adds the lock a request appending to a resumable upload holds, so
+concurrent appends to the same upload are refused.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-11-10 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {column["name"] for column in inspector.get_columns("resumableupload")}
+    if "lock_token" not in columns:
+        with op.batch_alter_table("resumableupload") as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "lock_token", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+                )
+            )
+            batch_op.add_column(sa.Column("locked_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("resumableupload") as batch_op:
+        batch_op.drop_column("locked_until")
+        batch_op.drop_column("lock_token")
@@ -0,0 +1,42 @@
+"""Resumable upload storage state
+
+Adds what the storage keeps about the data appended to a resumable upload
+so far, such as the ID and parts of an S3 multipart upload.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-11-12 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {column["name"] for column in inspector.get_columns("resumableupload")}
+    if "storage_state" not in columns:
+        with op.batch_alter_table("resumableupload") as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "storage_state", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+                )
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("resumableupload") as batch_op:
+        batch_op.drop_column("storage_state")
@@ -0,0 +1,57 @@
+"""PostGIS peak geography
+
+Adds the generated geography column of peaks and its GiST index, which
+nearest-peak queries use with DATABASE_POSTGIS=true. Only applies to
+PostgreSQL databases where the postgis extension is available.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-11-14 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_postgis() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+
+    available = bind.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'postgis'")
+    )
+    return available.first() is not None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_postgis():
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    op.execute(
+        "ALTER TABLE peak ADD COLUMN IF NOT EXISTS geog geography(Point, 4326) "
+        "GENERATED ALWAYS AS "
+        "(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_peak_geog ON peak USING gist (geog)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # The extension is left installed, as other schemas may use it
+    op.execute("DROP INDEX IF EXISTS ix_peak_geog")
+    op.execute("ALTER TABLE peak DROP COLUMN IF EXISTS geog")
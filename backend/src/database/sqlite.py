@@ -0,0 +1,104 @@
+"""
+SQLite connection tuning and write serialization
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+from sqlalchemy import Engine, event
+
+from src.database.settings import DatabaseSettings
+
+
+def sqlite_pragmas(settings: DatabaseSettings) -> List[str]:
+    """
+    Build the PRAGMA statements run on every new SQLite connection.
+
+    WAL lets readers proceed while a write is in progress, and
+    synchronous=NORMAL is durable in WAL mode except for the last
+    transactions before a power loss. busy_timeout makes a connection wait
+    for the write lock instead of failing with "database is locked".
+
+    Args:
+        settings: Database settings
+
+    Returns:
+        List of PRAGMA statements
+    """
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def configure_sqlite(engine: Engine, settings: DatabaseSettings) -> None:
+    """
+    Apply the SQLite pragmas to every connection the engine opens.
+
+    For an AsyncEngine pass its ``sync_engine``. Does nothing for other
+    backends or when SQLite tuning is disabled.
+
+    Args:
+        engine: Engine to configure
+        settings: Database settings
+    """
+    if engine.dialect.name != "sqlite" or not settings.sqlite_tuning:
+        return
+
+    pragmas = sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class DatabaseWriter:
+    """
+    Serializes write transactions made from this process.
+
+    SQLite allows a single writer at a time, so concurrent commits only
+    contend for the database lock. Repositories hold the writer around
+    their write transactions so writes queue in the event loop while reads
+    run freely. When disabled, e.g. on PostgreSQL, it does not lock.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize the DatabaseWriter.
+
+        Args:
+            enabled: Whether writes are serialized
+        """
+        self.enabled = enabled
+        self._locks: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    @asynccontextmanager
+    async def lock(self) -> AsyncIterator[None]:
+        """
+        Hold the write lock for the duration of the block.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        async with self._get_lock():
+            yield
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Get the lock for the running event loop."""
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
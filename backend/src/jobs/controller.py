@@ -0,0 +1,43 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from src.jobs.dependencies import jobs_repository_dep
+from src.jobs.models import JobRead
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/", response_model=List[JobRead], tags=["jobs"])
+async def get_photo_jobs(
+    jobs_repository: jobs_repository_dep,
+    photo_id: int = Query(..., description="ID of the photo"),
+):
+    """
+    Get the background jobs of a photo
+
+    Args:
+        photo_id: ID of the photo
+
+    Returns:
+        List[JobRead]: The photo's jobs, oldest first
+    """
+    return await jobs_repository.get_for_photo(photo_id)
+
+
+@router.get("/{job_id}", response_model=JobRead, tags=["jobs"])
+async def get_job(job_id: int, jobs_repository: jobs_repository_dep):
+    """
+    Get the status of a background job
+
+    Args:
+        job_id: ID of the job
+
+    Returns:
+        JobRead: The job, with its status, attempts and last error
+    """
+    job = await jobs_repository.get_by_id(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
@@ -0,0 +1,16 @@
+"""Dependency injection functions and annotations for the jobs module."""
+
+from typing import Annotated
+
+from fastapi import Depends
+
+from src.database.core import async_db_dep
+from src.jobs.repository import JobsRepository
+
+
+def get_jobs_repository(db: async_db_dep) -> JobsRepository:
+    """Provides a JobsRepository."""
+    return JobsRepository(db)
+
+
+jobs_repository_dep = Annotated[JobsRepository, Depends(get_jobs_repository)]
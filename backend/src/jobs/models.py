@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class Job(SQLModel, table=True):
+    """Database model for a queued background job"""
+
+    __table_args__ = (Index("ix_job_status_run_after", "status", "run_after"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    photo_id: Optional[int] = Field(default=None, index=True)
+    status: str = PENDING
+    attempts: int = 0
+    max_attempts: int
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+class JobRead(BaseModel):
+    """Response model for the status of a background job"""
+
+    id: int
+    kind: str
+    photo_id: Optional[int] = None
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.database.core import db_writer
+from src.jobs.models import FAILED, PENDING, RUNNING, SUCCEEDED, Job
+
+
+class JobsRepository:
+    """
+    Repository for the background job queue.
+
+    Jobs are claimed with a lease: a running job whose lease has expired,
+    because its worker stopped before finishing it, can be claimed again.
+    A claim is a single conditional UPDATE, so of several workers or
+    application processes racing for the same job only one gets it.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the JobsRepository.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    async def enqueue(
+        self, kind: str, max_attempts: int, photo_id: Optional[int] = None
+    ) -> Job:
+        """
+        Add a job to the queue, ready to run immediately.
+
+        Args:
+            kind: Kind of job, naming its handler
+            max_attempts: Number of times the job is tried before it fails
+            photo_id: ID of the photo the job processes (optional)
+
+        Returns:
+            The queued Job with database ID assigned
+        """
+        job = Job(kind=kind, photo_id=photo_id, max_attempts=max_attempts)
+
+        async with db_writer.lock():
+            self.db.add(job)
+            await self.db.commit()
+
+        await self.db.refresh(job)
+        return job
+
+    async def claim(self, lease: timedelta) -> Optional[Job]:
+        """
+        Claim the next job that is due, marking it as running.
+
+        Args:
+            lease: How long the job stays claimed before another worker may
+                take it over
+
+        Returns:
+            The claimed Job with its attempt counted, or None if no job is due
+        """
+        now = datetime.utcnow()
+        due = or_(
+            and_(Job.status == PENDING, Job.run_after <= now),
+            and_(Job.status == RUNNING, Job.locked_until < now),
+        )
+
+        async with db_writer.lock():
+            while True:
+                results = await self.db.exec(
+                    select(Job.id).where(due).order_by(Job.run_after, Job.id).limit(1)
+                )
+                job_id = results.first()
+                if job_id is None:
+                    await self.db.rollback()
+                    return None
+
+                # The job only goes to this worker if it is still due
+                result = await self.db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, due)
+                    .values(
+                        status=RUNNING,
+                        attempts=Job.attempts + 1,
+                        locked_until=now + lease,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await self.db.commit()
+                if result.rowcount == 1:
+                    break
+
+        return await self.db.get(Job, job_id, populate_existing=True)
+
+    async def renew(self, job: Job, lease: timedelta) -> bool:
+        """
+        Extend the lease of a claimed job that is still running.
+
+        Args:
+            job: The job as claimed
+            lease: How long from now the job stays claimed
+
+        Returns:
+            True if the lease was extended, False if the job is no longer
+            held by this claim, e.g. because its lease expired and another
+            worker took it over
+        """
+        async with db_writer.lock():
+            result = await self.db.execute(
+                update(Job)
+                .where(
+                    Job.id == job.id,
+                    Job.status == RUNNING,
+                    Job.attempts == job.attempts,
+                )
+                .values(locked_until=datetime.utcnow() + lease)
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+
+        return result.rowcount == 1
+
+    async def succeed(self, job: Job) -> bool:
+        """
+        Mark a claimed job as finished.
+
+        Args:
+            job: The job that succeeded, as claimed
+
+        Returns:
+            True if the job was marked, False if it is no longer held by this
+            claim, e.g. because its lease expired and another worker took it
+            over; the job is then left to that worker
+        """
+        return await self._finish(
+            job,
+            status=SUCCEEDED,
+            locked_until=None,
+            last_error=None,
+            finished_at=datetime.utcnow(),
+        )
+
+    async def fail(
+        self, job: Job, error: str, retry_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        Record a failed attempt of a claimed job.
+
+        Args:
+            job: The job that failed, as claimed
+            error: Description of the failure
+            retry_at: When to try the job again (optional, the job fails for
+                good if omitted)
+
+        Returns:
+            True if the attempt was recorded, False if the job is no longer
+            held by this claim; the job is then left to the worker holding it
+        """
+        values = {"locked_until": None, "last_error": error}
+        if retry_at is None:
+            values.update(status=FAILED, finished_at=datetime.utcnow())
+        else:
+            values.update(status=PENDING, run_after=retry_at)
+        return await self._finish(job, **values)
+
+    async def get_by_id(self, job_id: int) -> Optional[Job]:
+        """
+        Get a specific job by ID.
+
+        Args:
+            job_id: ID of the job to retrieve
+
+        Returns:
+            Job if found, None otherwise
+        """
+        return await self.db.get(Job, job_id)
+
+    async def get_for_photo(self, photo_id: int) -> List[Job]:
+        """
+        Get the jobs of a photo, oldest first.
+
+        Args:
+            photo_id: ID of the photo
+
+        Returns:
+            List of Job objects
+        """
+        results = await self.db.exec(
+            select(Job).where(Job.photo_id == photo_id).order_by(Job.id)
+        )
+        return results.all()
+
+    async def _finish(self, job: Job, **values: Any) -> bool:
+        """Update a claimed job in one statement if this claim still holds it."""
+        async with db_writer.lock():
+            result = await self.db.execute(
+                update(Job)
+                .where(
+                    Job.id == job.id,
+                    Job.status == RUNNING,
+                    Job.attempts == job.attempts,
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+
+        if result.rowcount != 1:
+            return False
+
+        await self.db.refresh(job)
+        return True
@@ -0,0 +1,38 @@
+"""
+Background job settings read from the environment
+"""
+
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class JobsSettings(BaseSettings):
+    """
+    Job worker configuration, read from ``JOBS_*`` environment variables
+    or a ``.env`` file.
+
+    ``processes`` sizes the process pool that runs CPU-bound steps (the
+    number of CPUs if unset), and ``concurrency`` is the number of jobs the
+    worker runs at once. A failed job is retried after ``backoff_seconds``,
+    doubling on each attempt up to ``max_backoff_seconds``. A running job
+    holds a lease of ``lease_seconds``, renewed while its handler runs; a
+    job whose worker stopped renewing it, e.g. because the server was
+    stopped, is picked up again once the lease expires.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="JOBS_", env_file=".env", extra="ignore"
+    )
+
+    enabled: bool = True
+    processes: Optional[int] = None
+    concurrency: int = 2
+    poll_interval: float = 0.5
+    max_attempts: int = 5
+    backoff_seconds: float = 2.0
+    max_backoff_seconds: float = 300.0
+    lease_seconds: float = 300.0
+
+
+jobs_settings = JobsSettings()
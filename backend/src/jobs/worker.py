@@ -0,0 +1,236 @@
+"""
+Worker running queued background jobs
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.jobs.models import Job
+from src.jobs.repository import JobsRepository
+from src.jobs.settings import JobsSettings, jobs_settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobHandler(ABC):
+    """
+    Runs the jobs of one kind.
+
+    Handlers run on the event loop and hand CPU-bound steps to the
+    worker's executor, so they never block request handling.
+    """
+
+    @abstractmethod
+    async def run(self, db: AsyncSession, job: Job, executor: Executor) -> None:
+        """
+        Run a job. Raise ValueError for failures that retrying cannot fix;
+        any other exception is retried.
+
+        Args:
+            db: Database session of the job
+            job: The job to run
+            executor: Process pool for CPU-bound steps
+        """
+        pass
+
+    async def failed(self, db: AsyncSession, job: Job) -> None:
+        """
+        Called once a job has failed for good.
+
+        Args:
+            db: Database session of the job
+            job: The job that failed
+        """
+        pass
+
+
+class JobWorker:
+    """
+    Runs queued jobs in the background of the application.
+
+    A few consumer tasks claim due jobs from the queue and run them with
+    their handlers, while CPU-bound steps run in a process pool started
+    with "spawn", which is safe alongside the event loop's threads. A
+    failed job is retried with exponential backoff until it runs out of
+    attempts. The lease of a running job is renewed while its handler
+    runs, and jobs interrupted by a shutdown are picked up again once
+    their lease expires.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        handlers: Dict[str, JobHandler],
+        settings: JobsSettings = jobs_settings,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Initialize the JobWorker.
+
+        Args:
+            engine: Engine of the database holding the queue
+            handlers: Handlers by job kind
+            settings: Job settings (default: from the environment)
+            executor: Executor for CPU-bound steps (optional, a process pool
+                is started on first use if omitted)
+        """
+        self.engine = engine
+        self.handlers = handlers
+        self.settings = settings
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def executor(self) -> Executor:
+        """Executor for CPU-bound steps, started on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.settings.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def backoff(self, attempts: int) -> timedelta:
+        """
+        Delay before retrying a job.
+
+        Args:
+            attempts: Number of attempts made so far
+
+        Returns:
+            backoff_seconds doubled for every attempt after the first,
+            capped at max_backoff_seconds
+        """
+        seconds = self.settings.backoff_seconds * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(seconds, self.settings.max_backoff_seconds))
+
+    def start(self) -> None:
+        """Start the consumer tasks on the running event loop."""
+        self._tasks = [
+            asyncio.create_task(self._consume())
+            for _ in range(self.settings.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the consumer tasks and shut down the process pool."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run_pending(self) -> int:
+        """
+        Run jobs until none is due.
+
+        Returns:
+            Number of jobs run
+        """
+        count = 0
+        while await self.run_next():
+            count += 1
+        return count
+
+    async def run_next(self) -> bool:
+        """
+        Claim and run the next due job.
+
+        Returns:
+            True if a job was run, False if none was due
+        """
+        async with AsyncSession(self.engine, expire_on_commit=False) as db:
+            repository = JobsRepository(db)
+            job = await repository.claim(timedelta(seconds=self.settings.lease_seconds))
+            if job is None:
+                return False
+
+            handler = self.handlers.get(job.kind)
+            attempts = job.attempts
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for jobs of kind '{job.kind}'.")
+                await self._run(handler, db, job)
+            except Exception as e:
+                await db.rollback()
+                await db.refresh(job)
+                if job.attempts != attempts:
+                    logger.warning("Job %s was taken over while it ran", job.id)
+                else:
+                    await self._fail(db, repository, handler, job, e)
+            else:
+                if not await repository.succeed(job):
+                    logger.warning("Job %s was taken over while it ran", job.id)
+
+        return True
+
+    async def _run(self, handler: JobHandler, db: AsyncSession, job: Job) -> None:
+        """Run a job, renewing its lease until the handler returns."""
+        renewal = asyncio.create_task(self._renew_lease(job))
+        try:
+            await handler.run(db, job, self.executor)
+        finally:
+            renewal.cancel()
+            await asyncio.gather(renewal, return_exceptions=True)
+
+    async def _renew_lease(self, job: Job) -> None:
+        """Extend the lease of a running job a few times per lease period."""
+        lease = timedelta(seconds=self.settings.lease_seconds)
+        while True:
+            await asyncio.sleep(self.settings.lease_seconds / 3)
+            try:
+                # The handler's session may be in use, so renew in another
+                async with AsyncSession(self.engine) as db:
+                    if not await JobsRepository(db).renew(job, lease):
+                        logger.warning("Lost the lease of job %s", job.id)
+                        return
+            except SQLAlchemyError:
+                logger.exception("Could not renew the lease of job %s", job.id)
+
+    async def _fail(
+        self,
+        db: AsyncSession,
+        repository: JobsRepository,
+        handler: Optional[JobHandler],
+        job: Job,
+        error: Exception,
+    ) -> None:
+        """Schedule a retry of a failed job, or fail it for good."""
+        if isinstance(error, BrokenExecutor) and self._owns_executor:
+            # A pool process died; start a new pool for the retry
+            self._executor = None
+
+        retry_at = None
+        if not isinstance(error, ValueError) and job.attempts < job.max_attempts:
+            retry_at = datetime.utcnow() + self.backoff(job.attempts)
+
+        message = str(error) or type(error).__name__
+        if not await repository.fail(job, message, retry_at):
+            logger.warning("Job %s was taken over while it ran", job.id)
+        elif retry_at is None and handler is not None:
+            await handler.failed(db, job)
+
+    async def _consume(self) -> None:
+        """Run due jobs, polling the queue while it is empty."""
+        while True:
+            try:
+                ran = await self.run_next()
+            except Exception:
+                # E.g. the database is unavailable; try again after the interval
+                logger.exception("Could not run the next job")
+                ran = False
+
+            if not ran:
+                await asyncio.sleep(self.settings.poll_interval)
@@ -0,0 +1,204 @@
+"""
+Process-level read-through cache of the peak catalogue
+"""
+
+import gzip
+import hashlib
+import threading
+import weakref
+from functools import cached_property
+from itertools import chain
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from src.peaks.index import PeakIndex
+from src.peaks.models import Peak
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+_peaks_adapter = TypeAdapter(List[Peak])
+
+
+class PeaksPayload:
+    """
+    Serialized JSON list of peaks with pre-compressed variants.
+
+    Each variant has its own strong entity tag derived from the content, so
+    tags are stable across processes serving the same catalogue. A brotli
+    variant is only available when the optional ``brotli`` package is
+    installed.
+    """
+
+    def __init__(self, peaks: List[Peak]):
+        """
+        Serialize and compress the peaks.
+
+        Args:
+            peaks: Peaks to serialize
+        """
+        body = _peaks_adapter.dump_json(peaks)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body)
+        self.bodies["gzip"] = gzip.compress(body, mtime=0)
+
+        self.etags: Dict[str, str] = {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+            for coding in self.bodies
+        }
+
+    @property
+    def encodings(self) -> List[str]:
+        """Available content codings other than identity, preferred first."""
+        return [coding for coding in self.bodies if coding != "identity"]
+
+
+class PeaksCatalogue:
+    """
+    Immutable snapshot of the peaks table.
+
+    Peaks are detached copies shared by every request, so they must be
+    treated as read-only. Coordinates are kept as columnar arrays in the
+    spatial index and rows are addressable by peak ID.
+    """
+
+    def __init__(self, peaks: List[Peak], version: int):
+        """
+        Build the catalogue.
+
+        Args:
+            peaks: Detached peaks, in table order
+            version: Cache version the snapshot was loaded at
+        """
+        self.peaks = peaks
+        self.version = version
+        self.rows: Dict[int, int] = {peak.id: row for row, peak in enumerate(peaks)}
+        self.index = PeakIndex(peaks)
+
+    def get(self, peak_id: int) -> Optional[Peak]:
+        """
+        Get a peak by ID.
+
+        Args:
+            peak_id: ID of the peak
+
+        Returns:
+            Peak if found, None otherwise
+        """
+        row = self.rows.get(peak_id)
+        return self.peaks[row] if row is not None else None
+
+    @cached_property
+    def payload(self) -> PeaksPayload:
+        """Serialized peak list, computed on first use."""
+        return PeaksPayload(self.peaks)
+
+
+class PeaksCache:
+    """
+    Read-through cache holding one PeaksCatalogue per database engine.
+
+    Any committed insert, update or delete of a Peak through an ORM session
+    bumps the cache version, and catalogues loaded at an older version are
+    reloaded on next access. Writes that bypass the ORM unit of work (bulk
+    UPDATE/DELETE statements, other processes) must call invalidate().
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty cache.
+        """
+        self._version = 0
+        self._catalogues: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Current cache version."""
+        return self._version
+
+    def get(self, db: Session) -> PeaksCatalogue:
+        """
+        Get the catalogue for the database behind a session, loading it on miss.
+
+        Args:
+            db: Database session
+
+        Returns:
+            PeaksCatalogue for the session's database
+        """
+        bind = db.get_bind()
+
+        with self._lock:
+            catalogue = self._catalogues.get(bind)
+            if catalogue is not None and catalogue.version == self._version:
+                return catalogue
+
+        with self._load_lock:
+            with self._lock:
+                catalogue = self._catalogues.get(bind)
+                if catalogue is not None and catalogue.version == self._version:
+                    return catalogue
+
+            return self.load(db)
+
+    def load(self, db: Session) -> PeaksCatalogue:
+        """
+        Load the catalogue from the database, replacing any cached one.
+
+        Args:
+            db: Database session
+
+        Returns:
+            The freshly loaded PeaksCatalogue
+        """
+        version = self._version
+        peaks = [Peak.model_validate(peak) for peak in db.exec(select(Peak)).all()]
+        catalogue = PeaksCatalogue(peaks, version)
+
+        with self._lock:
+            self._catalogues[db.get_bind()] = catalogue
+
+        return catalogue
+
+    def invalidate(self) -> None:
+        """
+        Mark every cached catalogue as outdated.
+        """
+        with self._lock:
+            self._version += 1
+
+
+peaks_cache = PeaksCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_peak_changes(session, flush_context):
+    """Mark the session when a flush inserts, updates or deletes peaks."""
+    if any(
+        isinstance(obj, Peak)
+        for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        session.info["peaks_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    """Invalidate the peaks cache once peak changes are committed."""
+    if session.info.pop("peaks_changed", False):
+        peaks_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_peak_changes(session):
+    """Forget uncommitted peak changes."""
+    session.info.pop("peaks_changed", None)
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
 
+from src.common.utils.http import etag_matches, select_encoding
 from src.peaks.dependencies import peaks_service_dep
-from src.peaks.models import Peak, PeakWithDistance
+from src.peaks.models import (
+    MAX_PEAKS_LIMIT,
+    Peak,
+    PeaksBatchFind,
+    PeakWithDistance,
+)
 
 router = APIRouter(
     prefix="/api/peaks",
@@ -10,11 +16,44 @@ router = APIRouter(
 
 
 @router.get("/", response_model=list[Peak], tags=["peaks"])
-def get_peaks(service: peaks_service_dep):
+def get_peaks(
+    service: peaks_service_dep,
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+):
     """
     Retrieve all peaks.
+
+    The body is serialized once per catalogue version and served as raw
+    bytes, compressed when the client accepts it. Clients revalidating with
+    If-None-Match get 304 Not Modified while the catalogue is unchanged,
+    and clients accepting none of the codings 406 Not Acceptable.
     """
-    return service.get_all()
+    payload = service.get_all_payload()
+    encoding = select_encoding(accept_encoding, payload.encodings)
+    if encoding is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="None of the accepted content codings is available",
+        )
+
+    headers = {
+        "ETag": payload.etags[encoding],
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(if_none_match, payload.etags.values()):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=payload.bodies[encoding],
+        media_type="application/json",
+        headers=headers,
+    )
 
 
 @router.get("/find", response_model=list[PeakWithDistance], tags=["peaks"])
@@ -23,7 +62,7 @@ def find_nearest_peaks(
     latitude: float,
     longitude: float,
     max_distance: float | None = None,
-    limit: int = 5,
+    limit: int = Query(5, ge=1, le=MAX_PEAKS_LIMIT),
 ):
     """
     Find the nearest peaks to a given latitude and longitude.
@@ -32,7 +71,7 @@ def find_nearest_peaks(
         latitude: Latitude coordinate
         longitude: Longitude coordinate
         max_distance: Maximum distance in meters (optional)
-        limit: Maximum number of peaks to return (default: 5)
+        limit: Maximum number of peaks to return, 1 to 100 (default: 5)
 
     Returns:
         List of nearest peaks with distances in meters
@@ -42,6 +81,29 @@ def find_nearest_peaks(
     )
 
 
+@router.post("/find/batch", response_model=list[list[PeakWithDistance]], tags=["peaks"])
+def find_nearest_peaks_batch(
+    service: peaks_service_dep,
+    batch_find: PeaksBatchFind,
+):
+    """
+    Find the nearest peaks to many points in one request.
+
+    Args:
+        batch_find: Points to match (at most 1000), with optional max_distance
+            in meters and limit per point, 1 to 100 (default: 5)
+
+    Returns:
+        One list of nearest peaks with distances in meters per point, in the
+        order the points were given
+    """
+    return service.find_nearest_peaks_batch(
+        points=batch_find.points,
+        max_distance=batch_find.max_distance,
+        limit=batch_find.limit,
+    )
+
+
 @router.get("/{peak_id}", response_model=Peak, tags=["peaks"])
 def get_peak(peak_id: int, service: peaks_service_dep):
     """
@@ -5,12 +5,18 @@ from typing import Annotated
 from fastapi import Depends
 
 from src.database.core import db_dep
+from src.database.settings import database_settings
 from src.peaks.repository import PeaksRepository
 from src.peaks.service import PeaksService
 
 
 def get_repository(db: db_dep) -> PeaksRepository:
-    """Provides a PeaksRepository."""
+    """Provides a PeaksRepository, backed by PostGIS when it is enabled."""
+    if database_settings.postgis:
+        from src.peaks.postgis import PostgisPeaksRepository
+
+        return PostgisPeaksRepository(db)
+
     return PeaksRepository(db)
 
 
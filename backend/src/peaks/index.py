@@ -0,0 +1,354 @@
+"""
+Spatial index for nearest-peak and radius queries
+"""
+
+import math
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.common.utils.geo import (
+    RADIUS_EARTH_M,
+    bounding_box,
+    haversine_distance_matrix,
+    haversine_distances,
+)
+from src.peaks.models import Peak
+
+MATRIX_CHUNK_SIZE = 4_000_000
+
+
+class PeakIndex:
+    """
+    Grid-based spatial index over peaks.
+
+    Peaks are bucketed into cells of a fixed latitude/longitude grid. Queries
+    visit cells in square rings around the query cell and stop as soon as no
+    unvisited cell can contain a closer peak. Candidates are prefiltered by the
+    bounding box of the search radius, then ranked by exact haversine distance
+    computed per ring over columnar coordinate arrays, so results match a
+    full scan. Only the best ``limit`` candidates are ever kept, so selection
+    cost scales with ``limit`` rather than with the number of peaks.
+    """
+
+    def __init__(self, peaks: Sequence[Peak], cell_size: float = 0.25):
+        """
+        Build the index.
+
+        Args:
+            peaks: Peaks to index
+            cell_size: Size of a grid cell in degrees (default: 0.25)
+        """
+        self.peaks = list(peaks)
+        self.cell_size = cell_size
+        self.latitudes = np.array([p.latitude for p in self.peaks], dtype=np.float64)
+        self.longitudes = np.array([p.longitude for p in self.peaks], dtype=np.float64)
+
+        self._n_rows = math.ceil(180 / cell_size)
+        self._n_cols = math.ceil(360 / cell_size)
+        self._rows: Dict[int, Dict[int, List[int]]] = {}
+
+        for i, peak in enumerate(self.peaks):
+            row, col = self._cell(peak.latitude, peak.longitude)
+            self._rows.setdefault(row, {}).setdefault(col, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.peaks)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int,
+        max_distance: Optional[float] = None,
+    ) -> List[Tuple[Peak, float]]:
+        """
+        Find the peaks nearest to a point.
+
+        Args:
+            latitude: Latitude of the point
+            longitude: Longitude of the point
+            limit: Maximum number of peaks to return
+            max_distance: Maximum distance in meters (optional)
+
+        Returns:
+            List of (peak, distance in meters) tuples, nearest first
+        """
+        if limit <= 0:
+            return []
+
+        box = None
+        if max_distance is not None:
+            box = bounding_box(latitude, longitude, max_distance)
+
+        best_indices = np.empty(0, dtype=np.intp)
+        best_distances = np.empty(0, dtype=np.float64)
+
+        for ring, indices, distances in self._scan(latitude, longitude, box):
+            if max_distance is not None:
+                keep = distances <= max_distance
+                indices, distances = indices[keep], distances[keep]
+            if len(best_distances) == limit:
+                keep = distances < best_distances.max()
+                indices, distances = indices[keep], distances[keep]
+
+            if len(distances):
+                best_indices = np.concatenate((best_indices, indices))
+                best_distances = np.concatenate((best_distances, distances))
+
+                if len(best_distances) > limit:
+                    top = np.argpartition(best_distances, limit - 1)[:limit]
+                    best_indices, best_distances = (
+                        best_indices[top],
+                        best_distances[top],
+                    )
+
+            bound = self._ring_bound(latitude, ring)
+            if len(best_distances) == limit and best_distances.max() <= bound:
+                break
+            if max_distance is not None and bound > max_distance:
+                break
+
+        order = np.argsort(best_distances, kind="stable")
+        return [
+            (self.peaks[i], d)
+            for i, d in zip(
+                best_indices[order].tolist(), best_distances[order].tolist()
+            )
+        ]
+
+    def within(
+        self, latitude: float, longitude: float, radius: float
+    ) -> List[Tuple[Peak, float]]:
+        """
+        Find all peaks within a radius of a point.
+
+        Args:
+            latitude: Latitude of the point
+            longitude: Longitude of the point
+            radius: Search radius in meters
+
+        Returns:
+            List of (peak, distance in meters) tuples, nearest first
+        """
+        box = bounding_box(latitude, longitude, radius)
+        found_indices: List[np.ndarray] = []
+        found_distances: List[np.ndarray] = []
+
+        for ring, indices, distances in self._scan(latitude, longitude, box):
+            keep = distances <= radius
+            found_indices.append(indices[keep])
+            found_distances.append(distances[keep])
+
+            if self._ring_bound(latitude, ring) > radius:
+                break
+
+        if not found_indices:
+            return []
+
+        indices = np.concatenate(found_indices)
+        distances = np.concatenate(found_distances)
+        order = np.argsort(distances, kind="stable")
+
+        return [
+            (self.peaks[i], d)
+            for i, d in zip(indices[order].tolist(), distances[order].tolist())
+        ]
+
+    def nearest_batch(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        limit: int,
+        max_distance: Optional[float] = None,
+    ) -> List[List[Tuple[Peak, float]]]:
+        """
+        Find the peaks nearest to each of many points.
+
+        Distances are computed as a many-to-many matrix, in row chunks of at
+        most ``MATRIX_CHUNK_SIZE`` elements. With ``max_distance``, peaks
+        outside the box enclosing all query points are dropped first.
+
+        Args:
+            latitudes: Latitudes of the points
+            longitudes: Longitudes of the points
+            limit: Maximum number of peaks to return per point
+            max_distance: Maximum distance in meters (optional)
+
+        Returns:
+            One list of (peak, distance in meters) tuples per point, nearest
+            first, in the order of the input points
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        candidates = np.arange(len(self.peaks), dtype=np.intp)
+        if max_distance is not None and len(latitudes):
+            candidates = candidates[
+                self._within_box(latitudes, longitudes, max_distance)
+            ]
+
+        k = min(limit, len(candidates))
+        if k <= 0:
+            return [[] for _ in range(len(latitudes))]
+
+        peak_lats = self.latitudes[candidates]
+        peak_lons = self.longitudes[candidates]
+        rows_per_chunk = max(1, MATRIX_CHUNK_SIZE // len(candidates))
+        results: List[List[Tuple[Peak, float]]] = []
+
+        for start in range(0, len(latitudes), rows_per_chunk):
+            end = start + rows_per_chunk
+            distances = haversine_distance_matrix(
+                latitudes[start:end], longitudes[start:end], peak_lats, peak_lons
+            )
+
+            if k < len(candidates):
+                top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(k), distances.shape).copy()
+            top_distances = np.take_along_axis(distances, top, axis=1)
+
+            order = np.argsort(top_distances, axis=1, kind="stable")
+            top = candidates[np.take_along_axis(top, order, axis=1)]
+            top_distances = np.take_along_axis(top_distances, order, axis=1)
+
+            for row, row_distances in zip(top.tolist(), top_distances.tolist()):
+                results.append(
+                    [
+                        (self.peaks[i], d)
+                        for i, d in zip(row, row_distances)
+                        if max_distance is None or d <= max_distance
+                    ]
+                )
+
+        return results
+
+    def _within_box(
+        self, latitudes: np.ndarray, longitudes: np.ndarray, distance: float
+    ) -> np.ndarray:
+        """
+        Return a mask of peaks inside the box enclosing all query points,
+        expanded by a distance.
+        """
+        min_lat = bounding_box(latitudes.min(), 0.0, distance)[0]
+        max_lat = bounding_box(latitudes.max(), 0.0, distance)[1]
+        far_lat = latitudes[np.argmax(np.abs(latitudes))]
+        _, _, _, delta_lon = bounding_box(far_lat, 0.0, distance)
+
+        mask = (self.latitudes >= min_lat) & (self.latitudes <= max_lat)
+
+        west = longitudes.min() - delta_lon
+        east = longitudes.max() + delta_lon
+        if east - west >= 360:
+            return mask
+
+        west = (west + 180) % 360 - 180
+        east = (east + 180) % 360 - 180
+        if west <= east:
+            return mask & (self.longitudes >= west) & (self.longitudes <= east)
+
+        return mask & ((self.longitudes >= west) | (self.longitudes <= east))
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        """Return the (row, col) grid cell containing a point."""
+        row = min(int((latitude + 90) // self.cell_size), self._n_rows - 1)
+        col = int((longitude + 180) // self.cell_size) % self._n_cols
+        return row, col
+
+    def _scan(
+        self,
+        latitude: float,
+        longitude: float,
+        box: Optional[Tuple[float, float, float, float]] = None,
+    ) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Yield ``(ring, indices, distances)`` for each ring around a point,
+        with exact distances to the peaks in that ring.
+
+        If a bounding box is given, peaks outside it are dropped before any
+        distance is computed.
+        """
+        for ring, indices in self._rings(latitude, longitude):
+            indices = np.asarray(indices, dtype=np.intp)
+            lats = self.latitudes[indices]
+            lons = self.longitudes[indices]
+
+            if box is not None and len(indices):
+                min_lat, max_lat, min_lon, max_lon = box
+                inside = (lats >= min_lat) & (lats <= max_lat)
+                if min_lon <= max_lon:
+                    inside &= (lons >= min_lon) & (lons <= max_lon)
+                else:
+                    inside &= (lons >= min_lon) | (lons <= max_lon)
+                indices, lats, lons = indices[inside], lats[inside], lons[inside]
+
+            yield ring, indices, haversine_distances(latitude, longitude, lats, lons)
+
+    def _rings(
+        self, latitude: float, longitude: float
+    ) -> Iterator[Tuple[int, List[int]]]:
+        """
+        Yield indexed peaks ring by ring around the cell containing a point.
+
+        Each item is ``(ring, indices)`` where ``indices`` are the peaks in
+        cells exactly ``ring`` cells away. Iteration ends once every peak has
+        been yielded.
+        """
+        row0, col0 = self._cell(latitude, longitude)
+        remaining = len(self.peaks)
+        ring = 0
+
+        while remaining > 0:
+            indices: List[int] = []
+
+            for row in (row0 - ring, row0 + ring) if ring else (row0,):
+                for col, cell in self._rows.get(row, {}).items():
+                    if self._col_distance(col, col0) <= ring:
+                        indices.extend(cell)
+
+            if ring:
+                side_cols = {
+                    (col0 - ring) % self._n_cols,
+                    (col0 + ring) % self._n_cols,
+                }
+                side_cols = {
+                    col for col in side_cols if self._col_distance(col, col0) == ring
+                }
+                for row in range(row0 - ring + 1, row0 + ring):
+                    cols = self._rows.get(row)
+                    if not cols:
+                        continue
+                    for col in side_cols:
+                        indices.extend(cols.get(col, ()))
+
+            remaining -= len(indices)
+            yield ring, indices
+            ring += 1
+
+    def _col_distance(self, col: int, col0: int) -> int:
+        """Return the number of columns between two cells, wrapping at 180°."""
+        distance = abs(col - col0) % self._n_cols
+        return min(distance, self._n_cols - distance)
+
+    def _ring_bound(self, latitude: float, ring: int) -> float:
+        """
+        Lower bound, in meters, on the distance from a point to any peak
+        outside the rings visited so far (0..ring).
+        """
+        row0, _ = self._cell(latitude, 0.0)
+        span = math.radians(ring * self.cell_size)
+
+        lat_bound = RADIUS_EARTH_M * span
+
+        band_low = (row0 - ring) * self.cell_size - 90
+        band_high = (row0 + ring + 1) * self.cell_size - 90
+        max_abs_lat = min(max(abs(band_low), abs(band_high)), 90.0)
+        a = (
+            math.cos(math.radians(latitude))
+            * math.cos(math.radians(max_abs_lat))
+            * math.sin(min(span, math.pi) / 2) ** 2
+        )
+        lon_bound = 2 * RADIUS_EARTH_M * math.asin(math.sqrt(min(max(a, 0.0), 1.0)))
+
+        return min(lat_bound, lon_bound)
@@ -1,9 +1,13 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
+from pydantic import Field as PydanticField
 from sqlmodel import Field, SQLModel
 
+# Most peaks returned per point by the nearest peak queries
+MAX_PEAKS_LIMIT = 100
+
 
 class Peak(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -20,3 +24,18 @@ class PeakWithDistance(BaseModel):
 
     peak: Peak
     distance: float
+
+
+class Coordinates(BaseModel):
+    """Request model for a geographical point"""
+
+    latitude: float
+    longitude: float
+
+
+class PeaksBatchFind(BaseModel):
+    """Request model for finding the nearest peaks to many points at once"""
+
+    points: List[Coordinates] = PydanticField(max_length=1000)
+    max_distance: Optional[float] = None
+    limit: int = PydanticField(5, ge=1, le=MAX_PEAKS_LIMIT)
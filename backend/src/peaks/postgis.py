@@ -0,0 +1,193 @@
+"""
+PostGIS-backed nearest-peak queries
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from src.peaks.cache import PeaksCatalogue, peaks_cache
+from src.peaks.models import Peak
+from src.peaks.repository import PeaksRepository
+
+POINT = "ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography"
+
+
+class PostgisPeakIndex:
+    """
+    Nearest-peak queries answered by PostGIS KNN (``<->``) over a GiST index.
+
+    Exposes the same query methods as PeakIndex. Distances are computed on
+    the sphere, so they agree with the in-memory haversine index to within
+    a few meters; peaks are resolved from the cached catalogue.
+    """
+
+    def __init__(self, db: Session, catalogue: PeaksCatalogue):
+        """
+        Initialize the PostgisPeakIndex.
+
+        Args:
+            db: Database session
+            catalogue: Peak catalogue used to resolve peak IDs
+        """
+        self.db = db
+        self.catalogue = catalogue
+
+    def __len__(self) -> int:
+        return len(self.catalogue.peaks)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int,
+        max_distance: Optional[float] = None,
+    ) -> List[Tuple[Peak, float]]:
+        """
+        Find the peaks nearest to a point.
+
+        Args:
+            latitude: Latitude of the point
+            longitude: Longitude of the point
+            limit: Maximum number of peaks to return
+            max_distance: Maximum distance in meters (optional)
+
+        Returns:
+            List of (peak, distance in meters) tuples, nearest first
+        """
+        if limit <= 0:
+            return []
+
+        where = ""
+        if max_distance is not None:
+            where = f"WHERE ST_DWithin(geog, {POINT}, :max_distance, false)"
+
+        statement = text(
+            f"SELECT id, ST_Distance(geog, {POINT}, false) AS distance "
+            f"FROM peak {where} "
+            f"ORDER BY geog <-> {POINT} "
+            "LIMIT :limit"
+        )
+        rows = self.db.exec(
+            statement,
+            params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "max_distance": max_distance,
+                "limit": limit,
+            },
+        )
+        return self._resolve(rows)
+
+    def within(
+        self, latitude: float, longitude: float, radius: float
+    ) -> List[Tuple[Peak, float]]:
+        """
+        Find all peaks within a radius of a point.
+
+        Args:
+            latitude: Latitude of the point
+            longitude: Longitude of the point
+            radius: Search radius in meters
+
+        Returns:
+            List of (peak, distance in meters) tuples, nearest first
+        """
+        statement = text(
+            f"SELECT id, ST_Distance(geog, {POINT}, false) AS distance "
+            f"FROM peak WHERE ST_DWithin(geog, {POINT}, :radius, false) "
+            "ORDER BY distance"
+        )
+        rows = self.db.exec(
+            statement,
+            params={"latitude": latitude, "longitude": longitude, "radius": radius},
+        )
+        return self._resolve(rows)
+
+    def nearest_batch(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        limit: int,
+        max_distance: Optional[float] = None,
+    ) -> List[List[Tuple[Peak, float]]]:
+        """
+        Find the peaks nearest to each of many points in a single query.
+
+        Args:
+            latitudes: Latitudes of the points
+            longitudes: Longitudes of the points
+            limit: Maximum number of peaks to return per point
+            max_distance: Maximum distance in meters (optional)
+
+        Returns:
+            One list of (peak, distance in meters) tuples per point, nearest
+            first, in the order of the input points
+        """
+        results: List[List[Tuple[Peak, float]]] = [[] for _ in latitudes]
+        if limit <= 0 or not results:
+            return results
+
+        where = ""
+        if max_distance is not None:
+            where = "WHERE ST_DWithin(p.geog, q.point, :max_distance, false)"
+
+        statement = text(
+            "WITH q AS ("
+            " SELECT ord, ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography AS point"
+            " FROM unnest(CAST(:latitudes AS double precision[]),"
+            " CAST(:longitudes AS double precision[]))"
+            " WITH ORDINALITY AS u(lat, lon, ord)"
+            ") "
+            "SELECT q.ord, n.id, n.distance FROM q CROSS JOIN LATERAL ("
+            " SELECT p.id, ST_Distance(p.geog, q.point, false) AS distance"
+            f" FROM peak p {where}"
+            " ORDER BY p.geog <-> q.point LIMIT :limit"
+            ") n "
+            "ORDER BY q.ord, n.distance"
+        )
+        rows = self.db.exec(
+            statement,
+            params={
+                "latitudes": [float(lat) for lat in latitudes],
+                "longitudes": [float(lon) for lon in longitudes],
+                "max_distance": max_distance,
+                "limit": limit,
+            },
+        )
+
+        for position, peak_id, distance in rows:
+            peak = self.catalogue.get(peak_id)
+            if peak is not None:
+                results[position - 1].append((peak, float(distance)))
+
+        return results
+
+    def _resolve(self, rows) -> List[Tuple[Peak, float]]:
+        """Map (peak ID, distance) rows to cached peaks."""
+        found = []
+        for peak_id, distance in rows:
+            peak = self.catalogue.get(peak_id)
+            if peak is not None:
+                found.append((peak, float(distance)))
+        return found
+
+
+class PostgisPeaksRepository(PeaksRepository):
+    """
+    PeaksRepository whose spatial queries run in PostGIS.
+
+    Requires the geography column and index that the 0009 migration adds
+    on PostgreSQL with PostGIS available. Listing and lookups by
+    ID are still served from the process-level peaks cache.
+    """
+
+    def get_index(self) -> PostgisPeakIndex:
+        """
+        Get a PostGIS-backed spatial index of all peaks.
+
+        Returns:
+            PostgisPeakIndex bound to the repository's session
+        """
+        return PostgisPeakIndex(self.db, peaks_cache.get(self.db))
@@ -1,13 +1,18 @@
 from typing import List, Optional
 
-from sqlmodel import Session, select
+from sqlmodel import Session
 
+from src.peaks.cache import PeaksPayload, peaks_cache
+from src.peaks.index import PeakIndex
 from src.peaks.models import Peak
 
 
 class PeaksRepository:
     """
     Repository for Peak data access operations.
+
+    Reads go through the process-level peaks cache, so returned peaks are
+    shared read-only snapshots rather than session-bound instances.
     """
 
     def __init__(self, db: Session):
@@ -26,8 +31,7 @@ class PeaksRepository:
         Returns:
             List of all peaks
         """
-        query = select(Peak)
-        return self.db.exec(query).all()
+        return list(peaks_cache.get(self.db).peaks)
 
     def get_by_id(self, peak_id: int) -> Optional[Peak]:
         """
@@ -39,4 +43,22 @@ class PeaksRepository:
         Returns:
             Peak if found, None otherwise
         """
-        return self.db.get(Peak, peak_id)
+        return peaks_cache.get(self.db).get(peak_id)
+
+    def get_index(self) -> PeakIndex:
+        """
+        Get the spatial index of all peaks.
+
+        Returns:
+            PeakIndex over all peaks
+        """
+        return peaks_cache.get(self.db).index
+
+    def get_all_payload(self) -> PeaksPayload:
+        """
+        Get all peaks serialized as a JSON payload.
+
+        Returns:
+            PeaksPayload for the current catalogue
+        """
+        return peaks_cache.get(self.db).payload
@@ -2,17 +2,17 @@
 Service for matching geographical coordinates to peaks
 """
 
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
-from src.common.utils.geo import haversine_distance
-from src.peaks.models import Peak
+from src.peaks.cache import PeaksPayload
+from src.peaks.models import Coordinates, Peak, PeakWithDistance
 from src.peaks.repository import PeaksRepository
 
 
 class PeaksService:
     """
     Service for matching geographical coordinates to peaks
-    based on haversine distance calculation.
+    based on haversine distance calculation over a spatial index.
     """
 
     def __init__(self, peaks_repository: PeaksRepository):
@@ -33,6 +33,15 @@ class PeaksService:
         """
         return self.peaks_repository.get_all()
 
+    def get_all_payload(self) -> PeaksPayload:
+        """
+        Retrieve all peaks as a pre-serialized JSON payload.
+
+        Returns:
+            PeaksPayload with the serialized peaks and their entity tags
+        """
+        return self.peaks_repository.get_all_payload()
+
     def get_by_id(self, peak_id: int) -> Optional[Peak]:
         """
         Get a specific peak by ID.
@@ -51,38 +60,55 @@ class PeaksService:
         longitude: float,
         max_distance: float | None = None,
         limit: int = 5,
-    ) -> List[Dict[str, Any]]:
+    ) -> List[PeakWithDistance]:
         """
         Find the nearest peaks to a given latitude and longitude using Haversine distance.
 
         Args:
             latitude: Latitude of the point
             longitude: Longitude of the point
+            max_distance: Maximum distance in meters (optional)
             limit: Maximum number of peaks to return (default: 5)
 
         Returns:
-            List of dictionaries containing peak and its distance from the point
+            List of peaks with their distance from the point, nearest first
         """
-        peaks = self.peaks_repository.get_all()
-
-        if not peaks:
-            return []
-
-        peaks_with_distance = [
-            {
-                "peak": peak,
-                "distance": haversine_distance(
-                    latitude, longitude, peak.latitude, peak.longitude
-                ),
-            }
-            for peak in peaks
+        index = self.peaks_repository.get_index()
+
+        return [
+            PeakWithDistance(peak=peak, distance=distance)
+            for peak, distance in index.nearest(
+                latitude, longitude, limit=limit, max_distance=max_distance
+            )
         ]
 
-        if max_distance is not None:
-            peaks_with_distance = [
-                peak for peak in peaks_with_distance if peak["distance"] <= max_distance
-            ]
+    def find_nearest_peaks_batch(
+        self,
+        points: List[Coordinates],
+        max_distance: float | None = None,
+        limit: int = 5,
+    ) -> List[List[PeakWithDistance]]:
+        """
+        Find the nearest peaks to each of many points with a single peak load.
 
-        peaks_by_nearest = sorted(peaks_with_distance, key=lambda x: x["distance"])
+        Args:
+            points: Points to match
+            max_distance: Maximum distance in meters (optional)
+            limit: Maximum number of peaks to return per point (default: 5)
 
-        return peaks_by_nearest[:limit]
+        Returns:
+            One list of peaks with their distance per point, in input order
+        """
+        index = self.peaks_repository.get_index()
+
+        matches = index.nearest_batch(
+            [point.latitude for point in points],
+            [point.longitude for point in points],
+            limit=limit,
+            max_distance=max_distance,
+        )
+
+        return [
+            [PeakWithDistance(peak=peak, distance=distance) for peak, distance in row]
+            for row in matches
+        ]
@@ -1,31 +1,85 @@
+import time
 from typing import List, Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
+from fastapi import (
+    APIRouter,
+    Body,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from pydantic import TypeAdapter, ValidationError
 
 from src.photos.dependencies import photos_service_dep
-from src.photos.models import SummitPhotoCreate, SummitPhotoRead
+from src.photos.derivatives import DERIVATIVE_FORMATS, derivative_name
+from src.photos.models import (
+    PhotoBulkDelete,
+    PhotoBulkDeleteResult,
+    SummitPhotoBatchResult,
+    SummitPhotoCreate,
+    SummitPhotoPage,
+    SummitPhotoRead,
+)
+from src.uploads.dependencies import resumable_uploads_service_dep
+from src.uploads.settings import uploads_settings
+from src.uploads.signing import verify_url
 
 router = APIRouter(prefix="/api/photos", tags=["photos"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-@router.get("/", response_model=List[SummitPhotoRead], tags=["photos"])
+# Parses the metadata list of a batch upload
+SUMMIT_PHOTO_CREATES = TypeAdapter(List[SummitPhotoCreate])
+
+# Derivative URLs name the photo's stored file, whose content never changes
+DERIVATIVE_CACHE_MAX_AGE = 31536000
+DERIVATIVE_CACHE_CONTROL = f"public, max-age={DERIVATIVE_CACHE_MAX_AGE}, immutable"
+
+
+@router.get("/", response_model=SummitPhotoPage, tags=["photos"])
 async def get_all_photos(
     photos_service: photos_service_dep,
-    sort_by: Optional[str] = Query(None, description="Field to sort by"),
+    sort_by: Optional[str] = Query(
+        None, description="Field to sort by: 'id', 'uploaded_at' or 'captured_at'"
+    ),
     order: Optional[str] = Query(None, description="Sort order: 'asc' or 'desc'"),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor of the next page from a previous response"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to include, e.g. 'id,file_name'"
+    ),
 ):
     """
-    Get all uploaded photos, optionally sorted by a field.
+    Get a page of uploaded photos, optionally sorted by a field.
 
     Args:
         sort_by: Field to sort by (optional).
         order: Sort order 'desc' for descending, otherwise ascending (SQL default). Only used if sort_by is provided.
+        limit: Maximum number of photos in the page.
+        cursor: next_cursor of the previous page, to continue from it (optional).
+        fields: Comma-separated fields to include; "peak" adds peak information (optional, all fields if omitted).
 
     Returns:
-        List[SummitPhotoRead]: List of all uploaded photos, with peak information, sorted as specified or in default order.
+        SummitPhotoPage: The photos, sorted as specified or in default order, and the cursor of the next page, or null on the last page.
     """
+    field_names = None
+    if fields:
+        field_names = [name.strip() for name in fields.split(",") if name.strip()]
+
     try:
-        return await photos_service.get_all_photos(sort_by=sort_by, order=order)
+        return await photos_service.get_photos_page(
+            limit, cursor=cursor, sort_by=sort_by, order=order, fields=field_names
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to retrieve photos: {str(e)}"
@@ -58,6 +112,85 @@ async def upload_photo(
         raise HTTPException(status_code=500, detail=f"Failed to upload photo: {str(e)}")
 
 
+@router.post("/batch", response_model=SummitPhotoBatchResult, tags=["photos"])
+async def upload_photos(
+    photos_service: photos_service_dep,
+    files: List[UploadFile] = File(...),
+    summit_photo_creates: str = Form("[]"),
+):
+    """
+    Upload several photo files with metadata in one request
+
+    Args:
+        files: The photo files to upload
+        summit_photo_creates: JSON list of metadata for the photos, in the order of the files; files past its end get metadata from EXIF data only
+
+    Returns:
+        SummitPhotoBatchResult: For each file, in order, the uploaded photo object or the reason it failed
+    """
+    if len(files) > uploads_settings.batch_max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {uploads_settings.batch_max_files} files can be uploaded at once.",
+        )
+
+    try:
+        creates = SUMMIT_PHOTO_CREATES.validate_json(summit_photo_creates)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(creates) > len(files):
+        raise HTTPException(
+            status_code=400, detail="More metadata entries than files were sent."
+        )
+
+    items = await photos_service.upload_photos(files, creates)
+    return SummitPhotoBatchResult(items=items)
+
+
+@router.post("/uploads/{upload_id}", response_model=SummitPhotoRead, tags=["photos"])
+async def finish_photo_upload(
+    upload_id: str,
+    photos_service: photos_service_dep,
+    resumable_uploads_service: resumable_uploads_service_dep,
+    summit_photo_create: SummitPhotoCreate = Body(default_factory=SummitPhotoCreate),
+):
+    """
+    Create a photo from a resumable upload once all of its data was sent
+
+    Args:
+        upload_id: ID of the upload, from POST /api/uploads/
+        summit_photo_create: Metadata for the photo (captured_at, latitude, longitude, altitude, peak_id, distance_to_peak)
+
+    Returns:
+        SummitPhotoRead: The uploaded photo object with peak information
+    """
+    upload = await resumable_uploads_service.get(upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    if upload.offset < upload.length:
+        # The data may have been sent straight to storage
+        upload = await resumable_uploads_service.sync_offset(upload)
+
+    if upload.offset < upload.length:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload is at offset {upload.offset} of {upload.length}",
+            headers={"Upload-Offset": str(upload.offset)},
+        )
+
+    try:
+        photo = await photos_service.upload_stored_photo(upload, summit_photo_create)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload photo: {str(e)}")
+
+    await resumable_uploads_service.complete(upload)
+    return photo
+
+
 @router.get("/{photo_id}", response_model=SummitPhotoRead, tags=["photos"])
 async def get_photo_by_id(
     photo_id: int,
@@ -79,6 +212,50 @@ async def get_photo_by_id(
     return photo
 
 
+@router.get("/{photo_id}/derivatives/{size}.{format}", tags=["photos"])
+async def get_photo_derivative(
+    photo_id: int,
+    size: int,
+    format: str,
+    photos_service: photos_service_dep,
+    v: str = Query(..., description="Stored file name of the photo"),
+    expires: Optional[str] = Query(None, description="Expiry of a signed URL"),
+    signature: Optional[str] = Query(None, description="Signature of a signed URL"),
+):
+    """
+    Get a resized copy of a photo, generating it if it does not exist yet
+
+    Args:
+        photo_id: ID of the photo
+        size: Longest edge in pixels: 256, 1024 or 2048
+        format: Image format: 'webp' or 'jpeg'
+        v: Stored file name of the photo, as in its derivative URLs
+        expires: Expiry of the URL, required when URL signing is enabled
+        signature: Signature of the URL, required when URL signing is enabled
+
+    Returns:
+        Response: The image, cacheable indefinitely, or while a signed URL
+        is valid
+    """
+    if not verify_url(derivative_name(v, size, format), expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired URL")
+
+    data = await photos_service.get_derivative(photo_id, v, size, format)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Derivative not found")
+
+    cache_control = DERIVATIVE_CACHE_CONTROL
+    if signature and expires and expires.isdigit():
+        max_age = min(int(expires) - int(time.time()), DERIVATIVE_CACHE_MAX_AGE)
+        cache_control = f"public, max-age={max(max_age, 0)}, immutable"
+
+    return Response(
+        content=data,
+        media_type=DERIVATIVE_FORMATS[format][1],
+        headers={"Cache-Control": cache_control},
+    )
+
+
 @router.delete("/{photo_id}", response_model=dict, tags=["photos"])
 async def delete_photo(
     photo_id: int,
@@ -99,3 +276,28 @@ async def delete_photo(
         raise HTTPException(status_code=404, detail="Photo not found")
 
     return {"success": True}
+
+
+@router.post("/delete", response_model=PhotoBulkDeleteResult, tags=["photos"])
+async def delete_photos(
+    photo_bulk_delete: PhotoBulkDelete,
+    photos_service: photos_service_dep,
+):
+    """
+    Delete several photos by ID at once
+
+    Args:
+        photo_bulk_delete: IDs of the photos to delete
+
+    Returns:
+        PhotoBulkDeleteResult: IDs of the photos that were deleted and of those that were not found
+    """
+    if len(photo_bulk_delete.ids) > uploads_settings.batch_max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {uploads_settings.batch_max_files} photos can be deleted at once.",
+        )
+
+    deleted = await photos_service.delete_photos(photo_bulk_delete.ids)
+    not_found = sorted(set(photo_bulk_delete.ids) - set(deleted))
+    return PhotoBulkDeleteResult(deleted=deleted, not_found=not_found)
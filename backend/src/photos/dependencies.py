@@ -7,20 +7,14 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from src.database.core import db_dep
+from src.database.core import async_db_dep
 from src.photos.repository import PhotosRepository
 from src.photos.service import PhotosService
+from src.uploads.dependencies import get_uploads_service
 from src.uploads.service import UploadsService
-from src.uploads.services.local_storage import LocalFileStorage
 
 
-def get_uploads_service() -> UploadsService:
-    """Provides a configured UploadsService with LocalFileStorage."""
-    storage = LocalFileStorage()
-    return UploadsService(storage)
-
-
-def get_photos_repository(db: db_dep) -> PhotosRepository:
+def get_photos_repository(db: async_db_dep) -> PhotosRepository:
     """Provides a PhotosRepository."""
     return PhotosRepository(db)
 
@@ -0,0 +1,147 @@
+"""
+Resized copies of uploaded photos for display in the gallery
+"""
+
+import io
+from typing import Dict, List, Sequence, Tuple
+from urllib.parse import quote
+
+from PIL import Image, ImageOps
+
+# Longest edge in pixels of each derivative size
+DERIVATIVE_SIZES = (256, 1024, 2048)
+
+# Derivative formats: (Pillow format name, media type, save options)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True}),
+}
+
+# The stored file name of the original makes the URL unique to its content,
+# even when a new photo reuses the ID of a deleted one
+DERIVATIVE_URL = "/api/photos/{photo_id}/derivatives/{size}.{format}?v={file_name}"
+
+
+def derivative_name(file_name: str, size: int, format: str) -> str:
+    """
+    Name a derivative is stored under, next to its original. The name
+    keeps the original's extension, so originals that differ only by it
+    have different derivatives.
+
+    Args:
+        file_name: Stored file name of the original photo
+        size: Longest edge of the derivative in pixels
+        format: Derivative format, a key of DERIVATIVE_FORMATS
+
+    Returns:
+        File name of the derivative
+    """
+    return f"{file_name}.{size}.{format}"
+
+
+def derivative_names(file_name: str) -> List[str]:
+    """
+    Names of every derivative of a photo that may be stored, including
+    those named after the original's stem alone before derivative names
+    kept its extension.
+
+    Args:
+        file_name: Stored file name of the original photo
+
+    Returns:
+        File names of the derivatives
+    """
+    stem = file_name.rsplit(".", 1)[0]
+    return [
+        name
+        for size in DERIVATIVE_SIZES
+        for format in DERIVATIVE_FORMATS
+        for name in (
+            derivative_name(file_name, size, format),
+            f"{stem}_{size}.{format}",
+        )
+    ]
+
+
+def derivative_url(photo_id: int, file_name: str, size: int, format: str) -> str:
+    """
+    URL a derivative of a photo is served from.
+
+    Args:
+        photo_id: ID of the photo
+        file_name: Stored file name of the original photo
+        size: Longest edge of the derivative in pixels
+        format: Derivative format, a key of DERIVATIVE_FORMATS
+
+    Returns:
+        Path of the derivative endpoint, with the original's file name
+    """
+    return DERIVATIVE_URL.format(
+        photo_id=photo_id, size=size, format=format, file_name=quote(file_name)
+    )
+
+
+def is_derivative(size: int, format: str) -> bool:
+    """Check whether a size and format name a derivative that can be generated."""
+    return size in DERIVATIVE_SIZES and format in DERIVATIVE_FORMATS
+
+
+def render_derivatives(
+    original: bytes,
+    sizes: Sequence[int] = DERIVATIVE_SIZES,
+    formats: Sequence[str] = tuple(DERIVATIVE_FORMATS),
+) -> Dict[Tuple[int, str], bytes]:
+    """
+    Render resized copies of a photo. Raises ValueError if the photo
+    cannot be decoded.
+
+    The photo is rotated upright according to its EXIF orientation and
+    scaled to fit each size without being enlarged. JPEGs are decoded at
+    the smallest scale that still covers the largest size, and each size is
+    scaled down from the previous one, so a large original is only decoded
+    once and never at full resolution when it is not needed. EXIF data is
+    not copied to the derivatives.
+
+    Args:
+        original: Content of the original photo
+        sizes: Longest edges in pixels (default: DERIVATIVE_SIZES)
+        formats: Formats, keys of DERIVATIVE_FORMATS (default: all)
+
+    Returns:
+        Dictionary of encoded derivatives keyed by (size, format)
+    """
+    try:
+        with Image.open(io.BytesIO(original)) as image:
+            largest = max(sizes)
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError("File is not a readable image.") from e
+
+    derivatives = {}
+    for size in sorted(sizes, reverse=True):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        for format in formats:
+            pillow_format, _, options = DERIVATIVE_FORMATS[format]
+            buffer = io.BytesIO()
+            image.save(buffer, pillow_format, **options)
+            derivatives[(size, format)] = buffer.getvalue()
+
+    return derivatives
+
+
+def render_derivative(original: bytes, size: int, format: str) -> bytes:
+    """
+    Render a single resized copy of a photo. Raises ValueError if the
+    photo cannot be decoded.
+
+    Args:
+        original: Content of the original photo
+        size: Longest edge in pixels
+        format: Format, a key of DERIVATIVE_FORMATS
+
+    Returns:
+        The encoded derivative
+    """
+    return render_derivatives(original, (size,), (format,))[(size, format)]
@@ -0,0 +1,142 @@
+"""
+Extraction of capture metadata from JPEG EXIF data
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Sequence
+
+from exif import Image
+
+from src.photos.models import SummitPhotoCreate
+
+# Exif APP1 segments are at most 64 KiB and come before the image data,
+# so this much of the start of a file is enough to read them.
+EXIF_HEAD_SIZE = 128 * 1024
+
+SOI = b"\xff\xd8"
+EOI = b"\xff\xd9"
+APP1 = 0xE1
+SOS = 0xDA
+EXIF_HEADER = b"Exif\x00\x00"
+
+
+def find_exif_segment(head: bytes) -> Optional[bytes]:
+    """
+    Find the Exif APP1 segment by walking the JPEG markers at the start of a file.
+
+    Args:
+        head: The first bytes of the file
+
+    Returns:
+        The complete APP1 segment including its marker, or None if the data
+        is not a JPEG or the segment is missing or truncated
+    """
+    if not head.startswith(SOI):
+        return None
+
+    position = len(SOI)
+    while position + 4 <= len(head):
+        if head[position] != 0xFF:
+            return None
+
+        marker = head[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker in (SOS, EOI[1]):
+            return None
+
+        end = position + 2 + int.from_bytes(head[position + 2 : position + 4], "big")
+        if marker == APP1 and head[position + 4 : position + 10] == EXIF_HEADER:
+            return head[position:end] if end <= len(head) else None
+
+        position = end
+
+    return None
+
+
+def extract_metadata(head: bytes) -> SummitPhotoCreate:
+    """
+    Read the capture time, GPS position and altitude from a JPEG's EXIF data.
+
+    DateTimeOriginal is converted to UTC when the camera recorded its offset
+    and is kept as camera local time otherwise. Missing or malformed tags are
+    left unset.
+
+    Args:
+        head: The first bytes of the file, at least EXIF_HEAD_SIZE if available
+
+    Returns:
+        SummitPhotoCreate with the fields found in the EXIF data
+    """
+    segment = find_exif_segment(head)
+    if segment is None:
+        return SummitPhotoCreate()
+
+    try:
+        image = Image(SOI + segment + EOI)
+    except Exception:
+        return SummitPhotoCreate()
+
+    if not image.has_exif:
+        return SummitPhotoCreate()
+
+    metadata = {}
+
+    latitude = _coordinate(_get(image, "gps_latitude"), _get(image, "gps_latitude_ref"))
+    longitude = _coordinate(
+        _get(image, "gps_longitude"), _get(image, "gps_longitude_ref")
+    )
+    if latitude is not None and longitude is not None:
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            metadata["latitude"] = latitude
+            metadata["longitude"] = longitude
+
+    altitude = _get(image, "gps_altitude")
+    if isinstance(altitude, (int, float)):
+        below_sea_level = _get(image, "gps_altitude_ref") == 1
+        metadata["altitude"] = -float(altitude) if below_sea_level else float(altitude)
+
+    captured_at = _captured_at(
+        _get(image, "datetime_original"), _get(image, "offset_time_original")
+    )
+    if captured_at is not None:
+        metadata["captured_at"] = captured_at
+
+    return SummitPhotoCreate(**metadata)
+
+
+def _get(image: Image, tag: str) -> Any:
+    """Read a tag, treating unreadable values as missing."""
+    try:
+        return image.get(tag)
+    except Exception:
+        return None
+
+
+def _coordinate(dms: Optional[Sequence[float]], ref: Optional[str]) -> Optional[float]:
+    """Convert degrees, minutes and seconds to signed decimal degrees."""
+    if not dms or len(dms) != 3 or ref not in ("N", "S", "E", "W"):
+        return None
+
+    degrees, minutes, seconds = (float(part) for part in dms)
+    value = degrees + minutes / 60 + seconds / 3600
+    return -value if ref in ("S", "W") else value
+
+
+def _captured_at(value: Optional[str], offset: Optional[str]) -> Optional[datetime]:
+    """Parse an EXIF date and time, converting it to naive UTC if it has an offset."""
+    try:
+        captured_at = datetime.strptime(value.strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except (AttributeError, ValueError):
+        return None
+
+    try:
+        sign = -1 if offset[0] == "-" else 1
+        hours, minutes = offset[1:].split(":")
+        delta = timedelta(hours=int(hours), minutes=int(minutes))
+    except (TypeError, IndexError, ValueError):
+        return captured_at
+
+    aware = captured_at.replace(tzinfo=timezone(sign * delta))
+    return aware.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,52 @@
+"""
+Background job handlers for photos
+"""
+
+from concurrent.futures import Executor
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.jobs.models import Job
+from src.jobs.worker import JobHandler
+from src.photos.models import PROCESSING_FAILED
+from src.photos.repository import PhotosRepository
+from src.photos.service import PROCESS_PHOTO_JOB, PhotosService
+from src.uploads.service import UploadsService
+
+
+class ProcessPhotoHandler(JobHandler):
+    """
+    Runs the post-upload processing of photos and records its outcome in
+    the photo's processing status.
+    """
+
+    def __init__(self, uploads_service: UploadsService):
+        """
+        Initialize the ProcessPhotoHandler.
+
+        Args:
+            uploads_service: Service for reading and storing photo files
+        """
+        self.uploads_service = uploads_service
+
+    async def run(self, db: AsyncSession, job: Job, executor: Executor) -> None:
+        service = PhotosService(self.uploads_service, PhotosRepository(db))
+        await service.process_photo(job.photo_id, executor)
+
+    async def failed(self, db: AsyncSession, job: Job) -> None:
+        await PhotosRepository(db).set_processing_status(
+            job.photo_id, PROCESSING_FAILED
+        )
+
+
+def photo_job_handlers(uploads_service: UploadsService) -> dict:
+    """
+    Build the handlers of every photo job kind.
+
+    Args:
+        uploads_service: Service for reading and storing photo files
+
+    Returns:
+        Handlers by job kind, for JobWorker
+    """
+    return {PROCESS_PHOTO_JOB: ProcessPhotoHandler(uploads_service)}
@@ -1,28 +1,63 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from pydantic import Field as PydanticField
+from pydantic import computed_field, model_serializer
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from src.peaks.models import Peak
+from src.photos.derivatives import (
+    DERIVATIVE_FORMATS,
+    DERIVATIVE_SIZES,
+    derivative_name,
+    derivative_url,
+)
+from src.uploads.signing import sign_url, upload_url
+
+# Processing status of a photo: derivatives are generated by a background job
+PROCESSING_PENDING = "pending"
+PROCESSING_READY = "ready"
+PROCESSING_FAILED = "failed"
 
 
 class SummitPhoto(SQLModel, table=True):
     """Database model for a summit photo with metadata"""
 
+    __table_args__ = (
+        Index("ix_summitphoto_uploaded_at_id", "uploaded_at", "id"),
+        Index("ix_summitphoto_captured_at_id", "captured_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    file_name: str
+    file_name: str = Field(index=True)
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
     captured_at: Optional[datetime] = None
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     altitude: Optional[float] = None
-    peak_id: Optional[int] = Field(default=None, foreign_key="peak.id")
+    peak_id: Optional[int] = Field(default=None, foreign_key="peak.id", index=True)
     distance_to_peak: Optional[float] = None
+    processing_status: str = Field(
+        default=PROCESSING_READY,
+        sa_column_kwargs={"server_default": PROCESSING_READY},
+    )
 
     peak: Optional[Peak] = Relationship()
 
 
+class PhotoTombstone(SQLModel, table=True):
+    """
+    Database model for a stored file of deleted photos that is yet to be
+    removed from storage, with its derivatives
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    file_name: str
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
 class SummitPhotoCreate(BaseModel):
     """Request model for creating a new photo with metadata"""
 
@@ -34,6 +69,31 @@ class SummitPhotoCreate(BaseModel):
     distance_to_peak: Optional[float] = None
 
 
+class PhotoDerivative(BaseModel):
+    """Response model for a resized copy of a photo"""
+
+    size: int
+    format: str
+    url: str
+
+
+def photo_derivatives(photo_id: int, file_name: str) -> List[PhotoDerivative]:
+    """List every derivative of a photo, smallest first, with URLs signed
+    when URL signing is enabled."""
+    return [
+        PhotoDerivative(
+            size=size,
+            format=format,
+            url=sign_url(
+                derivative_url(photo_id, file_name, size, format),
+                derivative_name(file_name, size, format),
+            ),
+        )
+        for size in DERIVATIVE_SIZES
+        for format in DERIVATIVE_FORMATS
+    ]
+
+
 class SummitPhotoRead(BaseModel):
     """Response model for reading a photo with metadata"""
 
@@ -46,4 +106,92 @@ class SummitPhotoRead(BaseModel):
     altitude: Optional[float] = None
     peak_id: Optional[int] = None
     distance_to_peak: Optional[float] = None
+    processing_status: str = PROCESSING_READY
     peak: Optional[Peak] = None
+
+    @computed_field
+    @property
+    def url(self) -> str:
+        """URL of the original photo, signed when URL signing is enabled"""
+        return upload_url(self.file_name)
+
+    @computed_field
+    @property
+    def derivatives(self) -> List[PhotoDerivative]:
+        """Resized copies of the photo, generated after upload or on first request"""
+        return photo_derivatives(self.id, self.file_name)
+
+
+class SummitPhotoBatchItem(BaseModel):
+    """Response model for the outcome of one file of a batch upload"""
+
+    index: int
+    filename: Optional[str] = None
+    photo: Optional[SummitPhotoRead] = None
+    error: Optional[str] = None
+
+
+class SummitPhotoBatchResult(BaseModel):
+    """Response model for a batch upload, in the order the files were sent"""
+
+    items: List[SummitPhotoBatchItem]
+
+
+class PhotoBulkDelete(BaseModel):
+    """Request model for deleting several photos at once"""
+
+    ids: List[int] = PydanticField(min_length=1)
+
+
+class PhotoBulkDeleteResult(BaseModel):
+    """Response model for a bulk delete"""
+
+    deleted: List[int]
+    not_found: List[int]
+
+
+class SummitPhotoListItem(BaseModel):
+    """Response model for a photo in a list, with only the requested fields set"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    file_name: Optional[str] = None
+    uploaded_at: Optional[datetime] = None
+    captured_at: Optional[datetime] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    altitude: Optional[float] = None
+    peak_id: Optional[int] = None
+    distance_to_peak: Optional[float] = None
+    processing_status: Optional[str] = None
+    peak: Optional[Peak] = None
+
+    @computed_field
+    @property
+    def url(self) -> Optional[str]:
+        """URL of the original photo, signed when URL signing is enabled"""
+        return upload_url(self.file_name) if self.file_name else None
+
+    @computed_field
+    @property
+    def derivatives(self) -> List[PhotoDerivative]:
+        """Resized copies of the photo, generated after upload or on first request"""
+        return photo_derivatives(self.id, self.file_name) if self.file_name else []
+
+    @model_serializer(mode="wrap")
+    def _serialize_set_fields(self, handler):
+        """Leave out fields that were not requested. The URL and derivatives
+        are only listed when every field was."""
+        data = handler(self)
+        requested = set(self.model_fields_set)
+        if requested >= set(type(self).model_fields):
+            requested.update(("url", "derivatives"))
+        return {key: value for key, value in data.items() if key in requested}
+
+
+class SummitPhotoPage(BaseModel):
+    """Response model for one page of photos"""
+
+    items: List[SummitPhotoListItem]
+    next_cursor: Optional[str] = None
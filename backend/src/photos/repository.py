@@ -1,16 +1,35 @@
-from typing import List, Optional
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
-from sqlmodel import Session, desc, select
+import sqlalchemy
+from sqlalchemy import and_, delete, literal, tuple_, update
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import desc, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.photos.models import SummitPhoto
+from src.common.utils.pagination import decode_cursor, encode_cursor
+from src.database.core import db_writer
+from src.jobs.models import Job
+from src.peaks.models import Peak
+from src.photos.models import PROCESSING_READY, PhotoTombstone, SummitPhoto
+from src.uploads.models import Blob
+
+PHOTO_COLUMNS = tuple(SummitPhoto.__table__.columns.keys())
+PHOTO_FIELDS = PHOTO_COLUMNS + ("peak",)
+SORTABLE_FIELDS = ("id", "uploaded_at", "captured_at")
 
 
 class PhotosRepository:
     """
     Repository for SummitPhoto data access operations.
+
+    Relationships cannot be lazy-loaded on an AsyncSession, so every read
+    loads the photo's peak up front: single photos join it, and lists load
+    the peaks of all listed photos in one extra select-in query.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """
         Initialize the PhotosRepository.
 
@@ -19,22 +38,75 @@ class PhotosRepository:
         """
         self.db = db
 
-    def save(self, photo: SummitPhoto) -> SummitPhoto:
+    async def save(self, photo: SummitPhoto, job: Optional[Job] = None) -> SummitPhoto:
         """
         Save a photo to the database.
 
         Args:
             photo: The SummitPhoto to save
+            job: Job to queue for the photo in the same transaction, given
+                the photo's ID (optional)
 
         Returns:
             The saved SummitPhoto with database ID assigned
         """
-        self.db.add(photo)
-        self.db.commit()
-        self.db.refresh(photo)
+        async with db_writer.lock():
+            self.db.add(photo)
+            await self._commit_with_jobs([photo], [job])
+
+        await self.db.refresh(photo, attribute_names=["id", "peak"])
         return photo
 
-    def get_by_id(self, photo_id: int) -> Optional[SummitPhoto]:
+    async def save_all(
+        self,
+        photos: Sequence[SummitPhoto],
+        jobs: Sequence[Optional[Job]] = (),
+    ) -> List[SummitPhoto]:
+        """
+        Save several photos to the database in one transaction.
+
+        Args:
+            photos: The SummitPhotos to save
+            jobs: Job to queue for each photo in the same transaction, by
+                position, or None; each job is given its photo's ID
+                (optional)
+
+        Returns:
+            The saved SummitPhotos with database IDs assigned and peaks
+            loaded, in the same order
+        """
+        async with db_writer.lock():
+            self.db.add_all(photos)
+            await self._commit_with_jobs(photos, jobs)
+
+        ids = [photo.id for photo in photos]
+        results = await self.db.exec(
+            select(SummitPhoto)
+            .where(SummitPhoto.id.in_(ids))
+            .options(selectinload(SummitPhoto.peak))
+            .execution_options(populate_existing=True)
+        )
+        saved = {photo.id: photo for photo in results.all()}
+        return [saved[photo_id] for photo_id in ids]
+
+    async def _commit_with_jobs(
+        self, photos: Sequence[SummitPhoto], jobs: Sequence[Optional[Job]]
+    ) -> None:
+        """Commit added photos together with the jobs queued for them, so a
+        photo is never saved without its job."""
+        try:
+            if any(job is not None for job in jobs):
+                await self.db.flush()
+                for photo, job in zip(photos, jobs):
+                    if job is not None:
+                        job.photo_id = photo.id
+                        self.db.add(job)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+    async def get_by_id(self, photo_id: int) -> Optional[SummitPhoto]:
         """
         Get a specific photo by ID.
 
@@ -44,35 +116,263 @@ class PhotosRepository:
         Returns:
             SummitPhoto if found, None otherwise
         """
-        return self.db.get(SummitPhoto, photo_id)
+        return await self.db.get(
+            SummitPhoto, photo_id, options=[joinedload(SummitPhoto.peak)]
+        )
 
-    def get_all(
-        self, sort_by: Optional[str] = None, order: Optional[str] = None
-    ) -> List[SummitPhoto]:
+    async def get_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        order: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
         """
-        Get all photos from the database, optionally sorted.
+        Get one page of photos using keyset pagination.
+
+        Photos are ordered by the sort column with NULLs last, then by ID,
+        both in the requested direction. The cursor holds the sort and the
+        keys of the last row, so every page is a range scan starting where
+        the previous one ended, however deep the page is. Raises ValueError
+        for an invalid cursor, an unknown field or a sort field that is not
+        in SORTABLE_FIELDS.
 
         Args:
-            sort_by: Field to sort by (optional)
-            order: Sort order 'desc' for descending, otherwise ascending (SQL default)
+            limit: Maximum number of photos to return
+            cursor: Cursor returned with the previous page (optional)
+            sort_by: Field to sort by (optional, ID order if omitted)
+            order: Sort order 'desc' for descending, otherwise ascending
+            fields: Fields to load (optional, every field and the peak if omitted)
 
         Returns:
-            List of SummitPhoto objects
+            Tuple of the photos and the cursor of the next page, or None on
+            the last page. Photos are SummitPhoto objects, or dictionaries of
+            the requested fields when fields is given.
         """
-        statement = select(SummitPhoto)
+        sort_by = sort_by if self._check_sort(sort_by) != "id" else None
+        descending = order == "desc"
+        position = self._position(cursor, sort_by, descending) if cursor else None
+
+        if fields is None:
+            statement = select(SummitPhoto).options(selectinload(SummitPhoto.peak))
+        else:
+            unknown = set(fields) - set(PHOTO_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+
+            columns = ["id", *(f for f in fields if f != "peak")]
+            if sort_by:
+                columns.append(sort_by)
+            if "peak" in fields:
+                columns.append("peak_id")
+            statement = sqlalchemy.select(
+                *(getattr(SummitPhoto, c) for c in dict.fromkeys(columns))
+            )
+
+        rows: List[Any] = []
+        for where, order_by in self._segments(sort_by, descending, position):
+            segment = statement.order_by(*order_by).limit(limit + 1 - len(rows))
+            if where is not None:
+                segment = segment.where(where)
+
+            results = await self.db.exec(segment)
+            rows.extend(results.all() if fields is None else results.mappings().all())
+            if len(rows) > limit:
+                break
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._cursor(rows[-1], sort_by, descending)
+
+        if fields is None:
+            return list(rows), next_cursor
+
+        items = [
+            {f: row[f] for f in dict.fromkeys(["id", *fields]) if f != "peak"}
+            for row in rows
+        ]
+        if "peak" in fields:
+            peaks = await self._get_peaks({row["peak_id"] for row in rows})
+            for item, row in zip(items, rows):
+                item["peak"] = peaks.get(row["peak_id"])
+
+        return items, next_cursor
+
+    def _cursor(self, row: Any, sort_by: Optional[str], descending: bool) -> str:
+        """Encode the keyset position of a row as a cursor."""
+        if isinstance(row, Mapping):
+            photo_id, value = row["id"], row[sort_by] if sort_by else None
+        else:
+            photo_id, value = row.id, getattr(row, sort_by) if sort_by else None
 
-        if sort_by and hasattr(SummitPhoto, sort_by):
+        return encode_cursor(
+            {
+                "sort_by": sort_by,
+                "order": "desc" if descending else "asc",
+                "value": value.isoformat() if isinstance(value, datetime) else value,
+                "id": photo_id,
+            }
+        )
+
+    def _check_sort(self, sort_by: Optional[str]) -> Optional[str]:
+        """Reject sort fields without a matching index."""
+        if sort_by is not None and sort_by not in SORTABLE_FIELDS:
+            raise ValueError(
+                f"Cannot sort by '{sort_by}'. "
+                f"Sortable fields: {', '.join(SORTABLE_FIELDS)}."
+            )
+        return sort_by
+
+    def _position(
+        self, cursor: str, sort_by: Optional[str], descending: bool
+    ) -> Dict[str, Any]:
+        """Decode a cursor and check that it belongs to the requested sort."""
+        position = decode_cursor(cursor)
+        if (
+            position.get("sort_by") != sort_by
+            or position.get("order") != ("desc" if descending else "asc")
+            or not isinstance(position.get("id"), int)
+        ):
+            raise ValueError("Cursor does not match the requested sort order.")
+
+        value = position.get("value")
+        if sort_by and value is not None:
             column = getattr(SummitPhoto, sort_by)
-            statement = (
-                statement.order_by(desc(column))
-                if order == "desc"
-                else statement.order_by(column)
+            if column.type.python_type is datetime:
+                try:
+                    position["value"] = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise ValueError("Invalid cursor.")
+
+        return position
+
+    def _segments(
+        self,
+        sort_by: Optional[str],
+        descending: bool,
+        position: Optional[Dict[str, Any]],
+    ) -> List[Tuple[Any, List[Any]]]:
+        """
+        Split a keyset sort into range scans over the (column, id) indexes.
+
+        NULLs of a nullable sort column come after every value, in ID order,
+        in both directions. They are read by a second scan so that neither
+        scan needs an expression in its ORDER BY and both can seek straight
+        to the cursor position.
+
+        Returns:
+            (WHERE clause or None, ORDER BY clauses) for each scan, in order
+        """
+
+        def directed(column):
+            return desc(column) if descending else column
+
+        def after(key, bound):
+            return key < bound if descending else key > bound
+
+        id_order = [directed(SummitPhoto.id)]
+        if not sort_by:
+            where = after(SummitPhoto.id, position["id"]) if position else None
+            return [(where, id_order)]
+
+        column = getattr(SummitPhoto, sort_by)
+        if position is not None and position["value"] is None:
+            return [
+                (
+                    and_(column.is_(None), after(SummitPhoto.id, position["id"])),
+                    id_order,
+                )
+            ]
+
+        if position is None:
+            where = column.is_not(None) if column.nullable else None
+        else:
+            where = after(
+                tuple_(column, SummitPhoto.id),
+                tuple_(literal(position["value"], column.type), position["id"]),
+            )
+
+        segments = [(where, [directed(column), *id_order])]
+        if column.nullable:
+            segments.append((column.is_(None), id_order))
+
+        return segments
+
+    async def _get_peaks(self, peak_ids: set) -> Dict[int, Peak]:
+        """Load the peaks with the given IDs in one query."""
+        peak_ids.discard(None)
+        if not peak_ids:
+            return {}
+
+        results = await self.db.exec(select(Peak).where(Peak.id.in_(peak_ids)))
+        return {peak.id: peak for peak in results.all()}
+
+    async def is_file_processed(self, file_name: str) -> bool:
+        """
+        Check whether a photo stored in a file has been processed, which
+        other photos sharing the content-addressed file can rely on.
+
+        Args:
+            file_name: Stored file name
+
+        Returns:
+            True if a photo of the file is ready
+        """
+        results = await self.db.exec(
+            select(SummitPhoto.id)
+            .where(
+                SummitPhoto.file_name == file_name,
+                SummitPhoto.processing_status == PROCESSING_READY,
             )
+            .limit(1)
+        )
+        return results.first() is not None
 
-        results = self.db.exec(statement).all()
-        return results
+    async def get_processed_files(self, file_names: Sequence[str]) -> Set[str]:
+        """
+        Find which of several stored files have been processed for a photo
+        (see is_file_processed).
 
-    def delete(self, photo_id: int) -> bool:
+        Args:
+            file_names: Stored file names
+
+        Returns:
+            The file names with a photo that is ready
+        """
+        results = await self.db.exec(
+            select(SummitPhoto.file_name)
+            .where(
+                SummitPhoto.file_name.in_(set(file_names)),
+                SummitPhoto.processing_status == PROCESSING_READY,
+            )
+            .distinct()
+        )
+        return set(results.all())
+
+    async def set_processing_status(self, photo_id: int, status: str) -> bool:
+        """
+        Update the processing status of a photo.
+
+        Args:
+            photo_id: ID of the photo
+            status: The new processing status
+
+        Returns:
+            True if the photo was updated, False if not found
+        """
+        photo = await self.db.get(SummitPhoto, photo_id)
+        if not photo:
+            return False
+
+        async with db_writer.lock():
+            photo.processing_status = status
+            await self.db.commit()
+
+        return True
+
+    async def delete(self, photo_id: int) -> bool:
         """
         Delete a photo by ID.
 
@@ -82,10 +382,112 @@ class PhotosRepository:
         Returns:
             True if photo was deleted, False if not found
         """
-        photo = self.get_by_id(photo_id)
+        photo = await self.get_by_id(photo_id)
         if not photo:
             return False
 
-        self.db.delete(photo)
-        self.db.commit()
+        async with db_writer.lock():
+            await self.db.delete(photo)
+            await self.db.commit()
+
         return True
+
+    async def delete_many(
+        self, photo_ids: Sequence[int]
+    ) -> Tuple[List[int], List[PhotoTombstone]]:
+        """
+        Delete several photos in one transaction, leaving a tombstone for
+        each stored file that no photo uses any more.
+
+        A content-addressed file loses a reference for every deleted photo
+        in the same transaction, so a file only gets a tombstone once its
+        last reference is gone. The files of the tombstones are for the
+        caller to delete from storage, after which the tombstones are
+        removed with delete_tombstones; if that never happens, the
+        tombstones are left for a later purge.
+
+        Args:
+            photo_ids: IDs of the photos to delete
+
+        Returns:
+            IDs of the photos that were deleted, and the tombstones of the
+            files to delete
+        """
+        async with db_writer.lock():
+            # Only rows this statement deleted release their references,
+            # even if another process deletes the same photos at once
+            results = await self.db.execute(
+                delete(SummitPhoto)
+                .where(SummitPhoto.id.in_(set(photo_ids)))
+                .returning(SummitPhoto.id, SummitPhoto.file_name)
+            )
+            rows = results.all()
+            if not rows:
+                await self.db.rollback()
+                return [], []
+
+            deleted_ids = sorted(photo_id for photo_id, _ in rows)
+            references = Counter(file_name for _, file_name in rows)
+
+            for file_name, count in list(references.items()):
+                results = await self.db.execute(
+                    update(Blob)
+                    .where(Blob.file_name == file_name)
+                    .values(ref_count=Blob.ref_count - count)
+                    .returning(Blob.ref_count)
+                    .execution_options(synchronize_session=False)
+                )
+                remaining = results.scalar_one_or_none()
+                if remaining is not None and remaining > 0:
+                    del references[file_name]
+                elif remaining is not None:
+                    await self.db.execute(
+                        delete(Blob).where(
+                            Blob.file_name == file_name, Blob.ref_count <= 0
+                        )
+                    )
+
+            tombstones = [PhotoTombstone(file_name=name) for name in references]
+            self.db.add_all(tombstones)
+            await self.db.commit()
+
+        return deleted_ids, tombstones
+
+    async def get_tombstones(
+        self, created_before: datetime, limit: int = 100
+    ) -> List[PhotoTombstone]:
+        """
+        Get the tombstones of files whose deletion did not finish.
+
+        Args:
+            created_before: Only tombstones created before this time
+            limit: Maximum number of tombstones to return
+
+        Returns:
+            The oldest matching tombstones
+        """
+        results = await self.db.exec(
+            select(PhotoTombstone)
+            .where(PhotoTombstone.created_at < created_before)
+            .order_by(PhotoTombstone.created_at, PhotoTombstone.id)
+            .limit(limit)
+        )
+        return list(results.all())
+
+    async def delete_tombstones(self, tombstones: Sequence[PhotoTombstone]) -> None:
+        """
+        Remove the tombstones of files that were deleted from storage.
+
+        Args:
+            tombstones: The tombstones to remove
+        """
+        if not tombstones:
+            return
+
+        async with db_writer.lock():
+            await self.db.execute(
+                delete(PhotoTombstone).where(
+                    PhotoTombstone.id.in_([tombstone.id for tombstone in tombstones])
+                )
+            )
+            await self.db.commit()
@@ -1,10 +1,48 @@
-from typing import List, Optional
+import asyncio
+import logging
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
 
 from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.photos.models import SummitPhoto, SummitPhotoCreate
+from src.jobs.models import Job
+from src.jobs.settings import jobs_settings
+from src.photos.derivatives import (
+    derivative_name,
+    derivative_names,
+    is_derivative,
+    render_derivative,
+    render_derivatives,
+)
+from src.photos.exif import EXIF_HEAD_SIZE, extract_metadata
+from src.photos.models import (
+    PROCESSING_PENDING,
+    PROCESSING_READY,
+    PhotoTombstone,
+    SummitPhoto,
+    SummitPhotoBatchItem,
+    SummitPhotoCreate,
+    SummitPhotoPage,
+    SummitPhotoRead,
+)
 from src.photos.repository import PhotosRepository
-from src.uploads.service import UploadsService
+from src.uploads.capture import HeadCapturingUpload
+from src.uploads.models import ResumableUpload
+from src.uploads.repository import BlobsRepository
+from src.uploads.service import UploadsService, blob_lock
+from src.uploads.services.storage import StorageInterface
+from src.uploads.settings import uploads_settings
+
+logger = logging.getLogger(__name__)
+
+# Job kind of the post-upload processing of a photo
+PROCESS_PHOTO_JOB = "photo.process"
+
+# Age after which the files of a deletion are assumed to have been abandoned
+TOMBSTONE_GRACE_SECONDS = 60
 
 
 class PhotosService:
@@ -33,6 +71,16 @@ class PhotosService:
         """
         Upload a photo file and store it in the database with the provided metadata.
 
+        Capture time, GPS position and altitude are read from the EXIF data
+        at the start of the file as it is stored, and fill in any of those
+        fields missing from summit_photo_create. Values sent by the client
+        take precedence, since they may have been corrected by the user.
+        The photo is returned as soon as it is stored, with a pending
+        processing status; resized copies for the gallery are generated by a
+        background job. A photo whose content-addressed file was already
+        processed for another photo shares its derivatives and is ready
+        at once.
+
         Args:
             file: The uploaded photo file
             summit_photo_create: Metadata for the photo (captured_at, latitude, longitude, altitude, peak_id, distance_to_peak)
@@ -40,16 +88,259 @@ class PhotosService:
         Returns:
             SummitPhoto: The saved photo object with peak information
         """
-        path = await self.uploads_service.save_file(file, content_type_prefix="image/")
+        upload = HeadCapturingUpload(file, EXIF_HEAD_SIZE)
+        path = await self.uploads_service.save_file(
+            upload, content_type_prefix="image/"
+        )
+
+        return await self._create_photo(path, upload.head, summit_photo_create)
+
+    async def upload_stored_photo(
+        self, upload: ResumableUpload, summit_photo_create: SummitPhotoCreate
+    ) -> SummitPhoto:
+        """
+        Create a photo from a finished resumable upload, like upload_photo
+        does for a file sent in one request. The received file is given its
+        permanent name without being copied.
+
+        Args:
+            upload: The complete resumable upload
+            summit_photo_create: Metadata for the photo (captured_at, latitude, longitude, altitude, peak_id, distance_to_peak)
+
+        Returns:
+            SummitPhoto: The saved photo object with peak information
+        """
+        if upload.offset < upload.length:
+            raise ValueError("Upload is not complete.")
+
+        head = await self.uploads_service.read_file(upload.file_name, EXIF_HEAD_SIZE)
+        if head is None:
+            raise ValueError("Uploaded file not found.")
+
+        path = await self.uploads_service.adopt_file(
+            upload.file_name,
+            upload.filename,
+            upload.content_type,
+            content_type_prefix="image/",
+        )
+
+        return await self._create_photo(path, head, summit_photo_create)
+
+    async def upload_photos(
+        self,
+        files: Sequence[UploadFile],
+        summit_photo_creates: Sequence[SummitPhotoCreate],
+        concurrency: int = uploads_settings.batch_concurrency,
+    ) -> List[SummitPhotoBatchItem]:
+        """
+        Upload several photo files at once, each like upload_photo does.
+
+        Files are stored a few at a time, and the photos of all files that
+        were stored are saved in one transaction, together with their
+        processing jobs. A file that cannot be stored is reported without
+        affecting the others; if the photos cannot be saved, every stored
+        file is deleted again and reported as failed.
+
+        Args:
+            files: The uploaded photo files
+            summit_photo_creates: Metadata of the files, by position; files
+                without an entry get their metadata from EXIF data only
+            concurrency: Number of files stored at a time
+
+        Returns:
+            List[SummitPhotoBatchItem]: Outcome of each file, in order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def store(file: UploadFile) -> Tuple[str, bytes]:
+            async with semaphore:
+                upload = HeadCapturingUpload(file, EXIF_HEAD_SIZE)
+                path = await self.uploads_service.save_file(
+                    upload, content_type_prefix="image/"
+                )
+                return path, upload.head
+
+        stored = await asyncio.gather(
+            *(store(file) for file in files), return_exceptions=True
+        )
+
+        items = [
+            SummitPhotoBatchItem(index=index, filename=file.filename)
+            for index, file in enumerate(files)
+        ]
+        photos = []
+        for item, result in zip(items, stored):
+            if isinstance(result, BaseException):
+                item.error = str(result) or type(result).__name__
+                continue
+
+            path, head = result
+            create = (
+                summit_photo_creates[item.index]
+                if item.index < len(summit_photo_creates)
+                else SummitPhotoCreate()
+            )
+            photos.append((item, self._new_photo(path, head, create)))
 
-        photo = SummitPhoto(
+        if not photos:
+            return items
+
+        processed = await self.photos_repository.get_processed_files(
+            [photo.file_name for _, photo in photos]
+        )
+        for _, photo in photos:
+            if photo.file_name in processed:
+                photo.processing_status = PROCESSING_READY
+
+        try:
+            saved = await self.photos_repository.save_all(
+                [photo for _, photo in photos],
+                [
+                    None if photo.file_name in processed else self._process_job()
+                    for _, photo in photos
+                ],
+            )
+        except Exception:
+            for item, photo in photos:
+                await self.uploads_service.delete_file(photo.file_name)
+                item.error = "Failed to save photo."
+            return items
+
+        for (item, _), photo in zip(photos, saved):
+            item.photo = SummitPhotoRead.model_validate(photo, from_attributes=True)
+
+        return items
+
+    async def _create_photo(
+        self, path: str, head: bytes, summit_photo_create: SummitPhotoCreate
+    ) -> SummitPhoto:
+        """Save the photo of a stored file and queue its processing."""
+        photo = self._new_photo(path, head, summit_photo_create)
+        processed = await self.photos_repository.is_file_processed(photo.file_name)
+        if processed:
+            photo.processing_status = PROCESSING_READY
+
+        job = None if processed else self._process_job()
+        return await self.photos_repository.save(photo, job)
+
+    def _process_job(self) -> Job:
+        """Processing job of a new photo, queued when the photo is saved."""
+        return Job(kind=PROCESS_PHOTO_JOB, max_attempts=jobs_settings.max_attempts)
+
+    def _new_photo(
+        self, path: str, head: bytes, summit_photo_create: SummitPhotoCreate
+    ) -> SummitPhoto:
+        """Pending photo of a stored file, with metadata from the client and EXIF."""
+        metadata = extract_metadata(head).model_copy(
+            update=summit_photo_create.model_dump(exclude_none=True)
+        )
+
+        return SummitPhoto(
             file_name=path.split("/")[-1],
-            **summit_photo_create.model_dump(),
+            processing_status=PROCESSING_PENDING,
+            **metadata.model_dump(),
         )
 
-        saved_photo = self.photos_repository.save(photo)
+    async def process_photo(
+        self, photo_id: int, executor: Optional[Executor] = None
+    ) -> None:
+        """
+        Run the post-upload processing of a photo and mark it ready. Raises
+        ValueError if the photo does not exist or its file is missing or
+        cannot be decoded.
+
+        Args:
+            photo_id: ID of the photo
+            executor: Executor for decoding and resizing (optional, a worker
+                thread if omitted)
+        """
+        photo = await self.photos_repository.get_by_id(photo_id)
+        if not photo:
+            raise ValueError("Photo not found.")
+
+        if not await self.create_derivatives(photo.file_name, executor):
+            raise ValueError("Photo file is missing or is not a readable image.")
+
+        await self.photos_repository.set_processing_status(photo_id, PROCESSING_READY)
 
-        return saved_photo
+    async def create_derivatives(
+        self, file_name: str, executor: Optional[Executor] = None
+    ) -> bool:
+        """
+        Generate every derivative size and format of a stored photo and store
+        them next to it.
+
+        Args:
+            file_name: Stored file name of the original photo
+            executor: Executor for decoding and resizing (optional, a worker
+                thread if omitted)
+
+        Returns:
+            bool: True if the derivatives were stored, False if the original
+            is missing or cannot be decoded as an image
+        """
+        original = await self.uploads_service.read_file(file_name)
+        if original is None:
+            return False
+
+        try:
+            derivatives = await asyncio.get_running_loop().run_in_executor(
+                executor, render_derivatives, original
+            )
+        except ValueError:
+            return False
+
+        for (size, format), data in derivatives.items():
+            await self.uploads_service.save_bytes(
+                data, derivative_name(file_name, size, format)
+            )
+
+        return True
+
+    async def get_derivative(
+        self, photo_id: int, file_name: str, size: int, format: str
+    ) -> Optional[bytes]:
+        """
+        Get a resized copy of a photo. Derivatives that were never generated,
+        such as those of photos uploaded before derivatives existed, are
+        rendered from the original and stored on first request.
+
+        Args:
+            photo_id: ID of the photo
+            file_name: Stored file name of the photo the derivative was asked
+                for, so a photo that reused the ID of a deleted one is not
+                mistaken for it
+            size: Longest edge in pixels, one of DERIVATIVE_SIZES
+            format: Format, one of DERIVATIVE_FORMATS
+
+        Returns:
+            Optional[bytes]: The encoded derivative, or None if the size or
+            format is not offered, the photo is missing or has another file,
+            or its original is missing or cannot be decoded
+        """
+        if not is_derivative(size, format):
+            return None
+
+        photo = await self.photos_repository.get_by_id(photo_id)
+        if not photo or photo.file_name != file_name:
+            return None
+
+        name = derivative_name(photo.file_name, size, format)
+        data = await self.uploads_service.read_file(name)
+        if data is not None:
+            return data
+
+        original = await self.uploads_service.read_file(photo.file_name)
+        if original is None:
+            return None
+
+        try:
+            data = await asyncio.to_thread(render_derivative, original, size, format)
+        except ValueError:
+            return None
+
+        await self.uploads_service.save_bytes(data, name)
+        return data
 
     async def get_photo_by_id(self, photo_id: int) -> Optional[SummitPhoto]:
         """
@@ -61,26 +352,40 @@ class PhotosService:
         Returns:
             SummitPhoto with peak information if found, None otherwise
         """
-        return self.photos_repository.get_by_id(photo_id)
+        return await self.photos_repository.get_by_id(photo_id)
 
-    async def get_all_photos(
-        self, sort_by: Optional[str] = None, order: Optional[str] = None
-    ) -> List[SummitPhoto]:
+    async def get_photos_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        order: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> SummitPhotoPage:
         """
-        Get all photos from the database, optionally sorted.
+        Get one page of photos. Raises ValueError for an invalid cursor or
+        an unknown field.
 
         Args:
+            limit: Maximum number of photos to return
+            cursor: Cursor returned with the previous page (optional)
             sort_by: Field to sort by (optional)
-            order: Sort order 'desc' for descending, otherwise ascending (SQL default)
+            order: Sort order 'desc' for descending, otherwise ascending
+            fields: Fields to include (optional, all fields if omitted)
 
         Returns:
-            List[SummitPhoto]: List of all photos with peak information
+            SummitPhotoPage: The photos and the cursor of the next page
         """
-        return self.photos_repository.get_all(sort_by=sort_by, order=order)
+        photos, next_cursor = await self.photos_repository.get_page(
+            limit, cursor=cursor, sort_by=sort_by, order=order, fields=fields
+        )
+
+        return SummitPhotoPage(items=photos, next_cursor=next_cursor)
 
     async def delete_photo(self, photo_id: int) -> bool:
         """
-        Delete a photo by ID (both file and database record)
+        Delete a photo by ID (file, derivatives and database record), like
+        delete_photos does.
 
         Args:
             photo_id: ID of the photo to delete
@@ -88,14 +393,119 @@ class PhotosService:
         Returns:
             bool: True if deletion was successful
         """
-        photo = self.photos_repository.get_by_id(photo_id)
-        if not photo:
-            return False
+        return photo_id in await self.delete_photos([photo_id])
+
+    async def delete_photos(
+        self,
+        photo_ids: Sequence[int],
+        concurrency: int = uploads_settings.batch_concurrency,
+    ) -> List[int]:
+        """
+        Delete several photos with their files and derivatives.
+
+        The photos are deleted in one transaction that leaves a tombstone for
+        each file no other photo uses, and the files are deleted afterwards.
+        If that is interrupted, the tombstones remain for purge_tombstones,
+        so neither photos without files nor files without photos are left.
+        A content-addressed file and its derivatives are kept while other
+        photos still use them.
+
+        Args:
+            photo_ids: IDs of the photos to delete
+            concurrency: Number of files whose deletion runs at a time
 
-        file_deleted = await self.uploads_service.delete_file(photo.file_name)
+        Returns:
+            List[int]: IDs of the photos that were deleted, others were not
+            found
+        """
+        # Released references are ordered with new ones, as in delete_file
+        async with blob_lock.lock():
+            deleted_ids, tombstones = await self.photos_repository.delete_many(
+                photo_ids
+            )
 
-        if file_deleted:
-            db_deleted = self.photos_repository.delete(photo_id)
-            return db_deleted
+        await self._purge(tombstones, concurrency)
+        return deleted_ids
+
+    async def purge_tombstones(
+        self,
+        created_before: datetime,
+        concurrency: int = uploads_settings.batch_concurrency,
+    ) -> int:
+        """
+        Delete the files of deleted photos whose deletion was interrupted.
+
+        Args:
+            created_before: Only files of photos deleted before this time,
+                so deletions still in progress are left alone
+            concurrency: Number of files whose deletion runs at a time
+
+        Returns:
+            int: Number of tombstones purged
+        """
+        count = 0
+        while tombstones := await self.photos_repository.get_tombstones(created_before):
+            purged = await self._purge(tombstones, concurrency)
+            count += purged
+            if purged < len(tombstones):
+                # Storage is failing; the rest is retried at the next purge
+                break
+
+        return count
+
+    async def _purge(
+        self, tombstones: Sequence[PhotoTombstone], concurrency: int
+    ) -> int:
+        """Delete the files of tombstones and remove the tombstones of those
+        that succeeded."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def purge(tombstone: PhotoTombstone) -> None:
+            async with semaphore:
+                await self.uploads_service.purge_files(
+                    tombstone.file_name,
+                    [tombstone.file_name] + derivative_names(tombstone.file_name),
+                )
+
+        results = await asyncio.gather(
+            *(purge(tombstone) for tombstone in tombstones), return_exceptions=True
+        )
+        purged = [
+            tombstone
+            for tombstone, result in zip(tombstones, results)
+            if not isinstance(result, BaseException)
+        ]
+        await self.photos_repository.delete_tombstones(purged)
+        return len(purged)
+
+
+async def purge_deleted_photo_files(
+    engine: AsyncEngine,
+    storage: StorageInterface,
+    interval: float = uploads_settings.tombstone_gc_interval,
+) -> None:
+    """
+    Delete the files left behind by interrupted photo deletions every
+    interval seconds until cancelled, starting right away.
+
+    Args:
+        engine: Engine of the database holding the photos
+        storage: Storage provider of the files
+        interval: Seconds between purges
+    """
+    while True:
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                uploads_service = UploadsService(
+                    storage,
+                    BlobsRepository(db) if uploads_settings.content_addressed else None,
+                )
+                service = PhotosService(uploads_service, PhotosRepository(db))
+                await service.purge_tombstones(
+                    datetime.utcnow() - timedelta(seconds=TOMBSTONE_GRACE_SECONDS)
+                )
+        except Exception:
+            # E.g. the database is unavailable; try again at the next interval
+            logger.exception("Could not purge the files of deleted photos")
 
-        return False
+        await asyncio.sleep(interval)
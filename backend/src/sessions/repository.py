@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
 from uuid import UUID
 
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.database.core import db_writer
 from src.sessions.models import Session as UserSession
 
 
@@ -11,7 +13,7 @@ class SessionsRepository:
     Repository for managing user sessions.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """
         Initialize the SessionsRepository.
 
@@ -20,7 +22,7 @@ class SessionsRepository:
         """
         self.db = db
 
-    def create(self, user_id: int, expires_in_days: int) -> UserSession:
+    async def create(self, user_id: int, expires_in_days: int) -> UserSession:
         """
         Create a new user session.
 
@@ -36,13 +38,15 @@ class SessionsRepository:
             expires_at=datetime.utcnow() + timedelta(days=expires_in_days),
         )
 
-        self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
+        async with db_writer.lock():
+            self.db.add(session)
+            await self.db.commit()
+
+        await self.db.refresh(session)
 
         return session
 
-    def get_active_by_id(self, session_id: UUID) -> UserSession | None:
+    async def get_active_by_id(self, session_id: UUID) -> UserSession | None:
         """
         Get an active session by ID.
 
@@ -58,17 +62,19 @@ class SessionsRepository:
             UserSession.expires_at > datetime.utcnow(),
         )
 
-        return self.db.exec(statement).first()
+        result = await self.db.exec(statement)
+        return result.first()
 
-    def invalidate_by_id(self, session_id: UUID) -> None:
+    async def invalidate_by_id(self, session_id: UUID) -> None:
         """
         Invalidate a session.
 
         Args:
             session_id: UUID of the session to invalidate
         """
-        session = self.get_active_by_id(session_id)
+        session = await self.get_active_by_id(session_id)
 
         if session:
-            session.is_active = False
-            self.db.commit()
+            async with db_writer.lock():
+                session.is_active = False
+                await self.db.commit()
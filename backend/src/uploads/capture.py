@@ -0,0 +1,114 @@
+"""
+Upload file wrappers that inspect the stream as it is read
+"""
+
+import asyncio
+import hashlib
+
+from fastapi import UploadFile
+
+
+class HeadCapturingUpload:
+    """
+    Wraps an UploadFile and keeps a copy of its first bytes while it is read.
+
+    Storage providers stream the wrapper like the UploadFile itself, and
+    the captured head can be inspected afterwards, e.g. for EXIF data,
+    without reading the stored file again.
+    """
+
+    def __init__(self, file: UploadFile, head_size: int):
+        """
+        Initialize the HeadCapturingUpload.
+
+        Args:
+            file: The uploaded file to wrap
+            head_size: Number of leading bytes to keep
+        """
+        self.file = file
+        self.head_size = head_size
+        self._head = bytearray()
+
+    @property
+    def filename(self):
+        return self.file.filename
+
+    @property
+    def content_type(self):
+        return self.file.content_type
+
+    @property
+    def head(self) -> bytes:
+        """The leading bytes read so far, at most head_size of them."""
+        return bytes(self._head)
+
+    async def read(self, size: int = -1) -> bytes:
+        """
+        Read from the wrapped file, capturing the head.
+
+        Args:
+            size: Maximum number of bytes to read, -1 for all
+
+        Returns:
+            The bytes read
+        """
+        data = await self.file.read(size)
+        missing = self.head_size - len(self._head)
+        if missing > 0:
+            self._head += data[:missing]
+        return data
+
+    async def close(self) -> None:
+        await self.file.close()
+
+
+class HashingUpload:
+    """
+    Wraps an UploadFile and computes a digest of its content while it is read.
+
+    Hashing runs in a worker thread, so large uploads are digested without
+    holding up the event loop.
+    """
+
+    def __init__(self, file: UploadFile, algorithm: str = "sha256"):
+        """
+        Initialize the HashingUpload.
+
+        Args:
+            file: The uploaded file to wrap
+            algorithm: hashlib algorithm name (default: SHA-256)
+        """
+        self.file = file
+        self.size = 0
+        self._hash = hashlib.new(algorithm)
+
+    @property
+    def filename(self):
+        return self.file.filename
+
+    @property
+    def content_type(self):
+        return self.file.content_type
+
+    def hexdigest(self) -> str:
+        """Hex digest of the bytes read so far."""
+        return self._hash.hexdigest()
+
+    async def read(self, size: int = -1) -> bytes:
+        """
+        Read from the wrapped file, hashing the data.
+
+        Args:
+            size: Maximum number of bytes to read, -1 for all
+
+        Returns:
+            The bytes read
+        """
+        data = await self.file.read(size)
+        if data:
+            await asyncio.to_thread(self._hash.update, data)
+            self.size += len(data)
+        return data
+
+    async def close(self) -> None:
+        await self.file.close()
@@ -0,0 +1,207 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+
+from src.uploads.dependencies import resumable_uploads_service_dep
+from src.uploads.models import (
+    DirectUploadRead,
+    ResumableUpload,
+    ResumableUploadCreate,
+    ResumableUploadRead,
+    StorageCacheStats,
+)
+from src.uploads.services.cached_storage import CachedStorage
+from src.uploads.services.factory import get_storage
+from src.uploads.services.storage import StorageInterface
+
+router = APIRouter(prefix="/api/uploads", tags=["uploads"])
+
+# Content type of the body of a PATCH request, as in the tus protocol
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+async def _get_upload(resumable_uploads_service, upload_id: str) -> ResumableUpload:
+    upload = await resumable_uploads_service.get(upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    return upload
+
+
+@router.post("/", response_model=ResumableUploadRead, status_code=201, tags=["uploads"])
+async def create_upload(
+    upload_create: ResumableUploadCreate,
+    response: Response,
+    resumable_uploads_service: resumable_uploads_service_dep,
+):
+    """
+    Start a resumable upload of a photo
+
+    Args:
+        upload_create: Name, content type and length in bytes of the file
+
+    Returns:
+        ResumableUploadRead: The new upload, with the URL to send its data
+        to in the Location header
+    """
+    try:
+        upload = await resumable_uploads_service.create(
+            upload_create, content_type_prefix="image/"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response.headers["Location"] = f"{router.prefix}/{upload.id}"
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return upload
+
+
+@router.get("/cache", response_model=StorageCacheStats, tags=["uploads"])
+async def get_cache_stats(storage: StorageInterface = Depends(get_storage)):
+    """
+    Get the usage of the local cache of stored files
+
+    Returns:
+        StorageCacheStats: Hits, misses, reads that waited on another read's fetch, evictions and size of the cache since the application started
+    """
+    if not isinstance(storage, CachedStorage):
+        raise HTTPException(status_code=404, detail="Storage is not cached")
+
+    return StorageCacheStats(
+        hits=storage.hits,
+        misses=storage.misses,
+        coalesced=storage.coalesced,
+        evictions=storage.evictions,
+        entries=storage.entries,
+        size=storage.size,
+        max_size=storage.max_size,
+    )
+
+
+@router.head("/{upload_id}", tags=["uploads"])
+async def get_upload_offset(
+    upload_id: str, resumable_uploads_service: resumable_uploads_service_dep
+):
+    """
+    Get the offset to resume an upload from
+
+    Args:
+        upload_id: ID of the upload
+
+    Returns:
+        Response: Empty, with the Upload-Offset and Upload-Length headers
+    """
+    upload = await _get_upload(resumable_uploads_service, upload_id)
+
+    return Response(
+        headers={
+            "Upload-Offset": str(upload.offset),
+            "Upload-Length": str(upload.length),
+            "Cache-Control": "no-store",
+        }
+    )
+
+
+@router.get("/{upload_id}", response_model=ResumableUploadRead, tags=["uploads"])
+async def get_upload(
+    upload_id: str, resumable_uploads_service: resumable_uploads_service_dep
+):
+    """
+    Get the state of an upload
+
+    Args:
+        upload_id: ID of the upload
+
+    Returns:
+        ResumableUploadRead: The upload, with the number of bytes received
+    """
+    return await _get_upload(resumable_uploads_service, upload_id)
+
+
+@router.patch("/{upload_id}", status_code=204, tags=["uploads"])
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    resumable_uploads_service: resumable_uploads_service_dep,
+    upload_offset: int = Header(..., ge=0),
+    content_type: str = Header(...),
+):
+    """
+    Append a chunk of data to an upload
+
+    The request body is the chunk, sent with the content type
+    application/offset+octet-stream and the Upload-Offset header set to the
+    upload's current offset. If the connection drops, the data received
+    before that is kept; send a HEAD request to find where to resume.
+
+    Args:
+        upload_id: ID of the upload
+        upload_offset: Offset the chunk starts at
+
+    Returns:
+        Response: Empty, with the new offset in the Upload-Offset header
+    """
+    if content_type != CHUNK_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=415, detail=f"Chunks must be sent as {CHUNK_CONTENT_TYPE}"
+        )
+
+    upload = await _get_upload(resumable_uploads_service, upload_id)
+    if upload_offset != upload.offset:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload is at offset {upload.offset}",
+            headers={"Upload-Offset": str(upload.offset)},
+        )
+
+    try:
+        appended = await resumable_uploads_service.append(upload, request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if appended is None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload is being appended to or is at offset {upload.offset}",
+            headers={"Upload-Offset": str(upload.offset)},
+        )
+
+    return Response(status_code=204, headers={"Upload-Offset": str(appended.offset)})
+
+
+@router.post("/{upload_id}/direct", response_model=DirectUploadRead, tags=["uploads"])
+async def get_direct_upload(
+    upload_id: str, resumable_uploads_service: resumable_uploads_service_dep
+):
+    """
+    Get a URL to send the whole file of an upload straight to storage
+
+    Only available with S3 storage, before any chunk was sent. Send the file
+    with the returned method and headers, then finish the upload as usual.
+
+    Args:
+        upload_id: ID of the upload
+
+    Returns:
+        DirectUploadRead: URL, method and headers of the request to send, and when the URL expires
+    """
+    upload = await _get_upload(resumable_uploads_service, upload_id)
+
+    try:
+        return resumable_uploads_service.direct_upload(upload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/{upload_id}", status_code=204, tags=["uploads"])
+async def cancel_upload(
+    upload_id: str, resumable_uploads_service: resumable_uploads_service_dep
+):
+    """
+    Cancel an upload, deleting the data received so far
+
+    Args:
+        upload_id: ID of the upload
+    """
+    upload = await _get_upload(resumable_uploads_service, upload_id)
+    await resumable_uploads_service.cancel(upload)
+
+    return Response(status_code=204)
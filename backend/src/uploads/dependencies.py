@@ -0,0 +1,37 @@
+"""Dependency injection functions and annotations for the uploads module."""
+
+from typing import Annotated
+
+from fastapi import Depends
+
+from src.database.core import async_db_dep
+from src.uploads.repository import BlobsRepository, ResumableUploadsRepository
+from src.uploads.resumable import ResumableUploadsService
+from src.uploads.service import UploadsService
+from src.uploads.services.factory import get_storage
+from src.uploads.settings import uploads_settings
+
+
+def get_uploads_service(db: async_db_dep) -> UploadsService:
+    """
+    Provides a configured UploadsService with the configured storage,
+    storing files by content when content addressing is enabled.
+    """
+    storage = get_storage()
+    if uploads_settings.content_addressed:
+        return UploadsService(storage, BlobsRepository(db))
+
+    return UploadsService(storage)
+
+
+def get_resumable_uploads_service(
+    db: async_db_dep,
+    uploads_service: UploadsService = Depends(get_uploads_service),
+) -> ResumableUploadsService:
+    """Provides a ResumableUploadsService storing data with the UploadsService."""
+    return ResumableUploadsService(uploads_service, ResumableUploadsRepository(db))
+
+
+resumable_uploads_service_dep = Annotated[
+    ResumableUploadsService, Depends(get_resumable_uploads_service)
+]
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel
+from pydantic import Field as PydanticField
+from sqlmodel import Field, SQLModel
+
+
+class Blob(SQLModel, table=True):
+    """Database model for a content-addressed file and its reference count"""
+
+    file_name: str = Field(primary_key=True)
+    digest: str = Field(index=True)
+    size: int
+    ref_count: int = 1
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ResumableUpload(SQLModel, table=True):
+    """Database model for an upload sent in chunks that can be resumed"""
+
+    id: str = Field(default_factory=lambda: uuid4().hex, primary_key=True)
+    filename: str
+    content_type: str
+    length: int
+    offset: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+    # Held by the request appending to the upload, see ResumableUploadsRepository.lock
+    lock_token: Optional[str] = None
+    locked_until: Optional[datetime] = None
+    # What the storage keeps about the data appended so far, see StorageInterface.append
+    storage_state: Optional[str] = None
+
+    @property
+    def file_name(self) -> str:
+        """Name the received data is stored under until the upload is finished"""
+        return f"{self.id}.part"
+
+
+class ResumableUploadCreate(BaseModel):
+    """Request model for starting a resumable upload"""
+
+    filename: str = PydanticField(min_length=1)
+    content_type: str
+    length: int = PydanticField(gt=0)
+
+
+class ResumableUploadRead(BaseModel):
+    """Response model for the state of a resumable upload"""
+
+    id: str
+    filename: str
+    content_type: str
+    length: int
+    offset: int
+    expires_at: datetime
+
+
+class DirectUploadRead(BaseModel):
+    """Response model for a URL to send an upload's data straight to storage"""
+
+    url: str
+    method: str = "PUT"
+    headers: Dict[str, str]
+    expires_at: datetime
+
+
+class StorageCacheStats(BaseModel):
+    """Response model for the usage of the local cache of stored files"""
+
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+    entries: int
+    size: int
+    max_size: int
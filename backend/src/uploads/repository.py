@@ -0,0 +1,281 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.database.core import db_writer
+from src.uploads.models import Blob, ResumableUpload
+
+
+class BlobsRepository:
+    """
+    Repository for the reference counts of content-addressed files.
+
+    Counts are changed with single UPDATE statements, so references taken
+    and dropped by several application processes at once are all counted.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the BlobsRepository.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    async def get(self, file_name: str) -> Optional[Blob]:
+        """
+        Get the blob stored under a file name.
+
+        Args:
+            file_name: Name of the stored file
+
+        Returns:
+            Blob if the file is content-addressed, None otherwise
+        """
+        return await self.db.get(Blob, file_name, populate_existing=True)
+
+    async def acquire(self, file_name: str, digest: str, size: int) -> int:
+        """
+        Add a reference to a blob, recording the blob if it is new.
+
+        Args:
+            file_name: Name the blob is stored under
+            digest: Hex digest of the content
+            size: Size of the content in bytes
+
+        Returns:
+            Number of references to the blob, 1 if it is new
+        """
+        async with db_writer.lock():
+            count = await self._add_references(file_name, 1)
+            if count is None:
+                self.db.add(Blob(file_name=file_name, digest=digest, size=size))
+                try:
+                    await self.db.commit()
+                    return 1
+                except IntegrityError:
+                    # Recorded by another process in the meantime
+                    await self.db.rollback()
+                    count = await self._add_references(file_name, 1)
+            await self.db.commit()
+
+        return count
+
+    async def release(self, file_name: str) -> Optional[int]:
+        """
+        Drop a reference to a blob, forgetting the blob with its last one.
+
+        Args:
+            file_name: Name the blob is stored under
+
+        Returns:
+            Number of references left, or None if the file is not a blob
+        """
+        async with db_writer.lock():
+            remaining = await self._add_references(file_name, -1)
+            if remaining is None:
+                await self.db.rollback()
+                return None
+
+            if remaining <= 0:
+                await self.db.execute(
+                    delete(Blob).where(Blob.file_name == file_name, Blob.ref_count <= 0)
+                )
+            await self.db.commit()
+
+        return max(remaining, 0)
+
+    async def _add_references(self, file_name: str, count: int) -> Optional[int]:
+        """Change the reference count of a blob in one statement, returning
+        the new count, or None if there is no such blob."""
+        result = await self.db.execute(
+            update(Blob)
+            .where(Blob.file_name == file_name)
+            .values(ref_count=Blob.ref_count + count)
+            .returning(Blob.ref_count)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none()
+
+
+class ResumableUploadsRepository:
+    """
+    Repository for resumable uploads in progress.
+
+    A request appending to an upload locks it first, with a conditional
+    UPDATE that only succeeds at the offset the request was sent for and
+    while no other request holds the lock, so concurrent appends cannot
+    interleave their writes, even from different processes. The lock
+    expires unless it is renewed, so a request that stopped without
+    unlocking does not block the upload for good.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the ResumableUploadsRepository.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    async def save(self, upload: ResumableUpload) -> ResumableUpload:
+        """
+        Save a new or updated resumable upload.
+
+        Args:
+            upload: The upload to save
+
+        Returns:
+            The saved ResumableUpload
+        """
+        async with db_writer.lock():
+            self.db.add(upload)
+            await self.db.commit()
+
+        return upload
+
+    async def lock(
+        self, upload: ResumableUpload, token: str, locked_until: datetime
+    ) -> bool:
+        """
+        Lock an upload for appending at its offset.
+
+        Args:
+            upload: The upload, at the offset to append at
+            token: Token identifying the lock holder
+            locked_until: When the lock expires unless it is renewed
+
+        Returns:
+            True if the upload was locked, False if another request holds it
+            or its offset has moved on; the upload is then refreshed
+        """
+        return await self._update_if(
+            upload,
+            [
+                ResumableUpload.offset == upload.offset,
+                or_(
+                    ResumableUpload.locked_until.is_(None),
+                    ResumableUpload.locked_until < datetime.utcnow(),
+                ),
+            ],
+            lock_token=token,
+            locked_until=locked_until,
+        )
+
+    async def renew_lock(
+        self, upload: ResumableUpload, token: str, locked_until: datetime
+    ) -> bool:
+        """
+        Save the offset and storage state of a locked upload and extend its
+        lock.
+
+        Args:
+            upload: The locked upload
+            token: Token the upload was locked with
+            locked_until: When the lock now expires
+
+        Returns:
+            True if the lock is still held, False if it expired and another
+            request took the upload over; the upload is then refreshed
+        """
+        return await self._update_if(
+            upload,
+            [ResumableUpload.lock_token == token],
+            offset=upload.offset,
+            storage_state=upload.storage_state,
+            locked_until=locked_until,
+        )
+
+    async def unlock(self, upload: ResumableUpload, token: str) -> bool:
+        """
+        Save the offset, storage state and expiry of a locked upload and
+        release its lock.
+
+        Args:
+            upload: The locked upload
+            token: Token the upload was locked with
+
+        Returns:
+            True if the lock was still held, False otherwise; the upload is
+            then refreshed
+        """
+        return await self._update_if(
+            upload,
+            [ResumableUpload.lock_token == token],
+            offset=upload.offset,
+            storage_state=upload.storage_state,
+            expires_at=upload.expires_at,
+            lock_token=None,
+            locked_until=None,
+        )
+
+    async def _update_if(
+        self, upload: ResumableUpload, conditions: List[Any], **values: Any
+    ) -> bool:
+        """Update an upload in one statement if it meets the conditions."""
+        async with db_writer.lock():
+            result = await self.db.execute(
+                update(ResumableUpload)
+                .where(ResumableUpload.id == upload.id, *conditions)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                await self.db.rollback()
+                await self.db.refresh(upload)
+                return False
+
+            await self.db.commit()
+
+        await self.db.refresh(upload)
+        return True
+
+    async def get_by_id(self, upload_id: str) -> Optional[ResumableUpload]:
+        """
+        Get a resumable upload by ID.
+
+        Args:
+            upload_id: ID of the upload
+
+        Returns:
+            ResumableUpload if found, None otherwise
+        """
+        return await self.db.get(ResumableUpload, upload_id)
+
+    async def get_expired(
+        self, now: datetime, limit: int = 100
+    ) -> List[ResumableUpload]:
+        """
+        Get uploads that expired before a point in time, oldest first.
+
+        Args:
+            now: The point in time
+            limit: Maximum number of uploads to return
+
+        Returns:
+            List of ResumableUpload objects
+        """
+        results = await self.db.exec(
+            select(ResumableUpload)
+            .where(ResumableUpload.expires_at < now)
+            .order_by(ResumableUpload.expires_at)
+            .limit(limit)
+        )
+        return results.all()
+
+    async def delete(self, upload: ResumableUpload) -> None:
+        """
+        Delete a resumable upload.
+
+        Args:
+            upload: The upload to delete
+        """
+        async with db_writer.lock():
+            await self.db.delete(upload)
+            await self.db.commit()
@@ -0,0 +1,118 @@
+"""
+Script moving the files of a flat upload directory into the sharded layout
+
+Run it after the application has been configured with UPLOADS_SHARD_DEPTH;
+the application keeps serving files from either place while they are moved,
+so it does not need to be stopped. The script can be interrupted and run
+again at any time.
+
+    python -m src.uploads.reshard --batch-size 1000 --pause 0.1
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+from pathlib import Path
+from typing import Iterator, List
+
+from src.uploads.services.local_storage import LocalFileStorage
+from src.uploads.settings import uploads_settings
+
+
+def flat_files(upload_dir: Path) -> Iterator[str]:
+    """
+    Names of the finished files at the top of an upload directory.
+
+    Args:
+        upload_dir: The upload directory
+
+    Returns:
+        Iterator of file names, skipping directories and hidden files
+    """
+    with os.scandir(upload_dir) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and not entry.name.startswith("."):
+                yield entry.name
+
+
+def move_batch(storage: LocalFileStorage, filenames: List[str]) -> int:
+    """
+    Move files from the flat directory to their place in the sharded layout.
+    A file that already exists in the sharded layout was stored there again
+    under the same unique name, so the flat copy is deleted instead.
+
+    Args:
+        storage: Storage with the target shard depth
+        filenames: Names of files in the flat directory
+
+    Returns:
+        Number of files moved or deleted
+    """
+    count = 0
+    for filename in filenames:
+        source = storage.upload_dir / filename
+        target = storage.path_of(filename)
+        try:
+            if target.exists():
+                source.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, target)
+        except FileNotFoundError:
+            # Deleted, or moved by the application, since it was listed
+            continue
+
+        count += 1
+
+    return count
+
+
+async def reshard(
+    storage: LocalFileStorage, batch_size: int = 1000, pause: float = 0.0
+) -> int:
+    """
+    Move every file of the flat directory into the sharded layout, in
+    batches run in a worker thread with a pause in between to limit the
+    load on the disk.
+
+    Args:
+        storage: Storage with the target shard depth
+        batch_size: Files moved per batch
+        pause: Seconds to wait between batches
+
+    Returns:
+        Number of files moved
+    """
+    if storage.shard_depth == 0:
+        raise ValueError("Set a shard depth to move files into.")
+
+    # Entries that are neither added nor removed while the directory is read
+    # are listed exactly once, so files can be moved while it is scanned
+    files = flat_files(storage.upload_dir)
+    moved = 0
+    while batch := await asyncio.to_thread(
+        lambda: list(itertools.islice(files, batch_size))
+    ):
+        moved += await asyncio.to_thread(move_batch, storage, batch)
+        print(f"Moved {moved} files")
+        await asyncio.sleep(pause)
+
+    return moved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--upload-dir", default="uploads")
+    parser.add_argument("--shard-depth", type=int, default=uploads_settings.shard_depth)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.0)
+    args = parser.parse_args()
+
+    storage = LocalFileStorage(upload_dir=args.upload_dir, shard_depth=args.shard_depth)
+    moved = asyncio.run(reshard(storage, args.batch_size, args.pause))
+    print(f"Resharding completed: {moved} files moved")
+
+
+if __name__ == "__main__":
+    main()
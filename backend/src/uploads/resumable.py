@@ -0,0 +1,288 @@
+"""
+Resumable uploads sent in chunks, modelled on the tus protocol
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.uploads.models import (
+    DirectUploadRead,
+    ResumableUpload,
+    ResumableUploadCreate,
+)
+from src.uploads.repository import ResumableUploadsRepository
+from src.uploads.service import UploadsService
+from src.uploads.settings import UploadsSettings, uploads_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResumableUploadsService:
+    """
+    Service for uploads sent in chunks that can be resumed after a dropped
+    connection.
+
+    An upload is created with its total length, then its data is appended
+    in chunks at the offset the server reports, and it is finished once
+    complete. Received data is stored through the uploads service as it
+    arrives and the offset is only advanced past data that was written, so
+    a chunk cut off mid-way resumes right after its last stored byte.
+    Only one chunk is appended to an upload at a time. Uploads expire some
+    time after their last chunk.
+    """
+
+    def __init__(
+        self,
+        uploads_service: UploadsService,
+        repository: ResumableUploadsRepository,
+        settings: UploadsSettings = uploads_settings,
+    ):
+        """
+        Initialize the ResumableUploadsService.
+
+        Args:
+            uploads_service: Service storing the received data
+            repository: Repository of uploads in progress
+            settings: Upload settings (default: from the environment)
+        """
+        self.uploads_service = uploads_service
+        self.repository = repository
+        self.settings = settings
+
+    async def create(
+        self, upload_create: ResumableUploadCreate, content_type_prefix: str = None
+    ) -> ResumableUpload:
+        """
+        Start a resumable upload. Raises ValueError if the file is too large
+        or not of the expected type.
+
+        Args:
+            upload_create: Name, content type and length of the file
+            content_type_prefix: Optional content type validation prefix (e.g., "image/")
+
+        Returns:
+            The new ResumableUpload, at offset 0
+        """
+        if content_type_prefix and not upload_create.content_type.startswith(
+            content_type_prefix
+        ):
+            raise ValueError(f"File must be of type {content_type_prefix}")
+
+        if upload_create.length > self.settings.resumable_max_length:
+            raise ValueError(
+                f"File is larger than {self.settings.resumable_max_length} bytes."
+            )
+
+        upload = ResumableUpload(
+            **upload_create.model_dump(), expires_at=self._expiry()
+        )
+        await self.uploads_service.write_at(upload.file_name, 0, b"")
+        return await self.repository.save(upload)
+
+    async def get(self, upload_id: str) -> Optional[ResumableUpload]:
+        """
+        Get an upload that has not expired.
+
+        Args:
+            upload_id: ID of the upload
+
+        Returns:
+            ResumableUpload if found and not expired, None otherwise
+        """
+        upload = await self.repository.get_by_id(upload_id)
+        if upload is None or upload.expires_at < datetime.utcnow():
+            return None
+
+        return upload
+
+    async def append(
+        self, upload: ResumableUpload, chunks: AsyncIterator[bytes]
+    ) -> Optional[ResumableUpload]:
+        """
+        Append a chunk of data at the upload's current offset. Raises
+        ValueError if the data goes past the upload's length; the data
+        before that point is kept.
+
+        The data is written in pieces of the configured buffer size, and the
+        offset is saved even if the stream breaks off, so the client can
+        resume from the last byte that was stored. The upload is locked
+        while the chunk is written, so a chunk sent at the same time is
+        refused rather than interleaved with it.
+
+        Args:
+            upload: The upload to append to
+            chunks: The chunk's data as it arrives
+
+        Returns:
+            The upload with its new offset and expiry, or None if another
+            chunk is being appended or the offset has moved on, in which
+            case the upload is refreshed to its current offset
+        """
+        token = uuid4().hex
+        if not await self.repository.lock(upload, token, self._lock_expiry()):
+            return None
+
+        buffer = bytearray()
+        try:
+            async for data in chunks:
+                if upload.offset + len(buffer) + len(data) > upload.length:
+                    raise ValueError("Chunk goes past the end of the upload.")
+
+                buffer += data
+                if len(buffer) >= self.settings.write_buffer_size:
+                    await self._write(upload, token, buffer)
+                    buffer.clear()
+        finally:
+            if buffer:
+                await self._write(upload, token, buffer)
+            if upload.offset == upload.length and upload.storage_state is not None:
+                await self.uploads_service.finish_append(
+                    upload.file_name, upload.storage_state
+                )
+                upload.storage_state = None
+            upload.expires_at = self._expiry()
+            await self.repository.unlock(upload, token)
+
+        return upload
+
+    def direct_upload(self, upload: ResumableUpload) -> DirectUploadRead:
+        """
+        Get a URL to send the whole of an upload's data straight to storage,
+        instead of in chunks through the application. Raises ValueError if
+        the storage does not accept direct uploads or the upload has
+        already received data.
+
+        Args:
+            upload: The upload to send
+
+        Returns:
+            URL and headers of the request that sends the data
+        """
+        if upload.offset:
+            raise ValueError("Upload has already received data.")
+
+        expires_in = self.settings.direct_upload_ttl_seconds
+        presigned = self.uploads_service.presigned_upload(
+            upload.file_name, upload.length, expires_in
+        )
+        if presigned is None:
+            raise ValueError("Storage does not accept direct uploads.")
+
+        url, headers = presigned
+        return DirectUploadRead(
+            url=url,
+            headers=headers,
+            expires_at=datetime.utcnow() + timedelta(seconds=expires_in),
+        )
+
+    async def sync_offset(self, upload: ResumableUpload) -> ResumableUpload:
+        """
+        Update the offset of an upload to the data in storage, which may
+        have been sent there directly.
+
+        Args:
+            upload: The upload
+
+        Returns:
+            The upload with the offset of its stored data
+        """
+        if upload.storage_state is not None:
+            # Appended in chunks, so the stored file is not readable yet
+            return upload
+
+        size = await self.uploads_service.file_size(upload.file_name)
+        if size is not None and size != upload.offset and size <= upload.length:
+            upload.offset = size
+            upload.expires_at = self._expiry()
+            await self.repository.save(upload)
+
+        return upload
+
+    async def cancel(self, upload: ResumableUpload) -> None:
+        """
+        Cancel an upload, deleting the data received so far.
+
+        Args:
+            upload: The upload to cancel
+        """
+        await self.uploads_service.abort_append(upload.file_name, upload.storage_state)
+        await self.uploads_service.delete_file(upload.file_name)
+        await self.repository.delete(upload)
+
+    async def complete(self, upload: ResumableUpload) -> None:
+        """
+        Forget an upload whose file has been given its permanent name.
+
+        Args:
+            upload: The finished upload
+        """
+        await self.repository.delete(upload)
+
+    async def collect_expired(self) -> int:
+        """
+        Delete expired uploads and their data.
+
+        Returns:
+            Number of uploads deleted
+        """
+        count = 0
+        while expired := await self.repository.get_expired(datetime.utcnow()):
+            for upload in expired:
+                await self.cancel(upload)
+            count += len(expired)
+        return count
+
+    async def _write(
+        self, upload: ResumableUpload, token: str, data: bytearray
+    ) -> None:
+        # Saves the offset and storage state of the previous write along
+        # with the renewal, as the next append requires
+        if not await self.repository.renew_lock(upload, token, self._lock_expiry()):
+            raise ValueError("Upload was taken over by another request.")
+
+        upload.offset, upload.storage_state = await self.uploads_service.append(
+            upload.file_name, upload.offset, bytes(data), upload.storage_state
+        )
+
+    def _lock_expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(
+            seconds=self.settings.resumable_lock_seconds
+        )
+
+    def _expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(
+            seconds=self.settings.resumable_expiry_seconds
+        )
+
+
+async def collect_expired_uploads(
+    engine: AsyncEngine,
+    uploads_service: UploadsService,
+    interval: float = uploads_settings.resumable_gc_interval,
+) -> None:
+    """
+    Delete expired resumable uploads every interval seconds until cancelled.
+
+    Args:
+        engine: Engine of the database holding the uploads
+        uploads_service: Service storing the received data
+        interval: Seconds between collections
+    """
+    while True:
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                service = ResumableUploadsService(
+                    uploads_service, ResumableUploadsRepository(db)
+                )
+                await service.collect_expired()
+        except Exception:
+            # E.g. the database is unavailable; try again at the next interval
+            logger.exception("Could not collect expired uploads")
+
+        await asyncio.sleep(interval)
@@ -1,19 +1,51 @@
+import asyncio
+import hashlib
 import uuid
 from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
 
 from fastapi import UploadFile
 
+from src.database.sqlite import DatabaseWriter
+from src.uploads.capture import HashingUpload
+from src.uploads.repository import BlobsRepository
 from src.uploads.services.storage import StorageInterface
+from src.uploads.settings import uploads_settings
+
+# Orders changes to blob reference counts with the file operations that
+# follow them, so a blob is never deleted after a new reference to it from
+# this process. The lock only orders coroutines of one process: the counts
+# stay right across processes, but a file deleted by one process may be
+# stored again by another in between, so content-addressed storage is for
+# deployments with a single application process.
+blob_lock = DatabaseWriter()
 
 
 class UploadsService:
-    def __init__(self, storage: StorageInterface):
+    def __init__(
+        self,
+        storage: StorageInterface,
+        blobs_repository: Optional[BlobsRepository] = None,
+    ):
+        """
+        Initialize the UploadsService
+
+        Args:
+            storage: Storage provider for the files
+            blobs_repository: Reference counts of content-addressed files
+                (optional, files are stored under unique names if omitted)
+        """
         self.storage = storage
+        self.blobs_repository = blobs_repository
 
     async def save_file(self, file: UploadFile, content_type_prefix: str = None) -> str:
         """
         Save an uploaded file using the configured storage provider
 
+        In content-addressed mode the file is named after the SHA-256 digest
+        of its content, computed while it is written, and an upload whose
+        content is already stored only adds a reference to that file.
+
         Args:
             file: The uploaded file
             content_type_prefix: Optional content type validation prefix (e.g., "image/")
@@ -21,24 +53,271 @@ class UploadsService:
         Returns:
             str: The path/URL where the file was saved
         """
-        if content_type_prefix and not file.content_type.startswith(
+        self._check_content_type(file.content_type, content_type_prefix)
+        filename = self._new_filename(file.filename)
+
+        if self.blobs_repository is None:
+            return await self.storage.save_file(file, filename)
+
+        upload = HashingUpload(file)
+        await self.storage.save_file(upload, filename)
+        return await self._store_blob(
+            filename, filename, upload.hexdigest(), upload.size
+        )
+
+    async def adopt_file(
+        self,
+        stored_filename: str,
+        original_filename: str,
+        content_type: str,
+        content_type_prefix: str = None,
+    ) -> str:
+        """
+        Give a file that is already in storage, such as an assembled
+        resumable upload, a permanent name as if it had been uploaded with
+        save_file, without copying it
+
+        Args:
+            stored_filename: Name the file is stored under
+            original_filename: Name of the file on the client
+            content_type: Content type of the file
+            content_type_prefix: Optional content type validation prefix (e.g., "image/")
+
+        Returns:
+            str: The path/URL where the file is now stored
+        """
+        self._check_content_type(content_type, content_type_prefix)
+        filename = self._new_filename(original_filename)
+
+        if self.blobs_repository is None:
+            return await self.storage.rename_file(stored_filename, filename)
+
+        # Stream the file, which may be large or in a remote storage
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async for chunk in self.storage.iter_file(
+                stored_filename, uploads_settings.write_buffer_size
+            ):
+                await asyncio.to_thread(digest.update, chunk)
+                size += len(chunk)
+        except FileNotFoundError:
+            raise ValueError("Stored file not found.")
+
+        return await self._store_blob(
+            stored_filename, filename, digest.hexdigest(), size
+        )
+
+    def _check_content_type(
+        self, content_type: Optional[str], content_type_prefix: Optional[str]
+    ) -> None:
+        """Reject files whose content type does not start with the prefix."""
+        if content_type_prefix and not (content_type or "").startswith(
             content_type_prefix
         ):
             raise ValueError(f"File must be of type {content_type_prefix}")
 
-        ext = file.filename.split(".")[-1].lower()
-        filename = f"{uuid.uuid4()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
+    def _new_filename(self, original_filename: str) -> str:
+        """Unique name to store a file under, keeping its extension."""
+        ext = original_filename.split(".")[-1].lower()
+        return f"{uuid.uuid4()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
+
+    async def _store_blob(
+        self, stored_filename: str, filename: str, digest: str, size: int
+    ) -> str:
+        """Move a stored file to its content-addressed name, counting the reference."""
+        blob_name = f"{digest}.{filename.split('.')[-1]}"
+
+        async with blob_lock.lock():
+            await self.blobs_repository.acquire(blob_name, digest, size)
+            # A copy of a stored blob replaces it with identical content
+            return await self.storage.rename_file(stored_filename, blob_name)
+
+    async def save_bytes(self, data: bytes, filename: str) -> str:
+        """
+        Save generated content, such as a resized copy of an upload, under
+        a given name using the configured storage provider
+
+        Args:
+            data: Content of the file
+            filename: Name to store the file under
+
+        Returns:
+            str: The path/URL where the file was saved
+        """
+        return await self.storage.save_bytes(data, filename)
+
+    async def read_file(self, filename: str, size: int = -1) -> Optional[bytes]:
+        """
+        Read a file using the configured storage provider
+
+        Args:
+            filename: Name of the file to read
+            size: Number of leading bytes to read, -1 for all
+
+        Returns:
+            Optional[bytes]: Content of the file, or None if it does not exist
+        """
+        return await self.storage.read_file(filename, size)
+
+    async def write_at(self, filename: str, offset: int, data: bytes) -> int:
+        """
+        Write part of a file that is stored piece by piece, such as a
+        resumable upload, using the configured storage provider
+
+        Args:
+            filename: Name of the file
+            offset: Position to write at; anything stored after it is dropped
+            data: Content to write
+
+        Returns:
+            int: Size of the stored file
+        """
+        return await self.storage.write_at(filename, offset, data)
+
+    async def append(
+        self, filename: str, offset: int, data: bytes, state: Optional[str]
+    ) -> Tuple[int, Optional[str]]:
+        """
+        Append data to a file that is stored piece by piece, such as a
+        resumable upload, using the configured storage provider. The file
+        can only be read once finish_append has been called.
 
-        return await self.storage.save_file(file, filename)
+        Args:
+            filename: Name of the file
+            offset: Size of the file so far
+            data: Content to append
+            state: State returned by the previous append, which must have
+                been saved, or None for the first one
+
+        Returns:
+            Tuple[int, Optional[str]]: Size of the file and the state to
+            save for the next append
+        """
+        return await self.storage.append(filename, offset, data, state)
+
+    async def finish_append(self, filename: str, state: Optional[str]) -> None:
+        """
+        Make a file stored with append readable
+
+        Args:
+            filename: Name of the file
+            state: State returned by the last append
+        """
+        await self.storage.finish_append(filename, state)
+
+    async def abort_append(self, filename: str, state: Optional[str]) -> None:
+        """
+        Drop what the storage kept aside for a file stored with append that
+        will not be finished; the file itself is deleted with delete_file
+
+        Args:
+            filename: Name of the file
+            state: State returned by the last append
+        """
+        await self.storage.abort_append(filename, state)
+
+    async def file_size(self, filename: str) -> Optional[int]:
+        """
+        Get the size of a file using the configured storage provider
+
+        Args:
+            filename: Name of the file
+
+        Returns:
+            Optional[int]: Size in bytes, or None if it does not exist
+        """
+        return await self.storage.file_size(filename)
+
+    def presigned_upload(
+        self, filename: str, length: int, expires_in: int
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Get a URL for a client to send a file straight to the configured
+        storage provider, without passing through the application
+
+        Args:
+            filename: Name to store the file under
+            length: Size of the file in bytes
+            expires_in: Seconds the URL stays valid
+
+        Returns:
+            Optional[Tuple[str, Dict[str, str]]]: URL to PUT the file to and
+            the headers to send with it, or None if the storage does not
+            accept direct uploads
+        """
+        return self.storage.presigned_upload(filename, length, expires_in)
 
     async def delete_file(self, filename: str) -> bool:
         """
         Delete a file using the configured storage provider
 
+        A content-addressed file loses one reference, and is only deleted
+        with its last one.
+
         Args:
             filename: Name of the file to delete
 
         Returns:
             bool: True if deletion was successful
         """
-        return await self.storage.delete_file(filename)
+        if self.blobs_repository is None:
+            return await self.storage.delete_file(filename)
+
+        async with blob_lock.lock():
+            if await self.blobs_repository.release(filename):
+                return True
+
+            return await self.storage.delete_file(filename)
+
+    async def purge_files(self, filename: str, filenames: Sequence[str]) -> bool:
+        """
+        Delete a file whose references were all released, together with the
+        files generated from it, such as its resized copies. Deleting a file
+        that is already gone succeeds, so a purge can be repeated. Raises
+        OSError if a file could not be deleted, so the purge is retried.
+
+        Args:
+            filename: Name of the file
+            filenames: Names of every file to delete, including the file
+
+        Returns:
+            bool: True if the files were deleted, False if they were kept
+            because the content was stored again in the meantime
+        """
+        if self.blobs_repository is None:
+            await self._delete_files(filenames)
+            return True
+
+        async with blob_lock.lock():
+            if await self.blobs_repository.get(filename) is not None:
+                return False
+
+            await self._delete_files(filenames)
+            return True
+
+    async def _delete_files(self, filenames: Sequence[str]) -> None:
+        """Delete files, failing if any of them is still stored afterwards."""
+        deleted = await asyncio.gather(
+            *(self.storage.delete_file(name) for name in filenames)
+        )
+        # Storage reports a file that was already gone like a failed delete
+        for name, ok in zip(filenames, deleted):
+            if not ok and await self.storage.file_size(name) is not None:
+                raise OSError(f"Could not delete stored file '{name}'.")
+
+    async def is_referenced(self, filename: str) -> bool:
+        """
+        Check whether a content-addressed file is still referenced, e.g.
+        by another photo with the same content, after a delete_file call
+
+        Args:
+            filename: Name of the file
+
+        Returns:
+            bool: True if the file is still in use
+        """
+        if self.blobs_repository is None:
+            return False
+
+        return await self.blobs_repository.get(filename) is not None
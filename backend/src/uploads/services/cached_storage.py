@@ -0,0 +1,229 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from fastapi import UploadFile
+
+from src.uploads.services.local_storage import LocalFileStorage
+from src.uploads.services.storage import StorageInterface
+
+
+class CachedStorage(StorageInterface):
+    """
+    Read-through cache keeping recently read files of a remote storage, such
+    as an S3 bucket, in a local directory.
+
+    A file read in full is fetched from the origin once and kept in the
+    cache tier, and read from there until it is evicted: the least recently
+    read files are deleted whenever the cache grows past max_size bytes.
+    Concurrent reads of a file that is not cached share one fetch. Reads of
+    only the start of an uncached file, e.g. for EXIF data, go to the origin
+    without filling the cache.
+
+    Writes go to the origin. Generated content saved with save_bytes, such
+    as resized copies, is also cached, since it is usually read soon after;
+    any other change to a file drops it from the cache. The cache is
+    rebuilt from the cache directory when the application restarts.
+    """
+
+    def __init__(
+        self, origin: StorageInterface, cache: LocalFileStorage, max_size: int
+    ):
+        """
+        Initialize the CachedStorage.
+
+        Args:
+            origin: Storage holding every file
+            cache: Local storage of the cached copies
+            max_size: Bytes the cached copies may take up at most
+        """
+        self.origin = origin
+        self.cache = cache
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        # Cached files and their sizes, least recently read first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._fetches: Dict[str, asyncio.Task] = {}
+        self._stale: Set[str] = set()
+
+    @property
+    def size(self) -> int:
+        """Bytes taken up by the cached copies."""
+        return self._size
+
+    @property
+    def entries(self) -> int:
+        """Number of cached files."""
+        return len(self._entries)
+
+    async def save_file(self, file: UploadFile, filename: str) -> str:
+        await self._invalidate(filename)
+        return await self.origin.save_file(file, filename)
+
+    async def save_bytes(self, data: bytes, filename: str) -> str:
+        await self._invalidate(filename)
+        path = await self.origin.save_bytes(data, filename)
+        await self._admit(filename, data)
+        return path
+
+    async def read_file(self, filename: str, size: int = -1) -> Optional[bytes]:
+        await self._load()
+        if filename in self._entries:
+            data = await self.cache.read_file(filename, size)
+            if data is not None:
+                self._entries.move_to_end(filename)
+                self.hits += 1
+                return data
+
+            # Removed from the cache directory behind our back
+            self._forget(filename)
+
+        self.misses += 1
+        if size >= 0:
+            return await self.origin.read_file(filename, size)
+
+        fetch = self._fetches.get(filename)
+        if fetch is None:
+            fetch = asyncio.create_task(self._fetch(filename))
+            self._fetches[filename] = fetch
+            fetch.add_done_callback(lambda _: self._fetches.pop(filename, None))
+        else:
+            self.coalesced += 1
+
+        # A cancelled reader leaves the fetch running for the others
+        return await asyncio.shield(fetch)
+
+    async def iter_file(self, filename: str, chunk_size: int) -> AsyncIterator[bytes]:
+        # Streamed reads are of files too large to hold, so never fill the cache
+        await self._load()
+        storage = self.cache if filename in self._entries else self.origin
+        async for chunk in storage.iter_file(filename, chunk_size):
+            yield chunk
+
+    async def write_at(self, filename: str, offset: int, data: bytes) -> int:
+        await self._invalidate(filename)
+        return await self.origin.write_at(filename, offset, data)
+
+    async def append(
+        self, filename: str, offset: int, data: bytes, state: Optional[str]
+    ) -> Tuple[int, Optional[str]]:
+        await self._invalidate(filename)
+        return await self.origin.append(filename, offset, data, state)
+
+    async def finish_append(self, filename: str, state: Optional[str]) -> None:
+        await self._invalidate(filename)
+        await self.origin.finish_append(filename, state)
+
+    async def abort_append(self, filename: str, state: Optional[str]) -> None:
+        await self.origin.abort_append(filename, state)
+
+    async def rename_file(self, filename: str, new_filename: str) -> str:
+        await self._invalidate(filename)
+        await self._invalidate(new_filename)
+        return await self.origin.rename_file(filename, new_filename)
+
+    async def delete_file(self, filename: str) -> bool:
+        await self._invalidate(filename)
+        return await self.origin.delete_file(filename)
+
+    async def file_size(self, filename: str) -> Optional[int]:
+        await self._load()
+        if filename in self._entries:
+            return self._entries[filename]
+
+        return await self.origin.file_size(filename)
+
+    def presigned_url(self, filename: str, expires_in: int) -> Optional[str]:
+        return self.origin.presigned_url(filename, expires_in)
+
+    def presigned_upload(
+        self, filename: str, length: int, expires_in: int
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        return self.origin.presigned_upload(filename, length, expires_in)
+
+    async def close(self) -> None:
+        await self.origin.close()
+        await self.cache.close()
+
+    async def _fetch(self, filename: str) -> Optional[bytes]:
+        """Read a file from the origin and cache it."""
+        self._stale.discard(filename)
+        data = await self.origin.read_file(filename)
+        if data is not None and filename not in self._stale:
+            await self._admit(filename, data)
+        return data
+
+    async def _admit(self, filename: str, data: bytes) -> None:
+        """Cache a copy of a file, evicting the least recently read files to
+        make room."""
+        if len(data) > self.max_size:
+            return
+
+        await self._load()
+        await self.cache.save_bytes(data, filename)
+        self._forget(filename)
+        self._entries[filename] = len(data)
+        self._size += len(data)
+
+        evicted = []
+        while self._size > self.max_size:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            evicted.append(name)
+
+        self.evictions += len(evicted)
+        await asyncio.gather(*(self.cache.delete_file(name) for name in evicted))
+
+    async def _invalidate(self, filename: str) -> None:
+        """Drop the cached copy of a file that is about to change."""
+        await self._load()
+        if filename in self._fetches:
+            self._stale.add(filename)
+        if filename in self._entries:
+            self._forget(filename)
+            await self.cache.delete_file(filename)
+
+    def _forget(self, filename: str) -> None:
+        size = self._entries.pop(filename, None)
+        if size is not None:
+            self._size -= size
+
+    async def _load(self) -> None:
+        """List the copies left in the cache directory by an earlier run,
+        least recently written first, once."""
+        if self._loaded:
+            return
+
+        async with self._load_lock:
+            if self._loaded:
+                return
+
+            for filename, size in await asyncio.to_thread(self._scan):
+                self._forget(filename)
+                self._entries[filename] = size
+                self._size += size
+            self._loaded = True
+
+        while self._size > self.max_size:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            await self.cache.delete_file(name)
+
+    def _scan(self) -> List[Tuple[str, int]]:
+        files = []
+        for directory, _, filenames in os.walk(self.cache.upload_dir):
+            for filename in filenames:
+                if filename.startswith("."):
+                    # Temporary files of interrupted writes
+                    continue
+                stat = os.stat(os.path.join(directory, filename))
+                files.append((stat.st_mtime, filename, stat.st_size))
+
+        return [(filename, size) for _, filename, size in sorted(files)]
@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+from src.uploads.services.cached_storage import CachedStorage
+from src.uploads.services.local_storage import LocalFileStorage
+from src.uploads.services.s3_storage import S3FileStorage
+from src.uploads.services.storage import StorageInterface
+from src.uploads.settings import uploads_settings
+
+
+@lru_cache
+def get_storage() -> StorageInterface:
+    """
+    Provides the storage configured by UPLOADS_STORAGE, behind a local read
+    cache if UPLOADS_CACHE_DIR is set. It is created once and shared, so the
+    connections of an S3 client are pooled and the cache is shared across
+    requests.
+    """
+    if uploads_settings.storage == "s3":
+        storage = S3FileStorage.from_settings(uploads_settings)
+    else:
+        storage = LocalFileStorage()
+
+    if not uploads_settings.cache_dir:
+        return storage
+
+    # Cached copies can always be fetched again, so they are not flushed
+    cache = LocalFileStorage(upload_dir=uploads_settings.cache_dir, fsync="none")
+    return CachedStorage(storage, cache, uploads_settings.cache_max_size)
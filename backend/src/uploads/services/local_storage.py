@@ -1,36 +1,247 @@
+import asyncio
+import hashlib
 import os
+import uuid
 from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, TypeVar
 
 from fastapi import UploadFile
 
 from src.uploads.services.storage import StorageInterface
+from src.uploads.settings import uploads_settings
+
+T = TypeVar("T")
+
+
+def shard_path(filename: str, depth: int) -> str:
+    """
+    Path of a file relative to an upload directory sharded depth levels deep.
+
+    Each level is a directory named after two hex digits of the MD5 hash of
+    the file name, so files spread evenly over 256 directories per level.
+
+    Args:
+        filename: Name of the file
+        depth: Number of directory levels, 0 for a flat directory
+
+    Returns:
+        Relative path of the file, e.g. "3f/a2/<filename>"
+    """
+    digest = hashlib.md5(filename.encode(), usedforsecurity=False).hexdigest()
+    return "/".join([digest[2 * i : 2 * i + 2] for i in range(depth)] + [filename])
 
 
 class LocalFileStorage(StorageInterface):
-    def __init__(self, upload_dir: str = "uploads"):
+    """
+    Stores files in a local directory without blocking the event loop.
+
+    All file system calls run in worker threads, and uploads are read and
+    written in large chunks. Files are written under a temporary name and
+    renamed into place once complete, so a file is never visible half
+    written, and are flushed to disk according to the fsync policy.
+
+    With a shard depth, files are spread over nested directories named after
+    a hash of the file name (see shard_path), keeping every directory small.
+    Files left in the flat directory by an earlier layout are still found
+    until they are moved (see src.uploads.reshard).
+    """
+
+    def __init__(
+        self,
+        upload_dir: str = "uploads",
+        buffer_size: int = uploads_settings.write_buffer_size,
+        fsync: str = uploads_settings.fsync,
+        shard_depth: int = uploads_settings.shard_depth,
+    ):
+        """
+        Initialize the LocalFileStorage.
+
+        Args:
+            upload_dir: Directory to store files in, created if missing
+            buffer_size: Bytes read from an upload and written per chunk
+            fsync: Fsync policy: "none", "file" or "full" (see UploadsSettings)
+            shard_depth: Directory levels files are spread over, 0 for flat
+        """
         self.upload_dir = Path(upload_dir)
         self.upload_dir.mkdir(exist_ok=True)
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.shard_depth = shard_depth
+
+    def path_of(self, filename: str) -> Path:
+        """
+        Path a file is stored at in the current layout.
+
+        Args:
+            filename: Name of the file
+
+        Returns:
+            Path of the file in the upload directory
+        """
+        return self.upload_dir / shard_path(filename, self.shard_depth)
 
     async def save_file(self, file: UploadFile, filename: str) -> str:
         try:
-            file_path = self.upload_dir / filename
+            file_path = self.path_of(filename)
+            temp_path = self._temp_path(file_path)
 
-            with open(file_path, "wb") as f:
-                while content := await file.read(8192):
-                    f.write(content)
+            f = await asyncio.to_thread(self._create, temp_path)
+            try:
+                while content := await file.read(self.buffer_size):
+                    await asyncio.to_thread(f.write, content)
+                await asyncio.to_thread(self._commit, f, temp_path, file_path)
+            except BaseException:
+                await asyncio.to_thread(self._discard, f, temp_path)
+                raise
 
             return str(file_path)
         finally:
             await file.close()
 
-    async def delete_file(self, filename: str) -> bool:
+    async def save_bytes(self, data: bytes, filename: str) -> str:
+        file_path = self.path_of(filename)
+        await asyncio.to_thread(self._write, data, file_path)
+        return str(file_path)
+
+    async def read_file(self, filename: str, size: int = -1) -> Optional[bytes]:
         try:
-            file_path = self.upload_dir / filename
-            if file_path.exists():
-                os.remove(file_path)
-                return True
+            return await asyncio.to_thread(
+                self._stored, filename, lambda path: self._read(path, size)
+            )
+        except (FileNotFoundError, IsADirectoryError):
+            return None
 
-            return False
+    async def iter_file(self, filename: str, chunk_size: int) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(
+            self._stored, filename, lambda path: open(path, "rb")
+        )
+        try:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def write_at(self, filename: str, offset: int, data: bytes) -> int:
+        if offset == 0:
+            return await asyncio.to_thread(
+                self._write_at, self.path_of(filename), offset, data
+            )
+
+        return await asyncio.to_thread(
+            self._stored, filename, lambda path: self._write_at(path, offset, data)
+        )
+
+    async def rename_file(self, filename: str, new_filename: str) -> str:
+        file_path = self.path_of(new_filename)
+        await asyncio.to_thread(
+            self._stored, filename, lambda path: self._move(path, file_path)
+        )
+        return str(file_path)
+
+    async def delete_file(self, filename: str) -> bool:
+        try:
+            await asyncio.to_thread(self._stored, filename, os.remove)
+            return True
 
         except Exception:
             return False
+
+    async def file_size(self, filename: str) -> Optional[int]:
+        try:
+            return await asyncio.to_thread(
+                self._stored, filename, lambda path: path.stat().st_size
+            )
+        except FileNotFoundError:
+            return None
+
+    def _stored(self, filename: str, operation: Callable[[Path], T]) -> T:
+        """
+        Run a file operation on a stored file, in the current layout or, if
+        it is not there, in the flat directory of the earlier layout.
+        """
+        file_path = self.path_of(filename)
+        if self.shard_depth == 0:
+            return operation(file_path)
+
+        try:
+            return operation(file_path)
+        except FileNotFoundError:
+            pass
+
+        try:
+            return operation(self.upload_dir / filename)
+        except FileNotFoundError:
+            # The file may have been moved into the current layout meanwhile
+            return operation(file_path)
+
+    def _temp_path(self, file_path: Path) -> Path:
+        """Unique temporary path next to the final one, on the same file system."""
+        return file_path.parent / f".{file_path.name}.{uuid.uuid4().hex}.tmp"
+
+    def _create(self, file_path: Path):
+        """Open a new file for writing, creating its shard directories."""
+        try:
+            return open(file_path, "wb")
+        except FileNotFoundError:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            return open(file_path, "wb")
+
+    def _move(self, source: Path, file_path: Path) -> None:
+        """Rename a file into place, creating its shard directories."""
+        try:
+            os.replace(source, file_path)
+        except FileNotFoundError:
+            if not source.exists():
+                raise
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, file_path)
+
+    def _write(self, data: bytes, file_path: Path) -> None:
+        """Write a complete file under a temporary name and rename it into place."""
+        temp_path = self._temp_path(file_path)
+        f = self._create(temp_path)
+        try:
+            f.write(data)
+            self._commit(f, temp_path, file_path)
+        except BaseException:
+            self._discard(f, temp_path)
+            raise
+
+    def _read(self, file_path: Path, size: int) -> bytes:
+        """Read a file, or its first size bytes."""
+        with open(file_path, "rb") as f:
+            return f.read(size)
+
+    def _write_at(self, file_path: Path, offset: int, data: bytes) -> int:
+        """Write data at an offset, truncating the file there first."""
+        with open(file_path, "r+b") if offset else self._create(file_path) as f:
+            if f.seek(0, os.SEEK_END) < offset:
+                raise ValueError("Cannot write beyond the end of the stored data.")
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(data)
+            f.flush()
+            if self.fsync != "none":
+                os.fsync(f.fileno())
+            return f.tell()
+
+    def _commit(self, f, temp_path: Path, file_path: Path) -> None:
+        """Flush and close a written temporary file and rename it into place."""
+        f.flush()
+        if self.fsync != "none":
+            os.fsync(f.fileno())
+        f.close()
+
+        os.replace(temp_path, file_path)
+
+        if self.fsync == "full":
+            directory = os.open(file_path.parent, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def _discard(self, f, temp_path: Path) -> None:
+        """Close and remove a temporary file that will not be completed."""
+        f.close()
+        temp_path.unlink(missing_ok=True)
@@ -0,0 +1,730 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import mimetypes
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+from xml.etree import ElementTree
+
+import httpx
+from fastapi import UploadFile
+
+from src.uploads.services.storage import StorageInterface
+from src.uploads.settings import UploadsSettings
+
+# Hash of an empty request body
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+# Smallest part S3 accepts in a multipart upload, except for the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# Longest lifetime of a presigned URL
+MAX_PRESIGN_SECONDS = 7 * 24 * 60 * 60
+
+
+def uri_encode(value: str, safe: str = "") -> str:
+    """Percent-encode a value as AWS Signature Version 4 requires."""
+    return quote(value, safe="-_.~" + safe)
+
+
+def canonical_query(params: Sequence[Tuple[str, str]]) -> str:
+    """Query string of parameters, encoded and sorted as they are signed."""
+    return "&".join(
+        f"{name}={value}"
+        for name, value in sorted(
+            (uri_encode(name), uri_encode(value)) for name, value in params
+        )
+    )
+
+
+class S3Signer:
+    """
+    Signs S3 requests with AWS Signature Version 4, either in the
+    Authorization header or, for presigned URLs, in the query string.
+    """
+
+    def __init__(
+        self, access_key_id: str, secret_access_key: str, region: str = "us-east-1"
+    ):
+        """
+        Initialize the S3Signer.
+
+        Args:
+            access_key_id: Access key ID of the credentials
+            secret_access_key: Secret access key of the credentials
+            region: Region of the bucket
+        """
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+
+    def sign_headers(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        payload_hash: str = EMPTY_SHA256,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, str]:
+        """
+        Sign a request in its headers.
+
+        Args:
+            method: HTTP method
+            url: URL with the query string as it is sent
+            headers: Headers to sign besides Host and the x-amz- headers
+            payload_hash: Hex SHA-256 of the body
+            now: Time of the request (optional, the clock's if omitted)
+
+        Returns:
+            The headers with x-amz-date, x-amz-content-sha256 and
+            Authorization added
+        """
+        amz_date = _amz_date(now)
+        headers = {
+            **headers,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_hash,
+        }
+        signed = {"host": httpx.URL(url).netloc.decode(), **headers}
+        signature = self.signature(method, url, signed, payload_hash, amz_date)
+        headers["Authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{self._scope(amz_date)}, "
+            f"SignedHeaders={_signed_headers(signed)}, Signature={signature}"
+        )
+        return headers
+
+    def presign(
+        self,
+        method: str,
+        url: str,
+        expires_in: int,
+        headers: Optional[Dict[str, str]] = None,
+        now: Optional[datetime] = None,
+    ) -> str:
+        """
+        Sign a request in the query string of its URL, so it can be sent
+        without credentials until it expires.
+
+        Args:
+            method: HTTP method
+            url: URL without a query string
+            expires_in: Seconds the URL stays valid
+            headers: Headers the request must be sent with besides Host
+                (optional)
+            now: Time of signing (optional, the clock's if omitted)
+
+        Returns:
+            The URL with the signature in its query string
+        """
+        amz_date = _amz_date(now)
+        signed = {"host": httpx.URL(url).netloc.decode(), **(headers or {})}
+        query = canonical_query(
+            [
+                ("X-Amz-Algorithm", "AWS4-HMAC-SHA256"),
+                (
+                    "X-Amz-Credential",
+                    f"{self.access_key_id}/{self._scope(amz_date)}",
+                ),
+                ("X-Amz-Date", amz_date),
+                ("X-Amz-Expires", str(expires_in)),
+                ("X-Amz-SignedHeaders", _signed_headers(signed)),
+            ]
+        )
+        url = f"{url}?{query}"
+        signature = self.signature(method, url, signed, "UNSIGNED-PAYLOAD", amz_date)
+        return f"{url}&X-Amz-Signature={signature}"
+
+    def signature(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        payload_hash: str,
+        amz_date: str,
+    ) -> str:
+        """
+        Signature of a request.
+
+        Args:
+            method: HTTP method
+            url: URL with its query string, without any X-Amz-Signature
+            headers: Signed headers, including Host
+            payload_hash: Hex SHA-256 of the body, or "UNSIGNED-PAYLOAD"
+            amz_date: Time of signing, as in x-amz-date
+
+        Returns:
+            Hex signature
+        """
+        raw_url = httpx.URL(url)
+        params = [
+            (name, value)
+            for name, value in raw_url.params.multi_items()
+            if name != "X-Amz-Signature"
+        ]
+        canonical_headers = "".join(
+            f"{name.lower()}:{' '.join(str(value).split())}\n"
+            for name, value in sorted(headers.items(), key=lambda h: h[0].lower())
+        )
+        canonical_request = "\n".join(
+            [
+                method,
+                raw_url.raw_path.split(b"?")[0].decode(),
+                canonical_query(params),
+                canonical_headers,
+                _signed_headers(headers),
+                payload_hash,
+            ]
+        )
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                amz_date,
+                self._scope(amz_date),
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        key = f"AWS4{self.secret_access_key}".encode()
+        for part in (amz_date[:8], self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    def _scope(self, amz_date: str) -> str:
+        return f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+
+
+def _amz_date(now: Optional[datetime]) -> str:
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _signed_headers(headers: Dict[str, str]) -> str:
+    return ";".join(sorted(name.lower() for name in headers))
+
+
+def _xml_text(content: bytes, tag: str) -> Optional[str]:
+    """Text of the first element with a tag in an S3 XML response."""
+    element = ElementTree.fromstring(content).find(f".//{{*}}{tag}")
+    return None if element is None else element.text
+
+
+def _new_append_state() -> Dict[str, Any]:
+    """
+    State of a file appended to as a multipart upload: its upload ID, the
+    ETags and total size of the parts uploaded so far, the sizes of the
+    tail objects holding the data after them, and the starts of tail
+    objects left to delete.
+    """
+    return {"upload_id": None, "etags": [], "stored": 0, "tail": [], "garbage": []}
+
+
+def _tail_starts(parts: Dict[str, Any]) -> List[int]:
+    """Offsets at which the tail objects of an appended file start."""
+    starts = []
+    start = parts["stored"]
+    for size in parts["tail"]:
+        starts.append(start)
+        start += size
+    return starts
+
+
+def _tail_name(filename: str, start: int) -> str:
+    """Name of the tail object of an appended file starting at an offset."""
+    return f"{filename}.{start}"
+
+
+class S3FileStorage(StorageInterface):
+    """
+    Stores files as objects in an S3-compatible bucket, such as AWS S3 or
+    MinIO, over a pooled HTTP client.
+
+    Uploads are streamed in parts of part_size bytes: a file that fits in
+    one part is stored with a single PUT, and larger files with a multipart
+    upload whose parts are sent part_concurrency at a time, so at most that
+    many parts are held in memory. Objects are addressed path-style, as
+    endpoint/bucket/key.
+
+    Objects cannot be changed in place, so write_at rewrites the object:
+    data past the minimum part size is kept by copying it within the
+    bucket, so a file appended to in chunks is not transferred again.
+    A file appended to with append is instead kept as a multipart upload
+    that stays open until finish_append: each full part is uploaded once,
+    and the data short of a part waits in tail objects next to the file,
+    so storing a file costs time in proportion to its size.
+    Presigned URLs let clients read objects, and send uploads, directly to
+    the bucket.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        signer: S3Signer,
+        prefix: str = "",
+        part_size: int = 8 * 1024 * 1024,
+        part_concurrency: int = 4,
+        max_connections: int = 32,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        Initialize the S3FileStorage.
+
+        Args:
+            endpoint_url: URL of the S3 service, e.g. http://localhost:9000
+            bucket: Name of the bucket
+            signer: Signer with the credentials of the bucket
+            prefix: Prefix of the keys files are stored under
+            part_size: Bytes per part of a multipart upload, at least 5 MiB
+                for AWS S3
+            part_concurrency: Parts of one upload sent at a time
+            max_connections: Connections the client keeps open at most
+            client: HTTP client (optional, a pooled client if omitted)
+        """
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.signer = signer
+        self.prefix = prefix
+        self.part_size = part_size
+        self.part_concurrency = part_concurrency
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    @classmethod
+    def from_settings(cls, settings: UploadsSettings) -> "S3FileStorage":
+        """
+        Create the storage configured by the UPLOADS_S3_* settings.
+
+        Args:
+            settings: Upload settings
+
+        Returns:
+            The configured S3FileStorage
+        """
+        return cls(
+            settings.s3_endpoint_url,
+            settings.s3_bucket,
+            S3Signer(
+                settings.s3_access_key_id,
+                settings.s3_secret_access_key,
+                settings.s3_region,
+            ),
+            prefix=settings.s3_prefix,
+            part_size=settings.s3_part_size,
+            part_concurrency=settings.s3_part_concurrency,
+            max_connections=settings.s3_max_connections,
+        )
+
+    def key_of(self, filename: str) -> str:
+        """
+        Key a file is stored under.
+
+        Args:
+            filename: Name of the file
+
+        Returns:
+            The key, with the storage's prefix
+        """
+        return self.prefix + filename
+
+    def url_of(self, filename: str) -> str:
+        """
+        URL of the object of a file, without a query string.
+
+        Args:
+            filename: Name of the file
+
+        Returns:
+            Path-style URL of the object
+        """
+        key = uri_encode(self.key_of(filename), safe="/")
+        return f"{self.endpoint_url}/{self.bucket}/{key}"
+
+    async def save_file(self, file: UploadFile, filename: str) -> str:
+        try:
+            part = await self._read_part(file)
+            if len(part) < self.part_size:
+                await self._put(filename, part)
+            else:
+                await self._upload_parts(filename, part, file)
+
+            return self.key_of(filename)
+        finally:
+            await file.close()
+
+    async def save_bytes(self, data: bytes, filename: str) -> str:
+        await self._put(filename, data)
+        return self.key_of(filename)
+
+    async def read_file(self, filename: str, size: int = -1) -> Optional[bytes]:
+        if size == 0:
+            return None if await self.file_size(filename) is None else b""
+
+        headers = {"Range": f"bytes=0-{size - 1}"} if size > 0 else {}
+        response = await self._request("GET", filename, headers=headers)
+        if response.status_code == 404:
+            return None
+        if response.status_code == 416:
+            # A range of an empty object
+            return b""
+
+        response.raise_for_status()
+        return response.content
+
+    async def iter_file(self, filename: str, chunk_size: int) -> AsyncIterator[bytes]:
+        url = self.url_of(filename)
+        signed = self.signer.sign_headers("GET", url, {}, EMPTY_SHA256)
+        async with self.client.stream("GET", url, headers=signed) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(filename)
+
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def write_at(self, filename: str, offset: int, data: bytes) -> int:
+        if offset == 0:
+            await self._put(filename, data)
+            return len(data)
+
+        if offset < MIN_PART_SIZE:
+            kept = await self.read_file(filename, offset)
+            if kept is None:
+                raise FileNotFoundError(filename)
+            if len(kept) < offset:
+                raise ValueError("Cannot write beyond the end of the stored data.")
+
+            await self._put(filename, kept + data)
+            return offset + len(data)
+
+        upload_id = await self._create_multipart(filename)
+        try:
+            etags = [await self._copy_part(filename, upload_id, 1, offset)]
+            if data:
+                etags.append(await self._upload_part(filename, upload_id, 2, data))
+            await self._complete_multipart(filename, upload_id, etags)
+        except BaseException:
+            await self._abort_multipart(filename, upload_id)
+            raise
+
+        return offset + len(data)
+
+    async def append(
+        self, filename: str, offset: int, data: bytes, state: Optional[str]
+    ) -> Tuple[int, Optional[str]]:
+        if state is None and offset:
+            # Begun with write_at, before appends were kept as a multipart upload
+            return await self.write_at(filename, offset, data), None
+
+        parts = json.loads(state) if state else _new_append_state()
+        if offset != parts["stored"] + sum(parts["tail"]):
+            raise ValueError("Can only append at the end of the stored data.")
+
+        # Tails replaced by the previous append, whose saved state no longer
+        # refers to them
+        await self._delete_tails(filename, parts["garbage"])
+        parts["garbage"] = []
+
+        if sum(parts["tail"]) + len(data) < self.part_size:
+            if data:
+                await self._put(_tail_name(filename, offset), data)
+                parts["tail"].append(len(data))
+            return offset + len(data), json.dumps(parts)
+
+        pending = await self._read_tails(filename, parts) + data
+        replaced = _tail_starts(parts)
+        if parts["upload_id"] is None:
+            parts["upload_id"] = await self._create_multipart(filename)
+        while len(pending) >= self.part_size:
+            number = len(parts["etags"]) + 1
+            part, pending = pending[: self.part_size], pending[self.part_size :]
+            parts["etags"].append(
+                await self._upload_part(filename, parts["upload_id"], number, part)
+            )
+            parts["stored"] += len(part)
+
+        # Deleted by the next append, as until the new state is saved a
+        # retry starts from the old one
+        parts["garbage"] = replaced
+        parts["tail"] = []
+        if pending:
+            await self._put(_tail_name(filename, parts["stored"]), pending)
+            parts["tail"].append(len(pending))
+        return offset + len(data), json.dumps(parts)
+
+    async def finish_append(self, filename: str, state: Optional[str]) -> None:
+        if state is None:
+            return
+
+        parts = json.loads(state)
+        pending = await self._read_tails(filename, parts)
+        if parts["upload_id"] is None:
+            await self._put(filename, pending)
+        else:
+            etags = list(parts["etags"])
+            if pending:
+                etags.append(
+                    await self._upload_part(
+                        filename, parts["upload_id"], len(etags) + 1, pending
+                    )
+                )
+            await self._complete_multipart(filename, parts["upload_id"], etags)
+
+        await self._delete_tails(filename, parts["garbage"] + _tail_starts(parts))
+
+    async def abort_append(self, filename: str, state: Optional[str]) -> None:
+        if state is None:
+            return
+
+        parts = json.loads(state)
+        if parts["upload_id"] is not None:
+            await self._abort_multipart(filename, parts["upload_id"])
+        await self._delete_tails(filename, parts["garbage"] + _tail_starts(parts))
+
+    async def rename_file(self, filename: str, new_filename: str) -> str:
+        response = await self._request(
+            "PUT", new_filename, headers={"x-amz-copy-source": self._source(filename)}
+        )
+        if response.status_code == 404:
+            raise FileNotFoundError(filename)
+        self._check(response)
+
+        await self._request("DELETE", filename)
+        return self.key_of(new_filename)
+
+    async def delete_file(self, filename: str) -> bool:
+        # S3 reports deleting a missing object as a success
+        if await self.file_size(filename) is None:
+            return False
+
+        response = await self._request("DELETE", filename)
+        response.raise_for_status()
+        return True
+
+    async def file_size(self, filename: str) -> Optional[int]:
+        response = await self._request("HEAD", filename)
+        if response.status_code == 404:
+            return None
+
+        response.raise_for_status()
+        return int(response.headers["content-length"])
+
+    def presigned_url(
+        self, filename: str, expires_in: int, now: Optional[float] = None
+    ) -> str:
+        """
+        Presigned URL to read a file directly from the bucket.
+
+        Like UrlSigner, the signing time is rounded down to a multiple of
+        the lifetime, so the URL of a file is identical for a while and can
+        be cached; it is valid for between one and two lifetimes.
+
+        Args:
+            filename: Name of the file
+            expires_in: Shortest time the URL stays valid
+            now: Current UNIX time (optional, the clock's if omitted)
+
+        Returns:
+            URL of the object, valid for a GET request
+        """
+        now = time.time() if now is None else now
+        signed_at = datetime.fromtimestamp(
+            int(now) // expires_in * expires_in, timezone.utc
+        )
+        return self.signer.presign(
+            "GET",
+            self.url_of(filename),
+            min(2 * expires_in, MAX_PRESIGN_SECONDS),
+            now=signed_at,
+        )
+
+    def presigned_upload(
+        self, filename: str, length: int, expires_in: int
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        headers = {
+            "Content-Length": str(length),
+            "Content-Type": self._content_type(filename),
+        }
+        url = self.signer.presign("PUT", self.url_of(filename), expires_in, headers)
+        return url, headers
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def _read_part(self, file: UploadFile) -> bytes:
+        """Read the next part of an upload, short only at its end."""
+        part = bytearray()
+        while len(part) < self.part_size and (
+            data := await file.read(self.part_size - len(part))
+        ):
+            part += data
+        return bytes(part)
+
+    async def _upload_parts(self, filename: str, part: bytes, file: UploadFile) -> None:
+        """Store an upload with a multipart upload, reading the next part
+        while earlier ones are sent."""
+        upload_id = await self._create_multipart(filename)
+        semaphore = asyncio.Semaphore(self.part_concurrency)
+        tasks: List[asyncio.Task] = []
+
+        async def send(number: int, data: bytes) -> str:
+            try:
+                return await self._upload_part(filename, upload_id, number, data)
+            finally:
+                semaphore.release()
+
+        try:
+            while part:
+                await semaphore.acquire()
+                for task in tasks:
+                    if task.done() and task.exception():
+                        raise task.exception()
+                tasks.append(asyncio.create_task(send(len(tasks) + 1, part)))
+                part = await self._read_part(file)
+
+            etags = await asyncio.gather(*tasks)
+            await self._complete_multipart(filename, upload_id, etags)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._abort_multipart(filename, upload_id)
+            raise
+
+    async def _read_tails(self, filename: str, parts: Dict[str, Any]) -> bytes:
+        """Read the data of an appended file that waits in tail objects."""
+        tails = await asyncio.gather(
+            *(
+                self.read_file(_tail_name(filename, start))
+                for start in _tail_starts(parts)
+            )
+        )
+        if any(tail is None for tail in tails):
+            raise FileNotFoundError(filename)
+        return b"".join(tails)
+
+    async def _delete_tails(self, filename: str, starts: Sequence[int]) -> None:
+        responses = await asyncio.gather(
+            *(self._request("DELETE", _tail_name(filename, start)) for start in starts)
+        )
+        for response in responses:
+            response.raise_for_status()
+
+    async def _put(self, filename: str, data: bytes) -> None:
+        response = await self._request(
+            "PUT",
+            filename,
+            headers={"Content-Type": self._content_type(filename)},
+            content=data,
+        )
+        response.raise_for_status()
+
+    async def _create_multipart(self, filename: str) -> str:
+        response = await self._request(
+            "POST",
+            filename,
+            params=[("uploads", "")],
+            headers={"Content-Type": self._content_type(filename)},
+        )
+        response.raise_for_status()
+        return _xml_text(response.content, "UploadId")
+
+    async def _upload_part(
+        self, filename: str, upload_id: str, number: int, data: bytes
+    ) -> str:
+        response = await self._request(
+            "PUT",
+            filename,
+            params=[("partNumber", str(number)), ("uploadId", upload_id)],
+            content=data,
+        )
+        response.raise_for_status()
+        return response.headers["etag"]
+
+    async def _copy_part(
+        self, filename: str, upload_id: str, number: int, length: int
+    ) -> str:
+        """Copy the first length bytes of the stored object as a part."""
+        response = await self._request(
+            "PUT",
+            filename,
+            params=[("partNumber", str(number)), ("uploadId", upload_id)],
+            headers={
+                "x-amz-copy-source": self._source(filename),
+                "x-amz-copy-source-range": f"bytes=0-{length - 1}",
+            },
+        )
+        if response.status_code == 404:
+            raise FileNotFoundError(filename)
+        if response.status_code in (400, 416):
+            raise ValueError("Cannot write beyond the end of the stored data.")
+
+        self._check(response)
+        return _xml_text(response.content, "ETag")
+
+    async def _complete_multipart(
+        self, filename: str, upload_id: str, etags: Sequence[str]
+    ) -> None:
+        parts = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in enumerate(etags, start=1)
+        )
+        response = await self._request(
+            "POST",
+            filename,
+            params=[("uploadId", upload_id)],
+            content=f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode(),
+        )
+        self._check(response)
+
+    async def _abort_multipart(self, filename: str, upload_id: str) -> None:
+        try:
+            await self._request("DELETE", filename, params=[("uploadId", upload_id)])
+        except httpx.HTTPError:
+            # Incomplete uploads are removed by the bucket's lifecycle rules
+            pass
+
+    async def _request(
+        self,
+        method: str,
+        filename: str,
+        params: Sequence[Tuple[str, str]] = (),
+        headers: Optional[Dict[str, str]] = None,
+        content: bytes = b"",
+    ) -> httpx.Response:
+        """Send a signed request about the object of a file."""
+        url = self.url_of(filename)
+        if params:
+            url = f"{url}?{canonical_query(params)}"
+
+        payload_hash = (
+            await asyncio.to_thread(lambda: hashlib.sha256(content).hexdigest())
+            if content
+            else EMPTY_SHA256
+        )
+        signed = self.signer.sign_headers(method, url, headers or {}, payload_hash)
+        return await self.client.request(method, url, headers=signed, content=content)
+
+    def _source(self, filename: str) -> str:
+        """Copy source of the object of a file."""
+        return f"/{self.bucket}/{uri_encode(self.key_of(filename), safe='/')}"
+
+    def _check(self, response: httpx.Response) -> None:
+        """Raise for an error, including those S3 reports in the body of a
+        200 response to a copy or the completion of a multipart upload."""
+        response.raise_for_status()
+        if b"<Error>" in response.content:
+            code = _xml_text(response.content, "Code")
+            raise httpx.HTTPStatusError(
+                f"S3 error {code}", request=response.request, response=response
+            )
+
+    def _content_type(self, filename: str) -> str:
+        return mimetypes.guess_type(filename)[0] or "application/octet-stream"
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Optional, Tuple
 
 from fastapi import UploadFile
 
@@ -9,7 +10,68 @@ class StorageInterface(ABC):
         """Save a file to storage and return its URL/path"""
         pass
 
+    @abstractmethod
+    async def save_bytes(self, data: bytes, filename: str) -> str:
+        """Save generated content to storage and return its URL/path"""
+        pass
+
+    @abstractmethod
+    async def read_file(self, filename: str, size: int = -1) -> Optional[bytes]:
+        """Read a file, or its first size bytes, from storage, or None if it does not exist"""
+        pass
+
+    async def iter_file(self, filename: str, chunk_size: int) -> AsyncIterator[bytes]:
+        """Read a file in chunks of at most chunk_size bytes, raising FileNotFoundError if it does not exist; storages that can stream a file override this, which reads it whole"""
+        data = await self.read_file(filename)
+        if data is None:
+            raise FileNotFoundError(filename)
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+
+    @abstractmethod
+    async def write_at(self, filename: str, offset: int, data: bytes) -> int:
+        """Write data at an offset of a partially stored file, dropping anything after it, and return the file's new size"""
+        pass
+
+    async def append(
+        self, filename: str, offset: int, data: bytes, state: Optional[str]
+    ) -> Tuple[int, Optional[str]]:
+        """Append data at the end (offset) of a file stored piece by piece, given the state returned by its previous append once that state has been saved, and return the file's new size and state; the data is only readable once finish_append is called. Storages that cannot write in place override this, which calls write_at"""
+        return await self.write_at(filename, offset, data), state
+
+    async def finish_append(self, filename: str, state: Optional[str]) -> None:
+        """Make a file stored with append readable, given the state of its last append"""
+        pass
+
+    async def abort_append(self, filename: str, state: Optional[str]) -> None:
+        """Drop what append kept aside for a file that will not be finished; the file itself is deleted with delete_file"""
+        pass
+
+    @abstractmethod
+    async def rename_file(self, filename: str, new_filename: str) -> str:
+        """Rename a stored file, replacing any file with the new name, and return its URL/path"""
+        pass
+
     @abstractmethod
     async def delete_file(self, filename: str) -> bool:
         """Delete a file from storage"""
         pass
+
+    @abstractmethod
+    async def file_size(self, filename: str) -> Optional[int]:
+        """Size of a stored file in bytes, or None if it does not exist"""
+        pass
+
+    def presigned_url(self, filename: str, expires_in: int) -> Optional[str]:
+        """URL for a client to read a file directly from storage, or None if the storage is not reachable by clients"""
+        return None
+
+    def presigned_upload(
+        self, filename: str, length: int, expires_in: int
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        """URL and headers for a client to PUT a file of the given length directly into storage, or None if the storage does not accept direct uploads"""
+        return None
+
+    async def close(self) -> None:
+        """Release the resources of the storage, such as pooled connections"""
+        pass
@@ -0,0 +1,96 @@
+"""
+Upload storage settings read from the environment
+"""
+
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class UploadsSettings(BaseSettings):
+    """
+    Local file storage configuration, read from ``UPLOADS_*`` environment
+    variables or a ``.env`` file.
+
+    ``fsync`` sets how durable a stored file is once saving returns:
+    "none" leaves flushing to the operating system, "file" flushes the
+    file's contents before it is renamed into place, and "full" also
+    flushes the directory so the rename itself survives a power loss.
+
+    ``shard_depth`` spreads files over that many levels of subdirectories
+    named after a hash of the file name, so no directory holds millions of
+    files; 0 keeps every file in one directory.
+
+    With ``content_addressed``, uploads are stored under the SHA-256 digest
+    of their content, so identical uploads share one file. File deletions
+    are only ordered with new references within one process, so the mode
+    needs a single application process.
+
+    A batch upload accepts up to ``batch_max_files`` files and stores
+    ``batch_concurrency`` of them at a time.
+
+    Resumable uploads of up to ``resumable_max_length`` bytes expire
+    ``resumable_expiry_seconds`` after their last chunk, and expired ones
+    are deleted every ``resumable_gc_interval`` seconds. A chunk that has
+    not stored any data for ``resumable_lock_seconds`` loses its hold on
+    the upload to the next chunk sent for it.
+
+    ``delivery`` sets who sends the bytes of files under /uploads: "direct"
+    streams them from the application, while "x-accel-redirect" (nginx)
+    and "x-sendfile" (Apache, lighttpd) only answer with a header naming
+    the file, for the reverse proxy to send. With ``url_signing_key`` set,
+    photo URLs are signed and only valid for ``url_ttl_seconds`` to twice
+    that.
+
+    ``storage`` selects where files are kept: "local" stores them in the
+    upload directory, and "s3" in the ``s3_bucket`` of an S3-compatible
+    service at ``s3_endpoint_url``, such as AWS S3 or MinIO, under keys
+    starting with ``s3_prefix``. Uploads larger than ``s3_part_size`` are
+    sent in parts, ``s3_part_concurrency`` at a time, over at most
+    ``s3_max_connections`` pooled connections. Photo URLs then point into
+    the bucket, and clients can send resumable uploads straight to it with
+    URLs valid for ``direct_upload_ttl_seconds``.
+
+    With ``cache_dir`` set, files read from the storage are kept in that
+    local directory, up to ``cache_max_size`` bytes of the most recently
+    read ones, so repeated reads of a remote storage stay local.
+
+    Files of deleted photos whose removal from storage was interrupted are
+    deleted every ``tombstone_gc_interval`` seconds.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="UPLOADS_", env_file=".env", extra="ignore"
+    )
+
+    write_buffer_size: int = 1024 * 1024
+    fsync: Literal["none", "file", "full"] = "file"
+    shard_depth: int = 0
+    content_addressed: bool = False
+    batch_max_files: int = 100
+    batch_concurrency: int = 4
+    resumable_max_length: int = 100 * 1024 * 1024
+    resumable_expiry_seconds: int = 24 * 60 * 60
+    resumable_gc_interval: float = 60 * 60
+    resumable_lock_seconds: float = 60
+    delivery: Literal["direct", "x-accel-redirect", "x-sendfile"] = "direct"
+    accel_redirect_prefix: str = "/internal-uploads/"
+    url_signing_key: str = ""
+    url_ttl_seconds: int = 60 * 60
+    tombstone_gc_interval: float = 10 * 60
+    storage: Literal["local", "s3"] = "local"
+    s3_endpoint_url: str = "https://s3.amazonaws.com"
+    s3_region: str = "us-east-1"
+    s3_bucket: str = ""
+    s3_access_key_id: str = ""
+    s3_secret_access_key: str = ""
+    s3_prefix: str = ""
+    s3_part_size: int = 8 * 1024 * 1024
+    s3_part_concurrency: int = 4
+    s3_max_connections: int = 32
+    direct_upload_ttl_seconds: int = 15 * 60
+    cache_dir: str = ""
+    cache_max_size: int = 1024 * 1024 * 1024
+
+
+uploads_settings = UploadsSettings()
@@ -0,0 +1,176 @@
+"""
+Time-limited signed URLs of stored uploads
+"""
+
+import base64
+import hashlib
+import hmac
+import time
+from typing import Optional
+from urllib.parse import quote
+
+from src.uploads.services.factory import get_storage
+from src.uploads.settings import uploads_settings
+
+UPLOADS_URL = "/uploads/"
+
+
+class UrlSigner:
+    """
+    Signs upload URLs with HMAC-SHA256 so they can only be used until they
+    expire.
+
+    Expiry times are rounded up to a multiple of the lifetime, so every URL
+    signed for a file within the same window is identical and browsers can
+    keep serving it from their cache. A URL is valid for between one and
+    two lifetimes after it is signed.
+    """
+
+    def __init__(self, key: str, ttl_seconds: int):
+        """
+        Initialize the UrlSigner.
+
+        Args:
+            key: Secret signing key
+            ttl_seconds: Shortest time a signed URL stays valid
+        """
+        self.key = key.encode()
+        self.ttl_seconds = ttl_seconds
+
+    def sign(self, path: str, now: Optional[float] = None) -> str:
+        """
+        Sign the URL of an upload.
+
+        Args:
+            path: Path of the file relative to the upload directory
+            now: Current UNIX time (optional, the clock's if omitted)
+
+        Returns:
+            URL of the file with expires and signature query parameters
+        """
+        return f"{UPLOADS_URL}{quote(path)}?{self.query(path, now)}"
+
+    def query(self, path: str, now: Optional[float] = None) -> str:
+        """
+        Query string signing a file, for a URL it is served from.
+
+        Args:
+            path: Path of the file relative to the upload directory
+            now: Current UNIX time (optional, the clock's if omitted)
+
+        Returns:
+            The expires and signature query parameters
+        """
+        now = time.time() if now is None else now
+        expires = (int(now) // self.ttl_seconds + 2) * self.ttl_seconds
+        return f"expires={expires}&signature={self.signature(path, expires)}"
+
+    def verify(
+        self,
+        path: str,
+        expires: Optional[str],
+        signature: Optional[str],
+        now: Optional[float] = None,
+    ) -> bool:
+        """
+        Check a signed URL of an upload.
+
+        Args:
+            path: Path of the file relative to the upload directory
+            expires: The URL's expires parameter
+            signature: The URL's signature parameter
+            now: Current UNIX time (optional, the clock's if omitted)
+
+        Returns:
+            True if the signature matches and has not expired
+        """
+        if not expires or not signature or not expires.isdigit():
+            return False
+
+        now = time.time() if now is None else now
+        if int(expires) < now:
+            return False
+
+        return hmac.compare_digest(signature, self.signature(path, int(expires)))
+
+    def signature(self, path: str, expires: int) -> str:
+        """URL-safe HMAC of a path and expiry time."""
+        digest = hmac.new(
+            self.key, f"{path}\n{expires}".encode(), hashlib.sha256
+        ).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def upload_url(path: str, signer: Optional[UrlSigner] = None) -> str:
+    """
+    URL a stored upload is served from, signed when URL signing is enabled.
+    Files in S3 storage are read directly from the bucket with a presigned
+    URL.
+
+    Args:
+        path: Path of the file relative to the upload directory
+        signer: Signer of the URL (optional, from the settings if omitted)
+
+    Returns:
+        URL of the file
+    """
+    if uploads_settings.storage == "s3":
+        return get_storage().presigned_url(path, uploads_settings.url_ttl_seconds)
+
+    signer = signer or url_signer
+    if signer is None:
+        return f"{UPLOADS_URL}{quote(path)}"
+
+    return signer.sign(path)
+
+
+def sign_url(url: str, path: str, signer: Optional[UrlSigner] = None) -> str:
+    """
+    Sign a URL that serves a stored file from another route than the upload
+    directory, such as a resized copy of a photo, when URL signing is
+    enabled.
+
+    Args:
+        url: URL serving the file
+        path: Path of the file relative to the upload directory
+        signer: Signer of the URL (optional, from the settings if omitted)
+
+    Returns:
+        The URL, with expires and signature query parameters if signed
+    """
+    signer = signer or url_signer
+    if signer is None:
+        return url
+
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}{signer.query(path)}"
+
+
+def verify_url(
+    path: str,
+    expires: Optional[str],
+    signature: Optional[str],
+    signer: Optional[UrlSigner] = None,
+) -> bool:
+    """
+    Check the signature of a URL made with sign_url.
+
+    Args:
+        path: Path of the file relative to the upload directory
+        expires: The URL's expires parameter
+        signature: The URL's signature parameter
+        signer: Signer of the URL (optional, from the settings if omitted)
+
+    Returns:
+        True if URL signing is disabled, or the signature matches and has
+        not expired
+    """
+    signer = signer or url_signer
+    return signer is None or signer.verify(path, expires, signature)
+
+
+url_signer = (
+    UrlSigner(uploads_settings.url_signing_key, uploads_settings.url_ttl_seconds)
+    if uploads_settings.url_signing_key
+    else None
+)
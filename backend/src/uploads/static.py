@@ -0,0 +1,205 @@
+"""
+Serving of stored uploads over HTTP
+"""
+
+import os
+import time
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from src.uploads.services.local_storage import shard_path
+from src.uploads.settings import uploads_settings
+from src.uploads.signing import UrlSigner, url_signer
+
+# Uploads are stored under unique names and never change
+UPLOADS_CACHE_MAX_AGE = 31536000
+UPLOADS_CACHE_CONTROL = f"public, max-age={UPLOADS_CACHE_MAX_AGE}, immutable"
+
+# Response header handing a file to the reverse proxy, by delivery mode
+OFFLOAD_HEADERS = {
+    "x-accel-redirect": "X-Accel-Redirect",
+    "x-sendfile": "X-Sendfile",
+}
+
+
+class UploadFileResponse(FileResponse):
+    """File response reading photos in larger chunks than the default 64 KiB."""
+
+    chunk_size = 1024 * 1024
+
+
+class UploadFiles(StaticFiles):
+    """
+    Serves the upload directory for browsers and caches.
+
+    Every file is served with a long-lived immutable Cache-Control header,
+    a strong ETag and Last-Modified, and answers byte-range requests for
+    progressive loading. Conditional requests get 304 Not Modified, with
+    If-None-Match taking precedence over If-Modified-Since. When the ASGI
+    server supports the pathsend extension, whole files are handed to it to
+    send without passing through Python. Files still being written, such as
+    temporary files and unfinished resumable uploads, are not served.
+
+    With a signer, only URLs signed by it are served, and are cached no
+    longer than they are valid. In the "x-accel-redirect" and "x-sendfile"
+    delivery modes the file is not opened at all: the response only names
+    it in a header, and the reverse proxy sends it, handling ranges and
+    revalidation itself.
+
+    URLs name files by their stored name; in a sharded upload directory
+    they are looked up in their shard, or in the flat directory for files
+    that have not been moved yet.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_control: str = UPLOADS_CACHE_CONTROL,
+        delivery: str = uploads_settings.delivery,
+        accel_redirect_prefix: str = uploads_settings.accel_redirect_prefix,
+        signer: Optional[UrlSigner] = url_signer,
+        shard_depth: int = uploads_settings.shard_depth,
+        **kwargs,
+    ) -> None:
+        """
+        Initialize UploadFiles.
+
+        Args:
+            cache_control: Cache-Control header of files served without
+                a signer
+            delivery: "direct", "x-accel-redirect" or "x-sendfile" (see
+                UploadsSettings)
+            accel_redirect_prefix: Internal nginx location of the upload
+                directory, for "x-accel-redirect"
+            signer: Signer whose URLs are required (optional, URLs are not
+                checked if omitted)
+            shard_depth: Directory levels files are spread over (see
+                LocalFileStorage)
+            **kwargs: Arguments of StaticFiles, e.g. directory
+        """
+        super().__init__(**kwargs)
+        self.cache_control = cache_control
+        self.delivery = delivery
+        self.accel_redirect_prefix = accel_redirect_prefix
+        self.signer = signer
+        self.shard_depth = shard_depth
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if not is_servable(path):
+            raise HTTPException(status_code=404)
+
+        if self.signer is not None:
+            params = QueryParams(scope["query_string"])
+            if not self.signer.verify(
+                path, params.get("expires"), params.get("signature")
+            ):
+                raise HTTPException(status_code=403)
+
+        if self.delivery in OFFLOAD_HEADERS:
+            return self.offload_response(path, scope)
+
+        return await super().get_response(path, scope)
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        if self.shard_depth and os.sep not in path:
+            full_path, stat_result = super().lookup_path(
+                shard_path(path, self.shard_depth)
+            )
+            if stat_result is not None:
+                return full_path, stat_result
+
+        return super().lookup_path(path)
+
+    def offload_response(self, path: str, scope: Scope) -> Response:
+        """
+        Response handing a file to the reverse proxy to send.
+
+        Args:
+            path: Path of the file relative to the upload directory
+            scope: Scope of the request
+
+        Returns:
+            Response: Empty, naming the file in the delivery mode's header
+        """
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        if os.sep not in path:
+            # Files are handed over at their place in the current layout
+            path = shard_path(path, self.shard_depth)
+
+        if self.delivery == "x-sendfile":
+            target = os.path.join(os.path.abspath(self.directory), path)
+        else:
+            target = self.accel_redirect_prefix + path
+
+        return Response(
+            headers={
+                OFFLOAD_HEADERS[self.delivery]: target,
+                "Cache-Control": self.response_cache_control(scope),
+            }
+        )
+
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = UploadFileResponse(
+            full_path,
+            status_code=status_code,
+            headers={"Cache-Control": self.response_cache_control(scope)},
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+
+        return response
+
+    def is_not_modified(
+        self, response_headers: Headers, request_headers: Headers
+    ) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is None:
+            return super().is_not_modified(response_headers, request_headers)
+
+        # A client sending ETags wants them compared; its date is ignored
+        if if_none_match.strip() == "*":
+            return True
+
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return response_headers.get("etag") in tags
+
+    def response_cache_control(self, scope: Scope) -> str:
+        """Cache-Control of a file, lasting no longer than its signed URL."""
+        if self.signer is None:
+            return self.cache_control
+
+        expires = int(QueryParams(scope["query_string"])["expires"])
+        max_age = max(min(expires - int(time.time()), UPLOADS_CACHE_MAX_AGE), 0)
+        return f"public, max-age={max_age}, immutable"
+
+
+def is_servable(path: str) -> bool:
+    """
+    Check whether a path in the upload directory names a finished file.
+
+    Args:
+        path: Path relative to the upload directory
+
+    Returns:
+        False for paths outside the directory, hidden files, such as files
+        being written, and unfinished resumable uploads
+    """
+    if os.path.isabs(path) or path.split(os.sep)[0] == os.pardir:
+        return False
+
+    name = os.path.basename(path)
+    return not name.startswith(".") and not name.endswith(".part")
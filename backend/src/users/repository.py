@@ -1,5 +1,7 @@
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.database.core import db_writer
 from src.users.models import User
 
 
@@ -8,7 +10,7 @@ class UsersRepository:
     Repository for User data access operations.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """
         Initialize the UsersRepository.
 
@@ -17,7 +19,7 @@ class UsersRepository:
         """
         self.db = db
 
-    def save(self, user: User) -> User:
+    async def save(self, user: User) -> User:
         """
         Save a user to the database. Raises ValueError if email already exists.
 
@@ -29,20 +31,21 @@ class UsersRepository:
         """
         from sqlalchemy.exc import IntegrityError
 
-        self.db.add(user)
-        try:
-            self.db.commit()
-        except IntegrityError as e:
-            self.db.rollback()
-            if "unique" in str(e).lower() and "email" in str(e).lower():
-                raise ValueError("Email is already in use.")
+        async with db_writer.lock():
+            self.db.add(user)
+            try:
+                await self.db.commit()
+            except IntegrityError as e:
+                await self.db.rollback()
+                if "unique" in str(e).lower() and "email" in str(e).lower():
+                    raise ValueError("Email is already in use.")
 
-            raise
+                raise
 
-        self.db.refresh(user)
+        await self.db.refresh(user)
         return user
 
-    def get_by_id(self, user_id: int) -> User | None:
+    async def get_by_id(self, user_id: int) -> User | None:
         """
         Get a user by ID.
 
@@ -54,9 +57,10 @@ class UsersRepository:
         """
         statement = select(User).where(User.id == user_id)
 
-        return self.db.exec(statement).first()
+        result = await self.db.exec(statement)
+        return result.first()
 
-    def get_by_email(self, email: str) -> User | None:
+    async def get_by_email(self, email: str) -> User | None:
         """
         Get a user by email.
 
@@ -68,4 +72,5 @@ class UsersRepository:
         """
         statement = select(User).where(User.email == email)
 
-        return self.db.exec(statement).first()
+        result = await self.db.exec(statement)
+        return result.first()
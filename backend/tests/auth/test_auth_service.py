@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from uuid import UUID
 
 import pytest
@@ -13,7 +13,7 @@ from src.users.repository import UsersRepository
 @pytest.fixture
 def mock_users_repository():
     """Create a mock UsersRepository"""
-    repo = MagicMock(spec=UsersRepository)
+    repo = AsyncMock(spec=UsersRepository)
 
     def save_user(user):
         user.id = 1
@@ -26,7 +26,7 @@ def mock_users_repository():
 @pytest.fixture
 def mock_sessions_repository():
     """Create a mock SessionsRepository"""
-    return MagicMock(spec=SessionsRepository)
+    return AsyncMock(spec=SessionsRepository)
 
 
 @pytest.fixture
@@ -54,7 +54,8 @@ def service(
     )
 
 
-def test_authenticate_user_success(
+@pytest.mark.asyncio
+async def test_authenticate_user_success(
     service, mock_password_service, mock_users_repository
 ):
     """Test successful user authentication."""
@@ -62,12 +63,13 @@ def test_authenticate_user_success(
     user = User(id=1, email="test@example.com", hashed_password=hashed_password)
     mock_users_repository.get_by_email.return_value = user
 
-    result = service.authenticate_user("test@example.com", "correct_password")
+    result = await service.authenticate_user("test@example.com", "correct_password")
 
     assert result == user
 
 
-def test_authenticate_user_wrong_password(
+@pytest.mark.asyncio
+async def test_authenticate_user_wrong_password(
     service, mock_password_service, mock_users_repository
 ):
     """Test authentication with wrong password."""
@@ -75,16 +77,17 @@ def test_authenticate_user_wrong_password(
     user = User(id=1, email="test@example.com", hashed_password=hashed_password)
     mock_users_repository.get_by_email.return_value = user
 
-    result = service.authenticate_user("test@example.com", "wrong_password")
+    result = await service.authenticate_user("test@example.com", "wrong_password")
 
     assert result is None
 
 
-def test_authenticate_user_not_found(service, mock_users_repository):
+@pytest.mark.asyncio
+async def test_authenticate_user_not_found(service, mock_users_repository):
     """Test authentication when user is not found."""
     mock_users_repository.get_by_email.return_value = None
 
-    result = service.authenticate_user("nonexistent@example.com", "password")
+    result = await service.authenticate_user("nonexistent@example.com", "password")
 
     assert result is None
 
@@ -102,7 +105,8 @@ async def test_register_user(service):
     assert user.hashed_password != "password123"
 
 
-def test_login_user_success(
+@pytest.mark.asyncio
+async def test_login_user_success(
     service, mock_users_repository, mock_sessions_repository, mock_password_service
 ):
     """Test successful login and session creation."""
@@ -115,32 +119,37 @@ def test_login_user_success(
     session.id = session_id
     mock_sessions_repository.create.return_value = session
 
-    result = service.login_user("test@example.com", "correct_password")
+    result = await service.login_user("test@example.com", "correct_password")
 
     assert result == session_id
-    mock_sessions_repository.create.assert_called_once_with(user.id, expires_in_days=30)
+    mock_sessions_repository.create.assert_awaited_once_with(
+        user.id, expires_in_days=30
+    )
 
 
-def test_login_user_invalid_credentials(service, mock_users_repository):
+@pytest.mark.asyncio
+async def test_login_user_invalid_credentials(service, mock_users_repository):
     """Test login with invalid credentials raises ValueError."""
     mock_users_repository.get_by_email.return_value = None
 
     with pytest.raises(ValueError) as exc:
-        service.login_user("nonexistent@example.com", "password")
+        await service.login_user("nonexistent@example.com", "password")
 
     assert "Invalid credentials" in str(exc.value)
 
 
-def test_logout_user(service, mock_sessions_repository):
+@pytest.mark.asyncio
+async def test_logout_user(service, mock_sessions_repository):
     """Test user logout invalidates the session."""
     session_id = UUID("12345678-1234-5678-1234-567812345678")
 
-    service.logout_user(session_id)
+    await service.logout_user(session_id)
 
-    mock_sessions_repository.invalidate_by_id.assert_called_once_with(session_id)
+    mock_sessions_repository.invalidate_by_id.assert_awaited_once_with(session_id)
 
 
-def test_get_current_user_valid_session(
+@pytest.mark.asyncio
+async def test_get_current_user_valid_session(
     service, mock_users_repository, mock_sessions_repository
 ):
     """Test getting current user from valid session."""
@@ -154,25 +163,27 @@ def test_get_current_user_valid_session(
     user = User(id=user_id, email="test@example.com", hashed_password="hashed_pass")
     mock_users_repository.get_by_id.return_value = user
 
-    result = service.get_current_user(session_id)
+    result = await service.get_current_user(session_id)
 
     assert result == user
-    mock_sessions_repository.get_active_by_id.assert_called_once_with(session_id)
-    mock_users_repository.get_by_id.assert_called_once_with(user_id)
+    mock_sessions_repository.get_active_by_id.assert_awaited_once_with(session_id)
+    mock_users_repository.get_by_id.assert_awaited_once_with(user_id)
 
 
-def test_get_current_user_invalid_session(service, mock_sessions_repository):
+@pytest.mark.asyncio
+async def test_get_current_user_invalid_session(service, mock_sessions_repository):
     """Test getting current user with invalid session raises ValueError."""
     session_id = UUID("12345678-1234-5678-1234-567812345678")
     mock_sessions_repository.get_active_by_id.return_value = None
 
     with pytest.raises(ValueError) as exc:
-        service.get_current_user(session_id)
+        await service.get_current_user(session_id)
 
     assert "Invalid or expired session" in str(exc.value)
 
 
-def test_get_current_user_user_not_found(
+@pytest.mark.asyncio
+async def test_get_current_user_user_not_found(
     service, mock_users_repository, mock_sessions_repository
 ):
     """Test getting current user when user is not found raises ValueError."""
@@ -186,6 +197,6 @@ def test_get_current_user_user_not_found(
     mock_users_repository.get_by_id.return_value = None
 
     with pytest.raises(ValueError) as exc:
-        service.get_current_user(session_id)
+        await service.get_current_user(session_id)
 
     assert "User not found" in str(exc.value)
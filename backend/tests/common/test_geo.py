@@ -2,9 +2,15 @@
 Tests for the geo.py utility functions
 """
 
+import numpy as np
 import pytest
 
-from src.common.utils.geo import haversine_distance
+from src.common.utils.geo import (
+    bounding_box,
+    haversine_distance,
+    haversine_distance_matrix,
+    haversine_distances,
+)
 
 
 def test_haversine_distance():
@@ -19,3 +25,74 @@ def test_haversine_distance():
     distance = haversine_distance(lat1, lon1, lat2, lon2)
 
     assert 1250000 < distance < 1350000
+
+
+def test_haversine_distance_same_point():
+    """Test that the distance from a point to itself is zero"""
+    assert haversine_distance(49.1795, 20.0881, 49.1795, 20.0881) == 0.0
+
+
+def test_haversine_distances_matches_scalar():
+    """Test that the batched kernel matches the scalar function"""
+    lats = np.array([49.1795, 50.7361, 49.5731, -33.8688])
+    lons = np.array([20.0881, 15.7400, 19.5297, 151.2093])
+
+    distances = haversine_distances(52.2297, 21.0122, lats, lons)
+
+    assert distances.shape == (4,)
+    assert distances.dtype == np.float64
+    for distance, lat, lon in zip(distances, lats, lons):
+        assert distance == pytest.approx(haversine_distance(52.2297, 21.0122, lat, lon))
+
+
+def test_haversine_distances_empty():
+    """Test the batched kernel with no target points"""
+    distances = haversine_distances(52.2297, 21.0122, np.array([]), np.array([]))
+
+    assert distances.shape == (0,)
+
+
+def test_haversine_distance_matrix():
+    """Test the many-to-many kernel against the one-to-many kernel"""
+    lats1 = np.array([49.1794, 50.7360])
+    lons1 = np.array([20.0880, 15.7401])
+    lats2 = np.array([49.1795, 50.7361, 49.5731])
+    lons2 = np.array([20.0881, 15.7400, 19.5297])
+
+    matrix = haversine_distance_matrix(lats1, lons1, lats2, lons2)
+
+    assert matrix.shape == (2, 3)
+    for row, lat, lon in zip(matrix, lats1, lons1):
+        np.testing.assert_allclose(row, haversine_distances(lat, lon, lats2, lons2))
+
+
+def test_bounding_box_contains_points_within_distance():
+    """Test that every point within the distance lies inside the box"""
+    lat, lon, distance = 49.1795, 20.0881, 50000
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, distance)
+
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(lat - 1, lat + 1, 10000)
+    lons = rng.uniform(lon - 1.5, lon + 1.5, 10000)
+    within = haversine_distances(lat, lon, lats, lons) <= distance
+
+    assert within.any()
+    assert np.all((lats[within] >= min_lat) & (lats[within] <= max_lat))
+    assert np.all((lons[within] >= min_lon) & (lons[within] <= max_lon))
+
+
+def test_bounding_box_across_antimeridian():
+    """Test that a box crossing 180° longitude wraps around"""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(0.0, 179.9, 50000)
+
+    assert min_lon > max_lon
+    assert min_lon < 179.9
+    assert max_lon < -179.0
+
+
+def test_bounding_box_near_pole():
+    """Test that a box containing a pole spans all longitudes"""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(89.9, 10.0, 50000)
+
+    assert max_lat == 90.0
+    assert (min_lon, max_lon) == (-180.0, 180.0)
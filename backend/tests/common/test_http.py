@@ -0,0 +1,47 @@
+"""
+Tests for the http.py utility functions
+"""
+
+from src.common.utils.http import etag_matches, select_encoding
+
+
+def test_etag_matches():
+    """Test If-None-Match comparison against current entity tags"""
+    etags = ['"abc"', '"abc-gzip"']
+
+    assert etag_matches('"abc"', etags)
+    assert etag_matches('"xyz", "abc-gzip"', etags)
+    assert etag_matches('W/"abc"', etags)
+    assert etag_matches("*", etags)
+    assert not etag_matches('"xyz"', etags)
+    assert not etag_matches(None, etags)
+    assert not etag_matches("", etags)
+
+
+def test_select_encoding():
+    """Test Accept-Encoding negotiation"""
+    available = ["br", "gzip"]
+
+    assert select_encoding("gzip, deflate, br", available) == "br"
+    assert select_encoding("gzip, deflate", available) == "gzip"
+    assert select_encoding("br;q=0.5, gzip;q=0.9, identity;q=0.1", available) == (
+        "gzip"
+    )
+    assert select_encoding("gzip;q=0", available) == "identity"
+    assert select_encoding("*", available) == "br"
+    assert select_encoding("identity", available) == "identity"
+    assert select_encoding(None, available) == "identity"
+    assert select_encoding("", available) == "identity"
+
+
+def test_select_encoding_weighs_identity():
+    """Test that identity is weighed like the other codings"""
+    available = ["br", "gzip"]
+
+    assert select_encoding("gzip;q=0.1, identity;q=1", available) == "identity"
+    assert select_encoding("br;q=0.5, gzip;q=0.9", available) == "identity"
+    assert select_encoding("gzip;q=0.5, *;q=0.1", available) == "gzip"
+    assert select_encoding("deflate, *;q=0.2", available) == "br"
+    assert select_encoding("deflate, identity;q=0", available) is None
+    assert select_encoding("*;q=0", available) is None
+    assert select_encoding("gzip;q=0, identity;q=0", available) is None
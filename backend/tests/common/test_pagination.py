@@ -0,0 +1,24 @@
+"""
+Tests for pagination cursor utilities
+"""
+
+import pytest
+
+from src.common.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    """Test that a decoded cursor equals the encoded position"""
+    position = {"sort_by": "captured_at", "value": "2025-10-01T11:00:00", "id": 7}
+
+    cursor = encode_cursor(position)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == position
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm90IGpzb24", "WzEsMl0"])
+def test_decode_invalid_cursor(cursor):
+    """Test that malformed cursors raise ValueError"""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
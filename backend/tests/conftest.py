@@ -2,18 +2,24 @@ import shutil
 from pathlib import Path
 
 import pytest
+import pytest_asyncio
 from fastapi import UploadFile
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.datastructures import Headers
 
 from main import app
-from src.database.core import get_db
+from src.database.core import get_async_db, get_db
+from src.database.settings import database_settings
+from src.database.sqlite import configure_sqlite
 from src.peaks.models import Peak
 from src.uploads.services.local_storage import LocalFileStorage
 from tests.auth.auth_fixtures import logged_in_user, registered_user
 from tests.peaks.peak_fixtures import peak_coords, peak_models
+from tests.photos.photo_fixtures import exif_jpeg, photo_jpeg
 
 
 @pytest.fixture
@@ -24,16 +30,22 @@ def client():
 
 
 @pytest.fixture
-def client_with_db(test_db):
+def client_with_db(test_db, test_async_engine):
     """
     Create a test client with a test database session.
-    Reuses the test_db fixture for database operations.
+    Reuses the test_db fixture for synchronous database operations and opens
+    a fresh async session on the same database for each request.
     """
 
     def override_get_db():
         yield test_db
 
+    async def override_get_async_db():
+        async with AsyncSession(test_async_engine, expire_on_commit=False) as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     with TestClient(app, base_url="https://testserver") as test_client:
         yield test_client
@@ -42,21 +54,51 @@ def client_with_db(test_db):
 
 
 @pytest.fixture
-def test_db():
+def test_db_path(tmp_path):
+    """Path of a temporary SQLite database file shared by sync and async engines"""
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def test_db(test_db_path):
     """
-    Create a test database session with an in-memory SQLite database.
+    Create a test database session with a temporary SQLite database.
     """
     engine = create_engine(
-        "sqlite://",
+        f"sqlite:///{test_db_path}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
         echo=False,
     )
+    configure_sqlite(engine, database_settings)
     SQLModel.metadata.create_all(engine)
 
     with Session(engine) as db:
         yield db
 
+    engine.dispose()
+
+
+@pytest.fixture
+def test_async_engine(test_db, test_db_path):
+    """
+    Create an async engine on the test database.
+    Connections are not pooled so each event loop opens its own.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{test_db_path}", poolclass=NullPool, echo=False
+    )
+    configure_sqlite(engine.sync_engine, database_settings)
+    return engine
+
+
+@pytest_asyncio.fixture
+async def test_async_db(test_async_engine):
+    """
+    Create an async test database session on the test database.
+    """
+    async with AsyncSession(test_async_engine, expire_on_commit=False) as db:
+        yield db
+
 
 @pytest.fixture
 def test_peaks(test_db: Session):
@@ -0,0 +1,96 @@
+"""
+Tests for database settings and engine configuration
+"""
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.database.core import engine_options
+from src.database.settings import DatabaseSettings
+
+
+def test_settings_defaults_to_sqlite(monkeypatch):
+    """Test that the default settings point at the local SQLite database"""
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+
+    settings = DatabaseSettings(_env_file=None)
+
+    assert settings.backend == "sqlite"
+    assert settings.sync_url.drivername == "sqlite"
+    assert settings.async_url.drivername == "sqlite+aiosqlite"
+    assert settings.async_url.database == "./polish_peaks.db"
+
+
+def test_settings_read_from_environment(monkeypatch):
+    """Test that settings are read from DATABASE_* environment variables"""
+    monkeypatch.setenv("DATABASE_URL", "postgresql://peaks:secret@db:5432/peaks")
+    monkeypatch.setenv("DATABASE_POOL_SIZE", "20")
+    monkeypatch.setenv("DATABASE_STATEMENT_TIMEOUT_MS", "5000")
+    monkeypatch.setenv("DATABASE_POSTGIS", "true")
+
+    settings = DatabaseSettings(_env_file=None)
+
+    assert settings.backend == "postgresql"
+    assert settings.pool_size == 20
+    assert settings.statement_timeout_ms == 5000
+    assert settings.postgis is True
+
+
+def test_postgres_urls_use_psycopg():
+    """Test that PostgreSQL URLs get the psycopg driver for both engines"""
+    settings = DatabaseSettings(
+        url="postgresql+psycopg2://peaks:secret@db/peaks", _env_file=None
+    )
+
+    assert settings.sync_url.drivername == "postgresql+psycopg"
+    assert settings.async_url.drivername == "postgresql+psycopg"
+    assert settings.sync_url.password == "secret"
+    assert settings.sync_url.host == "db"
+
+
+def test_unsupported_backend():
+    """Test that an unsupported backend is rejected"""
+    settings = DatabaseSettings(url="mysql://peaks@db/peaks", _env_file=None)
+
+    with pytest.raises(ValueError):
+        settings.sync_url
+
+
+def test_engine_options_file_sqlite():
+    """Test that file-based SQLite engines get pool settings"""
+    settings = DatabaseSettings(
+        url="sqlite:///./peaks.db", pool_size=3, max_overflow=1, _env_file=None
+    )
+
+    options = engine_options(settings.sync_url, settings)
+
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 1
+    assert options["pool_pre_ping"] is True
+    assert options["echo"] is False
+    assert "connect_args" not in options
+
+
+def test_engine_options_memory_sqlite():
+    """Test that in-memory SQLite engines get no pool sizing"""
+    settings = DatabaseSettings(url="sqlite://", _env_file=None)
+
+    options = engine_options(settings.sync_url, settings)
+
+    assert "pool_size" not in options
+    create_engine(settings.sync_url, **options).dispose()
+
+
+def test_engine_options_postgres_statement_timeout():
+    """Test that PostgreSQL connections set the statement timeout"""
+    settings = DatabaseSettings(
+        url="postgresql://peaks@db/peaks",
+        statement_timeout_ms=2500,
+        pool_recycle=600,
+        _env_file=None,
+    )
+
+    options = engine_options(settings.async_url, settings)
+
+    assert options["connect_args"] == {"options": "-c statement_timeout=2500"}
+    assert options["pool_recycle"] == 600
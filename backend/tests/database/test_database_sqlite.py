@@ -0,0 +1,115 @@
+"""
+Tests for SQLite connection tuning and write serialization
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.database.settings import DatabaseSettings
+from src.database.sqlite import DatabaseWriter, configure_sqlite
+from src.sessions.repository import SessionsRepository
+
+
+@pytest.fixture
+def tuned_settings():
+    """Return SQLite settings with tuning enabled"""
+    return DatabaseSettings(sqlite_busy_timeout_ms=1234, _env_file=None)
+
+
+def test_pragmas_applied_to_connections(tmp_path, tuned_settings):
+    """Test that every new connection gets the tuning pragmas"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+    configure_sqlite(engine, tuned_settings)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -65536
+
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pragmas_applied_to_async_connections(tmp_path, tuned_settings):
+    """Test that async engines get the tuning pragmas"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}")
+    configure_sqlite(engine.sync_engine, tuned_settings)
+
+    async with engine.connect() as connection:
+        result = await connection.execute(text("PRAGMA journal_mode"))
+        assert result.scalar() == "wal"
+        result = await connection.execute(text("PRAGMA busy_timeout"))
+        assert result.scalar() == 1234
+
+    await engine.dispose()
+
+
+def test_tuning_disabled(tmp_path):
+    """Test that no pragmas are set when tuning is disabled"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'plain.db'}")
+    configure_sqlite(engine, DatabaseSettings(sqlite_tuning=False, _env_file=None))
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_writer_serializes_writes():
+    """Test that write blocks never overlap"""
+    writer = DatabaseWriter()
+    active = 0
+    max_active = 0
+
+    async def write():
+        nonlocal active, max_active
+        async with writer.lock():
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+
+    await asyncio.gather(*(write() for _ in range(20)))
+
+    assert max_active == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_writer_does_not_lock():
+    """Test that a disabled writer lets writes run concurrently"""
+    writer = DatabaseWriter(enabled=False)
+    active = 0
+    max_active = 0
+
+    async def write():
+        nonlocal active, max_active
+        async with writer.lock():
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+
+    await asyncio.gather(*(write() for _ in range(5)))
+
+    assert max_active == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_session_creates(test_async_engine):
+    """Test that many concurrent writers all succeed without lock errors"""
+
+    async def create():
+        async with AsyncSession(test_async_engine, expire_on_commit=False) as db:
+            return await SessionsRepository(db).create(user_id=1, expires_in_days=1)
+
+    sessions = await asyncio.gather(*(create() for _ in range(25)))
+
+    assert len({session.id for session in sessions}) == 25
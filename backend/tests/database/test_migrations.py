@@ -0,0 +1,80 @@
+"""
+Tests for the database migrations
+"""
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+from sqlmodel import SQLModel
+
+from src.database.core import run_migrations
+
+PHOTO_INDEXES = {
+    "ix_summitphoto_peak_id",
+    "ix_summitphoto_uploaded_at_id",
+    "ix_summitphoto_captured_at_id",
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create an engine on an empty SQLite database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _indexes(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_upgrade_creates_schema(engine):
+    """Test that upgrading an empty database creates every table and index"""
+    run_migrations(engine)
+
+    tables = set(inspect(engine).get_table_names())
+    assert {
+        "peak",
+        "user",
+        "session",
+        "summitphoto",
+        "job",
+        "blob",
+        "resumableupload",
+        "phototombstone",
+        "alembic_version",
+    } <= tables
+    assert PHOTO_INDEXES <= _indexes(engine, "summitphoto")
+
+
+def test_migrations_match_models(engine):
+    """Test that the migrated schema matches the SQLModel metadata"""
+    run_migrations(engine)
+
+    with engine.connect() as connection:
+        diff = compare_metadata(
+            MigrationContext.configure(connection), SQLModel.metadata
+        )
+
+    assert diff == []
+
+
+def test_upgrade_existing_database(engine):
+    """Test that a database created before migrations gets the new indexes"""
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for name in PHOTO_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+
+    run_migrations(engine)
+
+    assert PHOTO_INDEXES <= _indexes(engine, "summitphoto")
+
+
+def test_upgrade_is_idempotent(engine):
+    """Test that running migrations twice is a no-op"""
+    run_migrations(engine)
+    run_migrations(engine)
+
+    assert PHOTO_INDEXES <= _indexes(engine, "summitphoto")
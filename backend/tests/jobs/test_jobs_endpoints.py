@@ -0,0 +1,30 @@
+from src.jobs.models import Job
+
+
+def test_get_job(client_with_db, test_db):
+    """Test getting the status of a photo's processing job"""
+    job = Job(kind="photo.process", photo_id=1, max_attempts=5)
+    test_db.add(job)
+    test_db.commit()
+
+    jobs = client_with_db.get("/api/jobs/", params={"photo_id": 1})
+
+    assert jobs.status_code == 200
+    assert [item["id"] for item in jobs.json()] == [job.id]
+
+    resp = client_with_db.get(f"/api/jobs/{job.id}")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["kind"] == "photo.process"
+    assert data["photo_id"] == 1
+    assert data["status"] == "pending"
+    assert data["attempts"] == 0
+
+
+def test_get_nonexistent_job(client_with_db):
+    """Test getting a job that doesn't exist"""
+    resp = client_with_db.get("/api/jobs/9999")
+
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Job not found"
@@ -0,0 +1,153 @@
+"""
+Tests for the JobsRepository
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from src.jobs.models import Job
+from src.jobs.repository import JobsRepository
+
+LEASE = timedelta(minutes=5)
+
+
+@pytest.fixture()
+def test_jobs_repository(test_async_db):
+    """Create a JobsRepository instance for testing"""
+    return JobsRepository(test_async_db)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_and_claim(test_jobs_repository):
+    """Test that a queued job is claimed once, counting the attempt"""
+    job = await test_jobs_repository.enqueue("photo.process", 3, photo_id=7)
+
+    claimed = await test_jobs_repository.claim(LEASE)
+
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.attempts == 1
+    assert claimed.photo_id == 7
+    assert claimed.locked_until > datetime.utcnow()
+    assert await test_jobs_repository.claim(LEASE) is None
+
+
+@pytest.mark.asyncio
+async def test_claim_in_queue_order(test_jobs_repository):
+    """Test that jobs are claimed oldest first"""
+    first = await test_jobs_repository.enqueue("photo.process", 3)
+    second = await test_jobs_repository.enqueue("photo.process", 3)
+
+    assert (await test_jobs_repository.claim(LEASE)).id == first.id
+    assert (await test_jobs_repository.claim(LEASE)).id == second.id
+
+
+@pytest.mark.asyncio
+async def test_claim_expired_lease(test_jobs_repository):
+    """Test that a job whose worker stopped is claimed again"""
+    await test_jobs_repository.enqueue("photo.process", 3)
+    await test_jobs_repository.claim(timedelta(seconds=-1))
+
+    claimed = await test_jobs_repository.claim(LEASE)
+
+    assert claimed is not None
+    assert claimed.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_claim_skips_job_taken_meanwhile(
+    test_jobs_repository, test_async_db, test_async_engine, monkeypatch
+):
+    """Test that a job claimed by another process after it was selected is
+    left to that process"""
+    first = await test_jobs_repository.enqueue("photo.process", 3)
+    second = await test_jobs_repository.enqueue("photo.process", 3)
+    select_job = test_async_db.exec
+
+    async def exec_then_claim_first(statement, *args, **kwargs):
+        results = await select_job(statement, *args, **kwargs)
+        monkeypatch.setattr(test_async_db, "exec", select_job)
+        async with test_async_engine.begin() as connection:
+            await connection.execute(
+                update(Job)
+                .where(Job.id == first.id)
+                .values(status="running", locked_until=datetime.utcnow() + LEASE)
+            )
+        return results
+
+    monkeypatch.setattr(test_async_db, "exec", exec_then_claim_first)
+
+    claimed = await test_jobs_repository.claim(LEASE)
+
+    assert claimed.id == second.id
+    assert await test_jobs_repository.claim(LEASE) is None
+
+
+@pytest.mark.asyncio
+async def test_renew(test_jobs_repository, test_async_db):
+    """Test that only the current claim of a job can extend its lease"""
+    job = await test_jobs_repository.enqueue("photo.process", 3)
+    await test_jobs_repository.claim(timedelta(seconds=-1))
+    # The first claim, as its worker still sees it
+    stale = Job(id=job.id, kind=job.kind, max_attempts=3, attempts=1)
+    claimed = await test_jobs_repository.claim(timedelta(seconds=1))
+
+    assert await test_jobs_repository.renew(claimed, LEASE) is True
+    assert await test_jobs_repository.renew(stale, LEASE) is False
+    await test_async_db.refresh(claimed)
+    assert claimed.locked_until > datetime.utcnow() + timedelta(minutes=4)
+
+
+@pytest.mark.asyncio
+async def test_finish_after_takeover(test_jobs_repository, test_async_db):
+    """Test that a claim whose lease was taken over cannot finish the job"""
+    job = await test_jobs_repository.enqueue("photo.process", 3)
+    await test_jobs_repository.claim(timedelta(seconds=-1))
+    # The first claim, as its worker still sees it
+    stale = Job(id=job.id, kind=job.kind, max_attempts=3, attempts=1)
+    claimed = await test_jobs_repository.claim(LEASE)
+
+    assert await test_jobs_repository.succeed(stale) is False
+    assert await test_jobs_repository.fail(stale, "not an image") is False
+    await test_async_db.refresh(claimed)
+    assert claimed.status == "running"
+    assert claimed.locked_until > datetime.utcnow()
+
+    assert await test_jobs_repository.succeed(claimed) is True
+    assert claimed.status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_fail_with_retry(test_jobs_repository):
+    """Test that a job retried later is not claimed before it is due"""
+    await test_jobs_repository.enqueue("photo.process", 3)
+    job = await test_jobs_repository.claim(LEASE)
+
+    await test_jobs_repository.fail(
+        job, "storage unavailable", datetime.utcnow() + timedelta(minutes=1)
+    )
+
+    assert job.status == "pending"
+    assert job.last_error == "storage unavailable"
+    assert await test_jobs_repository.claim(LEASE) is None
+
+
+@pytest.mark.asyncio
+async def test_fail_and_succeed(test_jobs_repository):
+    """Test that finished jobs are not claimed again"""
+    await test_jobs_repository.enqueue("photo.process", 3, photo_id=1)
+    await test_jobs_repository.enqueue("photo.process", 3, photo_id=1)
+    failed = await test_jobs_repository.claim(LEASE)
+    succeeded = await test_jobs_repository.claim(LEASE)
+
+    await test_jobs_repository.fail(failed, "not an image")
+    await test_jobs_repository.succeed(succeeded)
+
+    assert await test_jobs_repository.claim(LEASE) is None
+    jobs = await test_jobs_repository.get_for_photo(1)
+    assert [(job.status, job.finished_at is not None) for job in jobs] == [
+        ("failed", True),
+        ("succeeded", True),
+    ]
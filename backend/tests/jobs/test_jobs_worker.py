@@ -0,0 +1,287 @@
+"""
+Tests for the JobWorker
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.jobs.models import Job
+from src.jobs.repository import JobsRepository
+from src.jobs.settings import JobsSettings
+from src.jobs.worker import JobHandler, JobWorker
+from src.photos.jobs import photo_job_handlers
+from src.photos.models import SummitPhoto
+from src.photos.service import PROCESS_PHOTO_JOB
+from src.uploads.service import UploadsService
+
+SETTINGS = JobsSettings(backoff_seconds=10, max_backoff_seconds=60)
+
+
+class RecordingHandler(JobHandler):
+    """Handler raising the given errors in turn, then succeeding"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.runs = []
+        self.failures = []
+
+    async def run(self, db, job, executor):
+        self.runs.append(job.id)
+        if self.errors:
+            raise self.errors.pop(0)
+
+    async def failed(self, db, job):
+        self.failures.append(job.id)
+
+
+@pytest.fixture
+def executor():
+    """Create a thread pool standing in for the process pool"""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        yield executor
+
+
+async def _enqueue(test_async_db, kind="test", max_attempts=3):
+    return await JobsRepository(test_async_db).enqueue(kind, max_attempts)
+
+
+async def _job(test_async_db, job_id):
+    test_async_db.expire_all()
+    return await JobsRepository(test_async_db).get_by_id(job_id)
+
+
+def test_backoff_doubles_up_to_maximum(test_async_engine):
+    worker = JobWorker(test_async_engine, {}, settings=SETTINGS)
+
+    assert [worker.backoff(n).total_seconds() for n in (1, 2, 3, 4)] == [
+        10,
+        20,
+        40,
+        60,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_pending(test_async_engine, test_async_db, executor):
+    """Test that due jobs are run and marked as succeeded"""
+    handler = RecordingHandler()
+    worker = JobWorker(
+        test_async_engine, {"test": handler}, settings=SETTINGS, executor=executor
+    )
+    jobs = [await _enqueue(test_async_db) for _ in range(3)]
+
+    assert await worker.run_pending() == 3
+
+    assert handler.runs == [job.id for job in jobs]
+    assert (await _job(test_async_db, jobs[0].id)).status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_with_backoff(
+    test_async_engine, test_async_db, executor
+):
+    """Test that a job failing with an unexpected error is retried later"""
+    handler = RecordingHandler(OSError("storage unavailable"))
+    worker = JobWorker(
+        test_async_engine, {"test": handler}, settings=SETTINGS, executor=executor
+    )
+    job = await _enqueue(test_async_db)
+
+    assert await worker.run_pending() == 1
+
+    job = await _job(test_async_db, job.id)
+    assert job.status == "pending"
+    assert job.attempts == 1
+    assert job.last_error == "storage unavailable"
+    assert job.run_after > datetime.utcnow() + timedelta(seconds=5)
+    assert handler.failures == []
+
+
+@pytest.mark.asyncio
+async def test_job_fails_after_max_attempts(test_async_engine, test_async_db, executor):
+    """Test that a job is failed for good once it runs out of attempts"""
+    settings = JobsSettings(backoff_seconds=0)
+    handler = RecordingHandler(OSError("first"), OSError("second"))
+    worker = JobWorker(
+        test_async_engine, {"test": handler}, settings=settings, executor=executor
+    )
+    job = await _enqueue(test_async_db, max_attempts=2)
+
+    assert await worker.run_pending() == 2
+
+    job = await _job(test_async_db, job.id)
+    assert (job.status, job.attempts, job.last_error) == ("failed", 2, "second")
+    assert handler.failures == [job.id]
+
+
+@pytest.mark.asyncio
+async def test_value_error_is_not_retried(test_async_engine, test_async_db, executor):
+    """Test that a job failing with a ValueError is failed without retrying"""
+    handler = RecordingHandler(ValueError("not an image"))
+    worker = JobWorker(
+        test_async_engine, {"test": handler}, settings=SETTINGS, executor=executor
+    )
+    job = await _enqueue(test_async_db)
+
+    await worker.run_pending()
+
+    job = await _job(test_async_db, job.id)
+    assert (job.status, job.attempts) == ("failed", 1)
+    assert handler.failures == [job.id]
+
+
+@pytest.mark.asyncio
+async def test_unknown_job_kind_fails(test_async_engine, test_async_db, executor):
+    """Test that a job without a handler is failed"""
+    worker = JobWorker(test_async_engine, {}, settings=SETTINGS, executor=executor)
+    job = await _enqueue(test_async_db, kind="unknown")
+
+    await worker.run_pending()
+
+    job = await _job(test_async_db, job.id)
+    assert job.status == "failed"
+    assert "unknown" in job.last_error
+
+
+class SlowHandler(JobHandler):
+    """Handler checking whether its job can be claimed while it runs"""
+
+    def __init__(self, engine, duration: float):
+        self.engine = engine
+        self.duration = duration
+        self.claimed_meanwhile = None
+
+    async def run(self, db, job, executor):
+        await asyncio.sleep(self.duration)
+        async with AsyncSession(self.engine) as other:
+            self.claimed_meanwhile = await JobsRepository(other).claim(
+                timedelta(seconds=1)
+            )
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_job_runs(
+    test_async_engine, test_async_db, executor
+):
+    """Test that a job running longer than its lease is not claimed again"""
+    handler = SlowHandler(test_async_engine, 0.5)
+    worker = JobWorker(
+        test_async_engine,
+        {"test": handler},
+        settings=JobsSettings(lease_seconds=0.3),
+        executor=executor,
+    )
+    job = await _enqueue(test_async_db)
+
+    assert await worker.run_pending() == 1
+
+    assert handler.claimed_meanwhile is None
+    assert (await _job(test_async_db, job.id)).status == "succeeded"
+
+
+class TakeoverHandler(JobHandler):
+    """Handler whose job is taken over by another worker while it runs"""
+
+    def __init__(self, engine, error=None):
+        self.engine = engine
+        self.error = error
+        self.failures = []
+
+    async def run(self, db, job, executor):
+        async with AsyncSession(self.engine, expire_on_commit=False) as other:
+            # The lease lapses, e.g. while the worker was stalled
+            await other.execute(
+                update(Job)
+                .where(Job.id == job.id)
+                .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await other.commit()
+            assert (
+                await JobsRepository(other).claim(timedelta(minutes=5))
+            ).id == job.id
+        if self.error:
+            raise self.error
+
+    async def failed(self, db, job):
+        self.failures.append(job.id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [None, ValueError("not an image")])
+async def test_job_taken_over_is_left_to_new_holder(
+    test_async_engine, test_async_db, executor, error
+):
+    """Test that a worker whose lease was taken over does not finish the job"""
+    handler = TakeoverHandler(test_async_engine, error)
+    worker = JobWorker(
+        test_async_engine, {"test": handler}, settings=SETTINGS, executor=executor
+    )
+    job = await _enqueue(test_async_db)
+
+    assert await worker.run_next() is True
+
+    job = await _job(test_async_db, job.id)
+    assert job.status == "running"
+    assert job.attempts == 2
+    assert job.locked_until > datetime.utcnow()
+    assert handler.failures == []
+
+
+@pytest.mark.asyncio
+async def test_process_photo_in_process_pool(
+    test_async_engine, test_async_db, local_storage, photo_jpeg
+):
+    """Test processing an uploaded photo with derivatives rendered in a process pool"""
+    await local_storage.save_bytes(photo_jpeg, "summit.jpg")
+    photo = SummitPhoto(file_name="summit.jpg", processing_status="pending")
+    test_async_db.add(photo)
+    await test_async_db.commit()
+    await JobsRepository(test_async_db).enqueue(PROCESS_PHOTO_JOB, 3, photo_id=photo.id)
+    worker = JobWorker(
+        test_async_engine,
+        photo_job_handlers(UploadsService(local_storage)),
+        settings=JobsSettings(processes=1),
+    )
+
+    try:
+        assert await worker.run_pending() == 1
+    finally:
+        await worker.stop()
+
+    await test_async_db.refresh(photo)
+    assert photo.processing_status == "ready"
+    assert await local_storage.read_file("summit.jpg.2048.jpeg") is not None
+
+
+@pytest.mark.asyncio
+async def test_consumer_logs_errors_and_keeps_polling(
+    test_async_engine, executor, monkeypatch, caplog
+):
+    """Test that a consumer logs a failure to run jobs and polls again"""
+    worker = JobWorker(
+        test_async_engine,
+        {},
+        settings=JobsSettings(concurrency=1, poll_interval=0.01),
+        executor=executor,
+    )
+    calls = 0
+
+    async def run_next():
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(worker, "run_next", run_next)
+
+    worker.start()
+    await asyncio.sleep(0.05)
+    await worker.stop()
+
+    assert calls > 1
+    assert "Could not run the next job" in caplog.text
+    assert "database is locked" in caplog.text
@@ -0,0 +1,110 @@
+"""
+Tests for the PeaksCache
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from src.peaks.cache import PeaksCache, peaks_cache
+from src.peaks.models import Peak
+
+
+@pytest.fixture
+def cache():
+    """Create an empty PeaksCache"""
+    return PeaksCache()
+
+
+@pytest.fixture
+def statements(test_db):
+    """Record SQL statements executed on the test database"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engine = test_db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_get_loads_catalogue(cache, test_db, test_peaks):
+    """Test that the first access loads all peaks"""
+    catalogue = cache.get(test_db)
+
+    assert len(catalogue.peaks) == 3
+    assert len(catalogue.index) == 3
+    assert catalogue.get(test_peaks[0].id).name == "Rysy"
+    assert catalogue.get(999999) is None
+
+
+def test_get_reads_through_once(cache, test_db, test_peaks, statements):
+    """Test that cached reads do not hit the database"""
+    cache.get(test_db)
+    loaded = len(statements)
+
+    for _ in range(5):
+        cache.get(test_db)
+
+    assert loaded > 0
+    assert len(statements) == loaded
+
+
+def test_catalogue_peaks_are_detached(cache, test_db, test_peaks):
+    """Test that cached peaks are not bound to the loading session"""
+    catalogue = cache.get(test_db)
+
+    assert all(peak not in test_db for peak in catalogue.peaks)
+
+
+def test_commit_invalidates_catalogue(test_db, test_peaks):
+    """Test that committing a peak change reloads the shared cache"""
+    catalogue = peaks_cache.get(test_db)
+
+    peak = test_db.get(Peak, test_peaks[0].id)
+    peak.elevation = 2500
+    test_db.commit()
+
+    reloaded = peaks_cache.get(test_db)
+
+    assert reloaded is not catalogue
+    assert reloaded.version > catalogue.version
+    assert reloaded.get(peak.id).elevation == 2500
+
+
+def test_rollback_keeps_catalogue(test_db, test_peaks):
+    """Test that rolled back peak changes do not invalidate the cache"""
+    catalogue = peaks_cache.get(test_db)
+
+    test_db.add(
+        Peak(name="Tarnica", elevation=1346, latitude=49.07, longitude=22.72, range="B")
+    )
+    test_db.flush()
+    test_db.rollback()
+
+    assert peaks_cache.get(test_db) is catalogue
+
+
+def test_invalidate(cache, test_db, test_peaks):
+    """Test explicit invalidation"""
+    catalogue = cache.get(test_db)
+
+    cache.invalidate()
+
+    assert cache.get(test_db) is not catalogue
+
+
+def test_catalogue_per_database(cache, test_db, test_peaks):
+    """Test that each database gets its own catalogue"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as other_db:
+        assert len(cache.get(other_db).peaks) == 0
+
+    assert len(cache.get(test_db).peaks) == 3
@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlmodel import Session
 
 from src.peaks.models import Peak
 
@@ -34,6 +35,95 @@ def test_get_peaks_empty_database(client_with_db: TestClient):
     assert response.json() == []
 
 
+def test_get_peaks_etag(client_with_db: TestClient, test_peaks: list[Peak]):
+    """Test that the peak list carries a strong ETag and supports 304"""
+    response = client_with_db.get(
+        "/api/peaks/", headers={"Accept-Encoding": "identity"}
+    )
+
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert response.headers["cache-control"] == "no-cache"
+    assert "content-encoding" not in response.headers
+
+    not_modified = client_with_db.get(
+        "/api/peaks/",
+        headers={"Accept-Encoding": "identity", "If-None-Match": etag},
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+
+def test_get_peaks_etag_changes_with_catalogue(
+    client_with_db: TestClient, test_db: Session, test_peaks: list[Peak]
+):
+    """Test that editing a peak changes the ETag"""
+    etag = client_with_db.get("/api/peaks/").headers["etag"]
+
+    test_peaks[0].elevation = 2500
+    test_db.commit()
+
+    response = client_with_db.get("/api/peaks/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert any(peak["elevation"] == 2500 for peak in response.json())
+
+
+def test_get_peaks_gzip(client_with_db: TestClient, test_peaks: list[Peak]):
+    """Test that a pre-compressed gzip variant is served when accepted"""
+    identity = client_with_db.get(
+        "/api/peaks/", headers={"Accept-Encoding": "identity"}
+    )
+    response = client_with_db.get("/api/peaks/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] != identity.headers["etag"]
+    assert response.json() == identity.json()
+
+
+def test_get_peaks_brotli(client_with_db: TestClient, test_peaks: list[Peak]):
+    """Test that a pre-compressed brotli variant is served when available"""
+    pytest.importorskip("brotli")
+
+    response = client_with_db.get(
+        "/api/peaks/", headers={"Accept-Encoding": "gzip, br"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()) == 3
+
+
+def test_get_peaks_prefers_identity_by_weight(
+    client_with_db: TestClient, test_peaks: list[Peak]
+):
+    """Test that identity is sent when the client weighs it highest"""
+    response = client_with_db.get(
+        "/api/peaks/", headers={"Accept-Encoding": "gzip;q=0.1, identity;q=1"}
+    )
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_get_peaks_no_acceptable_encoding(
+    client_with_db: TestClient, test_peaks: list[Peak]
+):
+    """Test that a client accepting none of the codings gets 406"""
+    for accept_encoding in ("deflate, identity;q=0", "*;q=0"):
+        response = client_with_db.get(
+            "/api/peaks/", headers={"Accept-Encoding": accept_encoding}
+        )
+
+        assert response.status_code == 406
+
+
 def test_find_nearest_peaks(
     client_with_db: TestClient, test_peaks: list[Peak], peak_coords: dict
 ):
@@ -211,6 +301,117 @@ def test_find_nearest_peaks_invalid_parameters(
 
     assert response.status_code == 422
 
+    response = client_with_db.get(
+        "/api/peaks/find",
+        params={
+            "latitude": peak_coords["near_rysy"][0],
+            "longitude": peak_coords["near_rysy"][1],
+            "limit": 0,
+        },
+    )
+
+    assert response.status_code == 422
+
+
+def test_find_nearest_peaks_batch(
+    client_with_db: TestClient, test_peaks: list[Peak], peak_coords: dict
+):
+    """Test finding nearest peaks for many points in one request"""
+    response = client_with_db.post(
+        "/api/peaks/find/batch",
+        json={
+            "points": [
+                {"latitude": lat, "longitude": lon}
+                for lat, lon in (
+                    peak_coords["near_rysy"],
+                    peak_coords["near_sniezka"],
+                    peak_coords["warsaw"],
+                )
+            ],
+            "limit": 2,
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 3
+    assert all(len(matches) == 2 for matches in data)
+
+    assert data[0][0]["peak"]["name"] == "Rysy"
+    assert data[0][0]["distance"] < 100
+    assert data[1][0]["peak"]["name"] == "Śnieżka"
+    assert data[1][0]["distance"] < 100
+
+    for matches in data:
+        distances = [item["distance"] for item in matches]
+        assert distances == sorted(distances)
+
+
+def test_find_nearest_peaks_batch_with_max_distance(
+    client_with_db: TestClient, test_peaks: list[Peak], peak_coords: dict
+):
+    """Test batch matching with max_distance filter"""
+    response = client_with_db.post(
+        "/api/peaks/find/batch",
+        json={
+            "points": [
+                {"latitude": lat, "longitude": lon}
+                for lat, lon in (peak_coords["near_rysy"], peak_coords["warsaw"])
+            ],
+            "max_distance": 100,
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 2
+    assert [item["peak"]["name"] for item in data[0]] == ["Rysy"]
+    assert data[1] == []
+
+
+def test_find_nearest_peaks_batch_empty_database(
+    client_with_db: TestClient, peak_coords: dict
+):
+    """Test batch matching when the database is empty"""
+    response = client_with_db.post(
+        "/api/peaks/find/batch",
+        json={
+            "points": [
+                {
+                    "latitude": peak_coords["near_rysy"][0],
+                    "longitude": peak_coords["near_rysy"][1],
+                }
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [[]]
+
+
+def test_find_nearest_peaks_batch_invalid_body(client_with_db: TestClient):
+    """Test that invalid batch requests return an error"""
+    response = client_with_db.post(
+        "/api/peaks/find/batch", json={"points": [{"latitude": 49.0}]}
+    )
+
+    assert response.status_code == 422
+
+    response = client_with_db.post(
+        "/api/peaks/find/batch",
+        json={"points": [{"latitude": 49.0, "longitude": 20.0}] * 1001},
+    )
+
+    assert response.status_code == 422
+
+    for limit in (0, -1, 101):
+        response = client_with_db.post(
+            "/api/peaks/find/batch",
+            json={"points": [{"latitude": 49.0, "longitude": 20.0}], "limit": limit},
+        )
+
+        assert response.status_code == 422
+
 
 def test_get_peak(client_with_db: TestClient, test_peaks: list[Peak]):
     """Test getting a specific peak by ID"""
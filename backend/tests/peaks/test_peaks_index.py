@@ -0,0 +1,199 @@
+"""
+Tests for the PeakIndex
+"""
+
+import random
+
+import pytest
+
+from src.common.utils.geo import haversine_distance
+from src.peaks.index import PeakIndex
+from src.peaks.models import Peak
+
+
+def brute_force(peaks, latitude, longitude):
+    """Return (peak, distance) pairs for all peaks, nearest first"""
+    return sorted(
+        (
+            (
+                peak,
+                haversine_distance(latitude, longitude, peak.latitude, peak.longitude),
+            )
+            for peak in peaks
+        ),
+        key=lambda x: x[1],
+    )
+
+
+@pytest.fixture
+def random_peaks():
+    """Return peaks scattered over Poland and a few far-away places"""
+    rng = random.Random(42)
+    peaks = [
+        Peak(
+            id=i,
+            name=f"Peak {i}",
+            elevation=rng.randint(300, 2500),
+            latitude=rng.uniform(49.0, 54.8),
+            longitude=rng.uniform(14.1, 24.1),
+            range="Test",
+        )
+        for i in range(500)
+    ]
+    peaks += [
+        Peak(
+            id=500, name="East", elevation=1, latitude=0.0, longitude=179.9, range="X"
+        ),
+        Peak(
+            id=501, name="West", elevation=1, latitude=0.0, longitude=-179.9, range="X"
+        ),
+        Peak(
+            id=502, name="North", elevation=1, latitude=89.9, longitude=10.0, range="X"
+        ),
+    ]
+    return peaks
+
+
+def test_nearest_matches_full_scan(random_peaks):
+    """Test that nearest queries return the same peaks as a full scan"""
+    index = PeakIndex(random_peaks)
+    rng = random.Random(7)
+
+    for _ in range(50):
+        latitude = rng.uniform(48.0, 56.0)
+        longitude = rng.uniform(13.0, 25.0)
+
+        results = index.nearest(latitude, longitude, limit=5)
+        expected = brute_force(random_peaks, latitude, longitude)[:5]
+
+        assert [peak.id for peak, _ in results] == [peak.id for peak, _ in expected]
+        assert [d for _, d in results] == pytest.approx([d for _, d in expected])
+
+
+def test_nearest_with_max_distance(random_peaks):
+    """Test that max_distance excludes peaks further away"""
+    index = PeakIndex(random_peaks)
+
+    results = index.nearest(50.0, 19.0, limit=100, max_distance=20000)
+    expected = [
+        (peak, d) for peak, d in brute_force(random_peaks, 50.0, 19.0) if d <= 20000
+    ]
+
+    assert [peak.id for peak, _ in results] == [peak.id for peak, _ in expected]
+    assert all(d <= 20000 for _, d in results)
+
+
+def test_nearest_across_antimeridian(random_peaks):
+    """Test that the grid wraps around at 180° longitude"""
+    index = PeakIndex(random_peaks)
+
+    results = index.nearest(0.0, 179.95, limit=2)
+
+    assert {peak.name for peak, _ in results} == {"East", "West"}
+
+
+def test_nearest_with_max_distance_across_antimeridian(random_peaks):
+    """Test that the max_distance prefilter keeps peaks across 180° longitude"""
+    index = PeakIndex(random_peaks)
+
+    results = index.nearest(0.0, 179.95, limit=5, max_distance=20000)
+
+    assert {peak.name for peak, _ in results} == {"East", "West"}
+
+
+def test_nearest_near_pole(random_peaks):
+    """Test nearest query close to the north pole"""
+    index = PeakIndex(random_peaks)
+
+    results = index.nearest(89.95, -170.0, limit=1)
+
+    assert results[0][0].name == "North"
+
+
+def test_within(random_peaks):
+    """Test that radius queries return every peak within the radius"""
+    index = PeakIndex(random_peaks)
+
+    results = index.within(51.0, 17.0, radius=50000)
+    expected = [
+        (peak, d) for peak, d in brute_force(random_peaks, 51.0, 17.0) if d <= 50000
+    ]
+
+    assert [peak.id for peak, _ in results] == [peak.id for peak, _ in expected]
+
+
+def test_empty_index():
+    """Test queries against an empty index"""
+    index = PeakIndex([])
+
+    assert index.nearest(50.0, 19.0, limit=5) == []
+    assert index.within(50.0, 19.0, radius=1000) == []
+
+
+def test_limit_larger_than_index(peak_models, peak_coords):
+    """Test that a limit larger than the index returns every peak"""
+    index = PeakIndex(list(peak_models.values()))
+
+    results = index.nearest(*peak_coords["warsaw"], limit=10)
+
+    assert len(results) == 3
+    assert [d for _, d in results] == sorted(d for _, d in results)
+
+
+def test_nearest_batch_matches_nearest(random_peaks):
+    """Test that batch queries match single-point queries"""
+    index = PeakIndex(random_peaks)
+    rng = random.Random(3)
+    points = [(rng.uniform(48.0, 56.0), rng.uniform(13.0, 25.0)) for _ in range(40)]
+
+    results = index.nearest_batch(
+        [lat for lat, _ in points], [lon for _, lon in points], limit=5
+    )
+
+    assert len(results) == len(points)
+    for (lat, lon), row in zip(points, results):
+        expected = index.nearest(lat, lon, limit=5)
+        assert [peak.id for peak, _ in row] == [peak.id for peak, _ in expected]
+        assert [d for _, d in row] == pytest.approx([d for _, d in expected])
+
+
+def test_nearest_batch_with_max_distance(random_peaks):
+    """Test that batch queries honour max_distance per point"""
+    index = PeakIndex(random_peaks)
+    points = [(50.0, 19.0), (0.0, 179.95), (10.0, 10.0)]
+
+    results = index.nearest_batch(
+        [lat for lat, _ in points],
+        [lon for _, lon in points],
+        limit=50,
+        max_distance=20000,
+    )
+
+    for (lat, lon), row in zip(points, results):
+        expected = index.nearest(lat, lon, limit=50, max_distance=20000)
+        assert [peak.id for peak, _ in row] == [peak.id for peak, _ in expected]
+    assert results[2] == []
+
+
+def test_nearest_batch_small_chunks(random_peaks, monkeypatch):
+    """Test that results are unaffected by matrix chunking"""
+    index = PeakIndex(random_peaks)
+    points = [(49.0 + i * 0.1, 19.0) for i in range(10)]
+    expected = index.nearest_batch(
+        [lat for lat, _ in points], [lon for _, lon in points], limit=3
+    )
+
+    monkeypatch.setattr("src.peaks.index.MATRIX_CHUNK_SIZE", 1)
+    results = index.nearest_batch(
+        [lat for lat, _ in points], [lon for _, lon in points], limit=3
+    )
+
+    assert [[p.id for p, _ in row] for row in results] == [
+        [p.id for p, _ in row] for row in expected
+    ]
+
+
+def test_nearest_batch_empty():
+    """Test batch queries with no peaks or no points"""
+    assert PeakIndex([]).nearest_batch([50.0], [19.0], limit=5) == [[]]
+    assert PeakIndex([]).nearest_batch([], [], limit=5) == []
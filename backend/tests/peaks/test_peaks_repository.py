@@ -4,6 +4,7 @@ Tests for the PeaksRepository
 
 import pytest
 
+from src.peaks.models import Peak
 from src.peaks.repository import PeaksRepository
 
 
@@ -35,3 +36,39 @@ def test_get_by_id(test_repository, test_peaks):
 
     peak = test_repository.get_by_id(999999)
     assert peak is None
+
+
+def test_get_index(test_repository, test_peaks, peak_coords):
+    """Test that the spatial index contains all peaks"""
+    index = test_repository.get_index()
+
+    assert len(index) == 3
+    nearest_peak, distance = index.nearest(*peak_coords["near_rysy"], limit=1)[0]
+    assert nearest_peak.name == "Rysy"
+    assert distance < 100
+
+
+def test_get_index_is_reused(test_repository, test_peaks):
+    """Test that the spatial index is cached while peaks do not change"""
+    assert test_repository.get_index() is test_repository.get_index()
+
+
+def test_get_index_rebuilt_after_peak_change(test_db, test_repository, test_peaks):
+    """Test that committing a peak change invalidates the spatial index"""
+    index = test_repository.get_index()
+
+    test_db.add(
+        Peak(
+            name="Tarnica",
+            elevation=1346,
+            latitude=49.0758,
+            longitude=22.7267,
+            range="Bieszczady",
+        )
+    )
+    test_db.commit()
+
+    rebuilt_index = test_repository.get_index()
+
+    assert rebuilt_index is not index
+    assert len(rebuilt_index) == 4
@@ -6,6 +6,8 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from src.peaks.index import PeakIndex
+from src.peaks.models import Coordinates, PeakWithDistance
 from src.peaks.repository import PeaksRepository
 from src.peaks.service import PeaksService
 
@@ -67,7 +69,7 @@ def test_find_nearest_peaks(peak_models, peak_coords):
     giewont = peak_models["giewont"]
 
     mock_repo = MagicMock(spec=PeaksRepository)
-    mock_repo.get_all.return_value = [rysy, giewont]
+    mock_repo.get_index.return_value = PeakIndex([rysy, giewont])
 
     service = PeaksService(mock_repo)
 
@@ -78,18 +80,19 @@ def test_find_nearest_peaks(peak_models, peak_coords):
     )
 
     assert len(results) == 2
-    assert results[0]["peak"].id == 1
-    assert results[0]["peak"].name == "Rysy"
-    assert results[0]["distance"] < 100
-    assert results[1]["peak"].name == "Giewont"
+    assert all(isinstance(result, PeakWithDistance) for result in results)
+    assert results[0].peak.id == 1
+    assert results[0].peak.name == "Rysy"
+    assert results[0].distance < 100
+    assert results[1].peak.name == "Giewont"
 
-    mock_repo.get_all.assert_called_once()
+    mock_repo.get_index.assert_called_once()
 
 
 def test_find_nearest_peak_no_peaks(peak_coords):
     """Test finding the nearest peaks when no peaks exist"""
     mock_repo = MagicMock(spec=PeaksRepository)
-    mock_repo.get_all.return_value = []
+    mock_repo.get_index.return_value = PeakIndex([])
 
     service = PeaksService(mock_repo)
 
@@ -101,7 +104,7 @@ def test_find_nearest_peak_no_peaks(peak_coords):
 
     assert results == []
 
-    mock_repo.get_all.assert_called_once()
+    mock_repo.get_index.assert_called_once()
 
 
 def test_find_nearest_peaks_respects_limit(peak_models, peak_coords):
@@ -111,7 +114,7 @@ def test_find_nearest_peaks_respects_limit(peak_models, peak_coords):
     babia_gora = peak_models["babia_gora"]
 
     mock_repo = MagicMock(spec=PeaksRepository)
-    mock_repo.get_all.return_value = [rysy, giewont, babia_gora]
+    mock_repo.get_index.return_value = PeakIndex([rysy, giewont, babia_gora])
 
     service = PeaksService(mock_repo)
 
@@ -122,9 +125,9 @@ def test_find_nearest_peaks_respects_limit(peak_models, peak_coords):
     )
 
     assert len(results) == 2
-    assert results[0]["distance"] < results[1]["distance"]
+    assert results[0].distance < results[1].distance
 
-    mock_repo.get_all.assert_called_once()
+    mock_repo.get_index.assert_called_once()
 
 
 def test_find_nearest_peaks_with_max_distance(peak_models, peak_coords):
@@ -134,7 +137,7 @@ def test_find_nearest_peaks_with_max_distance(peak_models, peak_coords):
     babia_gora = peak_models["babia_gora"]
 
     mock_repo = MagicMock(spec=PeaksRepository)
-    mock_repo.get_all.return_value = [rysy, giewont, babia_gora]
+    mock_repo.get_index.return_value = PeakIndex([rysy, giewont, babia_gora])
 
     service = PeaksService(mock_repo)
 
@@ -145,10 +148,10 @@ def test_find_nearest_peaks_with_max_distance(peak_models, peak_coords):
     )
 
     assert len(results) == 1
-    assert results[0]["peak"].name == "Rysy"
-    assert results[0]["distance"] < 100
+    assert results[0].peak.name == "Rysy"
+    assert results[0].distance < 100
 
-    mock_repo.get_all.assert_called()
+    mock_repo.get_index.assert_called()
 
 
 def test_find_nearest_peaks_max_distance_none(peak_models, peak_coords):
@@ -157,7 +160,7 @@ def test_find_nearest_peaks_max_distance_none(peak_models, peak_coords):
     giewont = peak_models["giewont"]
 
     mock_repo = MagicMock(spec=PeaksRepository)
-    mock_repo.get_all.return_value = [rysy, giewont]
+    mock_repo.get_index.return_value = PeakIndex([rysy, giewont])
 
     service = PeaksService(mock_repo)
 
@@ -168,7 +171,32 @@ def test_find_nearest_peaks_max_distance_none(peak_models, peak_coords):
     )
 
     assert len(results) == 2
-    assert results[0]["peak"].name == "Rysy"
-    assert results[1]["peak"].name == "Giewont"
+    assert results[0].peak.name == "Rysy"
+    assert results[1].peak.name == "Giewont"
 
-    mock_repo.get_all.assert_called_once()
+    mock_repo.get_index.assert_called_once()
+
+
+def test_find_nearest_peaks_batch(peak_models, peak_coords):
+    """Test finding the nearest peaks for many points at once"""
+    mock_repo = MagicMock(spec=PeaksRepository)
+    mock_repo.get_index.return_value = PeakIndex(list(peak_models.values()))
+
+    service = PeaksService(mock_repo)
+
+    results = service.find_nearest_peaks_batch(
+        points=[
+            Coordinates(latitude=lat, longitude=lon)
+            for lat, lon in (peak_coords["near_rysy"], peak_coords["warsaw"])
+        ],
+        max_distance=100,
+    )
+
+    assert len(results) == 2
+    assert len(results[0]) == 1
+    assert isinstance(results[0][0], PeakWithDistance)
+    assert results[0][0].peak.name == "Rysy"
+    assert results[0][0].distance < 100
+    assert results[1] == []
+
+    mock_repo.get_index.assert_called_once()
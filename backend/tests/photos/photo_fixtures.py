@@ -0,0 +1,141 @@
+"""
+Fixtures for photo-related tests
+"""
+
+import io
+import struct
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import pytest
+from PIL import Image
+
+ASCII, SHORT, LONG, RATIONAL, BYTE = 2, 3, 4, 5, 1
+
+
+def _ifd(entries: List[Tuple[int, int, int, bytes]], offset: int) -> bytes:
+    """Lay out a little-endian TIFF IFD at offset, followed by its data"""
+    data_offset = offset + 2 + 12 * len(entries) + 4
+    table, data = struct.pack("<H", len(entries)), b""
+
+    for tag, kind, count, value in sorted(entries):
+        if len(value) <= 4:
+            table += struct.pack("<HHI", tag, kind, count) + value.ljust(4, b"\0")
+        else:
+            table += struct.pack("<HHII", tag, kind, count, data_offset + len(data))
+            data += value + b"\0" * (len(value) % 2)
+
+    return table + struct.pack("<I", 0) + data
+
+
+def _rationals(*values: float) -> bytes:
+    return b"".join(struct.pack("<II", round(v * 10000), 10000) for v in values)
+
+
+def _dms(value: float) -> bytes:
+    value = abs(value)
+    degrees, minutes = int(value), int(value * 60) % 60
+    seconds = value * 3600 - degrees * 3600 - minutes * 60
+    return _rationals(degrees, minutes, seconds)
+
+
+def make_exif_jpeg(
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    altitude: Optional[float] = None,
+    captured_at: Optional[datetime] = None,
+    offset: Optional[str] = None,
+    body_size: int = 1024,
+) -> bytes:
+    """
+    Build a small JPEG with an Exif APP1 segment holding the given GPS
+    position, altitude and DateTimeOriginal, followed by body_size bytes of
+    scan data.
+    """
+    exif_entries, gps_entries = [], []
+
+    if captured_at is not None:
+        stamp = captured_at.strftime("%Y:%m:%d %H:%M:%S").encode() + b"\0"
+        exif_entries.append((0x9003, ASCII, len(stamp), stamp))
+    if offset is not None:
+        exif_entries.append((0x9011, ASCII, 7, offset.encode() + b"\0"))
+
+    if latitude is not None and longitude is not None:
+        gps_entries += [
+            (1, ASCII, 2, b"N\0" if latitude >= 0 else b"S\0"),
+            (2, RATIONAL, 3, _dms(latitude)),
+            (3, ASCII, 2, b"E\0" if longitude >= 0 else b"W\0"),
+            (4, RATIONAL, 3, _dms(longitude)),
+        ]
+    if altitude is not None:
+        gps_entries += [
+            (5, BYTE, 1, bytes([0 if altitude >= 0 else 1])),
+            (6, RATIONAL, 1, _rationals(abs(altitude))),
+        ]
+
+    def ifd0(exif_at: int, gps_at: int) -> bytes:
+        return _ifd(
+            [
+                (0x8769, LONG, 1, struct.pack("<I", exif_at)),
+                (0x8825, LONG, 1, struct.pack("<I", gps_at)),
+            ],
+            8,
+        )
+
+    exif_at = 8 + len(ifd0(0, 0))
+    exif_ifd = _ifd(exif_entries, exif_at)
+    gps_at = exif_at + len(exif_ifd)
+    tiff = b"II*\0" + struct.pack("<I", 8) + ifd0(exif_at, gps_at) + exif_ifd
+    tiff += _ifd(gps_entries, gps_at)
+
+    app0 = b"JFIF\0\x01\x01\0\0\x01\0\x01\0\0"
+    app1 = b"Exif\0\0" + tiff
+
+    return (
+        b"\xff\xd8"
+        + b"\xff\xe0"
+        + struct.pack(">H", len(app0) + 2)
+        + app0
+        + b"\xff\xe1"
+        + struct.pack(">H", len(app1) + 2)
+        + app1
+        + b"\xff\xda"
+        + struct.pack(">H", 2)
+        + b"\x11" * body_size
+        + b"\xff\xd9"
+    )
+
+
+@pytest.fixture
+def exif_jpeg():
+    """Return a JPEG taken on Rysy with full EXIF GPS and time data"""
+    return make_exif_jpeg(
+        latitude=49.1794,
+        longitude=20.0880,
+        altitude=2495.5,
+        captured_at=datetime(2025, 8, 15, 9, 30, 0),
+        body_size=200_000,
+    )
+
+
+def make_jpeg(width: int, height: int, orientation: Optional[int] = None) -> bytes:
+    """
+    Encode a JPEG of the given size, left half red and right half blue,
+    optionally with an EXIF Orientation tag.
+    """
+    image = Image.new("RGB", (width, height), (200, 30, 30))
+    image.paste((30, 30, 200), (width // 2, 0, width, height))
+
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[0x0112] = orientation
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def photo_jpeg():
+    """Return a 3000x2000 JPEG photo"""
+    return make_jpeg(3000, 2000)
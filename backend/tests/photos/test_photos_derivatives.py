@@ -0,0 +1,76 @@
+import io
+
+import pytest
+from PIL import Image
+
+from src.photos.derivatives import (
+    DERIVATIVE_FORMATS,
+    DERIVATIVE_SIZES,
+    derivative_name,
+    derivative_names,
+    derivative_url,
+    render_derivative,
+    render_derivatives,
+)
+from tests.photos.photo_fixtures import make_jpeg
+
+
+def _open(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def test_derivative_name_and_url():
+    assert derivative_name("abc_20250101_120000.jpg", 256, "webp") == (
+        "abc_20250101_120000.jpg.256.webp"
+    )
+    assert derivative_name("abc.png", 256, "webp") != derivative_name(
+        "abc.jpg", 256, "webp"
+    )
+    assert derivative_url(7, "abc.jpg", 1024, "jpeg") == (
+        "/api/photos/7/derivatives/1024.jpeg?v=abc.jpg"
+    )
+
+
+def test_derivative_names_include_stem_names():
+    names = derivative_names("abc.jpg")
+
+    assert len(names) == 2 * len(DERIVATIVE_SIZES) * len(DERIVATIVE_FORMATS)
+    assert "abc.jpg.256.webp" in names
+    assert "abc_256.webp" in names
+
+
+def test_render_derivatives_every_size_and_format(photo_jpeg):
+    derivatives = render_derivatives(photo_jpeg)
+
+    assert set(derivatives) == {
+        (size, format) for size in DERIVATIVE_SIZES for format in DERIVATIVE_FORMATS
+    }
+    for (size, format), data in derivatives.items():
+        image = _open(data)
+        assert image.format == DERIVATIVE_FORMATS[format][0]
+        assert image.size == (size, round(size * 2 / 3))
+
+
+def test_render_derivative_does_not_enlarge():
+    image = _open(render_derivative(make_jpeg(600, 400), 1024, "jpeg"))
+
+    assert image.size == (600, 400)
+
+
+def test_render_derivative_applies_exif_orientation():
+    # Orientation 6: stored sideways, displayed rotated 90 degrees clockwise
+    image = _open(render_derivative(make_jpeg(800, 400, orientation=6), 256, "jpeg"))
+
+    assert image.size == (128, 256)
+    assert image.getexif().get(0x0112) is None
+    red, _, blue = image.convert("RGB").getpixel((64, 32))
+    assert red > blue
+    red, _, blue = image.convert("RGB").getpixel((64, 224))
+    assert blue > red
+
+
+def test_render_derivative_rejects_non_images():
+    with pytest.raises(ValueError):
+        render_derivative(b"not an image", 256, "webp")
@@ -1,14 +1,28 @@
+import asyncio
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
 import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from main import app
+from src.database.core import async_db_dep
+from src.jobs.worker import JobWorker
 from src.photos import dependencies
+from src.photos.jobs import photo_job_handlers
+from src.photos.repository import PhotosRepository
+from src.photos.service import PhotosService
+from src.uploads import signing
+from src.uploads.repository import BlobsRepository
 from src.uploads.service import UploadsService
 from src.uploads.services.local_storage import LocalFileStorage
+from src.uploads.settings import uploads_settings
+from src.uploads.signing import UrlSigner
+from tests.photos.photo_fixtures import make_jpeg
 
 
 @pytest.fixture(autouse=True)
@@ -23,12 +37,37 @@ def override_uploads_service(test_upload_dir):
     app.dependency_overrides.pop(dependencies.get_uploads_service, None)
 
 
+@pytest.fixture
+def content_addressed(test_upload_dir):
+    """Store uploads by content in the test upload directory."""
+
+    def _get_uploads_service(db: async_db_dep):
+        return UploadsService(
+            LocalFileStorage(upload_dir=str(test_upload_dir)), BlobsRepository(db)
+        )
+
+    app.dependency_overrides[dependencies.get_uploads_service] = _get_uploads_service
+
+
+@pytest.fixture
+def run_jobs(test_async_engine, test_upload_dir):
+    """Return a function running the queued jobs of the test database"""
+    uploads_service = UploadsService(LocalFileStorage(upload_dir=str(test_upload_dir)))
+    executor = ThreadPoolExecutor(max_workers=1)
+    worker = JobWorker(
+        test_async_engine, photo_job_handlers(uploads_service), executor=executor
+    )
+
+    yield lambda: asyncio.run(worker.run_pending())
+    executor.shutdown()
+
+
 def test_get_all_photos_empty(client_with_db):
     """Test getting all photos when none exist"""
     resp = client_with_db.get("/api/photos/")
 
     assert resp.status_code == 200
-    assert resp.json() == []
+    assert resp.json() == {"items": [], "next_cursor": None}
 
 
 def test_get_all_photos(client_with_db):
@@ -49,7 +88,7 @@ def test_get_all_photos(client_with_db):
     resp = client_with_db.get("/api/photos/")
 
     assert resp.status_code == 200
-    photos = resp.json()
+    photos = resp.json()["items"]
     assert len(photos) >= 2
 
     for photo in photos:
@@ -80,7 +119,7 @@ def test_get_all_photos_with_peaks(client_with_db, test_peaks):
     resp = client_with_db.get("/api/photos/")
 
     assert resp.status_code == 200
-    photos = resp.json()
+    photos = resp.json()["items"]
     assert len(photos) >= 2
 
     photo_without_peak = next((p for p in photos if p["peak_id"] is None), None)
@@ -129,7 +168,7 @@ def test_get_all_photos_sorted_by_captured_at_asc(client_with_db):
     resp = client_with_db.get("/api/photos/?sort_by=captured_at&order=asc")
 
     assert resp.status_code == 200
-    photos = resp.json()
+    photos = resp.json()["items"]
     assert len(photos) >= 2
 
     captured_times = [photo["captured_at"] for photo in photos if photo["captured_at"]]
@@ -168,7 +207,7 @@ def test_get_all_photos_sorted_by_captured_at_desc(client_with_db):
     resp = client_with_db.get("/api/photos/?sort_by=captured_at&order=desc")
 
     assert resp.status_code == 200
-    photos = resp.json()
+    photos = resp.json()["items"]
     assert len(photos) >= 2
 
     captured_times = [photo["captured_at"] for photo in photos if photo["captured_at"]]
@@ -207,13 +246,84 @@ def test_get_all_photos_sorted_by_captured_at_default_order(client_with_db):
     resp = client_with_db.get("/api/photos/?sort_by=captured_at")
 
     assert resp.status_code == 200
-    photos = resp.json()
+    photos = resp.json()["items"]
     assert len(photos) >= 2
 
     captured_times = [photo["captured_at"] for photo in photos if photo["captured_at"]]
     assert captured_times == sorted(captured_times)
 
 
+def test_get_all_photos_pagination(client_with_db):
+    """Test following next_cursor through every page of photos"""
+    for i in range(5):
+        client_with_db.post(
+            "/api/photos/",
+            files={"file": (f"photo{i}.jpg", b"imagedata", "image/jpeg")},
+            data={"summit_photo_create": "{}"},
+        )
+
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 2, "sort_by": "uploaded_at", "order": "desc"}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client_with_db.get("/api/photos/", params=params)
+
+        assert resp.status_code == 200
+        page = resp.json()
+        assert len(page["items"]) <= 2
+        ids.extend(photo["id"] for photo in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(ids) == 5
+    assert len(set(ids)) == 5
+
+
+def test_get_all_photos_fields(client_with_db):
+    """Test that fields limits the returned photo fields"""
+    client_with_db.post(
+        "/api/photos/",
+        files={"file": ("photo1.jpg", b"imagedata1", "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    )
+
+    resp = client_with_db.get("/api/photos/", params={"fields": "file_name"})
+
+    assert resp.status_code == 200
+    photos = resp.json()["items"]
+    assert set(photos[0]) == {"id", "file_name"}
+
+
+def test_get_all_photos_unknown_field(client_with_db):
+    """Test that unknown fields are rejected"""
+    resp = client_with_db.get("/api/photos/", params={"fields": "id,secret"})
+
+    assert resp.status_code == 400
+
+
+def test_get_all_photos_invalid_cursor(client_with_db):
+    """Test that an invalid cursor is rejected"""
+    resp = client_with_db.get("/api/photos/", params={"cursor": "bogus"})
+
+    assert resp.status_code == 400
+
+
+def test_get_all_photos_limit_capped(client_with_db):
+    """Test that page sizes above the cap are rejected"""
+    resp = client_with_db.get("/api/photos/", params={"limit": 10_000})
+
+    assert resp.status_code == 422
+
+
+def test_get_all_photos_unsortable_field(client_with_db):
+    """Test that sorting by a field without an index is rejected"""
+    resp = client_with_db.get("/api/photos/", params={"sort_by": "file_name"})
+
+    assert resp.status_code == 400
+
+
 def test_upload_photo_success(client_with_db):
     """Test successful photo upload"""
 
@@ -228,6 +338,7 @@ def test_upload_photo_success(client_with_db):
     assert data["id"] is not None
     assert re.search(r".+\.jpg$", data["file_name"])
     assert Path(f"test_uploads/{data['file_name']}").exists()
+    assert data["url"] == f"/uploads/{data['file_name']}"
 
 
 def test_upload_invalid_file_type(client_with_db):
@@ -325,6 +436,22 @@ def test_upload_without_gps_data(client_with_db, test_peaks):
     assert data["distance_to_peak"] is None
 
 
+def test_upload_reads_exif_metadata(client_with_db, exif_jpeg):
+    """Test that an upload without metadata gets it from the EXIF data"""
+    resp = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("summit.jpg", exif_jpeg, "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    )
+
+    assert resp.status_code == 200
+    photo = resp.json()
+    assert photo["latitude"] == pytest.approx(49.1794, abs=1e-5)
+    assert photo["longitude"] == pytest.approx(20.0880, abs=1e-5)
+    assert photo["altitude"] == pytest.approx(2495.5)
+    assert photo["captured_at"] == "2025-08-15T09:30:00"
+
+
 def test_get_photo_by_id(client_with_db):
     """Test getting a specific photo by ID"""
     upload_resp = client_with_db.post(
@@ -371,9 +498,390 @@ def test_delete_photo_success(client_with_db):
     assert not os.path.exists(file_path)
 
 
+def test_upload_generates_derivatives(client_with_db, run_jobs, photo_jpeg):
+    """Test that a background job stores the derivatives of an uploaded photo"""
+    resp = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("summit.jpg", photo_jpeg, "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    )
+
+    assert resp.status_code == 200
+    photo = resp.json()
+    assert photo["processing_status"] == "pending"
+    file_name = photo["file_name"]
+    assert {(d["size"], d["format"]) for d in photo["derivatives"]} == {
+        (size, format) for size in (256, 1024, 2048) for format in ("webp", "jpeg")
+    }
+    assert not os.path.exists(f"test_uploads/{file_name}.256.webp")
+
+    assert run_jobs() == 1
+
+    processed = client_with_db.get(f"/api/photos/{photo['id']}").json()
+    assert processed["processing_status"] == "ready"
+    for derivative in photo["derivatives"]:
+        name = f"{file_name}.{derivative['size']}.{derivative['format']}"
+        assert os.path.exists(f"test_uploads/{name}")
+
+    listed = client_with_db.get("/api/photos/").json()["items"][0]
+    assert listed["derivatives"] == photo["derivatives"]
+
+
+def test_get_photo_derivative(client_with_db, photo_jpeg):
+    """Test serving a derivative, generating it if it is missing"""
+    photo = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("summit.jpg", photo_jpeg, "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    ).json()
+    url = f"/api/photos/{photo['id']}/derivatives/1024.webp?v={photo['file_name']}"
+    assert url in [derivative["url"] for derivative in photo["derivatives"]]
+    stored = Path("test_uploads") / f"{photo['file_name']}.1024.webp"
+
+    resp = client_with_db.get(url)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "image/webp"
+    assert resp.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert stored.read_bytes() == resp.content
+
+
+def test_get_photo_derivative_not_found(client_with_db):
+    """Test requesting derivatives that do not exist"""
+    upload = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("photo.jpg", b"imagedata", "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    ).json()
+
+    version = upload["file_name"]
+
+    for url in (
+        f"/api/photos/{upload['id']}/derivatives/256.webp?v={version}",
+        f"/api/photos/{upload['id']}/derivatives/300.webp?v={version}",
+        f"/api/photos/{upload['id']}/derivatives/256.png?v={version}",
+        f"/api/photos/9999/derivatives/256.webp?v={version}",
+    ):
+        resp = client_with_db.get(url)
+        assert resp.status_code == 404
+
+
+def test_derivative_url_of_deleted_photo_is_not_reused(client_with_db, photo_jpeg):
+    """Test that a photo reusing the ID of a deleted photo gets other URLs"""
+
+    def upload(content):
+        return client_with_db.post(
+            "/api/photos/",
+            files={"file": ("summit.jpg", content, "image/jpeg")},
+            data={"summit_photo_create": "{}"},
+        ).json()
+
+    deleted = upload(photo_jpeg)
+    client_with_db.delete(f"/api/photos/{deleted['id']}")
+    photo = upload(make_jpeg(300, 200))
+
+    assert photo["id"] == deleted["id"]
+    assert photo["derivatives"][0]["url"] != deleted["derivatives"][0]["url"]
+    resp = client_with_db.get(deleted["derivatives"][0]["url"])
+    assert resp.status_code == 404
+
+
+def test_derivative_urls_are_signed(client_with_db, photo_jpeg, monkeypatch):
+    """Test that derivatives are only served from signed URLs when signing is enabled"""
+    monkeypatch.setattr(signing, "url_signer", UrlSigner("secret", 3600))
+    photo = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("summit.jpg", photo_jpeg, "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    ).json()
+    url = photo["derivatives"][0]["url"]
+    unsigned = url.split("&expires=")[0]
+
+    resp = client_with_db.get(url)
+    assert resp.status_code == 200
+    max_age = int(resp.headers["cache-control"].split("max-age=")[1].split(",")[0])
+    assert 0 < max_age <= 7200
+
+    assert client_with_db.get(unsigned).status_code == 403
+    assert client_with_db.get(url.replace("/256.", "/1024.")).status_code == 403
+
+
+def test_delete_photo_deletes_derivatives(client_with_db, run_jobs, photo_jpeg):
+    """Test that deleting a photo deletes its derivatives"""
+    photo = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("summit.jpg", photo_jpeg, "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    ).json()
+    stem = photo["file_name"].rsplit(".", 1)[0]
+    run_jobs()
+    assert list(Path("test_uploads").glob(f"{photo['file_name']}.*"))
+
+    client_with_db.delete(f"/api/photos/{photo['id']}")
+
+    assert list(Path("test_uploads").glob(f"{stem}*")) == []
+
+
+def test_upload_of_unreadable_image_fails_processing(client_with_db, run_jobs):
+    """Test that a photo whose processing cannot succeed is marked failed"""
+    photo = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("photo.jpg", b"imagedata", "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    ).json()
+
+    run_jobs()
+
+    processed = client_with_db.get(f"/api/photos/{photo['id']}").json()
+    assert processed["processing_status"] == "failed"
+    jobs = client_with_db.get("/api/jobs/", params={"photo_id": photo["id"]}).json()
+    assert [(job["status"], job["attempts"]) for job in jobs] == [("failed", 1)]
+    assert "not a readable image" in jobs[0]["last_error"]
+
+
+def test_duplicate_uploads_share_file_and_derivatives(
+    client_with_db, content_addressed, run_jobs, photo_jpeg
+):
+    """Test that identical uploads share one stored file and its processing"""
+
+    def upload():
+        return client_with_db.post(
+            "/api/photos/",
+            files={"file": ("summit.jpg", photo_jpeg, "image/jpeg")},
+            data={"summit_photo_create": "{}"},
+        ).json()
+
+    first = upload()
+    assert run_jobs() == 1
+    second = upload()
+
+    assert second["file_name"] == first["file_name"]
+    assert second["processing_status"] == "ready"
+    assert run_jobs() == 0
+    stored = sorted(path.name for path in Path("test_uploads").iterdir())
+    assert stored == sorted(
+        [first["file_name"]]
+        + [
+            f"{first['file_name']}.{size}.{format}"
+            for size in (256, 1024, 2048)
+            for format in ("webp", "jpeg")
+        ]
+    )
+
+    client_with_db.delete(f"/api/photos/{first['id']}")
+    assert len(list(Path("test_uploads").iterdir())) == 7
+
+    client_with_db.delete(f"/api/photos/{second['id']}")
+    assert list(Path("test_uploads").iterdir()) == []
+
+
+def test_delete_photos(client_with_db, run_jobs, photo_jpeg):
+    """Test deleting several photos with their files at once"""
+    photos = [
+        client_with_db.post(
+            "/api/photos/",
+            files={"file": ("summit.jpg", photo_jpeg, "image/jpeg")},
+            data={"summit_photo_create": "{}"},
+        ).json()
+        for _ in range(3)
+    ]
+    run_jobs()
+
+    resp = client_with_db.post(
+        "/api/photos/delete", json={"ids": [photos[0]["id"], photos[1]["id"], 9999]}
+    )
+
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "deleted": [photos[0]["id"], photos[1]["id"]],
+        "not_found": [9999],
+    }
+    assert client_with_db.get(f"/api/photos/{photos[0]['id']}").status_code == 404
+    stems = [photo["file_name"].rsplit(".", 1)[0] for photo in photos]
+    assert list(Path("test_uploads").glob(f"{stems[0]}*")) == []
+    assert list(Path("test_uploads").glob(f"{stems[1]}*")) == []
+    assert len(list(Path("test_uploads").glob(f"{stems[2]}*"))) == 7
+
+
+def test_delete_photos_invalid_request(client_with_db, monkeypatch):
+    """Test that empty and oversized bulk deletes are rejected"""
+    assert (
+        client_with_db.post("/api/photos/delete", json={"ids": []}).status_code == 422
+    )
+
+    monkeypatch.setattr(uploads_settings, "batch_max_files", 2)
+    resp = client_with_db.post("/api/photos/delete", json={"ids": [1, 2, 3]})
+    assert resp.status_code == 400
+
+
+def test_interrupted_delete_is_finished_by_purge(
+    client_with_db, test_async_engine, photo_jpeg, monkeypatch
+):
+    """Test that files of a deletion interrupted before storage are purged later"""
+    photo = client_with_db.post(
+        "/api/photos/",
+        files={"file": ("summit.jpg", photo_jpeg, "image/jpeg")},
+        data={"summit_photo_create": "{}"},
+    ).json()
+
+    async def crash(self, tombstones, concurrency):
+        raise RuntimeError("crashed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(PhotosService, "_purge", crash)
+        with pytest.raises(RuntimeError):
+            client_with_db.delete(f"/api/photos/{photo['id']}")
+
+    assert client_with_db.get(f"/api/photos/{photo['id']}").status_code == 404
+    assert (Path("test_uploads") / photo["file_name"]).exists()
+
+    async def purge():
+        async with AsyncSession(test_async_engine, expire_on_commit=False) as db:
+            service = PhotosService(
+                UploadsService(LocalFileStorage(upload_dir="test_uploads")),
+                PhotosRepository(db),
+            )
+            return await service.purge_tombstones(datetime(3000, 1, 1))
+
+    assert asyncio.run(purge()) == 1
+    assert not (Path("test_uploads") / photo["file_name"]).exists()
+
+
 def test_delete_nonexistent_photo(client_with_db):
     """Test deleting a photo that doesn't exist"""
     resp = client_with_db.delete("/api/photos/9999")
 
     assert resp.status_code == 404
     assert resp.json()["detail"] == "Photo not found"
+
+
+def _resumable_upload(client, data, chunk_size):
+    """Send a file through a resumable upload and return its ID"""
+    upload_id = client.post(
+        "/api/uploads/",
+        json={
+            "filename": "summit.jpg",
+            "content_type": "image/jpeg",
+            "length": len(data),
+        },
+    ).json()["id"]
+
+    for offset in range(0, len(data), chunk_size):
+        client.patch(
+            f"/api/uploads/{upload_id}",
+            content=data[offset : offset + chunk_size],
+            headers={
+                "Content-Type": "application/offset+octet-stream",
+                "Upload-Offset": str(offset),
+            },
+        )
+
+    return upload_id
+
+
+def test_finish_resumable_upload(client_with_db, exif_jpeg):
+    """Test creating a photo from a resumable upload sent in chunks"""
+    upload_id = _resumable_upload(client_with_db, exif_jpeg, 100)
+
+    resp = client_with_db.post(
+        f"/api/photos/uploads/{upload_id}", json={"altitude": 2499}
+    )
+
+    assert resp.status_code == 200
+    photo = resp.json()
+    assert photo["processing_status"] == "pending"
+    assert photo["latitude"] == pytest.approx(49.1794, abs=1e-5)
+    assert photo["altitude"] == 2499
+    assert Path(f"test_uploads/{photo['file_name']}").read_bytes() == exif_jpeg
+    assert not Path(f"test_uploads/{upload_id}.part").exists()
+    assert client_with_db.head(f"/api/uploads/{upload_id}").status_code == 404
+
+
+def test_finish_incomplete_resumable_upload(client_with_db):
+    """Test that a resumable upload cannot become a photo before it is complete"""
+    upload_id = client_with_db.post(
+        "/api/uploads/",
+        json={"filename": "summit.jpg", "content_type": "image/jpeg", "length": 10},
+    ).json()["id"]
+
+    resp = client_with_db.post(f"/api/photos/uploads/{upload_id}")
+
+    assert resp.status_code == 409
+    assert resp.headers["Upload-Offset"] == "0"
+    assert client_with_db.post("/api/photos/uploads/missing").status_code == 404
+
+
+def test_upload_photos_batch(client_with_db, run_jobs, exif_jpeg, test_peaks):
+    """Test uploading several photos with metadata in one request"""
+    resp = client_with_db.post(
+        "/api/photos/batch",
+        files=[
+            ("files", ("summit.jpg", exif_jpeg, "image/jpeg")),
+            ("files", ("note.txt", b"hello", "text/plain")),
+            ("files", ("valley.jpg", b"imagedata", "image/jpeg")),
+        ],
+        data={
+            "summit_photo_creates": json.dumps(
+                [{"peak_id": test_peaks[0].id}, {}, {"altitude": 900}]
+            )
+        },
+    )
+
+    assert resp.status_code == 200, resp.text
+    items = resp.json()["items"]
+    assert [(item["index"], item["filename"]) for item in items] == [
+        (0, "summit.jpg"),
+        (1, "note.txt"),
+        (2, "valley.jpg"),
+    ]
+    assert items[0]["photo"]["peak"]["name"] == "Rysy"
+    assert items[0]["photo"]["latitude"] == pytest.approx(49.1794, abs=1e-5)
+    assert items[1]["photo"] is None
+    assert "image/" in items[1]["error"]
+    assert items[2]["photo"]["altitude"] == 900
+    assert items[2]["error"] is None
+
+    listed = client_with_db.get("/api/photos/").json()["items"]
+    assert len(listed) == 2
+    for item in (items[0], items[2]):
+        assert Path(f"test_uploads/{item['photo']['file_name']}").exists()
+    assert run_jobs() == 2
+
+
+def test_upload_photos_batch_without_metadata(client_with_db):
+    """Test that a batch can be sent without metadata"""
+    resp = client_with_db.post(
+        "/api/photos/batch",
+        files=[("files", ("a.jpg", b"a", "image/jpeg"))],
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["items"][0]["photo"]["id"] is not None
+
+
+def test_upload_photos_batch_invalid_metadata(client_with_db):
+    """Test that malformed or surplus metadata is rejected"""
+    files = [("files", ("a.jpg", b"a", "image/jpeg"))]
+
+    invalid = client_with_db.post(
+        "/api/photos/batch", files=files, data={"summit_photo_creates": "{}"}
+    )
+    surplus = client_with_db.post(
+        "/api/photos/batch", files=files, data={"summit_photo_creates": "[{}, {}]"}
+    )
+
+    assert invalid.status_code == 400
+    assert surplus.status_code == 400
+    assert client_with_db.get("/api/photos/").json()["items"] == []
+
+
+def test_upload_photos_batch_too_many_files(client_with_db, monkeypatch):
+    """Test that a batch larger than the limit is rejected"""
+    monkeypatch.setattr(uploads_settings, "batch_max_files", 2)
+
+    resp = client_with_db.post(
+        "/api/photos/batch",
+        files=[("files", (f"{i}.jpg", b"a", "image/jpeg")) for i in range(3)],
+    )
+
+    assert resp.status_code == 400
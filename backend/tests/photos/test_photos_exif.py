@@ -0,0 +1,61 @@
+"""
+Tests for EXIF metadata extraction
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.photos.exif import EXIF_HEAD_SIZE, extract_metadata, find_exif_segment
+from tests.photos.photo_fixtures import make_exif_jpeg
+
+
+def test_extract_metadata(exif_jpeg):
+    """Test reading GPS position, altitude and capture time"""
+    metadata = extract_metadata(exif_jpeg[:EXIF_HEAD_SIZE])
+
+    assert metadata.latitude == pytest.approx(49.1794, abs=1e-5)
+    assert metadata.longitude == pytest.approx(20.0880, abs=1e-5)
+    assert metadata.altitude == pytest.approx(2495.5)
+    assert metadata.captured_at == datetime(2025, 8, 15, 9, 30, 0)
+    assert metadata.peak_id is None
+
+
+def test_extract_metadata_southern_western_below_sea_level():
+    """Test that coordinate and altitude references set the sign"""
+    jpeg = make_exif_jpeg(latitude=-33.5, longitude=-70.25, altitude=-12.0)
+
+    metadata = extract_metadata(jpeg)
+
+    assert metadata.latitude == pytest.approx(-33.5)
+    assert metadata.longitude == pytest.approx(-70.25)
+    assert metadata.altitude == pytest.approx(-12.0)
+    assert metadata.captured_at is None
+
+
+def test_extract_metadata_converts_offset_to_utc():
+    """Test that a recorded UTC offset converts the capture time to UTC"""
+    jpeg = make_exif_jpeg(captured_at=datetime(2025, 8, 15, 9, 30), offset="+02:00")
+
+    metadata = extract_metadata(jpeg)
+
+    assert metadata.captured_at == datetime(2025, 8, 15, 7, 30)
+    assert metadata.latitude is None
+
+
+@pytest.mark.parametrize(
+    "head",
+    [b"", b"not a jpeg", b"\xff\xd8\xff\xda\x00\x02" + b"\x00" * 100],
+)
+def test_extract_metadata_without_exif(head):
+    """Test that files without EXIF data give empty metadata"""
+    metadata = extract_metadata(head)
+
+    assert metadata.model_dump(exclude_none=True) == {}
+
+
+def test_truncated_exif_segment(exif_jpeg):
+    """Test that a head cut inside the APP1 segment is ignored"""
+    assert find_exif_segment(exif_jpeg[:EXIF_HEAD_SIZE]) is not None
+    assert find_exif_segment(exif_jpeg[:40]) is None
+    assert extract_metadata(exif_jpeg[:40]).latitude is None
@@ -5,15 +5,21 @@ Tests for the PhotosRepository
 from datetime import datetime
 
 import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 
+from src.jobs.models import Job
+from src.jobs.repository import JobsRepository
 from src.photos.models import SummitPhoto
 from src.photos.repository import PhotosRepository
+from src.uploads.models import Blob
+from src.uploads.repository import BlobsRepository
 
 
 @pytest.fixture()
-def test_photos_repository(test_db):
+def test_photos_repository(test_async_db):
     """Create a PhotosRepository instance for testing"""
-    return PhotosRepository(test_db)
+    return PhotosRepository(test_async_db)
 
 
 @pytest.fixture()
@@ -54,7 +60,8 @@ def test_photos(test_db, test_peaks, peak_coords):
     return photos
 
 
-def test_save(test_photos_repository, test_peaks):
+@pytest.mark.asyncio
+async def test_save(test_photos_repository, test_peaks):
     """Test saving a new summit photo"""
     new_photo = SummitPhoto(
         file_name="new_photo.jpg",
@@ -66,7 +73,7 @@ def test_save(test_photos_repository, test_peaks):
         peak_id=test_peaks[0].id,
     )
 
-    saved_photo = test_photos_repository.save(new_photo)
+    saved_photo = await test_photos_repository.save(new_photo)
 
     assert saved_photo.id is not None
     assert saved_photo.file_name == "new_photo.jpg"
@@ -79,11 +86,80 @@ def test_save(test_photos_repository, test_peaks):
     assert saved_photo.peak.id == test_peaks[0].id
 
 
-def test_get_by_id(test_photos_repository, test_photos):
+@pytest.mark.asyncio
+async def test_save_all(test_photos_repository, test_peaks):
+    """Test saving several photos at once"""
+    photos = [
+        SummitPhoto(file_name="first.jpg", peak_id=test_peaks[1].id),
+        SummitPhoto(file_name="second.jpg"),
+        SummitPhoto(file_name="third.jpg", peak_id=test_peaks[0].id),
+    ]
+
+    saved = await test_photos_repository.save_all(photos)
+
+    assert [photo.file_name for photo in saved] == [
+        "first.jpg",
+        "second.jpg",
+        "third.jpg",
+    ]
+    assert all(photo.id is not None for photo in saved)
+    assert [photo.peak for photo in saved] == [test_peaks[1], None, test_peaks[0]]
+
+
+@pytest.mark.asyncio
+async def test_save_with_jobs(test_photos_repository, test_async_db):
+    """Test that jobs saved with photos are queued for them"""
+    photo = await test_photos_repository.save(
+        SummitPhoto(file_name="single.jpg"), Job(kind="photo.process", max_attempts=3)
+    )
+    saved = await test_photos_repository.save_all(
+        [SummitPhoto(file_name="ready.jpg"), SummitPhoto(file_name="pending.jpg")],
+        [None, Job(kind="photo.process", max_attempts=3)],
+    )
+
+    jobs = JobsRepository(test_async_db)
+    assert [job.kind for job in await jobs.get_for_photo(photo.id)] == ["photo.process"]
+    assert await jobs.get_for_photo(saved[0].id) == []
+    assert len(await jobs.get_for_photo(saved[1].id)) == 1
+
+
+@pytest.mark.asyncio
+async def test_save_rolls_back_photo_without_its_job(
+    test_photos_repository, test_async_db
+):
+    """Test that a photo is not saved when its job cannot be"""
+    # A job without max_attempts violates its NOT NULL constraint
+    with pytest.raises(IntegrityError):
+        await test_photos_repository.save(
+            SummitPhoto(file_name="orphan.jpg"), Job(kind="photo.process")
+        )
+
+    assert await test_photos_repository.get_page(10) == ([], None)
+
+
+@pytest.mark.asyncio
+async def test_get_processed_files(test_photos_repository):
+    """Test finding which files already have a processed photo"""
+    await test_photos_repository.save_all(
+        [
+            SummitPhoto(file_name="ready.jpg", processing_status="ready"),
+            SummitPhoto(file_name="pending.jpg", processing_status="pending"),
+        ]
+    )
+
+    processed = await test_photos_repository.get_processed_files(
+        ["ready.jpg", "pending.jpg", "new.jpg"]
+    )
+
+    assert processed == {"ready.jpg"}
+
+
+@pytest.mark.asyncio
+async def test_get_by_id(test_photos_repository, test_photos):
     """Test retrieving a summit photo by ID"""
     photo_id = test_photos[0].id
 
-    photo = test_photos_repository.get_by_id(photo_id)
+    photo = await test_photos_repository.get_by_id(photo_id)
 
     assert photo is not None
     assert photo.file_name == "test1.jpg"
@@ -93,16 +169,18 @@ def test_get_by_id(test_photos_repository, test_photos):
     assert photo.peak.id == test_photos[0].peak_id
 
 
-def test_get_by_id_non_existent(test_photos_repository):
+@pytest.mark.asyncio
+async def test_get_by_id_non_existent(test_photos_repository):
     """Test retrieving a non-existent summit photo by ID"""
-    non_existent_photo = test_photos_repository.get_by_id(999999)
+    non_existent_photo = await test_photos_repository.get_by_id(999999)
 
     assert non_existent_photo is None
 
 
-def test_get_all(test_photos_repository, test_photos):
-    """Test retrieving all summit photos"""
-    photos = test_photos_repository.get_all()
+@pytest.mark.asyncio
+async def test_get_page(test_photos_repository, test_photos):
+    """Test retrieving a page of summit photos with their peaks"""
+    photos, _ = await test_photos_repository.get_page(10)
 
     assert photos is not None
     assert len(photos) >= 2
@@ -119,46 +197,290 @@ def test_get_all(test_photos_repository, test_photos):
     assert first_test_photo.peak.id == test_photos[0].peak_id
 
 
-def test_get_all_sorted_by_captured_at_asc(test_photos_repository, test_photos):
-    """Test retrieving all summit photos sorted by captured_at ascending"""
-    photos = test_photos_repository.get_all(sort_by="captured_at", order="asc")
+@pytest.fixture()
+def many_photos(test_db):
+    """Create summit photos with repeated and missing captured_at values"""
+    photos = [
+        SummitPhoto(
+            file_name=f"page{i}.jpg",
+            captured_at=None if i % 4 == 0 else datetime(2025, 9, 1 + i // 3, 10, 0),
+        )
+        for i in range(11)
+    ]
 
-    assert photos is not None
-    assert len(photos) >= 2
+    for photo in photos:
+        test_db.add(photo)
 
-    captured_times = [
-        photo.captured_at for photo in photos if photo.captured_at is not None
-    ]
-    assert captured_times == sorted(captured_times)
+    test_db.commit()
+
+    for photo in photos:
+        test_db.refresh(photo)
 
+    return photos
 
-def test_get_all_sorted_by_captured_at_desc(test_photos_repository, test_photos):
-    """Test retrieving all summit photos sorted by captured_at descending"""
-    photos = test_photos_repository.get_all(sort_by="captured_at", order="desc")
 
-    assert photos is not None
-    assert len(photos) >= 2
+async def _collect_pages(repository, limit, **kwargs):
+    """Walk every page and return the photos and the number of pages"""
+    photos, cursor, pages = [], None, 0
+    while True:
+        page, cursor = await repository.get_page(limit, cursor=cursor, **kwargs)
+        photos.extend(page)
+        pages += 1
+        if cursor is None:
+            return photos, pages
 
-    captured_times = [
-        photo.captured_at for photo in photos if photo.captured_at is not None
-    ]
-    assert captured_times == sorted(captured_times, reverse=True)
 
+@pytest.mark.asyncio
+async def test_get_page_by_id(test_photos_repository, many_photos):
+    """Test paging through photos in ID order"""
+    photos, pages = await _collect_pages(test_photos_repository, 4)
+
+    assert [photo.id for photo in photos] == sorted(p.id for p in many_photos)
+    assert pages == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_get_page_by_captured_at(test_photos_repository, many_photos, order):
+    """Test paging by a column with ties and NULLs visits every photo once"""
+    photos, _ = await _collect_pages(
+        test_photos_repository, 3, sort_by="captured_at", order=order
+    )
+
+    descending = order == "desc"
+    dated = sorted(
+        (p for p in many_photos if p.captured_at is not None),
+        key=lambda p: (p.captured_at, p.id),
+        reverse=descending,
+    )
+    undated = sorted(
+        (p for p in many_photos if p.captured_at is None),
+        key=lambda p: p.id,
+        reverse=descending,
+    )
+
+    assert [photo.id for photo in photos] == [p.id for p in dated + undated]
+
+
+@pytest.mark.asyncio
+async def test_get_page_last_page_has_no_cursor(test_photos_repository, many_photos):
+    """Test that a page holding the remaining photos has no next cursor"""
+    photos, cursor = await test_photos_repository.get_page(len(many_photos))
+
+    assert len(photos) == len(many_photos)
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_page_fields(test_photos_repository, test_photos):
+    """Test that a field projection returns only the requested fields"""
+    photos, _ = await test_photos_repository.get_page(
+        10, sort_by="captured_at", fields=["file_name", "peak"]
+    )
+
+    assert set(photos[0]) == {"id", "file_name", "peak"}
+    assert photos[0]["file_name"] == "test1.jpg"
+    assert photos[0]["peak"].id == test_photos[0].peak_id
+
+
+@pytest.mark.asyncio
+async def test_get_page_unknown_field(test_photos_repository):
+    """Test that unknown fields are rejected"""
+    with pytest.raises(ValueError):
+        await test_photos_repository.get_page(10, fields=["password"])
+
+
+@pytest.mark.asyncio
+async def test_get_page_invalid_cursor(test_photos_repository, many_photos):
+    """Test that malformed cursors and cursors for another sort are rejected"""
+    _, cursor = await test_photos_repository.get_page(2, sort_by="captured_at")
+
+    with pytest.raises(ValueError):
+        await test_photos_repository.get_page(2, cursor="not-a-cursor")
+
+    with pytest.raises(ValueError):
+        await test_photos_repository.get_page(2, cursor=cursor, sort_by="uploaded_at")
 
-def test_delete(test_photos_repository, test_photos):
+
+@pytest.mark.asyncio
+async def test_delete(test_photos_repository, test_photos):
     """Test deleting a summit photo"""
     photo_id = test_photos[0].id
-    photo = test_photos_repository.get_by_id(photo_id)
+    photo = await test_photos_repository.get_by_id(photo_id)
     assert photo is not None
 
-    result = test_photos_repository.delete(photo_id)
+    result = await test_photos_repository.delete(photo_id)
     assert result is True
 
-    photo = test_photos_repository.get_by_id(photo_id)
+    photo = await test_photos_repository.get_by_id(photo_id)
     assert photo is None
 
 
-def test_delete_non_existent(test_photos_repository):
+@pytest.mark.asyncio
+async def test_delete_non_existent(test_photos_repository):
     """Test deleting a non-existent summit photo"""
-    result = test_photos_repository.delete(999999)
+    result = await test_photos_repository.delete(999999)
     assert result is False
+
+
+@pytest.mark.asyncio
+async def test_delete_many(test_photos_repository, test_photos):
+    """Test deleting several photos in one transaction"""
+    photo_id = test_photos[0].id
+
+    deleted, tombstones = await test_photos_repository.delete_many([photo_id, 999999])
+
+    assert deleted == [photo_id]
+    assert [tombstone.file_name for tombstone in tombstones] == ["test1.jpg"]
+    assert tombstones[0].id is not None
+    assert await test_photos_repository.get_by_id(photo_id) is None
+    assert await test_photos_repository.get_by_id(test_photos[1].id) is not None
+
+
+@pytest.mark.asyncio
+async def test_delete_many_non_existent(test_photos_repository):
+    """Test deleting photos that do not exist"""
+    assert await test_photos_repository.delete_many([999999]) == ([], [])
+
+
+@pytest.mark.asyncio
+async def test_delete_many_releases_blob_references(
+    test_photos_repository, test_async_db
+):
+    """Test that a shared file only gets a tombstone with its last photo"""
+    test_async_db.add(Blob(file_name="shared.jpg", digest="abc", size=1, ref_count=3))
+    photos = await test_photos_repository.save_all(
+        [SummitPhoto(file_name="shared.jpg") for _ in range(3)]
+    )
+
+    _, tombstones = await test_photos_repository.delete_many(
+        [photos[0].id, photos[1].id]
+    )
+    blob = await BlobsRepository(test_async_db).get("shared.jpg")
+    assert tombstones == []
+    assert blob.ref_count == 1
+
+    _, tombstones = await test_photos_repository.delete_many([photos[2].id])
+    assert [tombstone.file_name for tombstone in tombstones] == ["shared.jpg"]
+    assert await BlobsRepository(test_async_db).get("shared.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_get_and_delete_tombstones(test_photos_repository, test_photos):
+    """Test listing the tombstones of old deletions and removing them"""
+    _, tombstones = await test_photos_repository.delete_many(
+        [photo.id for photo in test_photos]
+    )
+
+    assert await test_photos_repository.get_tombstones(datetime(2000, 1, 1)) == []
+    pending = await test_photos_repository.get_tombstones(datetime(3000, 1, 1))
+    assert {tombstone.id for tombstone in pending} == {
+        tombstone.id for tombstone in tombstones
+    }
+    assert (
+        len(await test_photos_repository.get_tombstones(datetime(3000, 1, 1), 1)) == 1
+    )
+
+    await test_photos_repository.delete_tombstones(pending)
+    assert await test_photos_repository.get_tombstones(datetime(3000, 1, 1)) == []
+
+
+@pytest.fixture()
+def count_statements(test_async_engine):
+    """Count the SQL statements executed on the async test engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(
+        test_async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    yield statements
+    event.remove(
+        test_async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+
+
+@pytest.fixture()
+def thousand_photos(test_db, test_peaks):
+    """Create 1,000 summit photos spread over the test peaks"""
+    test_db.add_all(
+        SummitPhoto(
+            file_name=f"bulk{i}.jpg",
+            peak_id=test_peaks[i % len(test_peaks)].id,
+        )
+        for i in range(1000)
+    )
+    test_db.commit()
+
+
+@pytest.mark.asyncio
+async def test_get_page_loads_peaks_in_one_query(
+    test_photos_repository, thousand_photos, count_statements
+):
+    """Test that a page of photos with peaks takes a constant two queries"""
+    photos, _ = await test_photos_repository.get_page(200)
+    assert all(photo.peak is not None for photo in photos)
+    assert len(count_statements) == 2
+
+    count_statements.clear()
+    photos, _ = await test_photos_repository.get_page(200, fields=["peak"])
+    assert all(photo["peak"] is not None for photo in photos)
+    assert len(count_statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_joins_peak(
+    test_photos_repository, test_photos, count_statements
+):
+    """Test that a single photo is loaded with its peak in one query"""
+    photo = await test_photos_repository.get_by_id(test_photos[0].id)
+
+    assert photo.peak.id == test_photos[0].peak_id
+    assert len(count_statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_page_unsortable_field(test_photos_repository):
+    """Test that sorting by a field without an index is rejected"""
+    with pytest.raises(ValueError):
+        await test_photos_repository.get_page(10, sort_by="latitude")
+
+
+@pytest.fixture()
+def query_plans(test_async_engine):
+    """Collect the SQLite query plan of every photo query"""
+    plans = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        if statement.startswith("SELECT summitphoto"):
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append(" ".join(row[3] for row in cursor.fetchall()))
+
+    event.listen(
+        test_async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    yield plans
+    event.remove(
+        test_async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", ["uploaded_at", "captured_at"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_get_page_uses_index(
+    test_photos_repository, many_photos, query_plans, sort_by, order
+):
+    """Test that pages after a cursor are index range scans without a sort"""
+    _, cursor = await test_photos_repository.get_page(2, sort_by=sort_by, order=order)
+    query_plans.clear()
+
+    await test_photos_repository.get_page(
+        2, cursor=cursor, sort_by=sort_by, order=order
+    )
+
+    assert query_plans
+    assert f"USING INDEX ix_summitphoto_{sort_by}_id" in query_plans[0]
+    assert all("TEMP B-TREE" not in plan for plan in query_plans)
@@ -2,15 +2,22 @@
 Tests for the PhotosService
 """
 
+import asyncio
+import io
 from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi import UploadFile
+from starlette.datastructures import Headers
 
-from src.photos.models import SummitPhoto, SummitPhotoCreate
+from src.photos.models import PhotoTombstone, SummitPhoto, SummitPhotoCreate
 from src.photos.repository import PhotosRepository
-from src.photos.service import PhotosService
+from src.photos.service import (
+    PROCESS_PHOTO_JOB,
+    PhotosService,
+    purge_deleted_photo_files,
+)
 from src.uploads.service import UploadsService
 
 
@@ -20,21 +27,24 @@ def mock_uploads_service():
     service = AsyncMock(spec=UploadsService)
     service.save_file.return_value = "/uploads/test-photo.jpg"
     service.delete_file.return_value = True
+    service.read_file.return_value = None
+    service.is_referenced.return_value = False
     return service
 
 
 @pytest.fixture
 def mock_photos_repository():
     """Create a mock photo repository"""
-    repo = MagicMock(spec=PhotosRepository)
+    repo = AsyncMock(spec=PhotosRepository)
 
-    def save_photo(photo):
+    def save_photo(photo, job=None):
         photo.id = 1
         return photo
 
     repo.save.side_effect = save_photo
     repo.get_by_id.return_value = SummitPhoto(id=1, file_name="test-photo.jpg")
     repo.delete.return_value = True
+    repo.is_file_processed.return_value = False
     return repo
 
 
@@ -87,10 +97,24 @@ async def test_upload_photo_with_metadata(
     assert result.latitude == peak_coords["near_rysy"][0]
     assert result.longitude == peak_coords["near_rysy"][1]
 
-    mock_uploads_service.save_file.assert_called_once_with(
-        mock_file, content_type_prefix="image/"
-    )
-    mock_photos_repository.save.assert_called_once()
+    mock_uploads_service.save_file.assert_called_once()
+    upload = mock_uploads_service.save_file.call_args.args[0]
+    assert upload.file is mock_file
+    mock_photos_repository.save.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_upload_photo_queues_processing(
+    photos_service, mock_file, mock_uploads_service, mock_photos_repository
+):
+    """Test that an upload returns before processing, saved with a job for it"""
+    result = await photos_service.upload_photo(mock_file, SummitPhotoCreate())
+
+    assert result.processing_status == "pending"
+    mock_uploads_service.read_file.assert_not_awaited()
+    photo, job = mock_photos_repository.save.call_args.args
+    assert photo is result
+    assert job.kind == PROCESS_PHOTO_JOB
 
 
 @pytest.mark.asyncio
@@ -114,10 +138,10 @@ async def test_upload_photo_without_metadata(
     assert result.latitude is None
     assert result.longitude is None
 
-    mock_uploads_service.save_file.assert_called_once_with(
-        mock_file, content_type_prefix="image/"
-    )
-    mock_photos_repository.save.assert_called_once()
+    mock_uploads_service.save_file.assert_called_once()
+    upload = mock_uploads_service.save_file.call_args.args[0]
+    assert upload.file is mock_file
+    mock_photos_repository.save.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -144,10 +168,179 @@ async def test_upload_photo_with_partial_metadata(
     assert result.latitude is None
     assert result.longitude is None
 
-    mock_uploads_service.save_file.assert_called_once_with(
-        mock_file, content_type_prefix="image/"
+    mock_uploads_service.save_file.assert_called_once()
+    upload = mock_uploads_service.save_file.call_args.args[0]
+    assert upload.file is mock_file
+    mock_photos_repository.save.assert_awaited_once()
+
+
+@pytest.fixture
+def exif_upload(tmp_path, exif_jpeg):
+    """Create an UploadFile of a JPEG with EXIF data"""
+    path = tmp_path / "exif.jpg"
+    path.write_bytes(exif_jpeg)
+
+    with open(path, "rb") as f:
+        yield UploadFile(
+            filename="exif.jpg",
+            file=f,
+            headers=Headers({"content-type": "image/jpeg"}),
+        )
+
+
+@pytest.fixture
+def streaming_uploads_service(mock_uploads_service):
+    """Make the mock upload service read the whole file like a storage would"""
+
+    async def save_file(file, content_type_prefix=None):
+        while await file.read(8192):
+            pass
+        return "/uploads/test-photo.jpg"
+
+    mock_uploads_service.save_file.side_effect = save_file
+    return mock_uploads_service
+
+
+@pytest.mark.asyncio
+async def test_upload_photo_fills_metadata_from_exif(
+    photos_service, streaming_uploads_service, exif_upload
+):
+    """Test that missing metadata is read from the EXIF data of the upload"""
+    result = await photos_service.upload_photo(
+        exif_upload, SummitPhotoCreate(peak_id=1)
+    )
+
+    assert result.peak_id == 1
+    assert result.latitude == pytest.approx(49.1794, abs=1e-5)
+    assert result.longitude == pytest.approx(20.0880, abs=1e-5)
+    assert result.altitude == pytest.approx(2495.5)
+    assert result.captured_at == datetime(2025, 8, 15, 9, 30, 0)
+
+
+@pytest.mark.asyncio
+async def test_upload_photo_client_metadata_takes_precedence(
+    photos_service, streaming_uploads_service, exif_upload
+):
+    """Test that metadata sent by the client overrides the EXIF data"""
+    result = await photos_service.upload_photo(
+        exif_upload,
+        SummitPhotoCreate(latitude=50.0, longitude=19.0, altitude=None),
+    )
+
+    assert result.latitude == 50.0
+    assert result.longitude == 19.0
+    assert result.altitude == pytest.approx(2495.5)
+    assert result.captured_at == datetime(2025, 8, 15, 9, 30, 0)
+
+
+@pytest.fixture
+def storing_photos_service(local_storage, mock_photos_repository):
+    """Create a PhotosService that stores files in the test upload directory"""
+    return PhotosService(UploadsService(local_storage), mock_photos_repository)
+
+
+@pytest.mark.asyncio
+async def test_create_derivatives(storing_photos_service, local_storage, photo_jpeg):
+    """Test that every derivative of a stored photo is generated"""
+    await local_storage.save_bytes(photo_jpeg, "test-photo.jpg")
+
+    assert await storing_photos_service.create_derivatives("test-photo.jpg") is True
+
+    for name in (
+        "test-photo.jpg.256.webp",
+        "test-photo.jpg.1024.jpeg",
+        "test-photo.jpg.2048.webp",
+    ):
+        assert await local_storage.read_file(name) is not None
+
+
+@pytest.mark.asyncio
+async def test_create_derivatives_skips_undecodable_files(
+    storing_photos_service, local_storage
+):
+    """Test that files that are not images get no derivatives"""
+    await local_storage.save_bytes(b"not an image", "test-photo.jpg")
+
+    assert await storing_photos_service.create_derivatives("test-photo.jpg") is False
+    assert await local_storage.read_file("test-photo.jpg.256.webp") is None
+
+
+@pytest.mark.asyncio
+async def test_process_photo(
+    storing_photos_service, local_storage, mock_photos_repository, photo_jpeg
+):
+    """Test that processing a photo stores its derivatives and marks it ready"""
+    await local_storage.save_bytes(photo_jpeg, "test-photo.jpg")
+
+    await storing_photos_service.process_photo(1)
+
+    assert await local_storage.read_file("test-photo.jpg.1024.webp") is not None
+    mock_photos_repository.set_processing_status.assert_awaited_once_with(1, "ready")
+
+
+@pytest.mark.asyncio
+async def test_process_photo_missing_file(
+    storing_photos_service, mock_photos_repository
+):
+    """Test that processing a photo without a stored file cannot succeed"""
+    with pytest.raises(ValueError):
+        await storing_photos_service.process_photo(1)
+
+    mock_photos_repository.set_processing_status.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_derivative_generates_missing_derivative(
+    storing_photos_service, local_storage, photo_jpeg
+):
+    """Test that a derivative that was never generated is rendered and stored"""
+    await local_storage.save_bytes(photo_jpeg, "test-photo.jpg")
+
+    data = await storing_photos_service.get_derivative(1, "test-photo.jpg", 256, "webp")
+
+    assert data[:4] == b"RIFF"
+    assert await local_storage.read_file("test-photo.jpg.256.webp") == data
+    assert await local_storage.read_file("test-photo.jpg.256.jpeg") is None
+
+
+@pytest.mark.asyncio
+async def test_get_derivative_serves_stored_derivative(
+    storing_photos_service, local_storage
+):
+    """Test that a stored derivative is served without touching the original"""
+    await local_storage.save_bytes(b"stored", "test-photo.jpg.1024.jpeg")
+
+    assert (
+        await storing_photos_service.get_derivative(1, "test-photo.jpg", 1024, "jpeg")
+        == b"stored"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_derivative_of_other_file(storing_photos_service, local_storage):
+    """Test that a URL made for another file of the same photo ID is not served"""
+    await local_storage.save_bytes(b"stored", "test-photo.jpg.1024.jpeg")
+
+    assert (
+        await storing_photos_service.get_derivative(1, "deleted.jpg", 1024, "jpeg")
+        is None
     )
-    mock_photos_repository.save.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_derivative_unknown_size(
+    storing_photos_service, mock_photos_repository
+):
+    """Test that sizes and formats that are not offered are not generated"""
+    assert (
+        await storing_photos_service.get_derivative(1, "test-photo.jpg", 300, "webp")
+        is None
+    )
+    assert (
+        await storing_photos_service.get_derivative(1, "test-photo.jpg", 256, "png")
+        is None
+    )
+    mock_photos_repository.get_by_id.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -165,7 +358,7 @@ async def test_get_photo_by_id(photos_service, mock_photos_repository):
     result = await photos_service.get_photo_by_id(photo_id)
 
     assert result == test_photo
-    mock_photos_repository.get_by_id.assert_called_once_with(photo_id)
+    mock_photos_repository.get_by_id.assert_awaited_once_with(photo_id)
 
 
 @pytest.mark.asyncio
@@ -177,22 +370,24 @@ async def test_get_photo_by_id_not_found(photos_service, mock_photos_repository)
     result = await photos_service.get_photo_by_id(photo_id)
 
     assert result is None
-    mock_photos_repository.get_by_id.assert_called_once_with(photo_id)
+    mock_photos_repository.get_by_id.assert_awaited_once_with(photo_id)
 
 
 @pytest.mark.asyncio
-async def test_get_all_photos(photos_service, mock_photos_repository):
-    """Test getting all photos"""
-    test_photos = [
-        SummitPhoto(id=1, file_name="test1.jpg"),
-        SummitPhoto(id=2, file_name="test2.jpg"),
-    ]
-    mock_photos_repository.get_all.return_value = test_photos
+async def test_get_photos_page(photos_service, mock_photos_repository):
+    """Test getting a page of photos"""
+    test_photos = [SummitPhoto(id=1, file_name="test1.jpg")]
+    mock_photos_repository.get_page.return_value = (test_photos, "next")
 
-    result = await photos_service.get_all_photos()
+    result = await photos_service.get_photos_page(
+        1, sort_by="captured_at", order="desc"
+    )
 
-    assert result == test_photos
-    mock_photos_repository.get_all.assert_called_once_with(sort_by=None, order=None)
+    assert [item.id for item in result.items] == [1]
+    assert result.next_cursor == "next"
+    mock_photos_repository.get_page.assert_awaited_once_with(
+        1, cursor=None, sort_by="captured_at", order="desc", fields=None
+    )
 
 
 @pytest.mark.asyncio
@@ -201,38 +396,259 @@ async def test_delete_photo_success(
 ):
     """Test deleting a photo successfully"""
     photo_id = 1
+    tombstone = PhotoTombstone(id=3, file_name="test-photo.jpg")
+    mock_photos_repository.delete_many.return_value = ([photo_id], [tombstone])
+
     result = await photos_service.delete_photo(photo_id)
 
     assert result is True
-    mock_photos_repository.get_by_id.assert_called_once_with(photo_id)
-    mock_uploads_service.delete_file.assert_called_once_with("test-photo.jpg")
-    mock_photos_repository.delete.assert_called_once_with(photo_id)
+    mock_photos_repository.delete_many.assert_awaited_once_with([photo_id])
+    filename, filenames = mock_uploads_service.purge_files.call_args.args
+    assert filename == "test-photo.jpg"
+    assert filenames[0] == "test-photo.jpg"
+    assert "test-photo.jpg.256.webp" in filenames
+    assert "test-photo.jpg.2048.jpeg" in filenames
+    assert "test-photo_256.webp" in filenames
+    assert len(filenames) == 13
+    mock_photos_repository.delete_tombstones.assert_awaited_once_with([tombstone])
 
 
 @pytest.mark.asyncio
-async def test_delete_photo_failure_no_file(
+async def test_delete_photo_failure_not_found(
     photos_service, mock_uploads_service, mock_photos_repository
 ):
-    """Test deleting a photo when the file deletion fails"""
-    photo_id = 1
-    mock_uploads_service.delete_file.return_value = False
+    """Test deleting a photo that doesn't exist"""
+    mock_photos_repository.delete_many.return_value = ([], [])
 
-    result = await photos_service.delete_photo(photo_id)
+    result = await photos_service.delete_photo(999)
 
     assert result is False
-    mock_photos_repository.get_by_id.assert_called_once_with(photo_id)
-    mock_uploads_service.delete_file.assert_called_once_with("test-photo.jpg")
-    mock_photos_repository.delete.assert_not_called()
+    mock_uploads_service.purge_files.assert_not_awaited()
 
 
 @pytest.mark.asyncio
-async def test_delete_photo_failure_not_found(photos_service, mock_photos_repository):
-    """Test deleting a photo that doesn't exist"""
-    photo_id = 999
-    mock_photos_repository.get_by_id.return_value = None
+async def test_delete_photos_keeps_tombstones_of_failed_files(
+    photos_service, mock_uploads_service, mock_photos_repository
+):
+    """Test that files that cannot be deleted keep their tombstones"""
+    tombstones = [
+        PhotoTombstone(id=1, file_name="a.jpg"),
+        PhotoTombstone(id=2, file_name="b.jpg"),
+    ]
+    mock_photos_repository.delete_many.return_value = ([1, 2], tombstones)
 
-    result = await photos_service.delete_photo(photo_id)
+    async def purge_files(filename, filenames):
+        if filename == "b.jpg":
+            raise OSError("disk failure")
+        return True
 
-    assert result is False
-    mock_photos_repository.get_by_id.assert_called_once_with(photo_id)
-    mock_photos_repository.delete.assert_not_called()
+    mock_uploads_service.purge_files.side_effect = purge_files
+
+    result = await photos_service.delete_photos([1, 2, 3])
+
+    assert result == [1, 2]
+    mock_photos_repository.delete_tombstones.assert_awaited_once_with([tombstones[0]])
+
+
+@pytest.mark.asyncio
+async def test_delete_photos_bounds_concurrency(
+    photos_service, mock_uploads_service, mock_photos_repository
+):
+    """Test that only the given number of files are deleted at a time"""
+    tombstones = [PhotoTombstone(id=i, file_name=f"{i}.jpg") for i in range(6)]
+    mock_photos_repository.delete_many.return_value = (list(range(6)), tombstones)
+    running = 0
+    peak = 0
+
+    async def purge_files(filename, filenames):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return True
+
+    mock_uploads_service.purge_files.side_effect = purge_files
+
+    await photos_service.delete_photos(list(range(6)), concurrency=2)
+
+    assert peak == 2
+    assert mock_uploads_service.purge_files.await_count == 6
+
+
+@pytest.mark.asyncio
+async def test_purge_tombstones(
+    photos_service, mock_uploads_service, mock_photos_repository
+):
+    """Test purging the tombstones left by interrupted deletions"""
+    before = datetime(2025, 1, 1)
+    tombstones = [PhotoTombstone(id=1, file_name="a.jpg")]
+    mock_photos_repository.get_tombstones.side_effect = [tombstones, []]
+
+    count = await photos_service.purge_tombstones(before)
+
+    assert count == 1
+    mock_photos_repository.get_tombstones.assert_awaited_with(before)
+    mock_photos_repository.delete_tombstones.assert_awaited_once_with(tombstones)
+
+
+@pytest.mark.asyncio
+async def test_purge_tombstones_stops_when_storage_fails(
+    photos_service, mock_uploads_service, mock_photos_repository
+):
+    """Test that a purge does not loop over files that cannot be deleted"""
+    mock_photos_repository.get_tombstones.return_value = [
+        PhotoTombstone(id=1, file_name="a.jpg")
+    ]
+    mock_uploads_service.purge_files.side_effect = OSError("disk failure")
+
+    count = await photos_service.purge_tombstones(datetime(2025, 1, 1))
+
+    assert count == 0
+    mock_photos_repository.get_tombstones.assert_awaited_once()
+
+
+def _image(content: bytes, filename: str = "photo.jpg", content_type="image/jpeg"):
+    return UploadFile(
+        filename=filename,
+        file=io.BytesIO(content),
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+@pytest.fixture
+def batch_photos_repository(mock_photos_repository):
+    """Mock photo repository assigning IDs to photos saved in a batch"""
+
+    def save_all(photos, jobs=()):
+        for photo_id, photo in enumerate(photos, start=1):
+            photo.id = photo_id
+        return photos
+
+    mock_photos_repository.save_all.side_effect = save_all
+    mock_photos_repository.get_processed_files.return_value = set()
+    return mock_photos_repository
+
+
+@pytest.mark.asyncio
+async def test_upload_photos(
+    storing_photos_service, batch_photos_repository, exif_jpeg
+):
+    """Test that a batch stores every file and saves the photos together"""
+    files = [_image(exif_jpeg, "a.jpg"), _image(b"second", "b.jpg")]
+
+    items = await storing_photos_service.upload_photos(
+        files, [SummitPhotoCreate(altitude=2499)]
+    )
+
+    assert [(item.index, item.filename, item.error) for item in items] == [
+        (0, "a.jpg", None),
+        (1, "b.jpg", None),
+    ]
+    assert items[0].photo.altitude == 2499
+    assert items[0].photo.latitude == pytest.approx(49.1794, abs=1e-5)
+    assert items[1].photo.altitude is None
+    batch_photos_repository.save_all.assert_awaited_once()
+    batch_photos_repository.save.assert_not_awaited()
+    jobs = batch_photos_repository.save_all.call_args.args[1]
+    assert [job.kind for job in jobs] == [PROCESS_PHOTO_JOB] * 2
+
+
+@pytest.mark.asyncio
+async def test_upload_photos_reports_failed_files(
+    storing_photos_service, batch_photos_repository
+):
+    """Test that a file that cannot be stored does not fail the others"""
+    files = [_image(b"note", "note.txt", "text/plain"), _image(b"photo")]
+
+    items = await storing_photos_service.upload_photos(files, [])
+
+    assert items[0].photo is None
+    assert "image/" in items[0].error
+    assert items[1].photo.id == 1
+    saved = batch_photos_repository.save_all.call_args.args[0]
+    assert len(saved) == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_photos_skips_processed_files(
+    storing_photos_service, batch_photos_repository
+):
+    """Test that photos of already processed files are ready without a job"""
+
+    async def processed(file_names):
+        return {file_names[0]}
+
+    batch_photos_repository.get_processed_files.side_effect = processed
+
+    items = await storing_photos_service.upload_photos(
+        [_image(b"first"), _image(b"second")], []
+    )
+
+    assert [item.photo.processing_status for item in items] == ["ready", "pending"]
+    jobs = batch_photos_repository.save_all.call_args.args[1]
+    assert [job and job.kind for job in jobs] == [None, PROCESS_PHOTO_JOB]
+
+
+@pytest.mark.asyncio
+async def test_upload_photos_deletes_files_if_save_fails(
+    storing_photos_service, batch_photos_repository, local_storage
+):
+    """Test that stored files are removed when the photos cannot be saved"""
+    batch_photos_repository.save_all.side_effect = RuntimeError("database is locked")
+
+    items = await storing_photos_service.upload_photos(
+        [_image(b"first"), _image(b"second")], []
+    )
+
+    assert all(item.error and item.photo is None for item in items)
+    assert list(local_storage.upload_dir.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_upload_photos_bounds_concurrency(
+    storing_photos_service, batch_photos_repository, local_storage
+):
+    """Test that no more than the given number of files are stored at a time"""
+    running = 0
+    most = 0
+    save_file = local_storage.save_file
+
+    async def counting_save_file(file, filename):
+        nonlocal running, most
+        running += 1
+        most = max(most, running)
+        try:
+            await asyncio.sleep(0.01)
+            return await save_file(file, filename)
+        finally:
+            running -= 1
+
+    local_storage.save_file = counting_save_file
+
+    items = await storing_photos_service.upload_photos(
+        [_image(bytes([i])) for i in range(10)], [], concurrency=3
+    )
+
+    assert all(item.photo for item in items)
+    assert most == 3
+
+
+@pytest.mark.asyncio
+async def test_purge_loop_logs_errors(
+    test_async_engine, local_storage, monkeypatch, caplog
+):
+    """Test that the purge loop logs a failed purge and keeps running"""
+
+    async def purge_tombstones(self, created_before):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(PhotosService, "purge_tombstones", purge_tombstones)
+    purger = asyncio.create_task(
+        purge_deleted_photo_files(test_async_engine, local_storage, 0.01)
+    )
+    await asyncio.sleep(0.05)
+    purger.cancel()
+    await asyncio.gather(purger, return_exceptions=True)
+
+    assert caplog.text.count("Could not purge the files of deleted photos") > 1
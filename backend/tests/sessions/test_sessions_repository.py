@@ -1,33 +1,35 @@
 import pytest
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.sessions.repository import SessionsRepository
 
 
 @pytest.fixture
-def test_sessions_repository(test_db: Session) -> SessionsRepository:
+def test_sessions_repository(test_async_db: AsyncSession) -> SessionsRepository:
     """Create a SessionsRepository instance for testing."""
-    return SessionsRepository(test_db)
+    return SessionsRepository(test_async_db)
 
 
-def test_create_session(test_sessions_repository: SessionsRepository):
+@pytest.mark.asyncio
+async def test_create_session(test_sessions_repository: SessionsRepository):
     """Test creating a new session"""
     user_id = 1
     expires_in_days = 7
 
-    session = test_sessions_repository.create(user_id, expires_in_days)
+    session = await test_sessions_repository.create(user_id, expires_in_days)
 
     assert session.id is not None
     assert session.user_id == user_id
     assert session.is_active
 
 
-def test_get_active_by_id_valid(test_sessions_repository: SessionsRepository):
+@pytest.mark.asyncio
+async def test_get_active_by_id_valid(test_sessions_repository: SessionsRepository):
     """Test retrieving valid active session by ID"""
     user_id = 1
-    session = test_sessions_repository.create(user_id, expires_in_days=7)
+    session = await test_sessions_repository.create(user_id, expires_in_days=7)
 
-    retrieved_session = test_sessions_repository.get_active_by_id(session.id)
+    retrieved_session = await test_sessions_repository.get_active_by_id(session.id)
 
     assert retrieved_session is not None
     assert retrieved_session.id == session.id
@@ -35,33 +37,38 @@ def test_get_active_by_id_valid(test_sessions_repository: SessionsRepository):
     assert retrieved_session.is_active
 
 
-def test_get_active_by_id_expired(test_sessions_repository: SessionsRepository):
+@pytest.mark.asyncio
+async def test_get_active_by_id_expired(test_sessions_repository: SessionsRepository):
     """Test retrieving expired session by ID returns None"""
     user_id = 1
-    session = test_sessions_repository.create(user_id, expires_in_days=0)
+    session = await test_sessions_repository.create(user_id, expires_in_days=0)
 
-    retrieved_session = test_sessions_repository.get_active_by_id(session.id)
+    retrieved_session = await test_sessions_repository.get_active_by_id(session.id)
 
     assert retrieved_session is None
 
 
-def test_get_active_by_id_invalidated(test_sessions_repository: SessionsRepository):
+@pytest.mark.asyncio
+async def test_get_active_by_id_invalidated(
+    test_sessions_repository: SessionsRepository,
+):
     """Test retrieving invalidated session by ID returns None"""
     user_id = 1
-    session = test_sessions_repository.create(user_id, expires_in_days=7)
-    test_sessions_repository.invalidate_by_id(session.id)
+    session = await test_sessions_repository.create(user_id, expires_in_days=7)
+    await test_sessions_repository.invalidate_by_id(session.id)
 
-    retrieved_session = test_sessions_repository.get_active_by_id(session.id)
+    retrieved_session = await test_sessions_repository.get_active_by_id(session.id)
 
     assert retrieved_session is None
 
 
-def test_invalidate_by_id(test_sessions_repository: SessionsRepository):
+@pytest.mark.asyncio
+async def test_invalidate_by_id(test_sessions_repository: SessionsRepository):
     """Test invalidating a session"""
     user_id = 1
-    session = test_sessions_repository.create(user_id, expires_in_days=7)
+    session = await test_sessions_repository.create(user_id, expires_in_days=7)
 
-    test_sessions_repository.invalidate_by_id(session.id)
+    await test_sessions_repository.invalidate_by_id(session.id)
 
-    inactive_session = test_sessions_repository.get_active_by_id(session.id)
+    inactive_session = await test_sessions_repository.get_active_by_id(session.id)
     assert inactive_session is None
@@ -0,0 +1,226 @@
+"""
+An in-memory stand-in for an S3-compatible service, served to httpx clients
+through a mock transport
+"""
+
+import asyncio
+import hashlib
+import re
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+from xml.etree import ElementTree
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from src.uploads.services.s3_storage import S3FileStorage, S3Signer
+
+S3_ENDPOINT = "http://s3.test"
+S3_BUCKET = "photos"
+
+
+class FakeS3:
+    """
+    Keeps the objects of one bucket in memory and answers the S3 requests
+    S3FileStorage sends, checking their signatures like S3 does.
+    """
+
+    def __init__(self, signer: S3Signer, part_delay: float = 0.0):
+        self.signer = signer
+        self.part_delay = part_delay
+        self.objects: Dict[str, bytes] = {}
+        self.content_types: Dict[str, str] = {}
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.parts_in_flight = 0
+        self.max_parts_in_flight = 0
+        self.fail_part: Optional[int] = None
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        if not self._authorized(request, body):
+            return _error(403, "SignatureDoesNotMatch")
+
+        prefix = f"/{S3_BUCKET}/"
+        path = unquote(request.url.path)
+        if not path.startswith(prefix):
+            return _error(404, "NoSuchBucket")
+
+        key = path[len(prefix) :]
+        params = request.url.params
+        self.requests.append((request.method, key))
+
+        if "uploadId" in params:
+            return await self._multipart(request, key, params, body)
+        if request.method == "POST" and "uploads" in params:
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {}
+            return _xml(
+                f"<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            )
+        if request.method == "PUT" and "x-amz-copy-source" in request.headers:
+            source = self._source(request)
+            if source not in self.objects:
+                return _error(404, "NoSuchKey")
+            self.objects[key] = self.objects[source]
+            return _xml(
+                "<CopyObjectResult><ETag>&quot;copy&quot;</ETag></CopyObjectResult>"
+            )
+        if request.method == "PUT":
+            self.objects[key] = body
+            self.content_types[key] = request.headers.get("content-type", "")
+            return httpx.Response(200, headers={"ETag": _etag(body)})
+        if request.method == "DELETE":
+            self.objects.pop(key, None)
+            return httpx.Response(204)
+        if key not in self.objects:
+            return _error(404, "NoSuchKey")
+        if request.method == "HEAD":
+            return httpx.Response(
+                200, headers={"Content-Length": str(len(self.objects[key]))}
+            )
+
+        data = self.objects[key]
+        if "range" not in request.headers:
+            return httpx.Response(200, content=data)
+
+        start, end = _range(request.headers["range"])
+        if start >= len(data):
+            return _error(416, "InvalidRange")
+        return httpx.Response(206, content=data[start : end + 1])
+
+    async def _multipart(self, request, key, params, body) -> httpx.Response:
+        upload_id = params["uploadId"]
+        if upload_id not in self.uploads:
+            return _error(404, "NoSuchUpload")
+
+        if request.method == "DELETE":
+            del self.uploads[upload_id]
+            return httpx.Response(204)
+
+        if request.method == "POST":
+            parts = self.uploads.pop(upload_id)
+            root = ElementTree.fromstring(body)
+            numbers = [int(part.findtext("PartNumber")) for part in root]
+            if numbers != sorted(parts):
+                return _xml("<Error><Code>InvalidPart</Code></Error>")
+            self.objects[key] = b"".join(parts[number] for number in numbers)
+            return _xml("<CompleteMultipartUploadResult/>")
+
+        number = int(params["partNumber"])
+        if "x-amz-copy-source" in request.headers:
+            source = self.objects.get(self._source(request))
+            if source is None:
+                return _error(404, "NoSuchKey")
+            start, end = _range(request.headers["x-amz-copy-source-range"])
+            if end >= len(source):
+                return _error(416, "InvalidRange")
+            self.uploads[upload_id][number] = source[start : end + 1]
+            return _xml(
+                "<CopyPartResult><ETag>&quot;copy&quot;</ETag></CopyPartResult>"
+            )
+
+        self.parts_in_flight += 1
+        self.max_parts_in_flight = max(self.max_parts_in_flight, self.parts_in_flight)
+        try:
+            await asyncio.sleep(self.part_delay)
+            if number == self.fail_part:
+                return _error(500, "InternalError")
+            self.uploads[upload_id][number] = body
+        finally:
+            self.parts_in_flight -= 1
+        return httpx.Response(200, headers={"ETag": _etag(body)})
+
+    def _authorized(self, request: httpx.Request, body: bytes) -> bool:
+        params = request.url.params
+        if "X-Amz-Signature" in params:
+            signed = params["X-Amz-SignedHeaders"].split(";")
+            amz_date = params["X-Amz-Date"]
+            signed_at = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(
+                tzinfo=timezone.utc
+            )
+            age = (datetime.now(timezone.utc) - signed_at).total_seconds()
+            if age > int(params["X-Amz-Expires"]):
+                return False
+            payload_hash = "UNSIGNED-PAYLOAD"
+            signature = params["X-Amz-Signature"]
+        else:
+            match = re.search(
+                r"SignedHeaders=([^,]+), Signature=(\w+)",
+                request.headers.get("authorization", ""),
+            )
+            if not match:
+                return False
+            signed = match.group(1).split(";")
+            amz_date = request.headers["x-amz-date"]
+            payload_hash = request.headers["x-amz-content-sha256"]
+            if payload_hash != hashlib.sha256(body).hexdigest():
+                return False
+            signature = match.group(2)
+
+        headers = {name: request.headers.get(name, "") for name in signed}
+        expected = self.signer.signature(
+            request.method, str(request.url), headers, payload_hash, amz_date
+        )
+        return signature == expected
+
+    def _source(self, request: httpx.Request) -> str:
+        return unquote(request.headers["x-amz-copy-source"])[len(S3_BUCKET) + 2 :]
+
+
+def _range(value: str) -> Tuple[int, int]:
+    start, end = value.removeprefix("bytes=").split("-")
+    return int(start), int(end)
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def _xml(content: str) -> httpx.Response:
+    return httpx.Response(
+        200, content=content.encode(), headers={"Content-Type": "application/xml"}
+    )
+
+
+def _error(status_code: int, code: str) -> httpx.Response:
+    return httpx.Response(
+        status_code,
+        content=f"<Error><Code>{code}</Code></Error>".encode(),
+        headers={"Content-Type": "application/xml"},
+    )
+
+
+@pytest.fixture
+def s3_signer():
+    """Signer with test credentials"""
+    return S3Signer("AKIDTEST", "test-secret", "eu-central-1")
+
+
+@pytest.fixture
+def fake_s3(s3_signer):
+    """In-memory S3 bucket"""
+    return FakeS3(s3_signer)
+
+
+@pytest_asyncio.fixture
+async def s3_storage(fake_s3, s3_signer):
+    """S3FileStorage on the in-memory bucket, with small parts"""
+    storage = S3FileStorage(
+        S3_ENDPOINT,
+        S3_BUCKET,
+        s3_signer,
+        prefix="uploads/",
+        part_size=1024,
+        part_concurrency=2,
+        client=httpx.AsyncClient(transport=fake_s3.transport()),
+    )
+    yield storage
+    await storage.close()
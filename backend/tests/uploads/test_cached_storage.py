@@ -0,0 +1,219 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from main import app
+from src.uploads.services.cached_storage import CachedStorage
+from src.uploads.services.factory import get_storage
+from src.uploads.services.local_storage import LocalFileStorage
+from tests.uploads.s3_fixtures import fake_s3, s3_signer, s3_storage  # noqa: F401
+
+
+class CountingStorage(LocalFileStorage):
+    """Local storage counting its reads, which take a moment"""
+
+    reads = 0
+
+    async def read_file(self, filename, size=-1):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return await super().read_file(filename, size)
+
+
+@pytest.fixture
+def origin(tmp_path):
+    return CountingStorage(upload_dir=str(tmp_path / "origin"))
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def cached(origin, cache_dir):
+    return CachedStorage(origin, LocalFileStorage(upload_dir=str(cache_dir)), 10)
+
+
+@pytest.mark.asyncio
+async def test_read_through(cached, origin):
+    await origin.save_bytes(b"abcd", "photo.jpg")
+
+    assert await cached.read_file("photo.jpg") == b"abcd"
+    assert await cached.read_file("photo.jpg") == b"abcd"
+    assert await cached.read_file("photo.jpg", 2) == b"ab"
+
+    assert origin.reads == 1
+    assert (cached.hits, cached.misses) == (2, 1)
+    assert (cached.entries, cached.size) == (1, 4)
+    assert await cached.file_size("photo.jpg") == 4
+
+
+@pytest.mark.asyncio
+async def test_missing_and_partial_reads_are_not_cached(cached, origin):
+    await origin.save_bytes(b"abcd", "photo.jpg")
+
+    assert await cached.read_file("missing.jpg") is None
+    assert await cached.read_file("photo.jpg", 2) == b"ab"
+
+    assert cached.entries == 0
+    assert origin.reads == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(cached, origin):
+    await origin.save_bytes(b"abcd", "photo.jpg")
+
+    results = await asyncio.gather(*(cached.read_file("photo.jpg") for _ in range(5)))
+
+    assert results == [b"abcd"] * 5
+    assert origin.reads == 1
+    assert (cached.misses, cached.coalesced) == (5, 4)
+
+
+@pytest.mark.asyncio
+async def test_iter_file(cached, origin):
+    await origin.save_bytes(b"abcd", "photo.jpg")
+
+    assert [chunk async for chunk in cached.iter_file("photo.jpg", 3)] == [
+        b"abc",
+        b"d",
+    ]
+    assert cached.entries == 0
+
+    await cached.read_file("photo.jpg")
+    await origin.delete_file("photo.jpg")
+    assert [chunk async for chunk in cached.iter_file("photo.jpg", 4)] == [b"abcd"]
+
+
+@pytest.mark.asyncio
+async def test_least_recently_read_files_are_evicted(cached, origin, cache_dir):
+    for name in ("a.jpg", "b.jpg", "c.jpg"):
+        await origin.save_bytes(b"1234", name)
+
+    await cached.read_file("a.jpg")
+    await cached.read_file("b.jpg")
+    await cached.read_file("a.jpg")
+    await cached.read_file("c.jpg")
+
+    assert sorted(os.listdir(cache_dir)) == ["a.jpg", "c.jpg"]
+    assert (cached.entries, cached.size, cached.evictions) == (2, 8, 1)
+
+
+@pytest.mark.asyncio
+async def test_files_larger_than_cache_are_not_cached(cached, origin):
+    await origin.save_bytes(b"x" * 11, "large.jpg")
+
+    assert await cached.read_file("large.jpg") == b"x" * 11
+    assert cached.entries == 0
+
+
+@pytest.mark.asyncio
+async def test_writes_go_to_origin_and_invalidate(cached, origin):
+    await cached.save_bytes(b"abcd", "photo.jpg")
+    assert await origin.read_file("photo.jpg") == b"abcd"
+    assert await cached.read_file("photo.jpg") == b"abcd"
+    assert cached.hits == 1
+
+    await cached.write_at("photo.jpg", 2, b"XY")
+    assert cached.entries == 0
+    assert await cached.read_file("photo.jpg") == b"abXY"
+
+    await cached.rename_file("photo.jpg", "renamed.jpg")
+    assert await cached.read_file("photo.jpg") is None
+    assert await cached.read_file("renamed.jpg") == b"abXY"
+
+    assert await cached.delete_file("renamed.jpg") is True
+    assert await cached.read_file("renamed.jpg") is None
+    assert cached.entries == 0
+
+
+@pytest.mark.asyncio
+async def test_save_file_invalidates(cached, origin):
+    await cached.save_bytes(b"old", "photo.jpg")
+
+    await cached.save_file(
+        UploadFile(
+            filename="photo.jpg",
+            file=io.BytesIO(b"new"),
+            headers=Headers({"content-type": "image/jpeg"}),
+        ),
+        "photo.jpg",
+    )
+
+    assert await cached.read_file("photo.jpg") == b"new"
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(origin, cache_dir):
+    await origin.save_bytes(b"abcd", "photo.jpg")
+    first = CachedStorage(origin, LocalFileStorage(upload_dir=str(cache_dir)), 10)
+    await first.read_file("photo.jpg")
+
+    second = CachedStorage(origin, LocalFileStorage(upload_dir=str(cache_dir)), 10)
+    assert await second.read_file("photo.jpg") == b"abcd"
+    assert (second.hits, second.size) == (1, 4)
+    assert origin.reads == 1
+
+    smaller = CachedStorage(origin, LocalFileStorage(upload_dir=str(cache_dir)), 2)
+    assert await smaller.file_size("photo.jpg") == 4
+    assert smaller.entries == 0
+    assert os.listdir(cache_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_cache_in_front_of_s3(s3_storage, fake_s3, cache_dir):
+    cached = CachedStorage(
+        s3_storage, LocalFileStorage(upload_dir=str(cache_dir)), 1024
+    )
+    await s3_storage.save_bytes(b"summit", "photo.jpg")
+    fake_s3.requests.clear()
+
+    for _ in range(3):
+        assert await cached.read_file("photo.jpg") == b"summit"
+
+    assert fake_s3.requests == [("GET", "uploads/photo.jpg")]
+    assert cached.presigned_url("photo.jpg", 60) == s3_storage.presigned_url(
+        "photo.jpg", 60
+    )
+
+
+def test_cache_stats_endpoint(client_with_db, tmp_path):
+    storage = CachedStorage(
+        LocalFileStorage(upload_dir=str(tmp_path / "origin")),
+        LocalFileStorage(upload_dir=str(tmp_path / "cache")),
+        100,
+    )
+    storage.hits = 3
+    app.dependency_overrides[get_storage] = lambda: storage
+    try:
+        resp = client_with_db.get("/api/uploads/cache")
+    finally:
+        app.dependency_overrides.pop(get_storage)
+
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "hits": 3,
+        "misses": 0,
+        "coalesced": 0,
+        "evictions": 0,
+        "entries": 0,
+        "size": 0,
+        "max_size": 100,
+    }
+
+
+def test_cache_stats_without_cache(client_with_db, tmp_path):
+    app.dependency_overrides[get_storage] = lambda: LocalFileStorage(
+        upload_dir=str(tmp_path)
+    )
+    try:
+        resp = client_with_db.get("/api/uploads/cache")
+    finally:
+        app.dependency_overrides.pop(get_storage)
+
+    assert resp.status_code == 404
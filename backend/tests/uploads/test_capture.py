@@ -0,0 +1,51 @@
+"""
+Tests for the HeadCapturingUpload wrapper
+"""
+
+import hashlib
+
+import pytest
+
+from src.uploads.capture import HashingUpload, HeadCapturingUpload
+
+
+@pytest.mark.asyncio
+async def test_captures_head_while_streaming(mock_upload_file):
+    """Test that the first bytes are kept while the file is read in chunks"""
+    upload = HeadCapturingUpload(mock_upload_file, head_size=6)
+
+    chunks = []
+    while chunk := await upload.read(4):
+        chunks.append(chunk)
+
+    assert b"".join(chunks) == b"test image content"
+    assert upload.head == b"test i"
+    assert upload.filename == "test.jpg"
+    assert upload.content_type == "image/jpeg"
+
+    await upload.close()
+
+
+@pytest.mark.asyncio
+async def test_head_larger_than_file(mock_upload_file):
+    """Test that a short file is captured whole"""
+    upload = HeadCapturingUpload(mock_upload_file, head_size=1024)
+
+    await upload.read()
+
+    assert upload.head == b"test image content"
+
+
+@pytest.mark.asyncio
+async def test_hashing_upload_digests_stream(mock_upload_file):
+    """Test that the digest and size cover everything read"""
+    upload = HashingUpload(mock_upload_file)
+
+    while await upload.read(5):
+        pass
+
+    assert upload.hexdigest() == hashlib.sha256(b"test image content").hexdigest()
+    assert upload.size == len(b"test image content")
+    assert upload.filename == "test.jpg"
+
+    await upload.close()
@@ -1,4 +1,5 @@
 import os
+from unittest.mock import patch
 
 import pytest
 
@@ -37,3 +38,126 @@ async def test_local_storage_delete_nonexistent_file(local_storage):
     deleted = await local_storage.delete_file("missing.jpg")
 
     assert deleted is False
+
+
+@pytest.mark.asyncio
+async def test_local_storage_save_and_read_bytes(local_storage):
+    path = await local_storage.save_bytes(b"resized", "example_256.webp")
+
+    assert os.path.exists(path)
+    assert await local_storage.read_file("example_256.webp") == b"resized"
+
+
+@pytest.mark.asyncio
+async def test_local_storage_read_nonexistent_file(local_storage):
+    assert await local_storage.read_file("missing.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_local_storage_iter_file(local_storage):
+    await local_storage.save_bytes(b"summit photo", "photo.jpg")
+
+    chunks = [chunk async for chunk in local_storage.iter_file("photo.jpg", 5)]
+
+    assert chunks == [b"summi", b"t pho", b"to"]
+    with pytest.raises(FileNotFoundError):
+        async for _ in local_storage.iter_file("missing.jpg", 5):
+            pass
+
+
+class FailingUpload:
+    """Upload whose stream breaks after the first chunk"""
+
+    def __init__(self):
+        self.chunks = [b"partial"]
+        self.closed = False
+
+    async def read(self, size=-1):
+        if self.chunks:
+            return self.chunks.pop()
+        raise OSError("connection reset")
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_local_storage_reads_in_buffer_sized_chunks(
+    test_upload_dir, mock_upload_file
+):
+    storage = LocalFileStorage(upload_dir=str(test_upload_dir), buffer_size=5)
+    sizes = []
+    read = mock_upload_file.read
+
+    async def recording_read(size=-1):
+        data = await read(size)
+        sizes.append(size)
+        return data
+
+    mock_upload_file.read = recording_read
+    path = await storage.save_file(mock_upload_file, "chunked.jpg")
+
+    assert set(sizes) == {5}
+    with open(path, "rb") as f:
+        assert f.read() == b"test image content"
+
+
+@pytest.mark.asyncio
+async def test_local_storage_failed_upload_leaves_no_file(local_storage):
+    upload = FailingUpload()
+
+    with pytest.raises(OSError):
+        await local_storage.save_file(upload, "broken.jpg")
+
+    assert upload.closed
+    assert os.listdir(local_storage.upload_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_local_storage_replaces_file_atomically(local_storage):
+    await local_storage.save_bytes(b"first", "photo_256.webp")
+    await local_storage.save_bytes(b"second", "photo_256.webp")
+
+    assert await local_storage.read_file("photo_256.webp") == b"second"
+    assert os.listdir(local_storage.upload_dir) == ["photo_256.webp"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy,expected", [("none", 0), ("file", 1), ("full", 2)])
+async def test_local_storage_fsync_policy(
+    test_upload_dir, mock_upload_file, policy, expected
+):
+    storage = LocalFileStorage(upload_dir=str(test_upload_dir), fsync=policy)
+
+    with patch("src.uploads.services.local_storage.os.fsync") as fsync:
+        await storage.save_file(mock_upload_file, "synced.jpg")
+
+    assert fsync.call_count == expected
+
+
+@pytest.mark.asyncio
+async def test_local_storage_write_at(local_storage, test_upload_dir):
+    assert await local_storage.write_at("upload.part", 0, b"hello") == 5
+    assert await local_storage.write_at("upload.part", 5, b" world") == 11
+    # Writing at an earlier offset drops everything after it
+    assert await local_storage.write_at("upload.part", 6, b"there") == 11
+
+    assert (test_upload_dir / "upload.part").read_bytes() == b"hello there"
+    assert await local_storage.read_file("upload.part", 5) == b"hello"
+
+
+@pytest.mark.asyncio
+async def test_local_storage_write_at_past_end(local_storage):
+    await local_storage.write_at("upload.part", 0, b"abc")
+
+    with pytest.raises(ValueError):
+        await local_storage.write_at("upload.part", 4, b"d")
+
+
+@pytest.mark.asyncio
+async def test_local_storage_file_size(local_storage):
+    await local_storage.save_bytes(b"12345", "sized.jpg")
+
+    assert await local_storage.file_size("sized.jpg") == 5
+    assert await local_storage.file_size("missing.jpg") is None
+    assert local_storage.presigned_upload("sized.jpg", 5, 60) is None
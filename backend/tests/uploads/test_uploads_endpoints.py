@@ -0,0 +1,189 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from main import app
+from src.photos import dependencies
+from src.uploads.models import ResumableUpload
+from src.uploads.service import UploadsService
+from src.uploads.services.local_storage import LocalFileStorage
+from src.uploads.services.s3_storage import S3FileStorage
+from tests.uploads.s3_fixtures import (  # noqa: F401
+    S3_BUCKET,
+    S3_ENDPOINT,
+    FakeS3,
+    s3_signer,
+)
+
+CHUNK_HEADERS = {"Content-Type": "application/offset+octet-stream"}
+
+
+@pytest.fixture(autouse=True)
+def override_uploads_service(test_upload_dir):
+    """Override the upload service dependency to isolate filesystem writes."""
+
+    def _get_uploads_service():
+        return UploadsService(LocalFileStorage(upload_dir=str(test_upload_dir)))
+
+    app.dependency_overrides[dependencies.get_uploads_service] = _get_uploads_service
+    yield
+    app.dependency_overrides.pop(dependencies.get_uploads_service, None)
+
+
+def _create(client, length, filename="summit.jpg", content_type="image/jpeg"):
+    return client.post(
+        "/api/uploads/",
+        json={"filename": filename, "content_type": content_type, "length": length},
+    )
+
+
+def _patch(client, upload_id, offset, data):
+    return client.patch(
+        f"/api/uploads/{upload_id}",
+        content=data,
+        headers={**CHUNK_HEADERS, "Upload-Offset": str(offset)},
+    )
+
+
+def test_create_upload(client_with_db):
+    resp = _create(client_with_db, 10)
+
+    assert resp.status_code == 201
+    upload = resp.json()
+    assert upload["offset"] == 0
+    assert resp.headers["Location"] == f"/api/uploads/{upload['id']}"
+    assert resp.headers["Upload-Offset"] == "0"
+
+
+def test_create_upload_rejects_non_image(client_with_db):
+    resp = _create(client_with_db, 10, "note.txt", "text/plain")
+
+    assert resp.status_code == 400
+
+
+def test_resume_upload(client_with_db, test_upload_dir):
+    upload_id = _create(client_with_db, 10).json()["id"]
+
+    resp = _patch(client_with_db, upload_id, 0, b"01234")
+    assert resp.status_code == 204
+    assert resp.headers["Upload-Offset"] == "5"
+
+    resp = client_with_db.head(f"/api/uploads/{upload_id}")
+    assert resp.status_code == 200
+    assert resp.headers["Upload-Offset"] == "5"
+    assert resp.headers["Upload-Length"] == "10"
+    assert resp.headers["Cache-Control"] == "no-store"
+
+    resp = _patch(client_with_db, upload_id, 5, b"56789")
+    assert resp.headers["Upload-Offset"] == "10"
+    assert (test_upload_dir / f"{upload_id}.part").read_bytes() == b"0123456789"
+
+
+def test_patch_offset_mismatch(client_with_db):
+    upload_id = _create(client_with_db, 10).json()["id"]
+    _patch(client_with_db, upload_id, 0, b"01234")
+
+    resp = _patch(client_with_db, upload_id, 0, b"01234")
+
+    assert resp.status_code == 409
+    assert resp.headers["Upload-Offset"] == "5"
+
+
+def test_patch_while_another_chunk_is_appended(client_with_db, test_db):
+    upload_id = _create(client_with_db, 10).json()["id"]
+    upload = test_db.get(ResumableUpload, upload_id)
+    upload.lock_token = "other"
+    upload.locked_until = datetime.utcnow() + timedelta(minutes=1)
+    test_db.add(upload)
+    test_db.commit()
+
+    resp = _patch(client_with_db, upload_id, 0, b"01234")
+
+    assert resp.status_code == 409
+    assert resp.headers["Upload-Offset"] == "0"
+
+
+def test_patch_requires_chunk_content_type(client_with_db):
+    upload_id = _create(client_with_db, 10).json()["id"]
+
+    resp = client_with_db.patch(
+        f"/api/uploads/{upload_id}",
+        content=b"01234",
+        headers={"Content-Type": "image/jpeg", "Upload-Offset": "0"},
+    )
+
+    assert resp.status_code == 415
+
+
+def test_patch_past_length(client_with_db):
+    upload_id = _create(client_with_db, 3).json()["id"]
+
+    resp = _patch(client_with_db, upload_id, 0, b"01234")
+
+    assert resp.status_code == 400
+
+
+def test_unknown_upload(client_with_db):
+    assert client_with_db.head("/api/uploads/missing").status_code == 404
+    assert _patch(client_with_db, "missing", 0, b"0").status_code == 404
+    assert client_with_db.delete("/api/uploads/missing").status_code == 404
+
+
+def test_cancel_upload(client_with_db, test_upload_dir):
+    upload_id = _create(client_with_db, 10).json()["id"]
+
+    resp = client_with_db.delete(f"/api/uploads/{upload_id}")
+
+    assert resp.status_code == 204
+    assert not (test_upload_dir / f"{upload_id}.part").exists()
+    assert client_with_db.head(f"/api/uploads/{upload_id}").status_code == 404
+
+
+def test_direct_upload_needs_supporting_storage(client_with_db):
+    upload_id = _create(client_with_db, 10).json()["id"]
+
+    resp = client_with_db.post(f"/api/uploads/{upload_id}/direct")
+
+    assert resp.status_code == 400
+    assert client_with_db.post("/api/uploads/missing/direct").status_code == 404
+
+
+@pytest.fixture
+def s3_uploads(s3_signer):
+    """Store uploads in an in-memory S3 bucket."""
+    fake_s3 = FakeS3(s3_signer)
+    storage = S3FileStorage(
+        S3_ENDPOINT,
+        S3_BUCKET,
+        s3_signer,
+        client=httpx.AsyncClient(transport=fake_s3.transport()),
+    )
+    app.dependency_overrides[dependencies.get_uploads_service] = lambda: (
+        UploadsService(storage)
+    )
+    yield fake_s3
+
+
+def test_direct_upload_to_s3(client_with_db, s3_uploads, photo_jpeg):
+    upload_id = _create(client_with_db, len(photo_jpeg)).json()["id"]
+
+    direct = client_with_db.post(f"/api/uploads/{upload_id}/direct")
+    assert direct.status_code == 200
+    direct = direct.json()
+    assert direct["method"] == "PUT"
+
+    async def send():
+        async with httpx.AsyncClient(transport=s3_uploads.transport()) as client:
+            return await client.put(
+                direct["url"], headers=direct["headers"], content=photo_jpeg
+            )
+
+    assert asyncio.run(send()).is_success
+
+    resp = client_with_db.post(f"/api/photos/uploads/{upload_id}", json={})
+    assert resp.status_code == 200
+    assert s3_uploads.objects == {resp.json()["file_name"]: photo_jpeg}
+
+    assert client_with_db.post(f"/api/uploads/{upload_id}/direct").status_code == 404
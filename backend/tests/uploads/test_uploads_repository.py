@@ -0,0 +1,42 @@
+"""
+Tests for the BlobsRepository
+"""
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.uploads.repository import BlobsRepository
+
+
+@pytest.fixture()
+def test_blobs_repository(test_async_db):
+    """Create a BlobsRepository instance for testing"""
+    return BlobsRepository(test_async_db)
+
+
+@pytest.mark.asyncio
+async def test_acquire_and_release(test_blobs_repository):
+    """Test that a blob is forgotten with its last reference"""
+    assert await test_blobs_repository.acquire("a.jpg", "a", 4) == 1
+    assert await test_blobs_repository.acquire("a.jpg", "a", 4) == 2
+
+    assert await test_blobs_repository.release("a.jpg") == 1
+    assert (await test_blobs_repository.get("a.jpg")).ref_count == 1
+    assert await test_blobs_repository.release("a.jpg") == 0
+    assert await test_blobs_repository.get("a.jpg") is None
+    assert await test_blobs_repository.release("a.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_references_from_other_sessions_are_counted(
+    test_blobs_repository, test_async_engine
+):
+    """Test that counts change in the database, not from loaded blobs"""
+    await test_blobs_repository.acquire("a.jpg", "a", 4)
+    assert (await test_blobs_repository.get("a.jpg")).ref_count == 1
+
+    async with AsyncSession(test_async_engine) as other:
+        assert await BlobsRepository(other).acquire("a.jpg", "a", 4) == 2
+
+    assert await test_blobs_repository.release("a.jpg") == 1
+    assert (await test_blobs_repository.get("a.jpg")).ref_count == 1
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from src.uploads.reshard import reshard
+from src.uploads.services.local_storage import LocalFileStorage, shard_path
+
+
+@pytest.fixture
+def sharded_storage(test_upload_dir):
+    return LocalFileStorage(upload_dir=str(test_upload_dir), shard_depth=2)
+
+
+def test_shard_path():
+    path = shard_path("photo.jpg", 2)
+
+    assert path == shard_path("photo.jpg", 2)
+    assert len(path.split("/")) == 3
+    assert path.endswith("/photo.jpg")
+    assert all(len(level) == 2 for level in path.split("/")[:2])
+    assert shard_path("photo.jpg", 0) == "photo.jpg"
+
+
+@pytest.mark.asyncio
+async def test_sharded_storage_round_trip(sharded_storage, test_upload_dir):
+    path = await sharded_storage.save_bytes(b"photo", "photo.jpg")
+
+    assert path == str(test_upload_dir / shard_path("photo.jpg", 2))
+    assert not (test_upload_dir / "photo.jpg").exists()
+    assert await sharded_storage.read_file("photo.jpg") == b"photo"
+
+    renamed = await sharded_storage.rename_file("photo.jpg", "renamed.jpg")
+    assert renamed == str(test_upload_dir / shard_path("renamed.jpg", 2))
+    assert await sharded_storage.read_file("renamed.jpg") == b"photo"
+
+    assert await sharded_storage.delete_file("renamed.jpg") is True
+    assert await sharded_storage.read_file("renamed.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_sharded_storage_save_file(sharded_storage, mock_upload_file):
+    path = await sharded_storage.save_file(mock_upload_file, "upload.jpg")
+
+    assert path.endswith(shard_path("upload.jpg", 2))
+    assert os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_sharded_storage_write_at(sharded_storage):
+    await sharded_storage.write_at("upload.part", 0, b"01")
+    assert await sharded_storage.write_at("upload.part", 2, b"23") == 4
+
+    assert await sharded_storage.read_file("upload.part") == b"0123"
+
+
+@pytest.mark.asyncio
+async def test_sharded_storage_finds_flat_files(sharded_storage, test_upload_dir):
+    (test_upload_dir / "legacy.jpg").write_bytes(b"legacy")
+    (test_upload_dir / "legacy.part").write_bytes(b"01")
+
+    assert await sharded_storage.read_file("legacy.jpg") == b"legacy"
+    assert await sharded_storage.write_at("legacy.part", 2, b"23") == 4
+
+    path = await sharded_storage.rename_file("legacy.jpg", "moved.jpg")
+    assert path.endswith(shard_path("moved.jpg", 2))
+    assert not (test_upload_dir / "legacy.jpg").exists()
+
+    assert await sharded_storage.delete_file("legacy.part") is True
+    assert not (test_upload_dir / "legacy.part").exists()
+
+
+@pytest.mark.asyncio
+async def test_reshard_moves_flat_files(sharded_storage, test_upload_dir):
+    names = [f"photo_{i}.jpg" for i in range(25)]
+    for name in names:
+        (test_upload_dir / name).write_bytes(name.encode())
+    (test_upload_dir / ".photo.jpg.1234.tmp").write_bytes(b"partial")
+    await sharded_storage.save_bytes(b"photo_0.jpg", "photo_0.jpg")
+
+    assert await reshard(sharded_storage, batch_size=10) == 25
+
+    for name in names:
+        assert not (test_upload_dir / name).exists()
+        assert await sharded_storage.read_file(name) == name.encode()
+    assert (test_upload_dir / ".photo.jpg.1234.tmp").exists()
+    assert await reshard(sharded_storage) == 0
+
+
+@pytest.mark.asyncio
+async def test_reshard_requires_shard_depth(local_storage):
+    with pytest.raises(ValueError):
+        await reshard(local_storage)
@@ -0,0 +1,243 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.uploads.models import ResumableUploadCreate
+from src.uploads.repository import ResumableUploadsRepository
+from src.uploads.resumable import ResumableUploadsService, collect_expired_uploads
+from src.uploads.service import UploadsService
+from src.uploads.settings import UploadsSettings
+from tests.uploads.s3_fixtures import fake_s3, s3_signer, s3_storage  # noqa: F401
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _broken_chunks(*parts):
+    for part in parts:
+        yield part
+    raise ConnectionError("client disconnected")
+
+
+async def _slow_chunks(*parts):
+    for part in parts:
+        await asyncio.sleep(0.01)
+        yield part
+
+
+SETTINGS = UploadsSettings(write_buffer_size=4, resumable_max_length=100)
+
+
+@pytest.fixture
+def resumable_service(local_storage, test_async_db):
+    return ResumableUploadsService(
+        UploadsService(local_storage),
+        ResumableUploadsRepository(test_async_db),
+        SETTINGS,
+    )
+
+
+def _create(length=10):
+    return ResumableUploadCreate(
+        filename="summit.jpg", content_type="image/jpeg", length=length
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_upload(resumable_service, test_upload_dir):
+    upload = await resumable_service.create(_create(), content_type_prefix="image/")
+
+    assert upload.offset == 0
+    assert upload.expires_at > datetime.utcnow()
+    assert (test_upload_dir / upload.file_name).read_bytes() == b""
+    assert await resumable_service.get(upload.id) is upload
+
+
+@pytest.mark.asyncio
+async def test_create_upload_validates(resumable_service):
+    with pytest.raises(ValueError):
+        await resumable_service.create(_create(101))
+
+    with pytest.raises(ValueError):
+        await resumable_service.create(
+            ResumableUploadCreate(
+                filename="a.txt", content_type="text/plain", length=1
+            ),
+            content_type_prefix="image/",
+        )
+
+
+@pytest.mark.asyncio
+async def test_append_in_chunks(resumable_service, test_upload_dir):
+    upload = await resumable_service.create(_create())
+
+    await resumable_service.append(upload, _chunks(b"01", b"23", b"45"))
+    assert upload.offset == 6
+
+    await resumable_service.append(upload, _chunks(b"6789"))
+    assert upload.offset == 10
+    assert (test_upload_dir / upload.file_name).read_bytes() == b"0123456789"
+
+
+@pytest.mark.asyncio
+async def test_append_to_s3_uploads_parts(s3_storage, fake_s3, test_async_db):
+    service = ResumableUploadsService(
+        UploadsService(s3_storage),
+        ResumableUploadsRepository(test_async_db),
+        UploadsSettings(write_buffer_size=256, resumable_max_length=4096),
+    )
+    data = bytes(range(256)) * 12
+    upload = await service.create(_create(len(data)))
+
+    await service.append(
+        upload, _chunks(*(data[i : i + 100] for i in range(0, 1500, 100)))
+    )
+    assert upload.storage_state is not None
+    assert (await service.sync_offset(upload)).offset == 1500
+
+    await service.append(upload, _chunks(data[1500:]))
+
+    key = s3_storage.key_of(upload.file_name)
+    assert upload.storage_state is None
+    assert fake_s3.objects == {key: data}
+    # The empty file, two full parts and the rest
+    assert fake_s3.requests.count(("PUT", key)) == 4
+
+
+@pytest.mark.asyncio
+async def test_cancel_s3_upload(s3_storage, fake_s3, test_async_db):
+    service = ResumableUploadsService(
+        UploadsService(s3_storage), ResumableUploadsRepository(test_async_db), SETTINGS
+    )
+    upload = await service.create(_create())
+    await service.append(upload, _chunks(b"012345"))
+
+    await service.cancel(upload)
+
+    assert fake_s3.objects == {}
+
+
+@pytest.mark.asyncio
+async def test_append_keeps_data_of_broken_chunk(resumable_service, test_async_db):
+    upload = await resumable_service.create(_create())
+
+    with pytest.raises(ConnectionError):
+        await resumable_service.append(upload, _broken_chunks(b"0123", b"45"))
+
+    stored = await ResumableUploadsRepository(test_async_db).get_by_id(upload.id)
+    await test_async_db.refresh(stored)
+    assert stored.offset == 6
+
+
+@pytest.mark.asyncio
+async def test_append_past_length(resumable_service, test_upload_dir):
+    upload = await resumable_service.create(_create(5))
+
+    with pytest.raises(ValueError):
+        await resumable_service.append(upload, _chunks(b"012", b"345"))
+
+    assert upload.offset == 3
+    assert (test_upload_dir / upload.file_name).read_bytes() == b"012"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_append_is_refused(
+    resumable_service, local_storage, test_async_engine, test_upload_dir
+):
+    upload = await resumable_service.create(_create())
+
+    async with AsyncSession(test_async_engine, expire_on_commit=False) as db:
+        # A second request for the same upload, in its own session
+        other = ResumableUploadsService(
+            UploadsService(local_storage), ResumableUploadsRepository(db), SETTINGS
+        )
+        copy = await other.get(upload.id)
+
+        first, second = await asyncio.gather(
+            resumable_service.append(upload, _slow_chunks(b"0123", b"4567")),
+            other.append(copy, _slow_chunks(b"abcd")),
+        )
+
+    assert first is upload
+    assert second is None
+    assert upload.offset == 8
+    assert (test_upload_dir / upload.file_name).read_bytes() == b"01234567"
+
+
+@pytest.mark.asyncio
+async def test_append_at_moved_offset_is_refused(
+    resumable_service, local_storage, test_async_engine
+):
+    upload = await resumable_service.create(_create())
+
+    async with AsyncSession(test_async_engine, expire_on_commit=False) as db:
+        other = ResumableUploadsService(
+            UploadsService(local_storage), ResumableUploadsRepository(db), SETTINGS
+        )
+        stale = await other.get(upload.id)
+        await resumable_service.append(upload, _chunks(b"0123"))
+
+        assert await other.append(stale, _chunks(b"abcd")) is None
+        assert stale.offset == 4
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_is_taken_over(resumable_service):
+    upload = await resumable_service.create(_create())
+    repository = resumable_service.repository
+    await repository.lock(upload, "stalled", datetime.utcnow() - timedelta(seconds=1))
+
+    assert await resumable_service.append(upload, _chunks(b"0123")) is upload
+    assert upload.offset == 4
+    assert upload.lock_token is None
+    # The stalled request can no longer save its progress
+    assert await repository.renew_lock(upload, "stalled", datetime.utcnow()) is False
+
+
+@pytest.mark.asyncio
+async def test_cancel_upload(resumable_service, test_upload_dir):
+    upload = await resumable_service.create(_create())
+
+    await resumable_service.cancel(upload)
+
+    assert not (test_upload_dir / upload.file_name).exists()
+    assert await resumable_service.get(upload.id) is None
+
+
+@pytest.mark.asyncio
+async def test_collect_expired(resumable_service, test_upload_dir):
+    expired = await resumable_service.create(_create())
+    active = await resumable_service.create(_create())
+    expired.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    await resumable_service.repository.save(expired)
+
+    assert await resumable_service.get(expired.id) is None
+    assert await resumable_service.collect_expired() == 1
+
+    assert not (test_upload_dir / expired.file_name).exists()
+    assert (test_upload_dir / active.file_name).exists()
+    assert await resumable_service.repository.get_by_id(expired.id) is None
+
+
+@pytest.mark.asyncio
+async def test_collector_logs_errors(
+    test_async_engine, local_storage, monkeypatch, caplog
+):
+    """Test that the collector logs a failed collection and keeps running"""
+
+    async def collect_expired(self):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(ResumableUploadsService, "collect_expired", collect_expired)
+    collector = asyncio.create_task(
+        collect_expired_uploads(test_async_engine, UploadsService(local_storage), 0.01)
+    )
+    await asyncio.sleep(0.05)
+    collector.cancel()
+    await asyncio.gather(collector, return_exceptions=True)
+
+    assert caplog.text.count("Could not collect expired uploads") > 1
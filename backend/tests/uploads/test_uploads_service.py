@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import re
@@ -6,7 +7,9 @@ import pytest
 from fastapi import UploadFile
 from starlette.datastructures import Headers
 
+from src.uploads.repository import BlobsRepository
 from src.uploads.service import UploadsService
+from src.uploads.settings import uploads_settings
 
 
 @pytest.mark.asyncio
@@ -53,3 +56,170 @@ async def test_delete_photo_failure(local_storage):
     deleted = await service.delete_file("nonexistent.jpg")
 
     assert deleted is False
+
+
+def _upload(content: bytes, filename: str = "photo.jpg") -> UploadFile:
+    return UploadFile(
+        filename=filename,
+        file=io.BytesIO(content),
+        headers=Headers({"content-type": "image/jpeg"}),
+    )
+
+
+@pytest.fixture
+def content_addressed_service(local_storage, test_async_db):
+    return UploadsService(local_storage, BlobsRepository(test_async_db))
+
+
+@pytest.mark.asyncio
+async def test_content_addressed_save_deduplicates(
+    content_addressed_service, local_storage, test_async_db
+):
+    first = await content_addressed_service.save_file(_upload(b"summit"))
+    second = await content_addressed_service.save_file(_upload(b"summit"))
+    other = await content_addressed_service.save_file(_upload(b"valley"))
+
+    digest = hashlib.sha256(b"summit").hexdigest()
+    assert first == second
+    assert first.endswith(f"{digest}.jpg")
+    assert other != first
+    assert sorted(os.listdir(local_storage.upload_dir)) == sorted(
+        [os.path.basename(first), os.path.basename(other)]
+    )
+    blob = await BlobsRepository(test_async_db).get(f"{digest}.jpg")
+    assert (blob.ref_count, blob.size) == (2, len(b"summit"))
+
+
+@pytest.mark.asyncio
+async def test_content_addressed_delete_releases_references(
+    content_addressed_service,
+):
+    path = await content_addressed_service.save_file(_upload(b"summit"))
+    await content_addressed_service.save_file(_upload(b"summit"))
+    filename = os.path.basename(path)
+
+    assert await content_addressed_service.delete_file(filename) is True
+    assert os.path.exists(path)
+    assert await content_addressed_service.is_referenced(filename) is True
+
+    assert await content_addressed_service.delete_file(filename) is True
+    assert not os.path.exists(path)
+    assert await content_addressed_service.is_referenced(filename) is False
+
+
+@pytest.mark.asyncio
+async def test_content_addressed_delete_untracked_file(
+    content_addressed_service, local_storage
+):
+    await local_storage.save_bytes(b"legacy", "legacy.jpg")
+
+    assert await content_addressed_service.delete_file("legacy.jpg") is True
+    assert await local_storage.read_file("legacy.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_purge_files(local_storage):
+    service = UploadsService(local_storage)
+    await local_storage.save_bytes(b"photo", "photo.jpg")
+    await local_storage.save_bytes(b"small", "photo_256.webp")
+
+    filenames = ["photo.jpg", "photo_256.webp", "photo_1024.webp"]
+    assert await service.purge_files("photo.jpg", filenames) is True
+    assert await local_storage.read_file("photo.jpg") is None
+    assert await local_storage.read_file("photo_256.webp") is None
+    assert await service.purge_files("photo.jpg", filenames) is True
+
+
+@pytest.mark.asyncio
+async def test_purge_files_fails_if_file_is_kept(local_storage, monkeypatch):
+    service = UploadsService(local_storage)
+    await local_storage.save_bytes(b"photo", "photo.jpg")
+
+    async def delete_file(filename):
+        # Like a delete failing with EACCES or EIO
+        return False
+
+    monkeypatch.setattr(local_storage, "delete_file", delete_file)
+
+    with pytest.raises(OSError):
+        await service.purge_files("photo.jpg", ["photo.jpg", "photo_256.webp"])
+
+
+@pytest.mark.asyncio
+async def test_content_addressed_purge_keeps_file_stored_again(
+    content_addressed_service,
+):
+    path = await content_addressed_service.save_file(_upload(b"summit"))
+    filename = os.path.basename(path)
+
+    assert await content_addressed_service.purge_files(filename, [filename]) is False
+    assert os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_adopt_file_renames_stored_file(local_storage, test_upload_dir):
+    service = UploadsService(local_storage)
+    await local_storage.write_at("upload.part", 0, b"image data")
+
+    path = await service.adopt_file("upload.part", "summit.JPG", "image/jpeg")
+
+    assert re.search(r"test_uploads/.+\.jpg$", path)
+    assert open(path, "rb").read() == b"image data"
+    assert not (test_upload_dir / "upload.part").exists()
+
+
+@pytest.mark.asyncio
+async def test_adopt_file_validates_content_type(local_storage):
+    service = UploadsService(local_storage)
+    await local_storage.write_at("upload.part", 0, b"hello")
+
+    with pytest.raises(ValueError):
+        await service.adopt_file(
+            "upload.part", "note.txt", "text/plain", content_type_prefix="image/"
+        )
+
+
+@pytest.mark.asyncio
+async def test_content_addressed_adopt_file(
+    content_addressed_service, local_storage, test_async_db
+):
+    first = await content_addressed_service.save_file(_upload(b"same"))
+    await local_storage.write_at("upload.part", 0, b"same")
+
+    second = await content_addressed_service.adopt_file(
+        "upload.part", "photo.jpg", "image/jpeg"
+    )
+
+    digest = hashlib.sha256(b"same").hexdigest()
+    assert first == second
+    assert os.path.basename(second) == f"{digest}.jpg"
+    blob = await BlobsRepository(test_async_db).get(f"{digest}.jpg")
+    assert blob.ref_count == 2
+
+
+@pytest.mark.asyncio
+async def test_content_addressed_adopt_file_streams_file(
+    content_addressed_service, local_storage, monkeypatch
+):
+    content = bytes(range(256)) * 10
+    await local_storage.write_at("upload.part", 0, content)
+    chunk_sizes = []
+    iter_file = local_storage.iter_file
+
+    async def read_file(filename, size=-1):
+        raise AssertionError("The whole file was read into memory.")
+
+    async def recording_iter_file(filename, chunk_size):
+        chunk_sizes.append(chunk_size)
+        async for chunk in iter_file(filename, chunk_size):
+            yield chunk
+
+    monkeypatch.setattr(local_storage, "read_file", read_file)
+    monkeypatch.setattr(local_storage, "iter_file", recording_iter_file)
+
+    path = await content_addressed_service.adopt_file(
+        "upload.part", "photo.jpg", "image/jpeg"
+    )
+
+    assert os.path.basename(path) == f"{hashlib.sha256(content).hexdigest()}.jpg"
+    assert chunk_sizes == [uploads_settings.write_buffer_size]
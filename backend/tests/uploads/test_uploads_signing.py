@@ -0,0 +1,77 @@
+from urllib.parse import parse_qs, urlsplit
+
+from src.uploads.signing import UrlSigner, sign_url, upload_url, verify_url
+
+NOW = 1_700_000_000
+
+
+def _params(url):
+    query = parse_qs(urlsplit(url).query)
+    return query["expires"][0], query["signature"][0]
+
+
+def test_signed_url_verifies():
+    signer = UrlSigner("secret", 3600)
+
+    url = signer.sign("photo.jpg", now=NOW)
+
+    assert url.startswith("/uploads/photo.jpg?expires=")
+    assert signer.verify("photo.jpg", *_params(url), now=NOW)
+
+
+def test_signed_url_lifetime():
+    signer = UrlSigner("secret", 3600)
+
+    expires, _ = _params(signer.sign("photo.jpg", now=NOW))
+
+    assert NOW + 3600 <= int(expires) <= NOW + 7200
+
+
+def test_signed_urls_are_stable_within_window():
+    signer = UrlSigner("secret", 3600)
+    start = NOW - NOW % 3600
+
+    assert signer.sign("photo.jpg", now=start) == signer.sign(
+        "photo.jpg", now=start + 3599
+    )
+    assert signer.sign("photo.jpg", now=start) != signer.sign(
+        "photo.jpg", now=start + 3600
+    )
+
+
+def test_rejects_expired_url():
+    signer = UrlSigner("secret", 3600)
+    expires, signature = _params(signer.sign("photo.jpg", now=NOW))
+
+    assert not signer.verify("photo.jpg", expires, signature, now=int(expires) + 1)
+
+
+def test_rejects_tampered_url():
+    signer = UrlSigner("secret", 3600)
+    expires, signature = _params(signer.sign("photo.jpg", now=NOW))
+
+    assert not signer.verify("other.jpg", expires, signature, now=NOW)
+    assert not signer.verify("photo.jpg", str(int(expires) + 1), signature, now=NOW)
+    assert not UrlSigner("other", 3600).verify("photo.jpg", expires, signature, now=NOW)
+    assert not signer.verify("photo.jpg", None, signature, now=NOW)
+    assert not signer.verify("photo.jpg", "soon", signature, now=NOW)
+
+
+def test_upload_url_without_signer():
+    assert upload_url("photo 1.jpg") == "/uploads/photo%201.jpg"
+    assert upload_url("photo.jpg", UrlSigner("secret", 60)).startswith(
+        "/uploads/photo.jpg?expires="
+    )
+
+
+def test_sign_url():
+    signer = UrlSigner("secret", 3600)
+    url = sign_url(
+        "/api/photos/1/derivatives/256.webp?v=a.jpg", "a.jpg.256.webp", signer
+    )
+    expires, signature = _params(url)
+
+    assert parse_qs(urlsplit(url).query)["v"] == ["a.jpg"]
+    assert verify_url("a.jpg.256.webp", expires, signature, signer)
+    assert not verify_url("b.jpg.256.webp", expires, signature, signer)
+    assert not verify_url("a.jpg.256.webp", None, None, signer)
@@ -0,0 +1,239 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import MutableHeaders
+from starlette.responses import FileResponse
+
+from src.uploads.services.local_storage import shard_path
+from src.uploads.signing import UrlSigner
+from src.uploads.static import UPLOADS_CACHE_CONTROL, UploadFiles, is_servable
+
+ACCEL_PREFIX = "/internal-uploads/"
+
+
+@pytest.fixture
+def uploads_client(test_upload_dir):
+    """Client of an app serving the test upload directory"""
+    (test_upload_dir / "photo.jpg").write_bytes(b"0123456789")
+    app = FastAPI()
+    app.mount("/uploads", UploadFiles(directory=str(test_upload_dir)))
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_serves_upload_with_cache_headers(uploads_client):
+    resp = uploads_client.get("/uploads/photo.jpg")
+
+    assert resp.status_code == 200
+    assert resp.content == b"0123456789"
+    assert resp.headers["Cache-Control"] == UPLOADS_CACHE_CONTROL
+    assert resp.headers["Content-Type"] == "image/jpeg"
+    assert resp.headers["Accept-Ranges"] == "bytes"
+    assert resp.headers["ETag"].startswith('"')
+    assert "Last-Modified" in resp.headers
+
+
+def test_if_none_match(uploads_client):
+    etag = uploads_client.get("/uploads/photo.jpg").headers["ETag"]
+
+    resp = uploads_client.get("/uploads/photo.jpg", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["ETag"] == etag
+    assert resp.headers["Cache-Control"] == UPLOADS_CACHE_CONTROL
+
+    weak = uploads_client.get(
+        "/uploads/photo.jpg", headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+    assert weak.status_code == 304
+
+    star = uploads_client.get("/uploads/photo.jpg", headers={"If-None-Match": "*"})
+    assert star.status_code == 304
+
+
+def test_if_none_match_takes_precedence(uploads_client):
+    last_modified = uploads_client.get("/uploads/photo.jpg").headers["Last-Modified"]
+
+    resp = uploads_client.get(
+        "/uploads/photo.jpg",
+        headers={"If-None-Match": '"stale"', "If-Modified-Since": last_modified},
+    )
+
+    assert resp.status_code == 200
+
+
+def test_if_modified_since(uploads_client):
+    last_modified = uploads_client.get("/uploads/photo.jpg").headers["Last-Modified"]
+
+    resp = uploads_client.get(
+        "/uploads/photo.jpg", headers={"If-Modified-Since": last_modified}
+    )
+
+    assert resp.status_code == 304
+
+
+def test_range_request(uploads_client):
+    resp = uploads_client.get("/uploads/photo.jpg", headers={"Range": "bytes=2-5"})
+
+    assert resp.status_code == 206
+    assert resp.content == b"2345"
+    assert resp.headers["Content-Range"] == "bytes 2-5/10"
+    assert resp.headers["Cache-Control"] == UPLOADS_CACHE_CONTROL
+
+
+def test_range_request_not_satisfiable(uploads_client):
+    resp = uploads_client.get("/uploads/photo.jpg", headers={"Range": "bytes=20-"})
+
+    assert resp.status_code == 416
+
+
+def test_unfinished_files_are_not_served(uploads_client, test_upload_dir):
+    (test_upload_dir / "upload.part").write_bytes(b"partial")
+    (test_upload_dir / ".photo.jpg.1234.tmp").write_bytes(b"partial")
+
+    assert uploads_client.get("/uploads/upload.part").status_code == 404
+    assert uploads_client.get("/uploads/.photo.jpg.1234.tmp").status_code == 404
+    assert "Cache-Control" not in uploads_client.get("/uploads/missing.jpg").headers
+
+
+def test_is_servable():
+    assert is_servable("photo.jpg")
+    assert is_servable("ab/photo_256.webp")
+    assert not is_servable("ab/upload.part")
+    assert not is_servable(".photo.jpg.1234.tmp")
+    assert not is_servable("../secret.jpg")
+    assert not is_servable("/etc/passwd")
+
+
+class AccelRedirectProxy:
+    """
+    Stands in for nginx in front of the app: a response with an
+    X-Accel-Redirect header is replaced by the named file from the internal
+    location, which the app itself never reads.
+    """
+
+    def __init__(self, app, directory):
+        self.app = app
+        self.directory = directory
+        self.redirects = []
+
+    async def __call__(self, scope, receive, send):
+        start = {}
+
+        async def intercept(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+            if message.get("more_body"):
+                return
+
+            headers = MutableHeaders(raw=list(start["headers"]))
+            target = headers.get("x-accel-redirect")
+            if target is None:
+                await send(start)
+                await send(message)
+                return
+
+            self.redirects.append(target)
+            path = os.path.join(self.directory, target.removeprefix(ACCEL_PREFIX))
+            if not os.path.isfile(path):
+                await send(
+                    {"type": "http.response.start", "status": 404, "headers": []}
+                )
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            response = FileResponse(
+                path, headers={"Cache-Control": headers["cache-control"]}
+            )
+            await response(scope, receive, send)
+
+        await self.app(scope, receive, intercept)
+
+
+@pytest.fixture
+def signer():
+    return UrlSigner("secret", 3600)
+
+
+def _app(test_upload_dir, **kwargs):
+    (test_upload_dir / "photo.jpg").write_bytes(b"0123456789")
+    app = FastAPI()
+    app.mount("/uploads", UploadFiles(directory=str(test_upload_dir), **kwargs))
+    return app
+
+
+def test_signed_urls_are_required(test_upload_dir, signer):
+    client = TestClient(_app(test_upload_dir, signer=signer))
+
+    resp = client.get(signer.sign("photo.jpg"))
+    assert resp.status_code == 200
+    assert resp.content == b"0123456789"
+    max_age = int(resp.headers["Cache-Control"].split("max-age=")[1].split(",")[0])
+    assert 3600 <= max_age <= 7200
+
+    assert client.get("/uploads/photo.jpg").status_code == 403
+    forged = signer.sign("photo.jpg").replace("photo.jpg", "other.jpg", 1)
+    assert client.get(forged).status_code == 403
+
+
+def test_x_accel_redirect(test_upload_dir, signer):
+    app = _app(test_upload_dir, delivery="x-accel-redirect", signer=signer)
+    proxy = AccelRedirectProxy(app, str(test_upload_dir))
+    client = TestClient(proxy)
+
+    resp = client.get(signer.sign("photo.jpg"), headers={"Range": "bytes=2-5"})
+
+    assert resp.status_code == 206
+    assert resp.content == b"2345"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert proxy.redirects == [f"{ACCEL_PREFIX}photo.jpg"]
+
+    assert client.get("/uploads/photo.jpg").status_code == 403
+    assert proxy.redirects == [f"{ACCEL_PREFIX}photo.jpg"]
+    assert client.get(signer.sign("missing.jpg")).status_code == 404
+
+
+def test_x_accel_redirect_does_not_read_file(test_upload_dir):
+    client = TestClient(_app(test_upload_dir, delivery="x-accel-redirect"))
+    (test_upload_dir / "photo.jpg").unlink()
+
+    resp = client.get("/uploads/photo.jpg")
+
+    assert resp.status_code == 200
+    assert resp.content == b""
+    assert resp.headers["X-Accel-Redirect"] == f"{ACCEL_PREFIX}photo.jpg"
+    assert resp.headers["Cache-Control"] == UPLOADS_CACHE_CONTROL
+
+
+def test_x_sendfile(test_upload_dir):
+    client = TestClient(_app(test_upload_dir, delivery="x-sendfile"))
+
+    resp = client.get("/uploads/photo.jpg")
+
+    assert resp.headers["X-Sendfile"] == os.path.abspath(test_upload_dir / "photo.jpg")
+    assert resp.content == b""
+
+
+def test_serves_sharded_and_flat_files(test_upload_dir):
+    client = TestClient(_app(test_upload_dir, shard_depth=2))
+    sharded = test_upload_dir / shard_path("sharded.jpg", 2)
+    sharded.parent.mkdir(parents=True)
+    sharded.write_bytes(b"sharded")
+
+    assert client.get("/uploads/sharded.jpg").content == b"sharded"
+    assert client.get("/uploads/photo.jpg").content == b"0123456789"
+    assert client.get("/uploads/missing.jpg").status_code == 404
+
+
+def test_x_accel_redirect_sharded(test_upload_dir):
+    client = TestClient(
+        _app(test_upload_dir, delivery="x-accel-redirect", shard_depth=2)
+    )
+
+    resp = client.get("/uploads/photo.jpg")
+
+    assert resp.headers["X-Accel-Redirect"] == ACCEL_PREFIX + shard_path("photo.jpg", 2)
@@ -1,17 +1,26 @@
 "use client";
 
 import { SummitPhotoCard } from "@/components/photos/SummitPhotoCard";
+import { Button } from "@/components/ui/button";
 import { photoMetadataService } from "@/lib/metadata/service";
 import { PhotoClient } from "@/lib/photos/client";
 import { SummitPhoto } from "@/lib/photos/types";
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import { Masonry } from "masonic";
 
+const PAGE_SIZE = 50;
+
 export default function Gallery() {
-  const { data: summitPhotos } = useQuery({
-    queryKey: ["summitPhotos"],
-    queryFn: async () => PhotoClient.getAllPhotos("captured_at", "desc"),
-  });
+  const { data, fetchNextPage, hasNextPage, isFetchingNextPage } =
+    useInfiniteQuery({
+      queryKey: ["summitPhotos"],
+      queryFn: async ({ pageParam }) =>
+        PhotoClient.getAllPhotos("captured_at", "desc", PAGE_SIZE, pageParam),
+      initialPageParam: null as string | null,
+      getNextPageParam: (lastPage) => lastPage.next_cursor,
+    });
+
+  const summitPhotos = data?.pages.flatMap((page) => page.items) ?? [];
 
   const renderCard = ({ data: summitPhoto }: { data: SummitPhoto }) => (
     <SummitPhotoCard
@@ -25,12 +34,23 @@ export default function Gallery() {
   return (
     <div className="max-w-7xl mx-auto py-6 px-4 sm:px-6 lg:px-8">
       <Masonry
-        items={summitPhotos || []}
+        items={summitPhotos}
         render={renderCard}
         columnWidth={300}
         columnGutter={16}
         rowGutter={16}
       />
+      {hasNextPage && (
+        <div className="flex justify-center mt-6">
+          <Button
+            variant="outline"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
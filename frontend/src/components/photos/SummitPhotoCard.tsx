@@ -28,6 +28,20 @@ interface SummitPhotoCardProps {
   uploadsBaseUrl?: string;
 }
 
+// Longest edge of the resized copy shown in the card
+const CARD_IMAGE_SIZE = 1024;
+
+function cardImageUrl(summitPhoto: SummitPhoto, uploadsBaseUrl: string) {
+  const derivative = summitPhoto.derivatives?.find(
+    (d) => d.size === CARD_IMAGE_SIZE && d.format === "webp",
+  );
+  return (
+    derivative?.url ??
+    summitPhoto.url ??
+    `${uploadsBaseUrl}${summitPhoto.file_name}`
+  );
+}
+
 export function SummitPhotoCard({
   summitPhoto,
   formatter,
@@ -47,7 +61,7 @@ export function SummitPhotoCard({
       </CardHeader>
 
       <Image
-        src={`${uploadsBaseUrl}${summitPhoto.file_name}`}
+        src={cardImageUrl(summitPhoto, uploadsBaseUrl)}
         alt={`Summit photo ${summitPhoto.id}`}
         width={1200}
         height={800}
@@ -27,6 +27,8 @@ export const API_ENDPOINTS = {
     getAll: (
       sort_by: string | null = null,
       order: "asc" | "desc" | null = null,
+      limit: number | null = null,
+      cursor: string | null = null,
     ) => {
       const params = new URLSearchParams();
 
@@ -38,9 +40,19 @@ export const API_ENDPOINTS = {
         params.append("order", order);
       }
 
+      if (limit) {
+        params.append("limit", limit.toString());
+      }
+
+      if (cursor) {
+        params.append("cursor", cursor);
+      }
+
       return `${API_BASE_URL}/photos?${params.toString()}`;
     },
     post: `${API_BASE_URL}/photos`,
+    batch: `${API_BASE_URL}/photos/batch`,
+    delete: `${API_BASE_URL}/photos/delete`,
   },
   peaks: {
     find: (
@@ -61,5 +73,6 @@ export const API_ENDPOINTS = {
 
       return `${API_BASE_URL}/peaks/find?${params.toString()}`;
     },
+    findBatch: `${API_BASE_URL}/peaks/find/batch`,
   },
 } as const;
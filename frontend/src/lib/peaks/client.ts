@@ -3,7 +3,7 @@
  */
 import { API_ENDPOINTS } from "@/config/api";
 import { ApiClient } from "@/lib/common/api-client";
-import { PeakWithDistance } from "./types";
+import { Coordinates, PeakWithDistance } from "./types";
 
 /**
  * PeakClient class for handling peak-related API requests
@@ -28,4 +28,24 @@ export class PeakClient extends ApiClient {
       API_ENDPOINTS.peaks.find(latitude, longitude, max_distance, limit),
     );
   }
+
+  /**
+   * Find nearby peaks for many locations in a single request
+   * @param points The locations to match
+   * @param max_distance The maximum distance in meters to search for peaks (optional)
+   * @param limit The maximum number of peaks to return per location (default is 5)
+   * @returns A list of nearby peaks with their distances for each location, in input order
+   * @throws Error if the request fails
+   */
+  static async findNearbyPeaksBatch(
+    points: Coordinates[],
+    max_distance?: number,
+    limit: number = 5,
+  ): Promise<PeakWithDistance[][]> {
+    return this.post<PeakWithDistance[][]>(API_ENDPOINTS.peaks.findBatch, {
+      points,
+      max_distance,
+      limit,
+    });
+  }
 }
@@ -11,3 +11,8 @@ export interface PeakWithDistance {
   peak: Peak;
   distance: number;
 }
+
+export interface Coordinates {
+  latitude: number;
+  longitude: number;
+}
@@ -2,7 +2,13 @@
  * API client for interacting with the photo endpoints
  */
 
-import { SummitPhoto, SummitPhotoCreate } from "@/lib/photos/types";
+import {
+  PhotoBulkDeleteResult,
+  SummitPhoto,
+  SummitPhotoBatchResult,
+  SummitPhotoCreate,
+  SummitPhotoPage,
+} from "@/lib/photos/types";
 import { API_ENDPOINTS } from "@/config/api";
 import { ApiClient } from "@/lib/common/api-client";
 
@@ -11,17 +17,23 @@ import { ApiClient } from "@/lib/common/api-client";
  */
 export class PhotoClient extends ApiClient {
   /**
-   * Get all summit photos from the backend
+   * Get a page of summit photos from the backend
    * @param sortBy Optional field to sort by
    * @param order Optional order of sorting (asc or desc)
-   * @returns A list of all summit photos
+   * @param limit Optional maximum number of photos in the page
+   * @param cursor Optional next_cursor of the previous page
+   * @returns A page of summit photos and the cursor of the next page
    * @throws Error if the request fails
    */
   static async getAllPhotos(
     sortBy: string | null = null,
     order: "asc" | "desc" | null = null,
-  ): Promise<SummitPhoto[]> {
-    return this.get<SummitPhoto[]>(API_ENDPOINTS.photos.getAll(sortBy, order));
+    limit: number | null = null,
+    cursor: string | null = null,
+  ): Promise<SummitPhotoPage> {
+    return this.get<SummitPhotoPage>(
+      API_ENDPOINTS.photos.getAll(sortBy, order, limit, cursor),
+    );
   }
 
   /**
@@ -43,4 +55,37 @@ export class PhotoClient extends ApiClient {
 
     return this.post<SummitPhoto>(API_ENDPOINTS.photos.post, formData);
   }
+
+  /**
+   * Upload several photo files to the backend in one request
+   * @param files The files to upload
+   * @param summitPhotoCreates Metadata of the files, in the same order
+   * @returns The uploaded photo or the error of each file, in order
+   * @throws Error if the request fails
+   */
+  static async uploadPhotos(
+    files: File[],
+    summitPhotoCreates: SummitPhotoCreate[] = [],
+  ): Promise<SummitPhotoBatchResult> {
+    const formData = new FormData();
+    files.forEach((file) => formData.append("files", file));
+    formData.append("summit_photo_creates", JSON.stringify(summitPhotoCreates));
+
+    return this.post<SummitPhotoBatchResult>(
+      API_ENDPOINTS.photos.batch,
+      formData,
+    );
+  }
+
+  /**
+   * Delete several photos with their files in one request
+   * @param ids IDs of the photos to delete
+   * @returns The IDs that were deleted and those that were not found
+   * @throws Error if the request fails
+   */
+  static async deletePhotos(ids: number[]): Promise<PhotoBulkDeleteResult> {
+    return this.post<PhotoBulkDeleteResult>(API_ENDPOINTS.photos.delete, {
+      ids,
+    });
+  }
 }
@@ -1,5 +1,11 @@
 import { Peak } from "@/lib/peaks/types";
 
+export interface PhotoDerivative {
+  size: number;
+  format: "webp" | "jpeg";
+  url: string;
+}
+
 export interface SummitPhoto {
   id?: number;
   file_name: string;
@@ -11,6 +17,30 @@ export interface SummitPhoto {
   peak_id?: number;
   distance_to_peak?: number;
   peak?: Peak;
+  processing_status?: "pending" | "ready" | "failed";
+  url?: string;
+  derivatives?: PhotoDerivative[];
+}
+
+export interface SummitPhotoPage {
+  items: SummitPhoto[];
+  next_cursor: string | null;
+}
+
+export interface SummitPhotoBatchItem {
+  index: number;
+  filename: string | null;
+  photo: SummitPhoto | null;
+  error: string | null;
+}
+
+export interface SummitPhotoBatchResult {
+  items: SummitPhotoBatchItem[];
+}
+
+export interface PhotoBulkDeleteResult {
+  deleted: number[];
+  not_found: number[];
 }
 
 export interface SummitPhotoCreate {